@@ -2,9 +2,11 @@
 AI-powered job processing and agent matching using GPT-5-Codex
 """
 
-from typing import Dict, List, Optional, Tuple
-from openai import OpenAI
+import argparse
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
 from loguru import logger
+from sqlalchemy import exists
 
 import sys
 
@@ -12,12 +14,50 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from database import SessionLocal
 from models import Job, AgentMatch
+from events import MATCH_CREATED, publish_event
+from analytics import record_matches
+from ranking import refresh_rank_scores
+from metrics import export_metrics, llm_call
+from tracing import configure_tracing, job_span, start_span
+from profiling import RunProfiler, add_profile_arguments
+
+
+def heuristic_match(title: str, description: Optional[str]) -> Tuple[str, float, str]:
+    """Keyword scoring used when the model's answer can't be used"""
+    # Title and description on separate lines, so no keyword matches across the two
+    text = f"{title}\n{description or ''}".lower()
+
+    # AFC matching criteria
+    afc_keywords = ["audit", "compliance", "internal control", "risk", "regulatory", "financial statement"]
+    afc_score = sum(1 for keyword in afc_keywords if keyword in text)
+
+    # FSP matching criteria
+    fsp_keywords = [
+        "financial analysis",
+        "investment",
+        "portfolio",
+        "market research",
+        "financial modeling",
+        "data analysis",
+    ]
+    fsp_score = sum(1 for keyword in fsp_keywords if keyword in text)
+
+    if afc_score > fsp_score and afc_score > 0:
+        confidence = min(0.9, 0.5 + (afc_score * 0.1))
+        return "AFC", confidence, f"Job matches AFC agent based on {afc_score} audit/compliance keywords"
+    elif fsp_score > 0:
+        confidence = min(0.9, 0.5 + (fsp_score * 0.1))
+        return "FSP", confidence, f"Job matches FSP agent based on {fsp_score} financial analysis keywords"
+    else:
+        return "other", 0.3, "Job requires human judgment and management skills"
 
 
 class AIJobProcessor:
     """AI processor for job matching and analysis using GPT-5-Codex"""
 
     def __init__(self):
+        from openai import OpenAI
+
         self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
         self.model = os.getenv("OPENAI_MODEL", "gpt-5-codex")
 
@@ -85,18 +125,20 @@ Please provide a JSON response with the following structure:
 Focus on identifying tasks that could be automated vs. those requiring human expertise.
 """
 
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert job analyst specializing in identifying automation opportunities in accounting and financial services roles.",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=0.3,
-                max_tokens=1000,
-            )
+            with start_span("llm.analyze", {"llm.model": self.model}), llm_call("analyze") as call:
+                call.response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": "You are an expert job analyst specializing in identifying automation opportunities in accounting and financial services roles.",
+                        },
+                        {"role": "user", "content": prompt},
+                    ],
+                    temperature=0.3,
+                    max_tokens=1000,
+                )
+            response = call.response
 
             # Parse the response
             analysis_text = response.choices[0].message.content
@@ -160,18 +202,20 @@ Consider:
 - Whether the role requires human judgment vs. structured tasks
 """
 
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert at matching accounting and financial services jobs to AI automation agents. Be precise and analytical in your matching.",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=0.2,
-                max_tokens=500,
-            )
+            with start_span("llm.match", {"llm.model": self.model}), llm_call("match") as call:
+                call.response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": "You are an expert at matching accounting and financial services jobs to AI automation agents. Be precise and analytical in your matching.",
+                        },
+                        {"role": "user", "content": prompt},
+                    ],
+                    temperature=0.2,
+                    max_tokens=500,
+                )
+            response = call.response
 
             response_text = response.choices[0].message.content
             logger.info(f"GPT-5-Codex matching response: {response_text}")
@@ -188,32 +232,7 @@ Consider:
 
     def _heuristic_match(self, job: Job, analysis: Dict) -> Tuple[str, float, str]:
         """Fallback heuristic matching when GPT-5-Codex is unavailable"""
-        title_lower = job.title.lower()
-        desc_lower = job.description.lower() if job.description else ""
-
-        # AFC matching criteria
-        afc_keywords = ["audit", "compliance", "internal control", "risk", "regulatory", "financial statement"]
-        afc_score = sum(1 for keyword in afc_keywords if keyword in title_lower or keyword in desc_lower)
-
-        # FSP matching criteria
-        fsp_keywords = [
-            "financial analysis",
-            "investment",
-            "portfolio",
-            "market research",
-            "financial modeling",
-            "data analysis",
-        ]
-        fsp_score = sum(1 for keyword in fsp_keywords if keyword in title_lower or keyword in desc_lower)
-
-        if afc_score > fsp_score and afc_score > 0:
-            confidence = min(0.9, 0.5 + (afc_score * 0.1))
-            return "AFC", confidence, f"Job matches AFC agent based on {afc_score} audit/compliance keywords"
-        elif fsp_score > 0:
-            confidence = min(0.9, 0.5 + (fsp_score * 0.1))
-            return "FSP", confidence, f"Job matches FSP agent based on {fsp_score} financial analysis keywords"
-        else:
-            return "other", 0.3, "Job requires human judgment and management skills"
+        return heuristic_match(job.title, job.description)
 
     def generate_gap_analysis(self, job: Job, matched_agent: str) -> str:
         """Generate gap analysis for jobs that don't match existing agents"""
@@ -237,18 +256,20 @@ Provide insights on:
 Keep the analysis concise and actionable.
 """
 
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an expert in AI agent development for accounting and financial services. Focus on practical automation opportunities.",
-                    },
-                    {"role": "user", "content": prompt},
-                ],
-                temperature=0.4,
-                max_tokens=300,
-            )
+            with start_span("llm.gap_analysis", {"llm.model": self.model}), llm_call("gap_analysis") as call:
+                call.response = self.client.chat.completions.create(
+                    model=self.model,
+                    messages=[
+                        {
+                            "role": "system",
+                            "content": "You are an expert in AI agent development for accounting and financial services. Focus on practical automation opportunities.",
+                        },
+                        {"role": "user", "content": prompt},
+                    ],
+                    temperature=0.4,
+                    max_tokens=300,
+                )
+            response = call.response
 
             return response.choices[0].message.content
 
@@ -271,28 +292,36 @@ Keep the analysis concise and actionable.
                 logger.info(f"Job {job_id} already processed")
                 return True
 
-            logger.info(f"Processing job: {job.title} at {job.company}")
+            with job_span("process_job", job):
+                logger.info(f"Processing job: {job.title} at {job.company}")
 
-            # Analyze job description
-            analysis = self.analyze_job_description(job.description or "")
+                # Analyze job description
+                analysis = self.analyze_job_description(job.description or "")
 
-            # Match to agent
-            matched_agent, confidence, explanation = self.match_job_to_agent(job, analysis)
+                # Match to agent
+                matched_agent, confidence, explanation = self.match_job_to_agent(job, analysis)
 
-            # Generate gap analysis if needed
-            notes = explanation
-            if matched_agent == "other":
-                gap_analysis = self.generate_gap_analysis(job, matched_agent)
-                notes = f"{explanation}\n\nGap Analysis:\n{gap_analysis}"
+                # Generate gap analysis if needed
+                notes = explanation
+                if matched_agent == "other":
+                    gap_analysis = self.generate_gap_analysis(job, matched_agent)
+                    notes = f"{explanation}\n\nGap Analysis:\n{gap_analysis}"
 
-            # Save agent match
-            agent_match = AgentMatch(job_id=job_id, matched_agent=matched_agent, confidence_score=confidence, notes=notes)
+                # Save agent match
+                agent_match = AgentMatch(job_id=job_id, matched_agent=matched_agent, confidence_score=confidence, notes=notes)
 
-            db.add(agent_match)
-            db.commit()
+                db.add(agent_match)
+                db.flush()
+                refresh_rank_scores(db, [job_id])
+                record_matches(db, [agent_match.id])
+                db.commit()
+                publish_event(
+                    MATCH_CREATED,
+                    {"id": agent_match.id, "job_id": job_id, "matched_agent": matched_agent, "confidence_score": confidence},
+                )
 
-            logger.info(f"Successfully processed job {job_id}: {matched_agent} (confidence: {confidence})")
-            return True
+                logger.info(f"Successfully processed job {job_id}: {matched_agent} (confidence: {confidence})")
+                return True
 
         except Exception as e:
             logger.error(f"Error processing job {job_id}: {e}")
@@ -328,13 +357,54 @@ Keep the analysis concise and actionable.
             db.close()
 
 
-def main():
-    """Main function to process all unprocessed jobs"""
-    processor = AIJobProcessor()
+def match_jobs_heuristically(job_ids: Sequence[int]) -> List[int]:
+    """Match the given unmatched jobs with `heuristic_match` alone, for pipelines running without an OpenAI key.
+
+    Returns the ids of the jobs that were matched.
+    """
+    db = SessionLocal()
+    try:
+        jobs = db.query(Job).filter(Job.id.in_(job_ids), ~exists().where(AgentMatch.job_id == Job.id)).all()
+        matches = []
+        for job in jobs:
+            with job_span("process_job", job, {"matcher": "heuristic"}):
+                agent, confidence, notes = heuristic_match(job.title, job.description)
+            matches.append(AgentMatch(job_id=job.id, matched_agent=agent, confidence_score=confidence, notes=notes))
+        db.add_all(matches)
+        db.flush()
+        refresh_rank_scores(db, [match.job_id for match in matches])
+        record_matches(db, [match.id for match in matches])
+        created = [
+            {"id": m.id, "job_id": m.job_id, "matched_agent": m.matched_agent, "confidence_score": m.confidence_score}
+            for m in matches
+        ]
+        db.commit()
+    finally:
+        db.close()
 
-    logger.info("Starting AI job processing...")
-    processed_count = processor.process_all_unprocessed_jobs()
-    logger.info(f"AI processing completed. Processed {processed_count} jobs.")
+    for event in created:
+        publish_event(MATCH_CREATED, event)
+    return [event["job_id"] for event in created]
+
+
+def main(argv=None):
+    """Main function to process all unprocessed jobs"""
+    parser = argparse.ArgumentParser(description="Match unprocessed jobs to agents")
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+
+    configure_tracing("ai_processor")
+    try:
+        with RunProfiler("ai_processor", args.profile, top=args.profile_top) as profiler:
+            with profiler.stage("setup"):
+                processor = AIJobProcessor()
+
+            logger.info("Starting AI job processing...")
+            with profiler.stage("process"):
+                processed_count = processor.process_all_unprocessed_jobs()
+        logger.info(f"AI processing completed. Processed {processed_count} jobs.")
+    finally:
+        export_metrics("ai_processor")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,439 @@
+"""
+Market analytics rollups
+
+Answers questions like "average advertised salary for senior auditors in Texas
+by week" or "share of AFC matches per month" from pre-aggregated weekly rollup
+tables (see `JobRollup`, `CompanyRollup` and `MatchRollup` in models.py)
+instead of scanning `jobs`. Writers add new rows to the rollups in the same
+transaction that inserts them (`record_jobs`, `record_matches`);
+`rebuild_rollups` recomputes everything from the source tables with pandas.
+
+Imports the models as a top-level module, like database.py, and only builds
+Core statements from their tables, so it works the same whether it is loaded
+as `backend.analytics` or, from the scripts that put `backend/` on sys.path,
+as `analytics`.
+"""
+
+import os
+import sys
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from loguru import logger
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.orm import Session
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from models import AgentMatch, CompanyRollup, Job, JobRollup, MatchRollup
+from normalization import (
+    SENIORITY_LEVELS,
+    TITLE_FAMILIES,
+    UNKNOWN,
+    backfill_job_keys,
+    location_state,
+    normalize_company,
+    seniority,
+    title_family,
+)
+
+jobs_table = Job.__table__
+agent_matches_table = AgentMatch.__table__
+job_rollups_table = JobRollup.__table__
+company_rollups_table = CompanyRollup.__table__
+match_rollups_table = MatchRollup.__table__
+
+JOB_DIMENSIONS = ("title_family", "seniority", "state", "source")
+MATCH_DIMENSIONS = JOB_DIMENSIONS + ("matched_agent",)
+JOB_MEASURES = ("job_count", "salary_count", "salary_sum")
+MATCH_MEASURES = ("match_count", "confidence_sum", "high_confidence_count")
+INTERVALS = ("week", "month")
+HIGH_CONFIDENCE = 0.8
+
+# Keeps IN lists well under SQLite's bound parameter limit
+_CHUNK_SIZE = 500
+
+
+def week_start(value: Union[date, datetime]) -> date:
+    """Monday of the week containing `value`; rollups are keyed by it"""
+    day = value.date() if isinstance(value, datetime) else value
+    return day - timedelta(days=day.weekday())
+
+
+def salary_midpoint(salary_min: Optional[float], salary_max: Optional[float]) -> Optional[float]:
+    known = [salary for salary in (salary_min, salary_max) if salary]
+    return sum(known) / len(known) if known else None
+
+
+def job_dimensions(title: Optional[str], location: Optional[str], source: Optional[str]) -> Tuple[str, str, str, str]:
+    """Rollup key of a posting from its free text, in JOB_DIMENSIONS order"""
+    return title_family(title), seniority(title), location_state(location), source or UNKNOWN
+
+
+# The normalized key columns rollup keys are read from
+KEY_COLUMNS = ("title_family", "seniority", "state", "is_remote")
+
+
+def stored_dimensions(row) -> Tuple[str, str, str, str]:
+    """Rollup key from a row with the job's KEY_COLUMNS, title, location and source"""
+    if row.title_family is None:
+        # Inserted without the model defaults and not backfilled yet
+        return job_dimensions(row.title, row.location, row.source)
+    state = "remote" if row.is_remote else row.state or UNKNOWN
+    return TITLE_FAMILIES[row.title_family], SENIORITY_LEVELS[row.seniority], state, row.source or UNKNOWN
+
+
+def _connection(db):
+    """The Connection behind a Session, or `db` itself when it already is one"""
+    return db.connection() if isinstance(db, Session) else db
+
+
+def _chunks(values: List, size: int = _CHUNK_SIZE) -> Iterable[List]:
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def _upsert_add(db, table, keys: Sequence[str], rows: List[dict]) -> None:
+    """Insert rollup rows, adding their measures to any existing row with the same key"""
+    if not rows:
+        return
+    if _connection(db).dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+    statement = dialect_insert(table)
+    # Descriptive columns such as the company's display name keep their first value
+    measures = [name for name in rows[0] if name not in keys and name != "company"]
+    statement = statement.on_conflict_do_update(
+        index_elements=list(keys), set_={name: table.c[name] + statement.excluded[name] for name in measures}
+    )
+    db.execute(statement, rows)
+
+
+def record_jobs(db, job_ids: Iterable[int]) -> int:
+    """Add newly inserted jobs to the rollups.
+
+    Call it once per job, in the transaction that inserts it; `db` is a
+    Session or Connection. Returns the number of jobs recorded.
+    """
+    job_ids = sorted(set(job_ids))
+    job_groups: Dict[tuple, list] = defaultdict(lambda: [0, 0, 0.0])
+    company_groups: Dict[tuple, list] = {}
+    names = ("title", "company", "location", "source", "salary_min", "salary_max", "date_posted") + KEY_COLUMNS
+    columns = [jobs_table.c[name] for name in names]
+    recorded = 0
+    for chunk in _chunks(job_ids):
+        for job in db.execute(select(*columns).where(jobs_table.c.id.in_(chunk))):
+            week = week_start(job.date_posted)
+            salary = salary_midpoint(job.salary_min, job.salary_max)
+            measures = [1, int(salary is not None), salary or 0.0]
+
+            group = job_groups[(week, *stored_dimensions(job))]
+            company = company_groups.setdefault((week, normalize_company(job.company) or UNKNOWN), [job.company, 0, 0, 0.0])
+            for position, value in enumerate(measures):
+                group[position] += value
+                company[position + 1] += value
+            recorded += 1
+
+    _upsert_add(
+        db,
+        job_rollups_table,
+        ("week",) + JOB_DIMENSIONS,
+        [dict(zip(("week",) + JOB_DIMENSIONS + JOB_MEASURES, key + tuple(values))) for key, values in job_groups.items()],
+    )
+    _upsert_add(
+        db,
+        company_rollups_table,
+        ("week", "company_key"),
+        [
+            dict(zip(("week", "company_key", "company") + JOB_MEASURES, key + tuple(values)))
+            for key, values in company_groups.items()
+        ],
+    )
+    return recorded
+
+
+def record_matches(db, match_ids: Iterable[int]) -> int:
+    """Add newly inserted agent matches to the rollups; see `record_jobs`"""
+    match_ids = sorted(set(match_ids))
+    groups: Dict[tuple, list] = defaultdict(lambda: [0, 0.0, 0])
+    recorded = 0
+    for chunk in _chunks(match_ids):
+        rows = db.execute(
+            select(
+                agent_matches_table.c.matched_agent,
+                agent_matches_table.c.confidence_score,
+                *[jobs_table.c[name] for name in ("title", "location", "source", "date_posted") + KEY_COLUMNS],
+            )
+            .join(jobs_table, jobs_table.c.id == agent_matches_table.c.job_id)
+            .where(agent_matches_table.c.id.in_(chunk))
+        )
+        for match in rows:
+            key = (
+                week_start(match.date_posted),
+                *stored_dimensions(match),
+                match.matched_agent,
+            )
+            group = groups[key]
+            group[0] += 1
+            group[1] += match.confidence_score
+            group[2] += int(match.confidence_score >= HIGH_CONFIDENCE)
+            recorded += 1
+
+    _upsert_add(
+        db,
+        match_rollups_table,
+        ("week",) + MATCH_DIMENSIONS,
+        [dict(zip(("week",) + MATCH_DIMENSIONS + MATCH_MEASURES, key + tuple(values))) for key, values in groups.items()],
+    )
+    return recorded
+
+
+def rebuild_rollups(db, chunk_size: int = 100_000) -> Dict[str, int]:
+    """Recompute every rollup from `jobs` and `agent_matches`.
+
+    Uses pandas when it is installed, otherwise replays the rows through
+    `record_jobs`/`record_matches`. Returns the number of jobs and matches read.
+    """
+    for table in (job_rollups_table, company_rollups_table, match_rollups_table):
+        db.execute(delete(table))
+    try:
+        import pandas  # noqa: F401
+    except ImportError:
+        return _replay_rollups(db, chunk_size)
+    return _rebuild_with_pandas(db, chunk_size)
+
+
+def _replay_rollups(db, chunk_size: int) -> Dict[str, int]:
+    counts = {}
+    for name, table, record in (("jobs", jobs_table, record_jobs), ("matches", agent_matches_table, record_matches)):
+        counts[name] = last_id = 0
+        while True:
+            ids = [
+                row[0]
+                for row in db.execute(select(table.c.id).where(table.c.id > last_id).order_by(table.c.id).limit(chunk_size))
+            ]
+            if not ids:
+                break
+            counts[name] += record(db, ids)
+            last_id = ids[-1]
+    return counts
+
+
+def _rebuild_with_pandas(db, chunk_size: int) -> Dict[str, int]:
+    import numpy as np
+    import pandas as pd
+
+    # Every row needs its key columns before they can be read in bulk
+    backfill_job_keys(db)
+    connection = _connection(db)
+
+    def map_unique(series, function):
+        # Normalize each distinct value once rather than once per row
+        series = series.fillna("")
+        return series.map({value: function(value) for value in series.unique()})
+
+    families = np.asarray(TITLE_FAMILIES, dtype=object)
+    levels = np.asarray(SENIORITY_LEVELS, dtype=object)
+
+    def add_dimensions(frame):
+        dates = pd.to_datetime(frame["date_posted"])
+        frame["week"] = (dates.dt.normalize() - pd.to_timedelta(dates.dt.weekday, unit="D")).dt.date
+        # Key codes index straight into the name tables
+        frame["title_family"] = families[frame["title_family"].to_numpy(dtype="int64")]
+        frame["seniority"] = levels[frame["seniority"].to_numpy(dtype="int64")]
+        remote = frame["is_remote"].astype("boolean").fillna(False).to_numpy(dtype=bool)
+        frame["state"] = np.where(remote, "remote", frame["state"].fillna(UNKNOWN).to_numpy(dtype=object))
+        frame["source"] = frame["source"].fillna(UNKNOWN)
+        return frame
+
+    job_parts, company_parts, match_parts = [], [], []
+    job_count = match_count = 0
+    jobs_statement = select(
+        *[jobs_table.c[name] for name in ("company", "source", "salary_min", "salary_max", "date_posted") + KEY_COLUMNS]
+    )
+    for frame in pd.read_sql(jobs_statement, connection, chunksize=chunk_size):
+        frame = add_dimensions(frame)
+        salaries = frame[["salary_min", "salary_max"]]
+        frame["salary"] = salaries.where(salaries > 0).mean(axis=1)
+        frame["company_key"] = map_unique(frame["company"], normalize_company).replace("", UNKNOWN)
+        measures = {
+            "job_count": ("salary", "size"),
+            "salary_count": ("salary", "count"),
+            "salary_sum": ("salary", "sum"),
+        }
+        job_parts.append(frame.groupby(["week", *JOB_DIMENSIONS]).agg(**measures))
+        company_parts.append(frame.groupby(["week", "company_key"]).agg(company=("company", "first"), **measures))
+        job_count += len(frame)
+
+    matches_statement = select(
+        agent_matches_table.c.matched_agent,
+        agent_matches_table.c.confidence_score,
+        *[jobs_table.c[name] for name in ("source", "date_posted") + KEY_COLUMNS],
+    ).join(jobs_table, jobs_table.c.id == agent_matches_table.c.job_id)
+    for frame in pd.read_sql(matches_statement, connection, chunksize=chunk_size):
+        frame = add_dimensions(frame)
+        frame["high_confidence"] = (frame["confidence_score"] >= HIGH_CONFIDENCE).astype(int)
+        match_parts.append(
+            frame.groupby(["week", *MATCH_DIMENSIONS]).agg(
+                match_count=("confidence_score", "size"),
+                confidence_sum=("confidence_score", "sum"),
+                high_confidence_count=("high_confidence", "sum"),
+            )
+        )
+        match_count += len(frame)
+
+    # Chunks can share keys, so combine their partial aggregates
+    for table, parts, aggregations in (
+        (job_rollups_table, job_parts, "sum"),
+        (company_rollups_table, company_parts, {"company": "first", **{name: "sum" for name in JOB_MEASURES}}),
+        (match_rollups_table, match_parts, "sum"),
+    ):
+        if parts:
+            combined = pd.concat(parts).groupby(level=list(range(parts[0].index.nlevels))).agg(aggregations)
+            combined = combined.reset_index()
+            # Column lists convert to Python scalars much faster than DataFrame.to_dict
+            columns = list(combined.columns)
+            db.execute(insert(table), [dict(zip(columns, row)) for row in zip(*(combined[name].tolist() for name in columns))])
+
+    return {"jobs": job_count, "matches": match_count}
+
+
+def ensure_rollups(db) -> None:
+    """Build the rollups for an existing database whose rollup tables are still empty"""
+    if db.execute(select(job_rollups_table.c.id).limit(1)).first() is not None:
+        return
+    if db.execute(select(jobs_table.c.id).limit(1)).first() is None:
+        return
+    counts = rebuild_rollups(db)
+    logger.info(f"Built analytics rollups from {counts['jobs']} jobs and {counts['matches']} agent matches")
+
+
+def _period(week: date, interval: str) -> date:
+    # Weeks count towards the month they start in
+    return week.replace(day=1) if interval == "month" else week
+
+
+def _rollup_report(
+    db,
+    table,
+    dimensions: Sequence[str],
+    measures: Sequence[str],
+    group_by: Sequence[str],
+    interval: str,
+    since: Optional[date],
+    until: Optional[date],
+    filters: Dict[str, Optional[str]],
+) -> List[dict]:
+    """Sum `measures` over the rollup rows matching the filters, per `group_by` key"""
+    unknown = [name for name in group_by if name != "period" and name not in dimensions]
+    if unknown:
+        raise ValueError(f"Cannot group by {', '.join(unknown)}; expected period or one of {', '.join(dimensions)}")
+    if interval not in INTERVALS:
+        raise ValueError(f"Unknown interval '{interval}'; expected one of {', '.join(INTERVALS)}")
+
+    keys = ["period"] if "period" in group_by else []
+    keys += [name for name in dimensions if name in group_by]
+    group_columns = [table.c.week if name == "period" else table.c[name] for name in keys]
+    statement = select(*group_columns, *[func.sum(table.c[name]).label(name) for name in measures])
+    if since:
+        statement = statement.where(table.c.week >= week_start(since))
+    if until:
+        statement = statement.where(table.c.week <= until)
+    for name, value in filters.items():
+        if value is None:
+            continue
+        if name not in dimensions:
+            raise ValueError(f"Cannot filter by {name}")
+        if name == "state" and len(value) == 2:
+            value = value.upper()
+        statement = statement.where(table.c[name] == value)
+    if group_columns:
+        statement = statement.group_by(*group_columns)
+
+    groups: Dict[tuple, dict] = {}
+    for row in db.execute(statement):
+        values = row._mapping
+        if values[measures[0]] is None:
+            # An ungrouped sum over no rows
+            continue
+        group = {name: _period(values["week"], interval) if name == "period" else values[name] for name in keys}
+        totals = groups.setdefault(tuple(group.values()), {**group, **{name: 0 for name in measures}})
+        for name in measures:
+            totals[name] += values[name]
+    return [groups[key] for key in sorted(groups)]
+
+
+def job_market_report(
+    db,
+    group_by: Sequence[str] = ("period",),
+    interval: str = "week",
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    **filters: Optional[str],
+) -> List[dict]:
+    """Posting counts and average advertised salary per group, e.g. senior auditors in TX by week"""
+    rows = _rollup_report(db, job_rollups_table, JOB_DIMENSIONS, JOB_MEASURES, group_by, interval, since, until, filters)
+    for row in rows:
+        salary_sum = row.pop("salary_sum")
+        row["avg_salary"] = round(salary_sum / row["salary_count"], 2) if row["salary_count"] else None
+    return rows
+
+
+def match_report(
+    db,
+    group_by: Sequence[str] = ("period", "matched_agent"),
+    interval: str = "month",
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    **filters: Optional[str],
+) -> List[dict]:
+    """Match counts, average confidence and each group's share of the matches in its period"""
+    rows = _rollup_report(db, match_rollups_table, MATCH_DIMENSIONS, MATCH_MEASURES, group_by, interval, since, until, filters)
+    period_totals: Dict[Optional[date], int] = defaultdict(int)
+    for row in rows:
+        period_totals[row.get("period")] += row["match_count"]
+    for row in rows:
+        confidence_sum = row.pop("confidence_sum")
+        row["avg_confidence"] = round(confidence_sum / row["match_count"], 4)
+        row["share"] = round(row["match_count"] / period_totals[row.get("period")], 4)
+    return rows
+
+
+def company_report(db, since: Optional[date] = None, until: Optional[date] = None, limit: int = 20) -> List[dict]:
+    """Companies with the most postings"""
+    table = company_rollups_table
+    job_count = func.sum(table.c.job_count).label("job_count")
+    statement = select(
+        table.c.company_key,
+        func.max(table.c.company).label("company"),
+        job_count,
+        func.sum(table.c.salary_count).label("salary_count"),
+        func.sum(table.c.salary_sum).label("salary_sum"),
+    )
+    if since:
+        statement = statement.where(table.c.week >= week_start(since))
+    if until:
+        statement = statement.where(table.c.week <= until)
+    statement = statement.group_by(table.c.company_key).order_by(job_count.desc(), table.c.company_key).limit(limit)
+
+    return [
+        {
+            "company": row.company,
+            "company_key": row.company_key,
+            "job_count": row.job_count,
+            "salary_count": row.salary_count,
+            "avg_salary": round(row.salary_sum / row.salary_count, 2) if row.salary_count else None,
+        }
+        for row in db.execute(statement)
+    ]
+
+
+if __name__ == "__main__":
+    from database import engine
+
+    with engine.begin() as conn:
+        counts = rebuild_rollups(conn)
+    print(f"Rebuilt analytics rollups from {counts['jobs']} jobs and {counts['matches']} agent matches")
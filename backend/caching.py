@@ -0,0 +1,101 @@
+"""
+HTTP conditional request support for read endpoints
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Dict, Optional, Sequence, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy.orm import Session
+
+from .metrics import record_cache
+from .models import TableVersion
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def get_table_versions(db: Session, tables: Sequence[str]) -> Dict[str, Tuple[int, datetime]]:
+    """Read the change counters for `tables` in one primary-key lookup"""
+    rows = (
+        db.query(TableVersion.table_name, TableVersion.version, TableVersion.updated_at)
+        .filter(TableVersion.table_name.in_(tables))
+        .all()
+    )
+    return {name: (version, updated_at) for name, version, updated_at in rows}
+
+
+def make_etag(request: Request, versions: Dict[str, Tuple[int, datetime]]) -> str:
+    """Build a weak ETag from the request URL and the versions of the tables it reads.
+
+    The ETag is weak because the same representation may be sent gzip or
+    brotli encoded.
+    """
+    key = [request.url.path, str(request.url.query)]
+    key += [f"{name}:{versions[name][0]}" for name in sorted(versions)]
+    digest = hashlib.sha1("|".join(key).encode("utf-8")).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison: W/"x" and "x" refer to the same representation
+    opaque = etag.removeprefix("W/")
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return opaque in candidates
+
+
+def _not_modified_since(if_modified_since: str, last_modified: datetime) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return last_modified <= since
+
+
+def conditional_get(request: Request, response: Response, db: Session, tables: Sequence[str]) -> Optional[Response]:
+    """Answer a conditional GET from the change counters of `tables`.
+
+    Returns a 304 response when the client's cached copy is still current.
+    Otherwise sets ETag and Last-Modified on `response` and returns None so the
+    endpoint runs its queries as usual.
+
+    Last-Modified has one-second resolution (and SQLite's CURRENT_TIMESTAMP
+    only records whole seconds), so a write later in the same second would not
+    move it. While the last change is less than a second old, Last-Modified is
+    left out and If-Modified-Since is not answered with a 304; the ETag, which
+    follows the version counters, still revalidates.
+    """
+    versions = get_table_versions(db, tables)
+    if len(versions) < len(tables):
+        # Change tracking is not installed for every table; never risk a stale 304
+        return None
+
+    etag = make_etag(request, versions)
+    last_modified = max(updated_at for _, updated_at in versions.values()).replace(tzinfo=timezone.utc, microsecond=0)
+    settled = last_modified < _utcnow().replace(microsecond=0)
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if settled:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_none_match is not None:
+        not_modified = _etag_matches(if_none_match, etag)
+    elif if_modified_since is not None and settled:
+        not_modified = _not_modified_since(if_modified_since, last_modified)
+    else:
+        not_modified = False
+
+    record_cache("http", hits=int(not_modified), misses=int(not not_modified))
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return None
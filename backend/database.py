@@ -4,13 +4,17 @@ Database connection and session management
 
 import os
 import sys
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
 
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from models import Base
+from normalization import backfill_job_keys
+from ranking import backfill_rank_scores
+from analytics import ensure_rollups, record_jobs, record_matches
+from metrics import instrument_engine
+from query_stats import install_query_stats
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -22,19 +26,163 @@ SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY")
 
 # For development, we'll use SQLite for now
 # TODO: Set up proper Supabase connection with database password
-DATABASE_URL = "sqlite:///./backend/auditor_jobs.db"
+DATABASE_URL = os.getenv("DATABASE_URL") or "sqlite:///./backend/auditor_jobs.db"
+# A connection per thread from the regular pool: a single shared SQLite
+# connection is not safe once background workers query concurrently.
 engine = create_engine(
     DATABASE_URL,
-    connect_args={"check_same_thread": False},
-    poolclass=StaticPool,
+    connect_args={"check_same_thread": False, "timeout": 30} if DATABASE_URL.startswith("sqlite") else {},
 )
+instrument_engine(engine)
+install_query_stats(engine)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+# Full-text search index over job postings. SQLite uses an external-content FTS5
+# table kept in sync by triggers; Postgres uses a generated tsvector column with
+# a GIN index, which the database maintains on every write.
+SQLITE_SEARCH_DDL = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(
+        title, company, description,
+        content='jobs', content_rowid='id', tokenize='porter unicode61'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS jobs_fts_ai AFTER INSERT ON jobs BEGIN
+        INSERT INTO jobs_fts(rowid, title, company, description)
+        VALUES (new.id, new.title, new.company, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS jobs_fts_ad AFTER DELETE ON jobs BEGIN
+        INSERT INTO jobs_fts(jobs_fts, rowid, title, company, description)
+        VALUES ('delete', old.id, old.title, old.company, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS jobs_fts_au AFTER UPDATE OF title, company, description ON jobs BEGIN
+        INSERT INTO jobs_fts(jobs_fts, rowid, title, company, description)
+        VALUES ('delete', old.id, old.title, old.company, old.description);
+        INSERT INTO jobs_fts(rowid, title, company, description)
+        VALUES (new.id, new.title, new.company, new.description);
+    END
+    """,
+]
+
+POSTGRES_SEARCH_DDL = [
+    """
+    ALTER TABLE jobs ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+        setweight(to_tsvector('english', coalesce(company, '')), 'B') ||
+        setweight(to_tsvector('english', coalesce(description, '')), 'C')
+    ) STORED
+    """,
+    "CREATE INDEX IF NOT EXISTS ix_jobs_search_vector ON jobs USING GIN (search_vector)",
+]
+
+
+def create_search_index(bind=engine):
+    """Create the full-text search index for jobs if it does not exist yet"""
+    with bind.begin() as conn:
+        if bind.dialect.name == "sqlite":
+            is_new = "jobs_fts" not in inspect(conn).get_table_names()
+            for statement in SQLITE_SEARCH_DDL:
+                conn.execute(text(statement))
+            if is_new:
+                # Index rows that were inserted before the triggers existed
+                conn.execute(text("INSERT INTO jobs_fts(jobs_fts) VALUES ('rebuild')"))
+        elif bind.dialect.name == "postgresql":
+            for statement in POSTGRES_SEARCH_DDL:
+                conn.execute(text(statement))
+
+
+# Change tracking for HTTP caching. Every write to a tracked table bumps its row
+# in `table_versions`, so readers can tell whether anything changed with a single
+# primary-key lookup instead of re-running their queries.
+VERSIONED_TABLES = ["jobs", "agent_matches", "outreach", "suppressions"]
+
+SQLITE_VERSION_TRIGGER = """
+    CREATE TRIGGER IF NOT EXISTS {table}_version_{event} AFTER {event} ON {table} BEGIN
+        UPDATE table_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP
+        WHERE table_name = '{table}';
+    END
+"""
+
+POSTGRES_VERSION_FUNCTION = """
+    CREATE OR REPLACE FUNCTION bump_table_version() RETURNS trigger AS $$
+    BEGIN
+        UPDATE table_versions SET version = version + 1, updated_at = now() AT TIME ZONE 'utc'
+        WHERE table_name = TG_TABLE_NAME;
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+
+POSTGRES_VERSION_TRIGGER = """
+    CREATE OR REPLACE TRIGGER {table}_version AFTER INSERT OR UPDATE OR DELETE ON {table}
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_table_version()
+"""
+
+
+def create_change_tracking(bind=engine):
+    """Seed `table_versions` and install the triggers that keep it current"""
+    with bind.begin() as conn:
+        for table in VERSIONED_TABLES:
+            exists = conn.execute(text("SELECT 1 FROM table_versions WHERE table_name = :t"), {"t": table}).first()
+            if not exists:
+                conn.execute(
+                    text("INSERT INTO table_versions (table_name, version, updated_at) VALUES (:t, 0, CURRENT_TIMESTAMP)"),
+                    {"t": table},
+                )
+
+        if bind.dialect.name == "sqlite":
+            for table in VERSIONED_TABLES:
+                for event in ("INSERT", "UPDATE", "DELETE"):
+                    conn.execute(text(SQLITE_VERSION_TRIGGER.format(table=table, event=event)))
+        elif bind.dialect.name == "postgresql":
+            conn.execute(text(POSTGRES_VERSION_FUNCTION))
+            for table in VERSIONED_TABLES:
+                conn.execute(text(POSTGRES_VERSION_TRIGGER.format(table=table)))
+
+
+def migrate_schema(bind=engine):
+    """Add columns and indexes that were added to the models after a table was created.
+
+    `create_all` only creates missing tables, so this keeps existing databases
+    usable as the models grow. New non-null columns need a server default.
+    """
+    inspector = inspect(bind)
+    with bind.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                ddl = f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column.type.compile(bind.dialect)}"
+                if column.server_default is not None:
+                    default = column.server_default.arg
+                    ddl += f" DEFAULT {default.text if hasattr(default, 'text') else repr(str(default))}"
+                conn.execute(text(ddl))
+
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+
 def create_tables():
     """Create all database tables"""
     Base.metadata.create_all(bind=engine)
+    migrate_schema()
+    create_search_index()
+    create_change_tracking()
+    with engine.begin() as conn:
+        backfill_job_keys(conn)
+        backfill_rank_scores(conn)
+        ensure_rollups(conn)
 
 
 def get_db():
@@ -126,6 +274,10 @@ def init_database():
                 )
                 db.add(match)
 
+        db.flush()
+        backfill_rank_scores(db)
+        record_jobs(db, [job.id for job in jobs])
+        record_matches(db, [match.id for match in db.query(AgentMatch.id)])
         db.commit()
 
         # Add sample outreach emails
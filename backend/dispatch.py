@@ -0,0 +1,180 @@
+"""
+Background dispatch of approved outreach emails
+"""
+
+import asyncio
+import os
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from loguru import logger
+from sqlalchemy import func
+
+from .models import Outreach
+from .database import SessionLocal
+from .email_service import EmailService
+from .events import OUTREACH_STATUS, publish_event
+from .locks import default_owner
+
+INTERRUPTED_SEND_ERROR = "Interrupted while sending; not retried automatically to avoid a duplicate email"
+
+
+class OutreachDispatcher:
+    """Sends queued outreach from worker tasks on the API's event loop.
+
+    Outreach moves approved -> queued when it is enqueued, and each worker
+    claims one message at a time (queued -> sending -> sent/failed) through
+    `EmailService.send_outreach`. The SMTP exchange runs in a thread so the
+    event loop is never blocked, and `concurrency` bounds how many messages
+    are in flight. Queue membership lives in the database, so queued rows are
+    picked up again after a restart.
+
+    Each claim records this dispatcher's `owner` and the time. A message still
+    in `sending` after `claim_timeout` seconds was abandoned by a crashed
+    process and is failed for manual review; younger claims may belong to
+    another API worker mid-send and are left alone. Abandoned claims are
+    looked for at start and then every `claim_timeout` seconds.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = 4,
+        max_attempts: int = 3,
+        retry_delay: float = 60.0,
+        claim_timeout: float = 600.0,
+        owner: Optional[str] = None,
+    ):
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.claim_timeout = claim_timeout
+        self.owner = owner or default_owner()
+        self.email_service = EmailService()
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def running(self) -> bool:
+        return self._loop is not None and not self._loop.is_closed() and any(not w.done() for w in self._workers)
+
+    async def start(self) -> None:
+        """Recover abandoned claims and start the worker tasks"""
+        if self.running:
+            return
+
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self.recover_interrupted()
+        for outreach_id in self._queued_ids():
+            self._queue.put_nowait(outreach_id)
+
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        self._workers.append(asyncio.create_task(self._recover_periodically()))
+        logger.info(f"Outreach dispatcher started with {self.concurrency} workers")
+
+    async def stop(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    async def join(self) -> None:
+        """Wait until everything currently queued has been attempted"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    def recover_interrupted(self) -> int:
+        """Fail messages whose `sending` claim is older than `claim_timeout` instead of risking a second send"""
+        cutoff = datetime.utcnow() - timedelta(seconds=self.claim_timeout)
+        # Claims made before claimed_at was recorded fall back to updated_at, which the claim also set
+        abandoned = (Outreach.status == "sending", func.coalesce(Outreach.claimed_at, Outreach.updated_at) < cutoff)
+        db = SessionLocal()
+        try:
+            interrupted = db.query(Outreach.id, Outreach.job_id, Outreach.claimed_by).filter(*abandoned).all()
+            db.query(Outreach).filter(Outreach.id.in_([row.id for row in interrupted]), *abandoned).update(
+                {Outreach.status: "failed", Outreach.last_error: INTERRUPTED_SEND_ERROR}, synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+
+        for outreach_id, job_id, claimed_by in interrupted:
+            logger.warning(
+                f"Outreach {outreach_id} was interrupted mid-send by {claimed_by or 'an unknown sender'}; "
+                "marked failed for manual review"
+            )
+            publish_event(OUTREACH_STATUS, {"id": outreach_id, "job_id": job_id, "status": "failed"})
+        return len(interrupted)
+
+    async def _recover_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.claim_timeout)
+            try:
+                await asyncio.to_thread(self.recover_interrupted)
+            except Exception as e:
+                logger.error(f"Dispatcher could not recover interrupted sends: {e}")
+
+    def _queued_ids(self) -> List[int]:
+        db = SessionLocal()
+        try:
+            return [row[0] for row in db.query(Outreach.id).filter(Outreach.status == "queued").order_by(Outreach.id)]
+        finally:
+            db.close()
+
+    def enqueue_approved(self, limit: Optional[int] = None) -> List[int]:
+        """Move approved outreach to `queued` and hand it to the workers"""
+        db = SessionLocal()
+        try:
+            query = db.query(Outreach.id).filter(Outreach.status == "approved").order_by(Outreach.id)
+            if limit:
+                query = query.limit(limit)
+            candidate_ids = [row[0] for row in query]
+            if not candidate_ids:
+                return []
+
+            # Only rows still approved are moved, so a concurrent enqueue cannot queue them twice
+            db.query(Outreach).filter(Outreach.id.in_(candidate_ids), Outreach.status == "approved").update(
+                {Outreach.status: "queued", Outreach.last_error: None, Outreach.updated_at: datetime.utcnow()},
+                synchronize_session=False,
+            )
+            db.commit()
+            queued = [
+                row[0] for row in db.query(Outreach.id).filter(Outreach.id.in_(candidate_ids), Outreach.status == "queued")
+            ]
+        finally:
+            db.close()
+
+        for outreach_id in queued:
+            self._queue.put_nowait(outreach_id)
+            publish_event(OUTREACH_STATUS, {"id": outreach_id, "status": "queued"})
+        logger.info(f"Queued {len(queued)} outreach emails for sending")
+        return queued
+
+    async def _worker(self) -> None:
+        while True:
+            outreach_id = await self._queue.get()
+            try:
+                result = await asyncio.to_thread(
+                    self.email_service.send_outreach,
+                    outreach_id,
+                    from_statuses=("queued",),
+                    retry_status="queued",
+                    max_attempts=self.max_attempts,
+                    claimed_by=self.owner,
+                )
+                if result.status == "retry":
+                    # Back off linearly with the number of attempts so far
+                    self._loop.call_later(self.retry_delay * result.attempts, self._queue.put_nowait, outreach_id)
+            except Exception as e:
+                logger.error(f"Dispatcher error for outreach {outreach_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+
+dispatcher = OutreachDispatcher(
+    concurrency=int(os.getenv("OUTREACH_SEND_CONCURRENCY", "4")),
+    max_attempts=int(os.getenv("OUTREACH_SEND_MAX_ATTEMPTS", "3")),
+    retry_delay=float(os.getenv("OUTREACH_SEND_RETRY_DELAY", "60")),
+    claim_timeout=float(os.getenv("OUTREACH_SEND_CLAIM_TIMEOUT", "600")),
+)
@@ -2,19 +2,46 @@
 Email service for outreach generation and sending
 """
 
+import argparse
 import os
 import smtplib
+import time
+from dataclasses import dataclass
+from datetime import datetime
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Optional, List
+from email.utils import make_msgid
+from typing import Optional, List, Sequence, Tuple
 from dotenv import load_dotenv
 from loguru import logger
+from sqlalchemy import and_, exists, func, insert, select
 
 from .models import Job, AgentMatch, Outreach
 from .database import SessionLocal
+from .events import OUTREACH_CREATED, OUTREACH_STATUS, publish_event
+from .metrics import FAILURES, OUTREACH_SEND_SECONDS, RETRIES
+from .smtp_pool import SMTPConnectionPool, get_smtp_pool
+from .personalization import OutreachPersonalizer
+from .suppression import SuppressionIndex, company_cooldown, suppression_index
+from .profiling import RunProfiler, add_profile_arguments
+from .tracing import configure_tracing, job_span
+from .templating import RenderedEmail, extract_key_tasks, outreach_templates
 
 load_dotenv()
 
+# SMTP failures that will not succeed on retry
+PERMANENT_SEND_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPNotSupportedError)
+
+
+@dataclass
+class SendResult:
+    """Outcome of one attempt to send an outreach email"""
+
+    outreach_id: int
+    status: str  # sent, retry, failed, suppressed, or skipped when the outreach could not be claimed
+    attempts: int = 0
+    error: Optional[str] = None
+
 
 class EmailService:
     def __init__(self):
@@ -24,95 +51,54 @@ class EmailService:
         self.email_password = os.getenv("EMAIL_PASSWORD")
         self.from_email = os.getenv("FROM_EMAIL")
         self.from_name = os.getenv("FROM_NAME", "Tellen AI Workforce")
+        self.smtp_starttls = os.getenv("SMTP_STARTTLS", "true").lower() == "true"
+        self.smtp_pool_size = int(os.getenv("SMTP_POOL_SIZE", "4"))
+        smtp_rate_limit = os.getenv("SMTP_RATE_LIMIT")
+        self.smtp_rate_limit = float(smtp_rate_limit) if smtp_rate_limit else None
+
+    def get_smtp_pool(self) -> SMTPConnectionPool:
+        """Shared connection pool for this service's SMTP server and account"""
+        return get_smtp_pool(
+            self.smtp_server,
+            self.smtp_port,
+            self.email_username,
+            self.email_password,
+            use_starttls=self.smtp_starttls,
+            max_connections=self.smtp_pool_size,
+            rate_limit=self.smtp_rate_limit,
+        )
+
+    def render_outreach_email(self, job: Job, agent_match: AgentMatch, personalization: Optional[str] = None) -> RenderedEmail:
+        """Render the subject and body of the outreach email for a job"""
+        return outreach_templates.render(job, agent_match.matched_agent, self.from_name, personalization)
 
     def generate_outreach_email(self, job: Job, agent_match: AgentMatch) -> str:
         """Generate personalized outreach email for a job"""
-
-        # Calculate Tellen service cost (20% of job salary)
-        tellen_cost = int((job.salary_min + job.salary_max) / 2 * 0.2)
-
-        # Determine agent description
-        agent_descriptions = {
-            "AFC": "Accounting & Financial Compliance agent",
-            "FSP": "Financial Services Professional agent",
-            "other": "specialized AI workforce agent",
-        }
-
-        agent_desc = agent_descriptions.get(agent_match.matched_agent, "AI workforce agent")
-
-        # Generate email template
-        email_template = f"""
-Subject: AI Workforce Solution for {job.title} Position at {job.company}
-
-Dear Hiring Manager,
-
-I hope this email finds you well. I'm reaching out regarding your {job.title} position at {job.company} in {job.location}.
-
-I represent Tellen, a leading provider of AI workforce solutions for accounting and financial services firms. After analyzing your job posting, I believe we have an ideal solution that could significantly reduce your hiring costs while maintaining high-quality work output.
-
-**Our Solution:**
-Our {agent_desc} is specifically designed to handle the core responsibilities outlined in your job posting:
-- {self._extract_key_tasks(job.description)}
-- Automated compliance and reporting
-- 24/7 availability with consistent quality
-
-**Cost Savings:**
-Instead of the ${job.salary_min:,} - ${job.salary_max:,} annual salary for this position, our AI workforce solution costs approximately ${tellen_cost:,} annually - representing a potential savings of 80% while maintaining professional standards.
-
-**Why Choose Tellen:**
-- Proven track record with accounting firms
-- Seamless integration with existing systems
-- Dedicated support and training
-- Scalable solutions that grow with your business
-- No benefits, vacation, or overhead costs
-
-**Next Steps:**
-I'd love to schedule a brief 15-minute call to discuss how our AI workforce can specifically address your needs for the {job.title} role. We can also provide a customized demonstration of our capabilities.
-
-Would you be available for a call this week? I'm flexible with timing and can work around your schedule.
-
-Thank you for your time and consideration. I look forward to hearing from you.
-
-Best regards,
-{self.from_name}
-Tellen AI Workforce Solutions
-
-P.S. We're currently offering a 30-day free trial for qualified firms. This would allow you to experience the quality and efficiency of our AI workforce with no risk.
-
----
-This email was generated by our AI system that analyzes job postings to identify automation opportunities. 
-If you'd prefer not to receive these communications, please reply with "UNSUBSCRIBE" and we'll remove you from our outreach list.
-"""
-
-        return email_template.strip()
+        return self.render_outreach_email(job, agent_match).draft_email
 
     def _extract_key_tasks(self, description: str) -> str:
         """Extract key tasks from job description"""
-        # Simple keyword extraction - in a real system, this would use NLP
-        keywords = []
-        description_lower = description.lower()
-
-        if "audit" in description_lower:
-            keywords.append("Financial auditing and compliance")
-        if "analysis" in description_lower:
-            keywords.append("Financial analysis and reporting")
-        if "accounting" in description_lower:
-            keywords.append("Accounting operations and bookkeeping")
-        if "reporting" in description_lower:
-            keywords.append("Financial reporting and documentation")
-        if "compliance" in description_lower:
-            keywords.append("Regulatory compliance monitoring")
-
-        if not keywords:
-            keywords = ["Financial data processing and analysis"]
-
-        return " • ".join(keywords[:3])  # Limit to 3 key tasks
-
-    def save_outreach_draft(self, job_id: int, email_content: str, firm_contact: Optional[str] = None) -> int:
+        return extract_key_tasks(description)
+
+    def save_outreach_draft(
+        self,
+        job_id: int,
+        email_content: str,
+        firm_contact: Optional[str] = None,
+        subject: Optional[str] = None,
+        body: Optional[str] = None,
+    ) -> int:
         """Save outreach email draft to database"""
         db = SessionLocal()
         try:
-            outreach = Outreach(job_id=job_id, draft_email=email_content, status="draft", firm_contact=firm_contact)
+            outreach = Outreach(
+                job_id=job_id,
+                draft_email=email_content,
+                subject=subject,
+                body=body,
+                status="draft",
+                firm_contact=firm_contact,
+            )
             db.add(outreach)
             db.commit()
             db.refresh(outreach)
@@ -124,27 +110,33 @@ If you'd prefer not to receive these communications, please reply with "UNSUBSCR
         finally:
             db.close()
 
+    def credentials_configured(self) -> bool:
+        return all([self.email_username, self.email_password, self.from_email])
+
+    def deliver(self, to_email: str, subject: str, body: str, message_id: Optional[str] = None) -> None:
+        """Send an email through the SMTP pool, raising on failure"""
+        if not self.credentials_configured():
+            raise ValueError("Email credentials not configured")
+
+        msg = MIMEMultipart()
+        msg["From"] = f"{self.from_name} <{self.from_email}>"
+        msg["To"] = to_email
+        msg["Subject"] = subject
+        msg["Message-ID"] = message_id or make_msgid()
+
+        msg.attach(MIMEText(body, "plain"))
+
+        # Reuses an authenticated session from the pool instead of a new handshake per message
+        self.get_smtp_pool().send(self.from_email, [to_email], msg.as_string())
+
     def send_email(self, to_email: str, subject: str, body: str) -> bool:
-        """Send email using SMTP"""
-        if not all([self.email_username, self.email_password, self.from_email]):
+        """Send email using a pooled SMTP connection"""
+        if not self.credentials_configured():
             logger.warning("Email credentials not configured. Email not sent.")
             return False
 
         try:
-            msg = MIMEMultipart()
-            msg["From"] = f"{self.from_name} <{self.from_email}>"
-            msg["To"] = to_email
-            msg["Subject"] = subject
-
-            msg.attach(MIMEText(body, "plain"))
-
-            server = smtplib.SMTP(self.smtp_server, self.smtp_port)
-            server.starttls()
-            server.login(self.email_username, self.email_password)
-            text = msg.as_string()
-            server.sendmail(self.from_email, to_email, text)
-            server.quit()
-
+            self.deliver(to_email, subject, body)
             logger.info(f"Email sent successfully to {to_email}")
             return True
 
@@ -168,14 +160,20 @@ If you'd prefer not to receive these communications, please reply with "UNSUBSCR
             if not agent_match:
                 raise ValueError(f"No agent match found for job {job_id}")
 
-            # Generate email content
-            email_content = self.generate_outreach_email(job, agent_match)
+            with job_span("generate_outreach", job, {"agent": agent_match.matched_agent}):
+                suppressed = suppression_index(db).check(job.company, firm_contact)
+                if suppressed:
+                    raise ValueError(suppressed)
 
-            # Save as draft
-            outreach_id = self.save_outreach_draft(job_id, email_content, firm_contact)
+                # Generate email content
+                email = self.render_outreach_email(job, agent_match)
 
-            logger.info(f"Generated outreach email for job {job_id} (outreach ID: {outreach_id})")
-            return outreach_id
+                # Save as draft
+                outreach_id = self.save_outreach_draft(job_id, email.draft_email, firm_contact, email.subject, email.body)
+
+                publish_event(OUTREACH_CREATED, {"id": outreach_id, "job_id": job_id, "status": "draft"})
+                logger.info(f"Generated outreach email for job {job_id} (outreach ID: {outreach_id})")
+                return outreach_id
 
         except Exception as e:
             logger.error(f"Error generating outreach for job {job_id}: {e}")
@@ -183,82 +181,262 @@ If you'd prefer not to receive these communications, please reply with "UNSUBSCR
         finally:
             db.close()
 
-    def send_approved_outreach(self, outreach_id: int) -> bool:
-        """Send an approved outreach email"""
+    @staticmethod
+    def split_draft(draft_email: str) -> Tuple[str, str]:
+        """Split a stored draft into its subject line and body"""
+        lines = draft_email.split("\n")
+        subject = ""
+        body_start = 0
+
+        for i, line in enumerate(lines):
+            if line.startswith("Subject:"):
+                subject = line.replace("Subject:", "").strip()
+                body_start = i + 2  # Skip subject line and empty line
+                break
+
+        return subject, "\n".join(lines[body_start:])
+
+    def _message_id(self, outreach_id: int) -> str:
+        # Stable per outreach so a provider can drop an accidental resend
+        domain = self.from_email.split("@")[-1] if self.from_email and "@" in self.from_email else "localhost"
+        return f"<outreach-{outreach_id}@{domain}>"
+
+    def send_outreach(
+        self,
+        outreach_id: int,
+        from_statuses: Sequence[str] = ("approved",),
+        retry_status: str = "approved",
+        max_attempts: int = 3,
+        claimed_by: Optional[str] = None,
+    ) -> SendResult:
+        """Claim an outreach email, send it and record the outcome.
+
+        The outreach is moved to `sending` by a conditional UPDATE that only
+        succeeds from one of `from_statuses`, and that state is committed
+        before the SMTP exchange starts. Two senders can therefore never both
+        claim the same message, and a crash mid-send leaves it in `sending`
+        rather than eligible to be sent again. The claim records `claimed_by`
+        and the time, so recovery can tell an abandoned claim from a send in
+        progress. Transient failures go back to `retry_status` until
+        `max_attempts` is reached.
+        """
         db = SessionLocal()
+        now = datetime.utcnow()
         try:
-            outreach = db.query(Outreach).filter(Outreach.id == outreach_id).first()
-            if not outreach:
-                raise ValueError(f"Outreach with ID {outreach_id} not found")
-
-            if outreach.status != "approved":
-                raise ValueError(f"Outreach {outreach_id} is not approved for sending")
-
-            if not outreach.firm_contact:
-                raise ValueError(f"No contact email for outreach {outreach_id}")
-
-            # Extract subject and body from email content
-            lines = outreach.draft_email.split("\n")
-            subject = ""
-            body_start = 0
-
-            for i, line in enumerate(lines):
-                if line.startswith("Subject:"):
-                    subject = line.replace("Subject:", "").strip()
-                    body_start = i + 2  # Skip subject line and empty line
-                    break
-
-            body = "\n".join(lines[body_start:])
-
-            # Send email
-            success = self.send_email(outreach.firm_contact, subject, body)
-
-            if success:
+            claimed = (
+                db.query(Outreach)
+                .filter(Outreach.id == outreach_id, Outreach.status.in_(from_statuses))
+                .update(
+                    {
+                        Outreach.status: "sending",
+                        Outreach.send_attempts: Outreach.send_attempts + 1,
+                        Outreach.claimed_by: claimed_by,
+                        Outreach.claimed_at: now,
+                        Outreach.updated_at: now,
+                    },
+                    synchronize_session=False,
+                )
+            )
+            db.commit()
+            if not claimed:
+                return SendResult(outreach_id, "skipped", error=f"Outreach {outreach_id} is not in {', '.join(from_statuses)}")
+
+            outreach = db.query(Outreach).filter(Outreach.id == outreach_id).one()
+            result = SendResult(outreach_id, "sent", attempts=outreach.send_attempts)
+            suppressed = suppression_index(db).check(outreach.job.company, outreach.firm_contact)
+            if suppressed:
+                result.status = "suppressed"
+                result.error = suppressed
+                logger.warning(f"Outreach {outreach_id} not sent: {suppressed}")
+            else:
+                send_start = time.perf_counter()
+                try:
+                    if not outreach.firm_contact:
+                        raise ValueError(f"No contact email for outreach {outreach_id}")
+                    if outreach.subject is not None and outreach.body is not None:
+                        subject, body = outreach.subject, outreach.body
+                    else:
+                        # Drafts saved before subject and body were stored separately
+                        subject, body = self.split_draft(outreach.draft_email)
+                    self.deliver(outreach.firm_contact, subject, body, message_id=self._message_id(outreach_id))
+                except Exception as e:
+                    permanent = isinstance(e, (ValueError,) + PERMANENT_SEND_ERRORS)
+                    retry = not permanent and outreach.send_attempts < max_attempts
+                    result.status = "retry" if retry else "failed"
+                    result.error = str(e)
+                    logger.error(f"Error sending outreach {outreach_id} (attempt {outreach.send_attempts}): {e}")
+                    (RETRIES if retry else FAILURES).labels(operation="outreach_send").inc()
+                OUTREACH_SEND_SECONDS.labels(status=result.status).observe(time.perf_counter() - send_start)
+
+            if result.status == "sent":
                 outreach.status = "sent"
-                db.commit()
-                logger.info(f"Outreach {outreach_id} sent successfully")
+                outreach.sent_at = datetime.utcnow()
+                outreach.last_error = None
+            else:
+                outreach.status = {"retry": retry_status, "suppressed": "suppressed"}.get(result.status, "failed")
+                outreach.last_error = result.error
+            db.commit()
 
-            return success
+            publish_event(OUTREACH_STATUS, {"id": outreach_id, "job_id": outreach.job_id, "status": outreach.status})
+            if result.status == "sent":
+                logger.info(f"Outreach {outreach_id} sent successfully")
+            return result
+        finally:
+            db.close()
 
+    def send_approved_outreach(self, outreach_id: int) -> bool:
+        """Send an approved outreach email"""
+        try:
+            return self.send_outreach(outreach_id).status == "sent"
         except Exception as e:
             logger.error(f"Error sending outreach {outreach_id}: {e}")
             return False
-        finally:
-            db.close()
 
 
-def generate_outreach_for_all_high_confidence_jobs(min_confidence: float = 0.8) -> List[int]:
-    """Generate outreach emails for all jobs with high confidence agent matches"""
+def personalizer_settings() -> dict:
+    return {
+        "concurrency": int(os.getenv("OUTREACH_PERSONALIZE_CONCURRENCY", "8")),
+        "timeout": float(os.getenv("OUTREACH_PERSONALIZE_TIMEOUT", "20")),
+    }
+
+
+def eligible_outreach_statement(
+    min_confidence: float, after_job_id: int = 0, limit: Optional[int] = None, job_ids: Optional[Sequence[int]] = None
+):
+    """Jobs whose best agent match clears `min_confidence` and that have no outreach yet.
+
+    The best match per job is picked with a window function and jobs with
+    existing outreach are excluded by an anti-join, so a single query returns
+    the (Job, AgentMatch) pairs to generate drafts for, in job id order.
+    `job_ids` restricts the candidates to those jobs.
+    """
+    best_match = select(
+        AgentMatch.id.label("match_id"),
+        func.row_number()
+        .over(partition_by=AgentMatch.job_id, order_by=(AgentMatch.confidence_score.desc(), AgentMatch.id))
+        .label("match_rank"),
+    )
+    best_match = best_match.where(AgentMatch.job_id > after_job_id)
+    if job_ids is not None:
+        best_match = best_match.where(AgentMatch.job_id.in_(job_ids))
+    best_match = best_match.subquery()
+
+    statement = (
+        select(Job, AgentMatch)
+        .join(AgentMatch, AgentMatch.job_id == Job.id)
+        .join(best_match, and_(best_match.c.match_id == AgentMatch.id, best_match.c.match_rank == 1))
+        .where(AgentMatch.confidence_score >= min_confidence)
+        .where(Job.id > after_job_id)
+        .where(~exists().where(Outreach.job_id == Job.id))
+        .order_by(Job.id)
+    )
+    if limit:
+        statement = statement.limit(limit)
+    return statement
+
+
+def generate_outreach_for_all_high_confidence_jobs(
+    min_confidence: float = 0.8,
+    batch_size: int = 1000,
+    personalize: Optional[bool] = None,
+    job_ids: Optional[Sequence[int]] = None,
+) -> List[int]:
+    """Generate outreach emails for all jobs with high confidence agent matches
+
+    Eligible jobs are read in keyset batches of `batch_size`, drafts are
+    rendered in memory and each batch is written with one multi-row INSERT.
+    Everything is committed in a single transaction, so a failure leaves no
+    partial set of drafts behind. With `personalize` (default: the
+    OUTREACH_PERSONALIZE setting) each batch first gets LLM-written paragraphs
+    from `OutreachPersonalizer`. `job_ids` limits the run to those jobs, as the
+    pipeline orchestrator does for newly matched postings.
+
+    Jobs at suppressed companies are skipped, as are jobs at companies
+    contacted within the cooldown window (OUTREACH_COMPANY_COOLDOWN_DAYS),
+    including earlier jobs in this run, so reposts get a single draft.
+    """
+    if personalize is None:
+        personalize = os.getenv("OUTREACH_PERSONALIZE", "false").lower() == "true"
+    personalizer = OutreachPersonalizer(**personalizer_settings()) if personalize else None
+
     db = SessionLocal()
     email_service = EmailService()
-    generated_outreach_ids = []
+    generated: List[Tuple[int, int]] = []
+    skipped = 0
 
     try:
-        # Get jobs with high confidence matches
-        high_confidence_matches = db.query(AgentMatch).filter(AgentMatch.confidence_score >= min_confidence).all()
-
-        for match in high_confidence_matches:
-            # Check if outreach already exists for this job
-            existing_outreach = db.query(Outreach).filter(Outreach.job_id == match.job_id).first()
-
-            if not existing_outreach:
+        suppressions = SuppressionIndex.load(db, cooldown=company_cooldown())
+        last_job_id = 0
+        while True:
+            pairs = db.execute(eligible_outreach_statement(min_confidence, last_job_id, batch_size, job_ids)).all()
+            if not pairs:
+                break
+            last_job_id = pairs[-1][0].id
+
+            now = datetime.utcnow()
+            allowed = []
+            for job, agent_match in pairs:
+                if suppressions.check(job.company, now=now):
+                    skipped += 1
+                    continue
+                suppressions.record(job.company, now)
+                allowed.append((job, agent_match))
+            pairs = allowed
+
+            paragraphs = personalizer.personalize(db, pairs)[0] if personalizer else [None] * len(pairs)
+
+            rows = []
+            for (job, agent_match), paragraph in zip(pairs, paragraphs):
                 try:
-                    outreach_id = email_service.generate_outreach_for_job(match.job_id)
-                    generated_outreach_ids.append(outreach_id)
+                    with job_span("generate_outreach", job, {"agent": agent_match.matched_agent}):
+                        email = email_service.render_outreach_email(job, agent_match, paragraph)
                 except Exception as e:
-                    logger.error(f"Failed to generate outreach for job {match.job_id}: {e}")
-
-        logger.info(f"Generated {len(generated_outreach_ids)} outreach emails")
-        return generated_outreach_ids
-
+                    logger.error(f"Failed to generate outreach for job {job.id}: {e}")
+                    continue
+                rows.append(
+                    {
+                        "job_id": job.id,
+                        "draft_email": email.draft_email,
+                        "subject": email.subject,
+                        "body": email.body,
+                        "status": "draft",
+                        "created_at": now,
+                        "updated_at": now,
+                    }
+                )
+
+            if rows:
+                generated.extend(db.execute(insert(Outreach).returning(Outreach.id, Outreach.job_id), rows).all())
+            # Rendered jobs are not needed again; keep the identity map from growing with the batch count
+            db.expunge_all()
+
+        db.commit()
     except Exception as e:
+        db.rollback()
         logger.error(f"Error generating outreach emails: {e}")
         return []
     finally:
         db.close()
 
+    for outreach_id, job_id in generated:
+        publish_event(OUTREACH_CREATED, {"id": outreach_id, "job_id": job_id, "status": "draft"})
+    logger.info(f"Generated {len(generated)} outreach emails ({skipped} skipped by suppression or company cooldown)")
+    return [outreach_id for outreach_id, _ in generated]
 
-if __name__ == "__main__":
-    # Generate outreach emails for high confidence matches
-    outreach_ids = generate_outreach_for_all_high_confidence_jobs()
+
+def main(argv=None):
+    """Generate outreach drafts for high confidence matches"""
+    parser = argparse.ArgumentParser(description="Generate outreach drafts for high confidence agent matches")
+    parser.add_argument("--min-confidence", type=float, default=0.8)
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+
+    configure_tracing("email_service")
+    with RunProfiler("email_service", args.profile, top=args.profile_top) as profiler:
+        with profiler.stage("generate_outreach"):
+            outreach_ids = generate_outreach_for_all_high_confidence_jobs(args.min_confidence)
     print(f"Generated {len(outreach_ids)} outreach emails: {outreach_ids}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+In-process event bus for pushing data changes to connected dashboards
+
+Publishers (the scraper, the AI processor, outreach endpoints) call
+`publish_event` from ordinary synchronous code. Subscribers are asyncio
+consumers such as the `/events` server-sent events endpoint. By default events
+only reach subscribers in the same process; set `EVENTS_BACKEND=postgres` and
+`EVENTS_DATABASE_URL` to relay them through Postgres LISTEN/NOTIFY so events
+published by the scraper and processor CLIs reach the API process too.
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import select
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set
+
+from loguru import logger
+
+JOB_CREATED = "job.created"
+MATCH_CREATED = "match.created"
+OUTREACH_CREATED = "outreach.created"
+OUTREACH_STATUS = "outreach.status"
+
+EVENT_TYPES = {JOB_CREATED, MATCH_CREATED, OUTREACH_CREATED, OUTREACH_STATUS}
+
+NOTIFY_CHANNEL = "auditor_events"
+
+
+@dataclass
+class Event:
+    id: int
+    type: str
+    data: Dict[str, Any]
+    created_at: datetime = field(default_factory=datetime.utcnow)
+
+    def to_sse(self) -> str:
+        """Format the event as a server-sent events message"""
+        payload = json.dumps(self.data, default=str)
+        return f"id: {self.id}\nevent: {self.type}\ndata: {payload}\n\n"
+
+
+class Subscription:
+    """A subscriber's bounded queue, bound to the event loop it was created on"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, event_types: Optional[Set[str]], max_queue_size: int):
+        self.loop = loop
+        self.event_types = event_types
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue_size)
+        self.dropped = 0
+
+    def wants(self, event: Event) -> bool:
+        return self.event_types is None or event.type in self.event_types
+
+    def offer(self, event: Event) -> None:
+        """Enqueue an event, dropping the oldest one if the consumer is too slow"""
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+    async def get(self) -> Event:
+        return await self.queue.get()
+
+
+class EventBus:
+    """Fan-out pub/sub with thread-safe publishing and a short replay buffer"""
+
+    def __init__(self, max_queue_size: int = 100, replay_size: int = 256):
+        self.max_queue_size = max_queue_size
+        self._subscriptions: List[Subscription] = []
+        self._recent: Deque[Event] = deque(maxlen=replay_size)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.backend = None
+
+    def subscribe(
+        self,
+        event_types: Optional[Iterable[str]] = None,
+        last_event_id: Optional[int] = None,
+        max_queue_size: Optional[int] = None,
+    ) -> Subscription:
+        """Register a subscriber; must be called from the consuming event loop.
+
+        When `last_event_id` is given, buffered events newer than it are
+        replayed so a reconnecting client does not miss anything.
+        `max_queue_size` overrides the bus default for consumers that must
+        keep up with bulk inserts, such as the pipeline orchestrator.
+        """
+        subscription = Subscription(
+            asyncio.get_running_loop(), set(event_types) if event_types else None, max_queue_size or self.max_queue_size
+        )
+        with self._lock:
+            self._subscriptions.append(subscription)
+            if last_event_id is not None:
+                for event in self._recent:
+                    if event.id > last_event_id and subscription.wants(event):
+                        subscription.offer(event)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscriptions)
+
+    def publish(self, event_type: str, data: Dict[str, Any]) -> None:
+        """Publish an event from any thread; never raises into the caller"""
+        try:
+            if self.backend is not None:
+                self.backend.notify(event_type, data)
+            else:
+                self.dispatch(event_type, data)
+        except Exception as e:
+            logger.error(f"Error publishing {event_type} event: {e}")
+
+    def dispatch(self, event_type: str, data: Dict[str, Any]) -> Event:
+        """Deliver an event to the subscribers in this process"""
+        with self._lock:
+            event = Event(id=next(self._ids), type=event_type, data=data)
+            self._recent.append(event)
+            subscriptions = [s for s in self._subscriptions if s.wants(event)]
+
+        for subscription in subscriptions:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+            except RuntimeError:
+                # The subscriber's loop has shut down; it will never read again
+                self.unsubscribe(subscription)
+        return event
+
+
+class PostgresNotifyBackend:
+    """Relays events between processes through Postgres LISTEN/NOTIFY"""
+
+    def __init__(self, bus: EventBus, dsn: str, channel: str = NOTIFY_CHANNEL):
+        import psycopg2
+
+        self.bus = bus
+        self.dsn = dsn
+        self.channel = channel
+        self._psycopg2 = psycopg2
+        self._notify_conn = None
+        self._notify_lock = threading.Lock()
+        self._listener: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+    def _connect(self):
+        conn = self._psycopg2.connect(self.dsn)
+        conn.autocommit = True
+        return conn
+
+    def notify(self, event_type: str, data: Dict[str, Any]) -> None:
+        payload = json.dumps({"type": event_type, "data": data}, default=str)
+        with self._notify_lock:
+            if self._notify_conn is None or self._notify_conn.closed:
+                self._notify_conn = self._connect()
+            with self._notify_conn.cursor() as cursor:
+                cursor.execute("SELECT pg_notify(%s, %s)", (self.channel, payload))
+
+    def start_listening(self) -> None:
+        """Start relaying notifications to this process's subscribers"""
+        if self._listener is None:
+            self._listener = threading.Thread(target=self._listen, name="event-bus-listener", daemon=True)
+            self._listener.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+
+    def _listen(self) -> None:
+        while not self._stopped.is_set():
+            try:
+                conn = self._connect()
+                with conn.cursor() as cursor:
+                    cursor.execute(f"LISTEN {self.channel}")
+                logger.info(f"Listening for events on Postgres channel {self.channel}")
+
+                while not self._stopped.is_set():
+                    if select.select([conn], [], [], 5.0) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        notification = conn.notifies.pop(0)
+                        message = json.loads(notification.payload)
+                        self.bus.dispatch(message["type"], message["data"])
+                conn.close()
+            except Exception as e:
+                logger.error(f"Event listener error, reconnecting: {e}")
+                self._stopped.wait(5.0)
+
+
+event_bus = EventBus()
+_configured = False
+
+
+def configure_event_bus(listen: bool = False) -> EventBus:
+    """Attach the cross-process backend selected by `EVENTS_BACKEND`, if any"""
+    global _configured
+    if not _configured and os.getenv("EVENTS_BACKEND", "memory") == "postgres":
+        dsn = os.getenv("EVENTS_DATABASE_URL")
+        if not dsn:
+            logger.warning("EVENTS_BACKEND=postgres but EVENTS_DATABASE_URL is not set; using in-process events")
+        else:
+            event_bus.backend = PostgresNotifyBackend(event_bus, dsn)
+    _configured = True
+
+    if listen and event_bus.backend is not None:
+        event_bus.backend.start_listening()
+    return event_bus
+
+
+def publish_event(event_type: str, data: Dict[str, Any]) -> None:
+    """Publish an event on the process-wide bus"""
+    if not _configured:
+        configure_event_bus()
+    event_bus.publish(event_type, data)
@@ -0,0 +1,228 @@
+"""
+Streaming data exports for jobs and agent matches
+"""
+
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional
+
+from sqlalchemy import Boolean, DateTime, Float, Integer, select
+from sqlalchemy.sql import Select
+
+from .models import Job, AgentMatch
+from .database import SessionLocal
+
+EXPORT_BATCH_SIZE = 1000
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+JOB_EXPORT_COLUMNS = [
+    Job.id,
+    Job.title,
+    Job.company,
+    Job.location,
+    Job.salary_min,
+    Job.salary_max,
+    Job.description,
+    Job.url,
+    Job.source,
+    Job.date_posted,
+    Job.created_at,
+    Job.updated_at,
+]
+
+AGENT_MATCH_EXPORT_COLUMNS = [
+    AgentMatch.id,
+    AgentMatch.job_id,
+    AgentMatch.matched_agent,
+    AgentMatch.confidence_score,
+    AgentMatch.notes,
+    AgentMatch.created_at,
+    Job.source.label("job_source"),
+]
+
+
+def jobs_export_statement(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    source: Optional[str] = None,
+    agent: Optional[str] = None,
+) -> Select:
+    """Build the SELECT for a jobs export; dates filter on `date_posted`"""
+    statement = select(*JOB_EXPORT_COLUMNS).order_by(Job.id)
+
+    if since:
+        statement = statement.where(Job.date_posted >= since)
+    if until:
+        statement = statement.where(Job.date_posted < until)
+    if source:
+        statement = statement.where(Job.source == source)
+    if agent:
+        statement = statement.where(Job.id.in_(select(AgentMatch.job_id).where(AgentMatch.matched_agent == agent)))
+
+    return statement
+
+
+def agent_matches_export_statement(
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    source: Optional[str] = None,
+    agent: Optional[str] = None,
+) -> Select:
+    """Build the SELECT for an agent match export; dates filter on `created_at`"""
+    statement = select(*AGENT_MATCH_EXPORT_COLUMNS).join(Job, AgentMatch.job_id == Job.id).order_by(AgentMatch.id)
+
+    if since:
+        statement = statement.where(AgentMatch.created_at >= since)
+    if until:
+        statement = statement.where(AgentMatch.created_at < until)
+    if source:
+        statement = statement.where(Job.source == source)
+    if agent:
+        statement = statement.where(AgentMatch.matched_agent == agent)
+
+    return statement
+
+
+def iter_row_batches(statement: Select, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[List[Dict]]:
+    """Stream rows in batches through a server-side cursor.
+
+    Rows are plain column tuples rather than ORM objects, and only one batch is
+    held in memory at a time. The session is owned by the generator so it stays
+    open for as long as the response is streaming.
+    """
+    db = SessionLocal()
+    try:
+        result = db.execute(statement.execution_options(yield_per=batch_size))
+        for partition in result.mappings().partitions():
+            yield [dict(row) for row in partition]
+    finally:
+        db.close()
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_ndjson(batches: Iterator[List[Dict]]) -> Iterator[bytes]:
+    """Encode row batches as newline-delimited JSON"""
+    for batch in batches:
+        yield "".join(json.dumps(row, default=_json_default) + "\n" for row in batch).encode("utf-8")
+
+
+def encode_csv(batches: Iterator[List[Dict]], columns: List[str]) -> Iterator[bytes]:
+    """Encode row batches as CSV with a header row"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=columns)
+    writer.writeheader()
+
+    for batch in batches:
+        for row in batch:
+            writer.writerow({key: value.isoformat() if isinstance(value, datetime) else value for key, value in row.items()})
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ParquetChunkSink(io.RawIOBase):
+    """Write-only file object that hands written bytes back in chunks.
+
+    `tell()` keeps counting across drains so the offsets Parquet records in its
+    footer stay correct even though earlier bytes have already been sent.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def _arrow_schema(statement: Select):
+    import pyarrow as pa
+
+    fields = []
+    for column in statement.selected_columns:
+        if isinstance(column.type, Integer):
+            arrow_type = pa.int64()
+        elif isinstance(column.type, Float):
+            arrow_type = pa.float64()
+        elif isinstance(column.type, DateTime):
+            arrow_type = pa.timestamp("us")
+        elif isinstance(column.type, Boolean):
+            arrow_type = pa.bool_()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column.key, arrow_type))
+    return pa.schema(fields)
+
+
+def encode_parquet(batches: Iterator[List[Dict]], statement: Select) -> Iterator[bytes]:
+    """Encode row batches as a Parquet file, one row group per batch"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = _arrow_schema(statement)
+    sink = _ParquetChunkSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema)
+    try:
+        for batch in batches:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def check_export_format(export_format: str) -> None:
+    """Validate an export format, raising ValueError if it is unsupported here"""
+    if export_format not in EXPORT_MEDIA_TYPES:
+        raise ValueError(f"Unsupported export format '{export_format}'. Allowed: {', '.join(EXPORT_MEDIA_TYPES)}")
+
+    if export_format == "parquet":
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            raise ValueError("Parquet export requires the 'pyarrow' package")
+
+
+def stream_export(statement: Select, export_format: str, batch_size: int = EXPORT_BATCH_SIZE) -> Iterator[bytes]:
+    """Stream the rows selected by `statement` encoded as `export_format`"""
+    batches = iter_row_batches(statement, batch_size)
+
+    if export_format == "ndjson":
+        return encode_ndjson(batches)
+    if export_format == "csv":
+        return encode_csv(batches, [column.key for column in statement.selected_columns])
+    if export_format == "parquet":
+        return encode_parquet(batches, statement)
+
+    raise ValueError(f"Unsupported export format '{export_format}'")
@@ -0,0 +1,106 @@
+"""
+Database-backed leases that keep pipeline runs from overlapping
+
+A lock is a row in `pipeline_locks` naming its owner and when its lease
+expires. Acquiring inserts the row, or takes it over once the previous
+holder's lease has lapsed, so a crashed process blocks others for at most
+one `ttl`. Holders of long runs call `renew` well inside the ttl.
+
+    lock = DatabaseLock("pipeline", ttl=300)
+    if lock.acquire():
+        try:
+            ...
+        finally:
+            lock.release()
+"""
+
+import os
+import socket
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from loguru import logger
+from sqlalchemy import delete, insert, or_, update
+from sqlalchemy.exc import IntegrityError
+
+from .database import SessionLocal
+from .models import PipelineLock
+
+
+def default_owner() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class DatabaseLock:
+    """A named lease in the `pipeline_locks` table"""
+
+    def __init__(self, name: str, ttl: float = 300.0, owner: Optional[str] = None):
+        self.name = name
+        self.ttl = ttl
+        self.owner = owner or default_owner()
+        self.held = False
+
+    def acquire(self) -> bool:
+        """Take the lock if it is free, expired or already ours; never blocks"""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl)
+        db = SessionLocal()
+        try:
+            try:
+                db.execute(
+                    insert(PipelineLock).values(name=self.name, owner=self.owner, acquired_at=now, expires_at=expires_at)
+                )
+                db.commit()
+                self.held = True
+            except IntegrityError:
+                db.rollback()
+                result = db.execute(
+                    update(PipelineLock)
+                    .where(PipelineLock.name == self.name)
+                    .where(or_(PipelineLock.expires_at < now, PipelineLock.owner == self.owner))
+                    .values(owner=self.owner, acquired_at=now, expires_at=expires_at)
+                )
+                db.commit()
+                self.held = result.rowcount == 1
+        finally:
+            db.close()
+        return self.held
+
+    def renew(self) -> bool:
+        """Extend the lease; False means it lapsed and another process has taken the lock"""
+        db = SessionLocal()
+        try:
+            result = db.execute(
+                update(PipelineLock)
+                .where(PipelineLock.name == self.name, PipelineLock.owner == self.owner)
+                .values(expires_at=datetime.utcnow() + timedelta(seconds=self.ttl))
+            )
+            db.commit()
+        finally:
+            db.close()
+        self.held = result.rowcount == 1
+        if not self.held:
+            logger.warning(f"Lost lock {self.name!r}")
+        return self.held
+
+    def release(self) -> None:
+        db = SessionLocal()
+        try:
+            db.execute(delete(PipelineLock).where(PipelineLock.name == self.name, PipelineLock.owner == self.owner))
+            db.commit()
+        finally:
+            db.close()
+        self.held = False
+
+    def holder(self) -> Optional[str]:
+        """The owner of an unexpired lease on this lock, if any"""
+        db = SessionLocal()
+        try:
+            return (
+                db.query(PipelineLock.owner)
+                .filter(PipelineLock.name == self.name, PipelineLock.expires_at >= datetime.utcnow())
+                .scalar()
+            )
+        finally:
+            db.close()
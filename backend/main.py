@@ -2,15 +2,52 @@
 FastAPI main application
 """
 
-from fastapi import FastAPI, Depends, HTTPException, status
+import asyncio
+import os
+import time
+from datetime import date, datetime
+from fastapi import FastAPI, Depends, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
-from typing import List, Optional
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlalchemy import func
+from sqlalchemy.orm import Session, raiseload, selectinload
+from typing import List, Optional, Set
 from dotenv import load_dotenv
+from loguru import logger
 
 from .database import get_db, init_database
-from .models import Job, AgentMatch, Outreach, JobResponse, AgentMatchResponse, OutreachResponse
+from .models import (
+    Job,
+    AgentMatch,
+    Outreach,
+    JobResponse,
+    JobWithMatches,
+    JobSearchResult,
+    AgentMatchResponse,
+    OutreachResponse,
+    Suppression,
+    SuppressionImport,
+    SuppressionResponse,
+)
 from .email_service import EmailService, generate_outreach_for_all_high_confidence_jobs
+from .search import search_jobs
+from .analytics import company_report, job_market_report, match_report
+from .suppression import infer_kind, import_suppressions
+from .caching import conditional_get
+from .metrics import API_REQUEST_QUERIES, API_REQUEST_SECONDS, metrics_response
+from .query_stats import track_queries
+from .tracing import configure_tracing
+from .dispatch import dispatcher
+from .events import EVENT_TYPES, OUTREACH_STATUS, configure_event_bus, event_bus, publish_event
+from .export import (
+    EXPORT_MEDIA_TYPES,
+    agent_matches_export_statement,
+    check_export_format,
+    jobs_export_statement,
+    stream_export,
+)
 
 load_dotenv()
 
@@ -31,6 +68,46 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Response compression for large list payloads; brotli when available
+try:
+    from brotli_asgi import BrotliMiddleware
+
+    app.add_middleware(BrotliMiddleware, minimum_size=1000, gzip_fallback=True)
+except ImportError:
+    app.add_middleware(GZipMiddleware, minimum_size=1000)
+
+
+@app.middleware("http")
+async def track_request_queries(request: Request, call_next):
+    """Count each request's queries; requests over API_QUERY_BUDGET are logged, and DEBUG adds the counts as headers"""
+    with track_queries() as stats:
+        response = await call_next(request)
+    route = getattr(request.scope.get("route"), "path", "unmatched")
+    API_REQUEST_QUERIES.labels(route=route).observe(stats.count)
+    if stats.count > int(os.getenv("API_QUERY_BUDGET", "25")):
+        logger.warning(f"{request.method} {route} ran {stats.count} queries ({stats.seconds * 1000:.1f} ms)")
+    if os.getenv("DEBUG", "false").lower() == "true":
+        response.headers["X-DB-Query-Count"] = str(stats.count)
+        response.headers["X-DB-Query-Time"] = f"{stats.seconds * 1000:.2f}ms"
+    return response
+
+
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """Time each request into `api_request_seconds`, labelled by route template rather than raw path"""
+    start = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        API_REQUEST_SECONDS.labels(
+            method=request.method, route=getattr(route, "path", "unmatched"), status=str(status_code)
+        ).observe(time.perf_counter() - start)
+
+
 # Security
 # security = HTTPBearer()  # Commented out for now
 
@@ -39,6 +116,14 @@ app.add_middleware(
 @app.on_event("startup")
 async def startup_event():
     init_database()
+    configure_tracing("api")
+    configure_event_bus(listen=True)
+    await dispatcher.start()
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await dispatcher.stop()
 
 
 @app.get("/")
@@ -53,21 +138,135 @@ async def health_check():
     return {"status": "healthy", "service": "auditor-job-posting-agent"}
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics for the API process"""
+    body, content_type = metrics_response()
+    return Response(content=body, media_type=content_type)
+
+
 # Job endpoints
-@app.get("/jobs", response_model=List[JobResponse])
-async def get_jobs(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Get all job postings with pagination"""
-    jobs = db.query(Job).offset(skip).limit(limit).all()
-    return jobs
+JOB_INCLUDES = {
+    "matches": Job.agent_matches,
+    "outreach": Job.outreach_emails,
+}
+
+
+def parse_job_includes(include: Optional[str]) -> Set[str]:
+    """Parse the comma-separated `include` query parameter for job endpoints"""
+    if not include:
+        return set()
+
+    includes = {part.strip() for part in include.split(",") if part.strip()}
+    unknown = includes - JOB_INCLUDES.keys()
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown include value(s): {', '.join(sorted(unknown))}. Allowed: {', '.join(sorted(JOB_INCLUDES))}",
+        )
+    return includes
+
+
+def job_query_with_includes(db: Session, includes: Set[str]):
+    """Build a job query that eager-loads the requested relationships.
+
+    Requested relationships are fetched with one SELECT ... IN query each, so the
+    number of queries stays constant however many jobs are returned. Relationships
+    that were not requested raise if touched rather than being lazy-loaded per job.
+    """
+    options = [
+        selectinload(relationship) if name in includes else raiseload(relationship)
+        for name, relationship in JOB_INCLUDES.items()
+    ]
+    return db.query(Job).options(*options)
+
+
+def job_payload(job: Job, includes: Set[str]) -> JobWithMatches:
+    """A job with only the requested relationships set, so the others are left out of the response"""
+    fields = JobResponse.model_validate(job).model_dump()
+    for name in includes:
+        relationship = JOB_INCLUDES[name]
+        fields[relationship.key] = getattr(job, relationship.key)
+    return JobWithMatches.model_validate(fields)
+
+
+@app.get("/jobs", response_model=List[JobWithMatches], response_model_exclude_unset=True)
+async def get_jobs(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    include: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Get all job postings with pagination, optionally including matches and outreach"""
+    includes = parse_job_includes(include)
+    tables = ["jobs"] + [JOB_INCLUDES[name].property.target.name for name in sorted(includes)]
+    not_modified = conditional_get(request, response, db, tables)
+    if not_modified:
+        return not_modified
+
+    jobs = job_query_with_includes(db, includes).order_by(Job.id).offset(skip).limit(limit).all()
+    return [job_payload(job, includes) for job in jobs]
+
+
+@app.get("/jobs/search", response_model=List[JobSearchResult])
+async def search_job_postings(
+    q: str = Query(..., min_length=1),
+    location: Optional[str] = None,
+    min_salary: Optional[float] = None,
+    max_salary: Optional[float] = None,
+    agent: Optional[str] = None,
+    skip: int = 0,
+    limit: int = Query(20, le=100),
+    db: Session = Depends(get_db),
+):
+    """Full-text search over job titles, companies and descriptions, ranked by relevance"""
+    try:
+        return search_jobs(
+            db,
+            q,
+            location=location,
+            min_salary=min_salary,
+            max_salary=max_salary,
+            agent=agent,
+            skip=skip,
+            limit=limit,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
-@app.get("/jobs/{job_id}", response_model=JobResponse)
-async def get_job(job_id: int, db: Session = Depends(get_db)):
-    """Get a specific job posting"""
-    job = db.query(Job).filter(Job.id == job_id).first()
+@app.get("/jobs/ranked", response_model=List[JobResponse])
+async def get_ranked_jobs(
+    request: Request,
+    response: Response,
+    min_score: Optional[float] = None,
+    skip: int = 0,
+    limit: int = Query(20, le=500),
+    db: Session = Depends(get_db),
+):
+    """Top jobs by composite rank score (salary, similar postings, match confidence, automation potential)"""
+    not_modified = conditional_get(request, response, db, ["jobs"])
+    if not_modified:
+        return not_modified
+
+    # Ordered to match a backwards scan of the rank_score index (ties by id), so only
+    # skip + limit index entries are read
+    query = db.query(Job).filter(Job.rank_score.isnot(None))
+    if min_score is not None:
+        query = query.filter(Job.rank_score >= min_score)
+    return query.order_by(Job.rank_score.desc(), Job.id.desc()).offset(skip).limit(limit).all()
+
+
+@app.get("/jobs/{job_id}", response_model=JobWithMatches, response_model_exclude_unset=True)
+async def get_job(job_id: int, include: Optional[str] = None, db: Session = Depends(get_db)):
+    """Get a specific job posting, optionally including matches and outreach"""
+    includes = parse_job_includes(include)
+    job = job_query_with_includes(db, includes).filter(Job.id == job_id).first()
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
-    return job
+    return job_payload(job, includes)
 
 
 @app.get("/jobs/{job_id}/matches", response_model=List[AgentMatchResponse])
@@ -101,12 +300,23 @@ async def get_agent_matches(
 
 # Outreach endpoints
 @app.get("/outreach", response_model=List[OutreachResponse])
-async def get_outreach_emails(status: Optional[str] = None, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+async def get_outreach_emails(
+    request: Request,
+    response: Response,
+    outreach_status: Optional[str] = Query(None, alias="status"),
+    skip: int = 0,
+    limit: int = 100,
+    db: Session = Depends(get_db),
+):
     """Get outreach emails with optional status filtering"""
+    not_modified = conditional_get(request, response, db, ["outreach"])
+    if not_modified:
+        return not_modified
+
     query = db.query(Outreach)
 
-    if status:
-        query = query.filter(Outreach.status == status)
+    if outreach_status:
+        query = query.filter(Outreach.status == outreach_status)
 
     emails = query.offset(skip).limit(limit).all()
     return emails
@@ -130,6 +340,7 @@ async def approve_outreach_email(outreach_id: int, db: Session = Depends(get_db)
 
     email.status = "approved"
     db.commit()
+    publish_event(OUTREACH_STATUS, {"id": outreach_id, "job_id": email.job_id, "status": "approved"})
 
     return {"message": "Outreach email approved", "id": outreach_id}
 
@@ -143,6 +354,7 @@ async def reject_outreach_email(outreach_id: int, db: Session = Depends(get_db))
 
     email.status = "rejected"
     db.commit()
+    publish_event(OUTREACH_STATUS, {"id": outreach_id, "job_id": email.job_id, "status": "rejected"})
 
     return {"message": "Outreach email rejected", "id": outreach_id}
 
@@ -159,47 +371,290 @@ async def generate_outreach_email(job_id: int, firm_contact: Optional[str] = Non
 
 
 @app.post("/outreach/generate-all")
-async def generate_all_outreach_emails(min_confidence: float = 0.8):
+async def generate_all_outreach_emails(min_confidence: float = 0.8, personalize: Optional[bool] = None):
     """Generate outreach emails for all high-confidence job matches"""
     try:
-        outreach_ids = generate_outreach_for_all_high_confidence_jobs(min_confidence)
+        # Runs in a worker thread: generation blocks on the database and, when personalizing, on the model
+        outreach_ids = await run_in_threadpool(
+            generate_outreach_for_all_high_confidence_jobs, min_confidence, personalize=personalize
+        )
         return {"message": f"Generated {len(outreach_ids)} outreach emails", "outreach_ids": outreach_ids}
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.post("/outreach/send-approved")
+async def send_approved_outreach_emails(limit: Optional[int] = None):
+    """Queue all approved outreach emails for background sending"""
+    email_service = EmailService()
+    if not email_service.credentials_configured():
+        raise HTTPException(status_code=400, detail="Email credentials not configured")
+
+    if not dispatcher.running:
+        await dispatcher.start()
+    outreach_ids = dispatcher.enqueue_approved(limit)
+    return {"message": f"Queued {len(outreach_ids)} outreach emails for sending", "outreach_ids": outreach_ids}
+
+
 @app.post("/outreach/{outreach_id}/send")
 async def send_outreach_email(outreach_id: int, db: Session = Depends(get_db)):
     """Send an approved outreach email"""
     email_service = EmailService()
     try:
-        success = email_service.send_approved_outreach(outreach_id)
-        if success:
-            return {"message": "Outreach email sent successfully", "id": outreach_id}
-        else:
-            raise HTTPException(status_code=500, detail="Failed to send email")
+        # SMTP is blocking; keep it off the event loop
+        result = await run_in_threadpool(email_service.send_outreach, outreach_id)
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
+    if result.status == "sent":
+        return {"message": "Outreach email sent successfully", "id": outreach_id}
+    if result.status in ("skipped", "suppressed"):
+        raise HTTPException(status_code=409, detail=result.error)
+    raise HTTPException(status_code=500, detail=f"Failed to send email: {result.error}")
+
+
+@app.post("/outreach/{outreach_id}/unsubscribe")
+async def unsubscribe_outreach_contact(outreach_id: int, db: Session = Depends(get_db)):
+    """Record an UNSUBSCRIBE reply: suppress the contact and the firm for all future outreach"""
+    email = db.query(Outreach).filter(Outreach.id == outreach_id).first()
+    if not email:
+        raise HTTPException(status_code=404, detail="Outreach email not found")
+
+    entries = [("company", email.job.company, "unsubscribe")]
+    if email.firm_contact:
+        entries.append(("email", email.firm_contact, "unsubscribe"))
+    added = import_suppressions(db, entries, source=f"outreach:{outreach_id}")
+    db.commit()
+    return {"message": "Contact unsubscribed", "id": outreach_id, "suppressions_added": added}
+
+
+# Suppression endpoints
+@app.get("/suppressions", response_model=List[SuppressionResponse])
+async def get_suppressions(
+    kind: Optional[str] = None, skip: int = 0, limit: int = Query(100, le=1000), db: Session = Depends(get_db)
+):
+    """List suppressed companies, domains and contacts"""
+    query = db.query(Suppression)
+    if kind:
+        query = query.filter(Suppression.kind == kind)
+    return query.order_by(Suppression.id).offset(skip).limit(limit).all()
+
+
+@app.post("/suppressions/import")
+async def import_suppression_list(payload: SuppressionImport, db: Session = Depends(get_db)):
+    """Bulk import a suppression list; entries already suppressed are skipped"""
+    entries = [(entry.kind or infer_kind(entry.value), entry.value, entry.reason) for entry in payload.entries]
+    try:
+        added = import_suppressions(db, entries, source=payload.source)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    db.commit()
+    return {"message": f"Imported {added} suppressions", "added": added, "skipped": len(entries) - added}
+
+
+@app.delete("/suppressions/{suppression_id}")
+async def delete_suppression(suppression_id: int, db: Session = Depends(get_db)):
+    """Remove a suppression entry"""
+    deleted = db.query(Suppression).filter(Suppression.id == suppression_id).delete()
+    if not deleted:
+        raise HTTPException(status_code=404, detail="Suppression not found")
+    db.commit()
+    return {"message": "Suppression removed", "id": suppression_id}
+
+
+# Export endpoints
+def export_response(statement, export_format: str, name: str) -> StreamingResponse:
+    """Stream an export of `statement` as a downloadable file"""
+    try:
+        check_export_format(export_format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return StreamingResponse(
+        stream_export(statement, export_format),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{name}.{export_format}"'},
+    )
+
+
+@app.get("/export/jobs")
+async def export_jobs(
+    export_format: str = Query("ndjson", alias="format"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    source: Optional[str] = None,
+    agent: Optional[str] = None,
+):
+    """Stream all job postings as NDJSON, CSV or Parquet"""
+    statement = jobs_export_statement(since=since, until=until, source=source, agent=agent)
+    return export_response(statement, export_format, "jobs")
+
+
+@app.get("/export/agent-matches")
+async def export_agent_matches(
+    export_format: str = Query("ndjson", alias="format"),
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    source: Optional[str] = None,
+    agent: Optional[str] = None,
+):
+    """Stream all agent matches as NDJSON, CSV or Parquet"""
+    statement = agent_matches_export_statement(since=since, until=until, source=source, agent=agent)
+    return export_response(statement, export_format, "agent-matches")
+
+
+# Event stream
+EVENT_HEARTBEAT_SECONDS = 15
+
+
+@app.get("/events")
+async def stream_events(request: Request, types: Optional[str] = None):
+    """Server-sent events feed of new jobs, agent matches and outreach status changes"""
+    event_types = {t.strip() for t in types.split(",") if t.strip()} if types else None
+    if event_types and not event_types <= EVENT_TYPES:
+        raise HTTPException(status_code=400, detail=f"Unknown event type(s): {', '.join(sorted(event_types - EVENT_TYPES))}")
+
+    last_event_id = request.headers.get("last-event-id")
+    subscription = event_bus.subscribe(
+        event_types, last_event_id=int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+    )
+
+    async def event_stream():
+        try:
+            # Tell EventSource how long to wait before reconnecting
+            yield "retry: 3000\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscription.get(), timeout=EVENT_HEARTBEAT_SECONDS)
+                    yield event.to_sse()
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+        finally:
+            event_bus.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# Analytics endpoints, answered from the weekly rollup tables
+def parse_group_by(group_by: str) -> List[str]:
+    return [name.strip() for name in group_by.split(",") if name.strip()]
+
+
+@app.get("/analytics/jobs")
+async def get_job_analytics(
+    request: Request,
+    response: Response,
+    group_by: str = "period",
+    interval: str = "week",
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    title_family: Optional[str] = None,
+    seniority: Optional[str] = None,
+    state: Optional[str] = None,
+    source: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Posting volume and average advertised salary, e.g. `?title_family=auditor&seniority=senior&state=TX`"""
+    not_modified = conditional_get(request, response, db, ["jobs"])
+    if not_modified:
+        return not_modified
+
+    try:
+        rows = job_market_report(
+            db,
+            parse_group_by(group_by),
+            interval,
+            since,
+            until,
+            title_family=title_family,
+            seniority=seniority,
+            state=state,
+            source=source,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"interval": interval, "group_by": parse_group_by(group_by), "rows": rows}
+
+
+@app.get("/analytics/matches")
+async def get_match_analytics(
+    request: Request,
+    response: Response,
+    group_by: str = "period,matched_agent",
+    interval: str = "month",
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    matched_agent: Optional[str] = None,
+    title_family: Optional[str] = None,
+    seniority: Optional[str] = None,
+    state: Optional[str] = None,
+    source: Optional[str] = None,
+    db: Session = Depends(get_db),
+):
+    """Agent match counts, average confidence and share of each period's matches"""
+    not_modified = conditional_get(request, response, db, ["jobs", "agent_matches"])
+    if not_modified:
+        return not_modified
+
+    try:
+        rows = match_report(
+            db,
+            parse_group_by(group_by),
+            interval,
+            since,
+            until,
+            matched_agent=matched_agent,
+            title_family=title_family,
+            seniority=seniority,
+            state=state,
+            source=source,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"interval": interval, "group_by": parse_group_by(group_by), "rows": rows}
+
+
+@app.get("/analytics/companies")
+async def get_company_analytics(
+    request: Request,
+    response: Response,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    limit: int = Query(20, le=500),
+    db: Session = Depends(get_db),
+):
+    """Companies with the most postings"""
+    not_modified = conditional_get(request, response, db, ["jobs"])
+    if not_modified:
+        return not_modified
+    return company_report(db, since, until, limit)
+
 
 # Statistics endpoints
 @app.get("/stats")
-async def get_statistics(db: Session = Depends(get_db)):
+async def get_statistics(request: Request, response: Response, db: Session = Depends(get_db)):
     """Get system statistics"""
-    total_jobs = db.query(Job).count()
-    total_matches = db.query(AgentMatch).count()
-    total_outreach = db.query(Outreach).count()
+    not_modified = conditional_get(request, response, db, ["jobs", "agent_matches", "outreach"])
+    if not_modified:
+        return not_modified
+
+    # One grouped count per table rather than a COUNT per agent and status
+    total_jobs = db.query(func.count(Job.id)).scalar()
+    matches_by_agent = dict(db.query(AgentMatch.matched_agent, func.count(AgentMatch.id)).group_by(AgentMatch.matched_agent))
+    outreach_by_status = dict(db.query(Outreach.status, func.count(Outreach.id)).group_by(Outreach.status))
 
-    # Agent distribution
-    afc_matches = db.query(AgentMatch).filter(AgentMatch.matched_agent == "AFC").count()
-    fsp_matches = db.query(AgentMatch).filter(AgentMatch.matched_agent == "FSP").count()
-    other_matches = db.query(AgentMatch).filter(AgentMatch.matched_agent == "other").count()
+    total_matches = sum(matches_by_agent.values())
+    afc_matches, fsp_matches, other_matches = (matches_by_agent.get(agent, 0) for agent in ("AFC", "FSP", "other"))
 
-    # Outreach status distribution
-    draft_outreach = db.query(Outreach).filter(Outreach.status == "draft").count()
-    approved_outreach = db.query(Outreach).filter(Outreach.status == "approved").count()
-    sent_outreach = db.query(Outreach).filter(Outreach.status == "sent").count()
-    rejected_outreach = db.query(Outreach).filter(Outreach.status == "rejected").count()
+    total_outreach = sum(outreach_by_status.values())
+    draft_outreach, approved_outreach, sent_outreach, rejected_outreach, failed_outreach = (
+        outreach_by_status.get(outreach_status, 0) for outreach_status in ("draft", "approved", "sent", "rejected", "failed")
+    )
+    queued_outreach = outreach_by_status.get("queued", 0) + outreach_by_status.get("sending", 0)
 
     return {
         "jobs": {"total": total_jobs},
@@ -210,6 +665,8 @@ async def get_statistics(db: Session = Depends(get_db)):
             "approved": approved_outreach,
             "sent": sent_outreach,
             "rejected": rejected_outreach,
+            "queued": queued_outreach,
+            "failed": failed_outreach,
         },
     }
 
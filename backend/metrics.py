@@ -0,0 +1,192 @@
+"""
+Prometheus metrics for the API, scrapers, processor and outreach sender
+
+The API serves every collector at `/metrics`. The scraper and processor CLIs
+exit before a scrape could reach them, so they call `export_metrics` on the
+way out: it pushes to a Pushgateway when `PROMETHEUS_PUSHGATEWAY` is set and
+writes a node_exporter textfile when `PROMETHEUS_TEXTFILE_DIR` is set.
+
+Hot paths record into module-level collectors:
+
+    with observe(HTTP_FETCH_SECONDS, source="indeed", kind="listing"):
+        response = session.get(url)
+
+    with llm_call("analyze") as call:
+        call.response = client.chat.completions.create(...)
+"""
+
+import os
+import time
+from contextlib import contextmanager
+from typing import Optional, Tuple
+
+from loguru import logger
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+from sqlalchemy import event
+
+NAMESPACE = "auditor"
+
+# Request-scale latencies: 5 ms to 2 minutes
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+# Query latencies: 100 µs to 5 s
+QUERY_BUCKETS = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+QUERY_COUNT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 250)
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+
+
+def _collector(metric_class, name: str, documentation: str, labelnames=(), **kwargs):
+    """Create a collector in the default registry, or return the existing one.
+
+    This module is imported both as `metrics` (the processor's path setup)
+    and as `backend.metrics`; both copies must share one set of collectors.
+    """
+    full_name = f"{NAMESPACE}_{name}"
+    existing = REGISTRY._names_to_collectors.get(full_name)
+    if existing is not None:
+        return existing
+    return metric_class(full_name, documentation, labelnames, **kwargs)
+
+
+HTTP_FETCH_SECONDS = _collector(
+    Histogram, "http_fetch_seconds", "Time to fetch a page from a job board", ("source", "kind"), buckets=LATENCY_BUCKETS
+)
+PARSE_SECONDS = _collector(
+    Histogram, "parse_seconds", "Time to parse a fetched page into job fields", ("source", "kind"), buckets=QUERY_BUCKETS
+)
+LLM_REQUEST_SECONDS = _collector(
+    Histogram, "llm_request_seconds", "Latency of LLM requests", ("operation",), buckets=LATENCY_BUCKETS
+)
+LLM_TOKENS = _collector(Histogram, "llm_tokens", "Tokens per LLM request", ("operation", "kind"), buckets=TOKEN_BUCKETS)
+DB_QUERY_SECONDS = _collector(
+    Histogram, "db_query_seconds", "Database statement execution time", ("statement",), buckets=QUERY_BUCKETS
+)
+OUTREACH_SEND_SECONDS = _collector(
+    Histogram, "outreach_send_seconds", "Time to deliver an outreach email", ("status",), buckets=LATENCY_BUCKETS
+)
+API_REQUEST_SECONDS = _collector(
+    Histogram, "api_request_seconds", "API request latency", ("method", "route", "status"), buckets=LATENCY_BUCKETS
+)
+API_REQUEST_QUERIES = _collector(
+    Histogram, "api_request_queries", "Database statements per API request", ("route",), buckets=QUERY_COUNT_BUCKETS
+)
+PIPELINE_STAGE_SECONDS = _collector(
+    Histogram, "pipeline_stage_seconds", "Time to run one batch of a pipeline stage", ("stage",), buckets=LATENCY_BUCKETS
+)
+PIPELINE_LATENCY_SECONDS = _collector(
+    Histogram,
+    "pipeline_latency_seconds",
+    "Time from a job being saved to its outreach draft",
+    buckets=(10, 30, 60, 120, 300, 600, 1800, 3600, 7200, 21600, 86400),
+)
+CACHE_HITS = _collector(Counter, "cache_hits", "Cache lookups answered from the cache", ("cache",))
+CACHE_MISSES = _collector(Counter, "cache_misses", "Cache lookups that had to compute or fetch", ("cache",))
+RETRIES = _collector(Counter, "retries", "Operations retried after a transient failure", ("operation",))
+FAILURES = _collector(Counter, "failures", "Operations that failed", ("operation",))
+SCRAPE_RATE = _collector(Gauge, "scrape_rate", "Requests per second the scraper currently allows a host", ("host",))
+SCRAPE_CIRCUIT_STATE = _collector(
+    Gauge, "scrape_circuit_state", "Circuit breaker state per host: 0 closed, 1 half-open, 2 open", ("host",)
+)
+SCRAPE_THROTTLED = _collector(
+    Counter, "scrape_throttled", "Responses treated as throttling (429, 403, 503)", ("host", "status")
+)
+
+
+@contextmanager
+def observe(histogram, **labels):
+    """Record the time spent in the block on `histogram`, whether or not it raises"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.labels(**labels).observe(time.perf_counter() - start)
+
+
+class LLMCall:
+    """Set `response` to the completion so its token usage is recorded"""
+
+    response = None
+
+
+@contextmanager
+def llm_call(operation: str):
+    """Time one LLM request, count it as a failure if it raises and record its token usage"""
+    call = LLMCall()
+    start = time.perf_counter()
+    try:
+        yield call
+    except BaseException:
+        FAILURES.labels(operation=f"llm_{operation}").inc()
+        raise
+    finally:
+        LLM_REQUEST_SECONDS.labels(operation=operation).observe(time.perf_counter() - start)
+    usage = getattr(call.response, "usage", None)
+    if usage is not None:
+        LLM_TOKENS.labels(operation=operation, kind="prompt").observe(usage.prompt_tokens or 0)
+        LLM_TOKENS.labels(operation=operation, kind="completion").observe(usage.completion_tokens or 0)
+
+
+def record_cache(cache: str, hits: int = 0, misses: int = 0) -> None:
+    if hits:
+        CACHE_HITS.labels(cache=cache).inc(hits)
+    if misses:
+        CACHE_MISSES.labels(cache=cache).inc(misses)
+
+
+def _statement_kind(statement: str) -> str:
+    verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    return verb if verb in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH") else "OTHER"
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["metrics_query_start"].pop()
+    DB_QUERY_SECONDS.labels(statement=_statement_kind(statement)).observe(elapsed)
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("metrics_query_start"):
+        conn.info["metrics_query_start"].pop()
+    FAILURES.labels(operation="db_query").inc()
+
+
+def instrument_engine(engine) -> None:
+    """Time every statement `engine` executes into `db_query_seconds`"""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def metrics_response() -> Tuple[bytes, str]:
+    """The exposition body and content type for a `/metrics` endpoint"""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def export_metrics(job: str, pushgateway: Optional[str] = None, textfile_dir: Optional[str] = None) -> None:
+    """Hand a CLI run's metrics to Prometheus before the process exits.
+
+    Pushes to `pushgateway` (default `$PROMETHEUS_PUSHGATEWAY`) under `job`
+    and writes `<textfile_dir>/<job>.prom` (default `$PROMETHEUS_TEXTFILE_DIR`)
+    for node_exporter's textfile collector. Failures are logged, not raised,
+    so monitoring never fails a run.
+    """
+    from prometheus_client import push_to_gateway, write_to_textfile
+
+    pushgateway = pushgateway or os.getenv("PROMETHEUS_PUSHGATEWAY")
+    textfile_dir = textfile_dir or os.getenv("PROMETHEUS_TEXTFILE_DIR")
+    if pushgateway:
+        try:
+            push_to_gateway(pushgateway, job=job, registry=REGISTRY)
+        except Exception as e:
+            logger.warning(f"Could not push metrics to {pushgateway}: {e}")
+    if textfile_dir:
+        try:
+            os.makedirs(textfile_dir, exist_ok=True)
+            write_to_textfile(os.path.join(textfile_dir, f"{job}.prom"), REGISTRY)
+        except Exception as e:
+            logger.warning(f"Could not write metrics to {textfile_dir}: {e}")
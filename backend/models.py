@@ -2,16 +2,44 @@
 Database models for the Auditor Job Posting Agent
 """
 
+import os
+import sys
 from datetime import datetime
 from typing import Optional
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Boolean, ForeignKey
+from sqlalchemy import (
+    Column,
+    Integer,
+    SmallInteger,
+    String,
+    Text,
+    Date,
+    DateTime,
+    Float,
+    Boolean,
+    ForeignKey,
+    UniqueConstraint,
+)
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from pydantic import BaseModel
 
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from normalization import job_key_values
+
 Base = declarative_base()
 
 
+def _job_key_default(name: str):
+    """Column default deriving a normalized key from the title and location being inserted"""
+
+    def default(context):
+        parameters = context.get_current_parameters()
+        return job_key_values(parameters.get("title"), parameters.get("location"))[name]
+
+    return default
+
+
 class Job(Base):
     """Job posting model"""
 
@@ -27,8 +55,21 @@ class Job(Base):
     url = Column(String(500), nullable=False, unique=True)
     source = Column(String(100), nullable=False, default="indeed")
     date_posted = Column(DateTime, nullable=False, default=datetime.utcnow)
+    # Normalized title and location keys (backend/normalization.py), set on insert:
+    # title_family and seniority are indexes into TITLE_FAMILIES and SENIORITY_LEVELS
+    title_family = Column(SmallInteger, nullable=True, index=True, default=_job_key_default("title_family"))
+    seniority = Column(SmallInteger, nullable=True, index=True, default=_job_key_default("seniority"))
+    city = Column(String(100), nullable=True, index=True, default=_job_key_default("city"))
+    state = Column(String(2), nullable=True, index=True, default=_job_key_default("state"))
+    is_remote = Column(Boolean, nullable=True, index=True, default=_job_key_default("is_remote"))
+    # Maintained by backend/ranking.py: similar-posting cluster and composite priority
+    cluster_key = Column(String(255), nullable=True, index=True)
+    rank_score = Column(Float, nullable=True, index=True)
+    # W3C traceparent of the scrape that found the job (backend/tracing.py); null when tracing is off
+    trace_context = Column(String(55), nullable=True)
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
-    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Indexed for incremental snapshots (backend/snapshot.py)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     # Relationships
     agent_matches = relationship("AgentMatch", back_populates="job", cascade="all, delete-orphan")
@@ -41,11 +82,11 @@ class AgentMatch(Base):
     __tablename__ = "agent_matches"
 
     id = Column(Integer, primary_key=True, index=True)
-    job_id = Column(Integer, ForeignKey("jobs.id"), nullable=False)
+    job_id = Column(Integer, ForeignKey("jobs.id"), nullable=False, index=True)
     matched_agent = Column(String(100), nullable=False, index=True)  # AFC, FSP, other
     confidence_score = Column(Float, nullable=False)  # 0-1 scale
     notes = Column(Text, nullable=True)
-    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
 
     # Relationships
     job = relationship("Job", back_populates="agent_matches")
@@ -57,18 +98,179 @@ class Outreach(Base):
     __tablename__ = "outreach"
 
     id = Column(Integer, primary_key=True, index=True)
-    job_id = Column(Integer, ForeignKey("jobs.id"), nullable=False)
+    job_id = Column(Integer, ForeignKey("jobs.id"), nullable=False, index=True)
     draft_email = Column(Text, nullable=False)
-    status = Column(String(50), nullable=False, default="draft")  # draft, sent, rejected
+    subject = Column(String(500), nullable=True)
+    body = Column(Text, nullable=True)
+    # draft, approved, rejected, then queued -> sending -> sent | failed | suppressed when dispatched
+    status = Column(String(50), nullable=False, default="draft", index=True)
     firm_contact = Column(String(255), nullable=True)
+    send_attempts = Column(Integer, nullable=False, default=0, server_default="0")
+    # Who moved it to `sending` and when, so a restart only recovers abandoned claims
+    claimed_by = Column(String(255), nullable=True)
+    claimed_at = Column(DateTime, nullable=True)
+    last_error = Column(Text, nullable=True)
     sent_at = Column(DateTime, nullable=True)
     created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
-    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow, index=True)
 
     # Relationships
     job = relationship("Job", back_populates="outreach_emails")
 
 
+class TableVersion(Base):
+    """Per-table change counter, bumped by database triggers on every write"""
+
+    __tablename__ = "table_versions"
+
+    table_name = Column(String(100), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class PipelineLock(Base):
+    """Lease held by one process at a time (backend/locks.py); expired leases can be taken over"""
+
+    __tablename__ = "pipeline_locks"
+
+    name = Column(String(100), primary_key=True)
+    owner = Column(String(255), nullable=False)
+    acquired_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+# Scrape run ledger, maintained by scraper/run_ledger.py. Search pages belong
+# to a run and are replayed when an unfinished run resumes; detail URLs are
+# tracked per source across runs so failed ones are retried with backoff.
+class ScrapeRun(Base):
+    """One crawl of a source; `running` until it finishes or is abandoned"""
+
+    __tablename__ = "scrape_runs"
+
+    id = Column(Integer, primary_key=True)
+    source = Column(String(100), nullable=False, index=True)
+    status = Column(String(20), nullable=False, default="running")  # running, completed, abandoned
+    started_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = Column(DateTime, nullable=True)
+
+
+class ScrapePage(Base):
+    """A (term, location, page) search unit of a run"""
+
+    __tablename__ = "scrape_pages"
+    __table_args__ = (UniqueConstraint("run_id", "term", "location", "page", name="uq_scrape_pages_unit"),)
+
+    id = Column(Integer, primary_key=True)
+    run_id = Column(Integer, ForeignKey("scrape_runs.id"), nullable=False, index=True)
+    term = Column(String(255), nullable=False)
+    location = Column(String(255), nullable=False, default="")
+    page = Column(Integer, nullable=False)
+    status = Column(String(20), nullable=False, default="pending")  # pending, done, failed
+    url_count = Column(Integer, nullable=True)
+    last_error = Column(Text, nullable=True)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class ScrapeUrl(Base):
+    """A job detail URL and whether its listing has been scraped and saved"""
+
+    __tablename__ = "scrape_urls"
+    __table_args__ = (UniqueConstraint("source", "url", name="uq_scrape_urls_source_url"),)
+
+    id = Column(Integer, primary_key=True)
+    source = Column(String(100), nullable=False)
+    url = Column(String(1000), nullable=False)
+    run_id = Column(Integer, ForeignKey("scrape_runs.id"), nullable=True)  # the run that last tried it
+    status = Column(String(20), nullable=False, default="pending", index=True)  # pending, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    next_attempt_at = Column(DateTime, nullable=True, index=True)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class PersonalizedParagraph(Base):
+    """LLM-written outreach paragraph, reused for reposts with the same company, agent and duties"""
+
+    __tablename__ = "personalized_paragraphs"
+
+    cache_key = Column(String(64), primary_key=True)
+    company = Column(String(255), nullable=False, index=True)
+    matched_agent = Column(String(100), nullable=False)
+    paragraph = Column(Text, nullable=False)
+    model = Column(String(100), nullable=True)
+    hits = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+class Suppression(Base):
+    """Do-not-contact entry for a company, contact domain or contact address"""
+
+    __tablename__ = "suppressions"
+    __table_args__ = (UniqueConstraint("kind", "value", name="uq_suppressions_kind_value"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String(20), nullable=False)  # company, domain, email
+    value = Column(String(255), nullable=False)  # normalized, see backend/suppression.py
+    reason = Column(String(255), nullable=True)  # unsubscribe, bounce, manual, ...
+    source = Column(String(255), nullable=True)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+
+# Market analytics rollups, maintained by backend/analytics.py. Keyed by the
+# Monday of the posting week; unknown dimensions are stored as "unknown" so
+# the unique keys work for upserts.
+class JobRollup(Base):
+    """Weekly posting counts and salaries by title family, seniority, state and source"""
+
+    __tablename__ = "job_rollups"
+    __table_args__ = (UniqueConstraint("week", "title_family", "seniority", "state", "source", name="uq_job_rollups_key"),)
+
+    id = Column(Integer, primary_key=True)
+    week = Column(Date, nullable=False, index=True)
+    title_family = Column(String(50), nullable=False)
+    seniority = Column(String(50), nullable=False)
+    state = Column(String(20), nullable=False)
+    source = Column(String(100), nullable=False)
+    job_count = Column(Integer, nullable=False, default=0)
+    salary_count = Column(Integer, nullable=False, default=0)  # postings that advertise a salary
+    salary_sum = Column(Float, nullable=False, default=0.0)  # of salary range midpoints
+
+
+class CompanyRollup(Base):
+    """Weekly posting counts and salaries per company"""
+
+    __tablename__ = "company_rollups"
+    __table_args__ = (UniqueConstraint("week", "company_key", name="uq_company_rollups_key"),)
+
+    id = Column(Integer, primary_key=True)
+    week = Column(Date, nullable=False, index=True)
+    company_key = Column(String(255), nullable=False, index=True)  # see normalize_company
+    company = Column(String(255), nullable=False)  # a representative spelling for display
+    job_count = Column(Integer, nullable=False, default=0)
+    salary_count = Column(Integer, nullable=False, default=0)
+    salary_sum = Column(Float, nullable=False, default=0.0)
+
+
+class MatchRollup(Base):
+    """Weekly agent match counts and confidence by the matched job's dimensions"""
+
+    __tablename__ = "match_rollups"
+    __table_args__ = (
+        UniqueConstraint("week", "title_family", "seniority", "state", "source", "matched_agent", name="uq_match_rollups_key"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    week = Column(Date, nullable=False, index=True)
+    title_family = Column(String(50), nullable=False)
+    seniority = Column(String(50), nullable=False)
+    state = Column(String(20), nullable=False)
+    source = Column(String(100), nullable=False)
+    matched_agent = Column(String(100), nullable=False)
+    match_count = Column(Integer, nullable=False, default=0)
+    confidence_sum = Column(Float, nullable=False, default=0.0)
+    high_confidence_count = Column(Integer, nullable=False, default=0)  # confidence >= 0.8
+
+
 # Pydantic models for API serialization
 class JobBase(BaseModel):
     title: str
@@ -88,6 +290,10 @@ class JobCreate(JobBase):
 class JobResponse(JobBase):
     id: int
     date_posted: datetime
+    city: Optional[str] = None
+    state: Optional[str] = None
+    is_remote: Optional[bool] = None
+    rank_score: Optional[float] = None
     created_at: datetime
     updated_at: datetime
 
@@ -95,6 +301,12 @@ class JobResponse(JobBase):
         from_attributes = True
 
 
+class JobSearchResult(JobResponse):
+    rank: float
+    title_highlight: str
+    snippet: Optional[str] = None
+
+
 class AgentMatchBase(BaseModel):
     matched_agent: str
     confidence_score: float
@@ -116,6 +328,8 @@ class AgentMatchResponse(AgentMatchBase):
 
 class OutreachBase(BaseModel):
     draft_email: str
+    subject: Optional[str] = None
+    body: Optional[str] = None
     status: str = "draft"
     firm_contact: Optional[str] = None
 
@@ -127,6 +341,8 @@ class OutreachCreate(OutreachBase):
 class OutreachResponse(OutreachBase):
     id: int
     job_id: int
+    send_attempts: int = 0
+    last_error: Optional[str] = None
     sent_at: Optional[datetime] = None
     created_at: datetime
     updated_at: datetime
@@ -135,6 +351,29 @@ class OutreachResponse(OutreachBase):
         from_attributes = True
 
 
+class SuppressionCreate(BaseModel):
+    value: str
+    kind: Optional[str] = None  # inferred from the value when omitted
+    reason: Optional[str] = None
+
+
+class SuppressionImport(BaseModel):
+    entries: list[SuppressionCreate]
+    source: Optional[str] = None
+
+
+class SuppressionResponse(BaseModel):
+    id: int
+    kind: str
+    value: str
+    reason: Optional[str] = None
+    source: Optional[str] = None
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
 class JobWithMatches(JobResponse):
     agent_matches: list[AgentMatchResponse] = []
     outreach_emails: list[OutreachResponse] = []
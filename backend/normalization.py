@@ -0,0 +1,253 @@
+"""
+Normalization of free-text job fields into comparison keys
+
+Kept free of package-relative imports so it can be loaded both as
+`backend.normalization` and, from the scripts that put `backend/` on
+sys.path, as `normalization`.
+"""
+
+import re
+from functools import lru_cache
+from typing import Iterable, NamedTuple, Optional
+
+from sqlalchemy import bindparam, column, select, table, update
+
+LEGAL_SUFFIXES = set("inc incorporated llc llp lp ltd limited corp corporation co company pc pllc plc cpa cpas".split())
+# Dropped from the end of a name along with legal suffixes: "Smith & Co" -> "smith"
+_TRAILING_WORDS = LEGAL_SUFFIXES | {"and"}
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+# Dotted abbreviations such as "L.L.P." or "P.C."
+_INITIALS = re.compile(r"\b(?:[a-z]\.){2,}")
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """Lowercase words separated by single spaces"""
+    return _NON_WORD.sub(" ", (value or "").lower()).strip()
+
+
+def normalize_company(name: Optional[str]) -> str:
+    """Reduce a company name to a comparison key: "The Smith & Co., LLP" -> "smith" """
+    name = _INITIALS.sub(lambda match: match.group().replace(".", ""), (name or "").lower())
+    words = normalize_text(name.replace("&", " and ")).split()
+    if words and words[0] == "the":
+        words = words[1:]
+    while len(words) > 1 and words[-1] in _TRAILING_WORDS:
+        words.pop()
+    return " ".join(words)
+
+
+# Title and location keys. Jobs store them as small integer codes (the index
+# into these tuples) and a two-letter state, filled in at insert time; see the
+# column defaults on `Job`.
+TITLE_FAMILIES = (
+    "other",
+    "auditor",
+    "accountant",
+    "tax",
+    "compliance",
+    "risk",
+    "controller",
+    "bookkeeper",
+    "financial analyst",
+    "financial services",
+)
+# Ordered, so `Job.seniority >= SENIORITY_LEVELS.index("senior")` selects senior and above
+SENIORITY_LEVELS = ("unknown", "staff", "senior", "manager", "executive")
+UNKNOWN = "unknown"
+
+# Matched against normalize_text() output. First matching rule wins, so more
+# specific families come first ("Tax Accountant" is tax) and the highest level
+# does ("Senior Audit Manager" is a manager).
+TITLE_FAMILY_RULES = tuple(
+    (TITLE_FAMILIES.index(name), re.compile(pattern))
+    for name, pattern in (
+        ("tax", r"\btax"),
+        ("auditor", r"\baudit"),
+        ("compliance", r"\bcompliance\b"),
+        ("risk", r"\brisk\b"),
+        ("controller", r"\b(?:controller|comptroller)\b"),
+        ("bookkeeper", r"\bbookkeep"),
+        ("accountant", r"\b(?:accountant|accounting|acct|acctg|cpa)\b"),
+        ("financial analyst", r"\b(?:analyst|fp a)\b"),
+        ("financial services", r"\bfinancial services\b"),
+    )
+)
+SENIORITY_RULES = tuple(
+    (SENIORITY_LEVELS.index(name), re.compile(pattern))
+    for name, pattern in (
+        ("executive", r"\b(?:chief|cfo|vp|svp|evp|vice president|partner|director|dir|head)\b"),
+        ("manager", r"\b(?:manager|mgr|supervisor)\b"),
+        ("senior", r"\b(?:senior|sr|lead|principal|iii|iv)\b"),
+        ("staff", r"\b(?:staff|associate|junior|jr|entry level|intern|i)\b"),
+    )
+)
+
+
+class TitleKey(NamedTuple):
+    family: int
+    seniority: int
+
+
+class Location(NamedTuple):
+    city: Optional[str]
+    state: Optional[str]
+    is_remote: bool
+
+
+US_STATES = {
+    "AL": "Alabama", "AK": "Alaska", "AZ": "Arizona", "AR": "Arkansas", "CA": "California", "CO": "Colorado",
+    "CT": "Connecticut", "DE": "Delaware", "DC": "District of Columbia", "FL": "Florida", "GA": "Georgia",
+    "HI": "Hawaii", "ID": "Idaho", "IL": "Illinois", "IN": "Indiana", "IA": "Iowa", "KS": "Kansas",
+    "KY": "Kentucky", "LA": "Louisiana", "ME": "Maine", "MD": "Maryland", "MA": "Massachusetts", "MI": "Michigan",
+    "MN": "Minnesota", "MS": "Mississippi", "MO": "Missouri", "MT": "Montana", "NE": "Nebraska", "NV": "Nevada",
+    "NH": "New Hampshire", "NJ": "New Jersey", "NM": "New Mexico", "NY": "New York", "NC": "North Carolina",
+    "ND": "North Dakota", "OH": "Ohio", "OK": "Oklahoma", "OR": "Oregon", "PA": "Pennsylvania",
+    "RI": "Rhode Island", "SC": "South Carolina", "SD": "South Dakota", "TN": "Tennessee", "TX": "Texas",
+    "UT": "Utah", "VT": "Vermont", "VA": "Virginia", "WA": "Washington", "WV": "West Virginia",
+    "WI": "Wisconsin", "WY": "Wyoming",
+}  # fmt: skip
+_STATE_CODES = {name.lower(): code for code, name in US_STATES.items()}
+# Shorthand and bare city names that would otherwise read as something else
+CITY_ALIASES = {
+    "nyc": ("New York", "NY"),
+    "new york": ("New York", "NY"),
+    "new york city": ("New York", "NY"),
+    "manhattan": ("New York", "NY"),
+    "sf": ("San Francisco", "CA"),
+    "sf bay area": ("San Francisco", "CA"),
+    "san francisco bay area": ("San Francisco", "CA"),
+    "philly": ("Philadelphia", "PA"),
+    "dc": ("Washington", "DC"),
+    "washington dc": ("Washington", "DC"),
+    "dfw": ("Dallas", "TX"),
+}
+
+_REMOTE = re.compile(r"\b(?:remote|work from home|wfh|anywhere|virtual)\b")
+# Parts of a location that say nothing about where the job is
+_NOISE = {"", "us", "usa", "united states", "hybrid", "on site", "onsite", "in office", "in"}
+_LOCATION_SEPARATORS = re.compile(r"[,|()/•]|\s[-–]\s")
+_LEADING_PREPOSITION = re.compile(r"^(?:in|near|based in)\s+", re.IGNORECASE)
+_ZIP_CODE = re.compile(r"\b\d{5}(?:-\d{4})?\b")
+
+
+@lru_cache(maxsize=65536)
+def canonical_title(title: Optional[str]) -> TitleKey:
+    """Family and seniority codes of a job title: "Sr. Internal Auditor II" -> (auditor, senior)"""
+    normalized = normalize_text(title)
+    family = next((code for code, pattern in TITLE_FAMILY_RULES if pattern.search(normalized)), 0)
+    level = next((code for code, pattern in SENIORITY_RULES if pattern.search(normalized)), 0)
+    return TitleKey(family, level)
+
+
+def _display_city(part: str) -> str:
+    return part.title() if part.isupper() or part.islower() else part
+
+
+@lru_cache(maxsize=65536)
+def parse_location(location: Optional[str]) -> Location:
+    """City, state and remote flag of a free-text location: "NYC" -> ("New York", "NY", False)"""
+    is_remote = bool(_REMOTE.search((location or "").lower()))
+    parts = []
+    for part in _LOCATION_SEPARATORS.split(location or ""):
+        part = " ".join(_ZIP_CODE.sub(" ", _REMOTE.sub(" ", part.lower() if is_remote else part)).split())
+        part = _LEADING_PREPOSITION.sub("", part)
+        if normalize_text(part) not in _NOISE:
+            parts.append(part)
+
+    def state_code(part: str) -> Optional[str]:
+        if len(part) == 2 and part.upper() in US_STATES:
+            return part.upper()
+        return _STATE_CODES.get(normalize_text(part))
+
+    # The last state-like part is the state ("Washington, PA"); the part before it is the city
+    city = state = None
+    candidates = parts
+    for position in range(len(parts) - 1, -1, -1):
+        state = state_code(parts[position])
+        if state:
+            candidates = parts[:position]
+            break
+    if not candidates and parts and normalize_text(parts[-1]) in CITY_ALIASES:
+        # A bare "New York" or "DC"
+        city = CITY_ALIASES[normalize_text(parts[-1])][0]
+    elif candidates:
+        key = normalize_text(candidates[0])
+        if key in CITY_ALIASES:
+            city, alias_state = CITY_ALIASES[key]
+            state = state or alias_state
+        else:
+            city = _display_city(candidates[0])
+    return Location(city, state, is_remote)
+
+
+def title_family(title: Optional[str]) -> str:
+    """Role family of a job title: "Sr. Internal Auditor" -> "auditor" """
+    return TITLE_FAMILIES[canonical_title(title).family]
+
+
+def seniority(title: Optional[str]) -> str:
+    """Level of a job title: "Sr. Internal Auditor" -> "senior" """
+    return SENIORITY_LEVELS[canonical_title(title).seniority]
+
+
+def location_state(location: Optional[str]) -> str:
+    """Two-letter state of a location, "remote", or "unknown" """
+    parsed = parse_location(location)
+    return "remote" if parsed.is_remote else parsed.state or UNKNOWN
+
+
+def cluster_key(title: Optional[str], company: Optional[str]) -> str:
+    """Key shared by postings of the same role at the same firm (reposts, multiple locations)"""
+    return f"{normalize_text(title)}|{normalize_company(company)}"[:255]
+
+
+_jobs = table(
+    "jobs",
+    column("id"),
+    column("title"),
+    column("location"),
+    column("title_family"),
+    column("seniority"),
+    column("city"),
+    column("state"),
+    column("is_remote"),
+)
+
+
+def job_key_values(title: Optional[str], location: Optional[str]) -> dict:
+    """Values of the normalized key columns of a job"""
+    title_key = canonical_title(title)
+    parsed = parse_location(location)
+    return {
+        "title_family": title_key.family,
+        "seniority": title_key.seniority,
+        "city": parsed.city[:100] if parsed.city else None,
+        "state": parsed.state,
+        "is_remote": parsed.is_remote,
+    }
+
+
+def normalize_jobs(db, job_ids: Iterable[int]) -> int:
+    """Recompute the key columns of jobs whose title or location changed; `db` is a Session or Connection"""
+    rows = []
+    job_ids = sorted(set(job_ids))
+    for start in range(0, len(job_ids), 500):
+        statement = select(_jobs.c.id, _jobs.c.title, _jobs.c.location).where(_jobs.c.id.in_(job_ids[start : start + 500]))
+        for job_id, title, location in db.execute(statement):
+            rows.append({"b_id": job_id, **{f"b_{name}": value for name, value in job_key_values(title, location).items()}})
+    if rows:
+        values = {name: bindparam(f"b_{name}") for name in ("title_family", "seniority", "city", "state", "is_remote")}
+        db.execute(update(_jobs).where(_jobs.c.id == bindparam("b_id")).values(**values), rows)
+    return len(rows)
+
+
+def backfill_job_keys(db, batch_size: int = 1000) -> int:
+    """Fill the key columns of jobs inserted before they existed"""
+    total = 0
+    while True:
+        statement = select(_jobs.c.id).where(_jobs.c.title_family.is_(None)).order_by(_jobs.c.id).limit(batch_size)
+        job_ids = [row[0] for row in db.execute(statement)]
+        if not job_ids:
+            return total
+        total += normalize_jobs(db, job_ids)
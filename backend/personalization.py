@@ -0,0 +1,213 @@
+"""
+LLM-written personalization for outreach drafts
+
+For each (job, agent match) pair the personalizer asks the model for a short
+paragraph tying the role's responsibilities to the matched agent. Calls run
+concurrently with bounded parallelism, and paragraphs are cached in the
+database keyed by company, agent and normalized responsibilities so reposts
+of the same role reuse the text instead of paying for another call. A call
+that fails or times out yields None, and the draft is rendered from the plain
+template instead.
+"""
+
+import asyncio
+import contextlib
+import hashlib
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from loguru import logger
+from sqlalchemy.orm import Session
+
+from .metrics import llm_call, record_cache
+from .models import AgentMatch, Job, PersonalizedParagraph
+from .tracing import start_span
+from .templating import AGENT_DESCRIPTIONS, DEFAULT_AGENT_DESCRIPTION
+
+PERSONALIZATION_SYSTEM_PROMPT = (
+    "You write concise, specific B2B outreach copy for Tellen, which provides AI agents for accounting "
+    "and financial services work. Never invent facts about the company."
+)
+
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+@dataclass
+class PersonalizationRequest:
+    """What the model needs to know about one job, detached from the ORM session"""
+
+    cache_key: str
+    company: str
+    title: str
+    matched_agent: str
+    responsibilities: str
+
+
+@dataclass
+class BatchReport:
+    jobs: int = 0
+    cache_hits: int = 0
+    llm_calls: int = 0
+    timeouts: int = 0
+    failures: int = 0
+    fallbacks: int = 0
+    seconds: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.cache_hits / self.jobs if self.jobs else 0.0
+
+
+def normalize_responsibilities(description: Optional[str]) -> str:
+    """Reduce a description to lowercase words so whitespace and punctuation edits share a cache entry"""
+    return _NON_WORD.sub(" ", (description or "").lower()).strip()
+
+
+def cache_key(company: str, matched_agent: str, description: Optional[str]) -> str:
+    normalized_company = _NON_WORD.sub(" ", company.lower()).strip()
+    key = "|".join([normalized_company, matched_agent, normalize_responsibilities(description)])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+class OutreachPersonalizer:
+    """Generates personalized paragraphs for batches of outreach drafts"""
+
+    def __init__(
+        self,
+        client=None,
+        model: Optional[str] = None,
+        concurrency: int = 8,
+        timeout: float = 20.0,
+        max_description_chars: int = 2000,
+    ):
+        self.model = model or os.getenv("OPENAI_MODEL", "gpt-5-codex")
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.max_description_chars = max_description_chars
+        self._client = client
+
+    @property
+    def enabled(self) -> bool:
+        """Whether there is a client to call: one was passed in, or an API key is configured"""
+        return self._client is not None or bool(os.getenv("OPENAI_API_KEY"))
+
+    def _batch_client(self):
+        """Async context manager giving the client for one batch.
+
+        Each batch runs on its own event loop (`asyncio.run`), and an
+        AsyncOpenAI client's connection pool is bound to the loop it first
+        ran on, so a client is opened and closed per batch rather than kept.
+        """
+        if self._client is not None:
+            return contextlib.nullcontext(self._client)
+        from openai import AsyncOpenAI
+
+        return AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+
+    def build_request(self, job: Job, agent_match: AgentMatch) -> PersonalizationRequest:
+        return PersonalizationRequest(
+            cache_key=cache_key(job.company, agent_match.matched_agent, job.description),
+            company=job.company,
+            title=job.title,
+            matched_agent=agent_match.matched_agent,
+            responsibilities=(job.description or "")[: self.max_description_chars],
+        )
+
+    def build_prompt(self, request: PersonalizationRequest) -> str:
+        agent_description = AGENT_DESCRIPTIONS.get(request.matched_agent, DEFAULT_AGENT_DESCRIPTION)
+        return f"""
+{request.company} is hiring for a {request.title} position. The posting lists these responsibilities:
+
+{request.responsibilities}
+
+Write one paragraph of 2-3 sentences for an outreach email to their hiring manager explaining how our
+{agent_description} could take on the repetitive parts of this work. Refer to the specific responsibilities.
+Return only the paragraph, with no greeting or sign-off.
+""".strip()
+
+    async def _generate(self, client, request: PersonalizationRequest) -> str:
+        with start_span("llm.personalize", {"llm.model": self.model}), llm_call("personalize") as call:
+            call.response = await client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": PERSONALIZATION_SYSTEM_PROMPT},
+                    {"role": "user", "content": self.build_prompt(request)},
+                ],
+                temperature=0.7,
+                max_tokens=200,
+            )
+        return call.response.choices[0].message.content.strip()
+
+    async def _generate_all(self, requests: Sequence[PersonalizationRequest], report: BatchReport) -> Dict[str, Optional[str]]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def generate_one(client, request: PersonalizationRequest) -> Optional[str]:
+            async with semaphore:
+                report.llm_calls += 1
+                try:
+                    return await asyncio.wait_for(self._generate(client, request), self.timeout)
+                except asyncio.TimeoutError:
+                    report.timeouts += 1
+                    logger.warning(f"Personalization for {request.company} timed out; using the template")
+                except Exception as e:
+                    report.failures += 1
+                    logger.error(f"Personalization for {request.company} failed; using the template: {e}")
+                return None
+
+        async with self._batch_client() as client:
+            paragraphs = await asyncio.gather(*(generate_one(client, request) for request in requests))
+        return {request.cache_key: paragraph for request, paragraph in zip(requests, paragraphs)}
+
+    def personalize(self, db: Session, pairs: Sequence[Tuple[Job, AgentMatch]]) -> Tuple[List[Optional[str]], BatchReport]:
+        """Return a paragraph (or None to fall back to the template) for each pair.
+
+        Cached paragraphs are read and new ones written through `db`, so they
+        land in the caller's transaction.
+        """
+        start = time.perf_counter()
+        report = BatchReport(jobs=len(pairs))
+        requests = [self.build_request(job, agent_match) for job, agent_match in pairs]
+        keys = {request.cache_key for request in requests}
+
+        cached = {
+            row.cache_key: row for row in db.query(PersonalizedParagraph).filter(PersonalizedParagraph.cache_key.in_(keys))
+        }
+        paragraphs: Dict[str, Optional[str]] = {key: row.paragraph for key, row in cached.items()}
+
+        # Reposts within the batch share one call
+        missing = list({request.cache_key: request for request in requests if request.cache_key not in cached}.values())
+        if missing and self.enabled:
+            generated = asyncio.run(self._generate_all(missing, report))
+            for request in missing:
+                paragraph = generated[request.cache_key]
+                if paragraph:
+                    paragraphs[request.cache_key] = paragraph
+                    db.add(
+                        PersonalizedParagraph(
+                            cache_key=request.cache_key,
+                            company=request.company,
+                            matched_agent=request.matched_agent,
+                            paragraph=paragraph,
+                            model=self.model,
+                        )
+                    )
+
+        results = []
+        for request in requests:
+            if request.cache_key in cached:
+                report.cache_hits += 1
+                cached[request.cache_key].hits += 1
+            results.append(paragraphs.get(request.cache_key))
+        report.fallbacks = sum(paragraph is None for paragraph in results)
+        record_cache("personalization", hits=report.cache_hits, misses=report.jobs - report.cache_hits)
+        db.flush()
+
+        report.seconds = time.perf_counter() - start
+        logger.info(
+            f"Personalized {report.jobs} drafts in {report.seconds:.2f}s: {report.cache_hits} cached "
+            f"({report.hit_rate:.0%} hit rate), {report.llm_calls} model calls, {report.fallbacks} template fallbacks"
+        )
+        return results, report
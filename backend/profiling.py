@@ -0,0 +1,230 @@
+"""
+Profiling mode for the CLI entry points
+
+`--profile` on the scraper, test run, AI processor and outreach CLIs runs the
+whole command under a profiler and writes one set of artifacts per run to
+`$PROFILE_DIR` (default ./profiles):
+
+  <name>-<time>-<pid>.prof       cProfile stats for pstats or snakeviz (cprofile mode)
+  <name>-<time>-<pid>.collapsed  folded stacks for flamegraph.pl or speedscope (sample mode)
+  <name>-<time>-<pid>.txt        per-stage wall-clock table and the top-N hot functions
+
+Both modes cover every thread, so the scraper's fetch and crawl pools show
+up: cProfile runs one profiler per thread started during the run and merges
+them at exit. `--profile sample` swaps cProfile for a stack sampler that reads
+every thread's stack each `PROFILE_INTERVAL` seconds (default 0.005); its overhead
+does not grow with the number of calls, so it is the one to use on production
+runs. Setting `PROFILE=cprofile` or `PROFILE=sample` turns profiling on
+without the flag, e.g. under a scheduler.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+PROFILE_MODES = ("cprofile", "sample")
+
+
+def add_profile_arguments(parser) -> None:
+    """Add `--profile [cprofile|sample]` and `--profile-top N` to a CLI's argument parser"""
+    parser.add_argument(
+        "--profile",
+        nargs="?",
+        choices=PROFILE_MODES,
+        const=os.getenv("PROFILE_MODE", "cprofile"),
+        default=os.getenv("PROFILE") or None,
+        help="profile the run with cProfile (default) or the stack sampler; artifacts go to $PROFILE_DIR",
+    )
+    parser.add_argument("--profile-top", type=int, default=25, help="functions listed in the profile report")
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """Samples the stacks of every thread but its own on a background thread"""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                if stack:
+                    self.stacks[tuple(reversed(stack))] += 1
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def collapsed(self) -> str:
+        """Folded stacks, one `outer;...;inner count` line per distinct stack"""
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top(self, limit: int) -> List[Tuple[str, int, int]]:
+        """(function, own samples, total samples) for the functions most often on top of the stack"""
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for label in set(stack):
+                total[label] += count
+        return [(label, samples, total[label]) for label, samples in own.most_common(limit)]
+
+
+class RunProfiler:
+    """Profile a CLI run and time its stages; a no-op apart from stage timing when `mode` is None
+
+    with RunProfiler("ai_processor", args.profile) as profiler:
+        with profiler.stage("match"):
+            ...
+    """
+
+    def __init__(self, name: str, mode: Optional[str] = None, output_dir: Optional[str] = None, top: int = 25):
+        if mode is not None and mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode {mode!r}; expected one of {', '.join(PROFILE_MODES)}")
+        self.name = name
+        self.mode = mode
+        self.output_dir = output_dir or os.getenv("PROFILE_DIR", "./profiles")
+        self.top = top
+        self.stages: List[Tuple[str, float]] = []
+        self.artifacts: Dict[str, str] = {}
+        self.seconds = 0.0
+        self._profiler = None
+        self._thread_profilers: List[cProfile.Profile] = []
+        self._start = 0.0
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode is not None
+
+    @contextmanager
+    def stage(self, name: str):
+        """Record the wall-clock time of the block as stage `name`"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append((name, time.perf_counter() - start))
+
+    def _profile_thread(self, frame, event, arg) -> None:
+        """`threading.setprofile` hook: the first call in a new thread starts that thread's profiler"""
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Python 3.12+ profiles every thread from the one profiler already running
+            sys.setprofile(None)
+            return
+        self._thread_profilers.append(profiler)
+
+    def __enter__(self) -> "RunProfiler":
+        if self.mode == "cprofile":
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+            threading.setprofile(self._profile_thread)
+        elif self.mode == "sample":
+            self._profiler = StackSampler(float(os.getenv("PROFILE_INTERVAL", "0.005")))
+            self._profiler.start()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.seconds = time.perf_counter() - self._start
+        if self.mode == "cprofile":
+            threading.setprofile(None)
+            self._profiler.disable()
+        elif self.mode == "sample":
+            self._profiler.stop()
+        if self.enabled:
+            try:
+                self.write()
+            except OSError as e:
+                logger.warning(f"Could not write profile for {self.name}: {e}")
+        return False
+
+    def stage_table(self) -> str:
+        """Wall-clock seconds per stage, repeated stages summed, in the order they first ran"""
+        totals: Dict[str, List[float]] = {}
+        for name, seconds in self.stages:
+            total = totals.setdefault(name, [0, 0.0])
+            total[0] += 1
+            total[1] += seconds
+        width = max([len(name) for name in totals] + [len("total")])
+        lines = [f"{'stage':<{width}}  {'runs':>5}  {'seconds':>10}  {'share':>6}"]
+        for name, (runs, seconds) in totals.items():
+            share = seconds / self.seconds if self.seconds else 0.0
+            lines.append(f"{name:<{width}}  {runs:>5}  {seconds:>10.3f}  {share:>6.1%}")
+        lines.append(f"{'total':<{width}}  {'':>5}  {self.seconds:>10.3f}")
+        return "\n".join(lines)
+
+    def stats(self, stream=None) -> pstats.Stats:
+        """The cProfile stats of every thread profiled during the run, merged"""
+        stats = pstats.Stats(self._profiler, stream=stream)
+        for profiler in self._thread_profilers:
+            stats.add(profiler)
+        return stats
+
+    def hot_functions(self) -> str:
+        if self.mode == "cprofile":
+            stream = io.StringIO()
+            stats = self.stats(stream)
+            stats.sort_stats("tottime").print_stats(self.top)
+            stats.sort_stats("cumulative").print_stats(self.top)
+            return stream.getvalue()
+        samples = self._profiler.samples
+        lines = [f"{samples} samples every {self._profiler.interval * 1000:g} ms", "   own%  total%  function"]
+        for label, own, total in self._profiler.top(self.top):
+            lines.append(f"{own / samples:>7.1%} {total / samples:>7.1%}  {label}")
+        return "\n".join(lines)
+
+    def report(self) -> str:
+        return f"Profile of {self.name} ({self.mode})\n\n{self.stage_table()}\n\n{self.hot_functions()}\n"
+
+    def write(self) -> Dict[str, str]:
+        """Write this run's artifacts and return their paths by kind"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, f"{self.name}-{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}")
+        if self.mode == "cprofile":
+            self.artifacts["prof"] = f"{base}.prof"
+            self.stats().dump_stats(self.artifacts["prof"])
+        else:
+            self.artifacts["collapsed"] = f"{base}.collapsed"
+            with open(self.artifacts["collapsed"], "w", encoding="utf-8") as f:
+                f.write(self._profiler.collapsed())
+        self.artifacts["report"] = f"{base}.txt"
+        report = self.report()
+        with open(self.artifacts["report"], "w", encoding="utf-8") as f:
+            f.write(report)
+        logger.info(f"Profile of {self.name} written to {self.artifacts['report']}\n{self.stage_table()}")
+        return self.artifacts
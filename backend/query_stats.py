@@ -0,0 +1,142 @@
+"""
+Per-request query counts and the slow query log
+
+`install_query_stats(engine)` adds cursor event listeners that count every
+statement and its execution time into the `QueryStats` of the current context:
+
+    with track_queries() as stats:
+        ...
+    print(stats.count, stats.seconds)
+
+The API opens one per request (see `main.py`). Statements slower than
+`SLOW_QUERY_MS` (default 250; empty disables) are logged with their parameters
+and the database's plan for them (`EXPLAIN QUERY PLAN` on SQLite, `EXPLAIN`
+elsewhere).
+"""
+
+import os
+import sys
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Optional
+
+from loguru import logger
+from sqlalchemy import event
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    seconds: float = 0.0
+    slow: int = 0
+
+
+def _threshold_from_env() -> Optional[float]:
+    value = os.getenv("SLOW_QUERY_MS", "250").strip()
+    return float(value) / 1000 if value else None
+
+
+class _Shared:
+    def __init__(self):
+        self.current: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+        self.slow_query_seconds: Optional[float] = _threshold_from_env()
+
+
+# Imported both as `query_stats` (the database module's path setup) and as
+# `backend.query_stats`; both copies must share the context and threshold
+_shared = (
+    next(
+        (
+            module._shared
+            for module in (sys.modules.get("query_stats"), sys.modules.get("backend.query_stats"))
+            if module is not None and hasattr(module, "_shared")
+        ),
+        None,
+    )
+    or _Shared()
+)
+
+
+@contextmanager
+def track_queries():
+    """Count the statements run in this context (and threads it hands work to) into a new `QueryStats`"""
+    stats = QueryStats()
+    token = _shared.current.set(stats)
+    try:
+        yield stats
+    finally:
+        _shared.current.reset(token)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _shared.current.get()
+
+
+def set_slow_query_threshold(milliseconds: Optional[float]) -> Optional[float]:
+    """Log statements slower than `milliseconds` (None turns the log off); returns the previous threshold"""
+    previous = _shared.slow_query_seconds
+    _shared.slow_query_seconds = None if milliseconds is None else milliseconds / 1000
+    return None if previous is None else previous * 1000
+
+
+def explain(connection, statement: str, parameters) -> str:
+    """The database's plan for `statement`, run on the raw DBAPI connection so no events fire"""
+    sqlite = connection.dialect.name == "sqlite"
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(("EXPLAIN QUERY PLAN " if sqlite else "EXPLAIN ") + statement, parameters or ())
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    if not sqlite:
+        return "\n".join(str(row[0]) for row in rows)
+    # (id, parent, notused, detail) rows; indent each step under its parent
+    depth = {0: -1}
+    lines = []
+    for node_id, parent, _, detail in rows:
+        depth[node_id] = depth.get(parent, -1) + 1
+        lines.append(f"{'  ' * depth[node_id]}{detail}")
+    return "\n".join(lines)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_stats_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_stats_start"].pop()
+    stats = _shared.current.get()
+    if stats is not None:
+        stats.count += 1
+        stats.seconds += elapsed
+
+    threshold = _shared.slow_query_seconds
+    if threshold is None or elapsed < threshold:
+        return
+    if stats is not None:
+        stats.slow += 1
+    plan = ""
+    verb = statement.lstrip()[:6].upper()
+    if not executemany and (verb == "SELECT" or verb.startswith("WITH")):
+        try:
+            plan = "\n" + explain(conn, statement, parameters)
+        except Exception as e:
+            plan = f"\n(EXPLAIN failed: {e})"
+    logger.warning(f"Slow query ({elapsed * 1000:.1f} ms): {statement} {parameters!r}{plan}")
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_stats_start"):
+        conn.info["query_stats_start"].pop()
+
+
+def install_query_stats(engine) -> None:
+    """Count and time `engine`'s statements into the current `QueryStats` and log slow ones"""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
@@ -0,0 +1,201 @@
+"""
+Job ranking for outreach prioritization
+
+Each job gets a composite `rank_score` (0-100) from its advertised salary,
+how many similar postings the firm has open (same normalized title and
+company), the confidence of its best agent match and that agent's automation
+potential. Scores are stored in the indexed `jobs.rank_score` column and
+refreshed incrementally: whenever jobs or matches are written, the writer
+calls `refresh_rank_scores` for the affected jobs, which also rescores the
+other postings in their clusters. Top-K queries then read the index instead
+of sorting the table.
+
+Uses SQLAlchemy Core table stubs rather than the ORM models, so it works the
+same whether it is loaded as `backend.ranking` or, from the scripts that put
+`backend/` on sys.path, as `ranking`.
+"""
+
+import math
+import os
+import sys
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from loguru import logger
+from sqlalchemy import DateTime, bindparam, column, select, table, update
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from normalization import cluster_key
+
+jobs_table = table(
+    "jobs",
+    column("id"),
+    column("title"),
+    column("company"),
+    column("salary_min"),
+    column("salary_max"),
+    column("cluster_key"),
+    column("rank_score"),
+    column("updated_at", DateTime),
+)
+agent_matches_table = table("agent_matches", column("job_id"), column("matched_agent"), column("confidence_score"))
+
+# Share of the score contributed by each input; they sum to 1
+RANK_WEIGHTS = {"salary": 0.35, "demand": 0.2, "confidence": 0.3, "automation": 0.15}
+# Salaries at or above this earn the full salary component
+SALARY_CEILING = 200_000
+# A firm with this many similar postings open earns the full demand component
+CLUSTER_CEILING = 10
+# How much of the role the matched agent can take over
+AUTOMATION_POTENTIAL = {"AFC": 1.0, "FSP": 1.0, "other": 0.3}
+
+# Keeps IN lists well under SQLite's bound parameter limit
+_CHUNK_SIZE = 500
+
+
+def compute_rank_score(
+    salary_min: Optional[float],
+    salary_max: Optional[float],
+    cluster_size: int,
+    confidence: Optional[float],
+    matched_agent: Optional[str],
+) -> float:
+    """Composite 0-100 score; a job without a salary or a match scores zero on those inputs"""
+    known = [salary for salary in (salary_min, salary_max) if salary]
+    salary = min(1.0, sum(known) / len(known) / SALARY_CEILING) if known else 0.0
+    # Logarithmic: the second and third postings say more about demand than the tenth
+    demand = min(1.0, math.log(max(cluster_size, 1)) / math.log(CLUSTER_CEILING))
+    automation = AUTOMATION_POTENTIAL.get(matched_agent, 0.0)
+
+    score = (
+        RANK_WEIGHTS["salary"] * salary
+        + RANK_WEIGHTS["demand"] * demand
+        + RANK_WEIGHTS["confidence"] * (confidence or 0.0)
+        + RANK_WEIGHTS["automation"] * automation
+    )
+    return round(100 * score, 3)
+
+
+def _chunks(values: List, size: int = _CHUNK_SIZE) -> Iterable[List]:
+    for start in range(0, len(values), size):
+        yield values[start : start + size]
+
+
+def refresh_rank_scores(db, job_ids: Iterable[int]) -> int:
+    """Recompute scores for `job_ids` and every posting that shares a cluster with them.
+
+    `db` is a Session or Connection; the updates join the caller's
+    transaction. Jobs whose cluster key or score changes get a new
+    `updated_at`, as an ORM update would, so incremental snapshots pick them
+    up. Returns the number of jobs rescored.
+    """
+    job_ids = sorted(set(job_ids))
+    if not job_ids:
+        return 0
+    now = datetime.utcnow()
+
+    # Cluster keys follow title and company, so bring them up to date first.
+    # A job that moved clusters also changes the size of the one it left.
+    keys = set()
+    key_updates = []
+    for chunk in _chunks(job_ids):
+        rows = db.execute(
+            select(jobs_table.c.id, jobs_table.c.title, jobs_table.c.company, jobs_table.c.cluster_key).where(
+                jobs_table.c.id.in_(chunk)
+            )
+        )
+        for job_id, title, company, current_key in rows:
+            key = cluster_key(title, company)
+            keys.add(key)
+            if current_key != key:
+                if current_key is not None:
+                    keys.add(current_key)
+                key_updates.append({"b_id": job_id, "b_key": key})
+    if key_updates:
+        db.execute(
+            update(jobs_table)
+            .where(jobs_table.c.id == bindparam("b_id"))
+            .values(cluster_key=bindparam("b_key"), updated_at=now),
+            key_updates,
+        )
+
+    members: List[Tuple] = []
+    for chunk in _chunks(sorted(keys)):
+        members += db.execute(
+            select(
+                jobs_table.c.id,
+                jobs_table.c.salary_min,
+                jobs_table.c.salary_max,
+                jobs_table.c.cluster_key,
+                jobs_table.c.rank_score,
+            ).where(jobs_table.c.cluster_key.in_(chunk))
+        ).all()
+    cluster_sizes = Counter(member.cluster_key for member in members)
+
+    best_matches: Dict[int, Tuple[float, str]] = {}
+    for chunk in _chunks([member.id for member in members]):
+        rows = db.execute(
+            select(
+                agent_matches_table.c.job_id, agent_matches_table.c.confidence_score, agent_matches_table.c.matched_agent
+            ).where(agent_matches_table.c.job_id.in_(chunk))
+        )
+        for job_id, confidence, agent in rows:
+            if job_id not in best_matches or confidence > best_matches[job_id][0]:
+                best_matches[job_id] = (confidence, agent)
+
+    scores = [
+        {
+            "b_id": member.id,
+            "b_score": compute_rank_score(
+                member.salary_min,
+                member.salary_max,
+                cluster_sizes[member.cluster_key],
+                *best_matches.get(member.id, (None, None)),
+            ),
+        }
+        for member in members
+    ]
+    # Only rows whose score moved are written, so unchanged rows keep their updated_at
+    current = {member.id: member.rank_score for member in members}
+    changed = [score for score in scores if current[score["b_id"]] != score["b_score"]]
+    if changed:
+        db.execute(
+            update(jobs_table)
+            .where(jobs_table.c.id == bindparam("b_id"))
+            .values(rank_score=bindparam("b_score"), updated_at=now),
+            changed,
+        )
+    return len(scores)
+
+
+def backfill_rank_scores(db, batch_size: int = 1000) -> int:
+    """Score every job that has no rank yet, e.g. after the column was added"""
+    total = 0
+    while True:
+        job_ids = [
+            row[0]
+            for row in db.execute(
+                select(jobs_table.c.id).where(jobs_table.c.rank_score.is_(None)).order_by(jobs_table.c.id).limit(batch_size)
+            )
+        ]
+        if not job_ids:
+            break
+        total += refresh_rank_scores(db, job_ids)
+    if total:
+        logger.info(f"Backfilled rank scores for {total} jobs")
+    return total
+
+
+def rescore_all(db, batch_size: int = 1000) -> int:
+    """Recompute every score, e.g. after the weights changed"""
+    db.execute(update(jobs_table).values(rank_score=None))
+    return backfill_rank_scores(db, batch_size)
+
+
+if __name__ == "__main__":
+    from database import engine
+
+    with engine.begin() as conn:
+        print(f"Rescored {rescore_all(conn)} jobs")
@@ -0,0 +1,156 @@
+"""
+Full-text search over job postings
+"""
+
+import html
+import re
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from .normalization import parse_location
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+SNIPPET_TOKENS = 24
+
+# The database wraps matches in these private-use characters; the scraped text
+# is HTML-escaped before they are swapped for the <mark> tags
+_MARK_START = "\ue000"
+_MARK_END = "\ue001"
+
+# Column weights for ranking: title matches count most, then company, then description
+TITLE_WEIGHT = 10.0
+COMPANY_WEIGHT = 5.0
+DESCRIPTION_WEIGHT = 1.0
+
+_TERM_PATTERN = re.compile(r"\w+\*?", re.UNICODE)
+
+_JOB_COLUMNS = (
+    "jobs.id, jobs.title, jobs.company, jobs.location, jobs.salary_min, jobs.salary_max, "
+    "jobs.description, jobs.url, jobs.source, jobs.date_posted, jobs.city, jobs.state, jobs.is_remote, "
+    "jobs.created_at, jobs.updated_at"
+)
+
+
+def build_fts5_query(query: str) -> str:
+    """Turn free text into an FTS5 query matching all terms.
+
+    Every term is quoted so punctuation in user input can never be parsed as
+    FTS5 syntax; a trailing `*` on a term is kept as a prefix search.
+    """
+    terms = []
+    for term in _TERM_PATTERN.findall(query):
+        if term.endswith("*"):
+            terms.append(f'"{term[:-1]}"*')
+        else:
+            terms.append(f'"{term}"')
+    return " ".join(terms)
+
+
+def highlight_html(text: Optional[str]) -> Optional[str]:
+    """Escape highlighted text from the database as HTML, with its matches in <mark> tags"""
+    if text is None:
+        return None
+    return html.escape(text).replace(_MARK_START, HIGHLIGHT_START).replace(_MARK_END, HIGHLIGHT_END)
+
+
+def _filter_clauses(
+    params: Dict,
+    location: Optional[str],
+    min_salary: Optional[float],
+    max_salary: Optional[float],
+    agent: Optional[str],
+) -> List[str]:
+    clauses = []
+    if location:
+        # A bare state ("TX", "Texas") or "remote" uses the indexed normalized columns
+        parsed = parse_location(location)
+        if parsed.is_remote and not parsed.city and not parsed.state:
+            clauses.append("jobs.is_remote")
+        elif parsed.state and not parsed.city:
+            clauses.append("jobs.state = :state")
+            params["state"] = parsed.state
+        else:
+            clauses.append("jobs.location LIKE :location")
+            params["location"] = f"%{location}%"
+    if min_salary is not None:
+        clauses.append("jobs.salary_max >= :min_salary")
+        params["min_salary"] = min_salary
+    if max_salary is not None:
+        clauses.append("jobs.salary_min <= :max_salary")
+        params["max_salary"] = max_salary
+    if agent:
+        clauses.append("EXISTS (SELECT 1 FROM agent_matches WHERE agent_matches.job_id = jobs.id AND matched_agent = :agent)")
+        params["agent"] = agent
+    return clauses
+
+
+def _sqlite_search(clauses: List[str]) -> str:
+    where = " AND ".join(["jobs_fts MATCH :query"] + clauses)
+    return f"""
+        SELECT {_JOB_COLUMNS},
+               -bm25(jobs_fts, {TITLE_WEIGHT}, {COMPANY_WEIGHT}, {DESCRIPTION_WEIGHT}) AS rank,
+               highlight(jobs_fts, 0, :hl_start, :hl_end) AS title_highlight,
+               snippet(jobs_fts, 2, :hl_start, :hl_end, '…', {SNIPPET_TOKENS}) AS snippet
+        FROM jobs_fts
+        JOIN jobs ON jobs.id = jobs_fts.rowid
+        WHERE {where}
+        ORDER BY bm25(jobs_fts, {TITLE_WEIGHT}, {COMPANY_WEIGHT}, {DESCRIPTION_WEIGHT})
+        LIMIT :limit OFFSET :skip
+    """
+
+
+def _postgres_search(clauses: List[str]) -> str:
+    where = " AND ".join(["jobs.search_vector @@ search_query"] + clauses)
+    return f"""
+        SELECT {_JOB_COLUMNS},
+               ts_rank_cd(jobs.search_vector, search_query) AS rank,
+               ts_headline('english', jobs.title, search_query,
+                           :headline_options || ', HighlightAll=true') AS title_highlight,
+               ts_headline('english', coalesce(jobs.description, ''), search_query,
+                           :headline_options || ', MaxWords={SNIPPET_TOKENS}') AS snippet
+        FROM jobs, websearch_to_tsquery('english', :query) AS search_query
+        WHERE {where}
+        ORDER BY rank DESC
+        LIMIT :limit OFFSET :skip
+    """
+
+
+def search_jobs(
+    db: Session,
+    query: str,
+    location: Optional[str] = None,
+    min_salary: Optional[float] = None,
+    max_salary: Optional[float] = None,
+    agent: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 20,
+) -> List[Dict]:
+    """Search job postings by relevance, returning rows with rank and HTML-escaped highlights.
+
+    Matching and ranking are answered by the database's full-text index
+    (FTS5 on SQLite, tsvector + GIN on Postgres); filters are applied to the
+    matched rows only.
+    """
+    dialect = db.get_bind().dialect.name
+    params = {"limit": limit, "skip": skip}
+
+    if dialect == "sqlite":
+        params.update(query=build_fts5_query(query), hl_start=_MARK_START, hl_end=_MARK_END)
+        if not params["query"]:
+            return []
+        build_statement = _sqlite_search
+    elif dialect == "postgresql":
+        params.update(query=query, headline_options=f"StartSel={_MARK_START}, StopSel={_MARK_END}")
+        build_statement = _postgres_search
+    else:
+        raise ValueError(f"Full-text search is not supported on {dialect}")
+
+    clauses = _filter_clauses(params, location, min_salary, max_salary, agent)
+    rows = db.execute(text(build_statement(clauses)), params).mappings().all()
+    return [
+        {**row, "title_highlight": highlight_html(row["title_highlight"]), "snippet": highlight_html(row["snippet"])}
+        for row in rows
+    ]
@@ -0,0 +1,248 @@
+"""
+Pooled SMTP sending with connection reuse, reconnects and rate limiting
+"""
+
+import fnmatch
+import queue
+import smtplib
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from loguru import logger
+
+from .metrics import RETRIES
+
+# Default sustained send rates (messages per second) for common providers.
+# SMTP_RATE_LIMIT overrides these; unknown hosts are not throttled.
+PROVIDER_RATE_LIMITS = {
+    "smtp.gmail.com": 1.0,
+    "smtp.office365.com": 0.5,
+    "smtp.sendgrid.net": 50.0,
+    "smtp.mailgun.org": 50.0,
+    "email-smtp.*.amazonaws.com": 14.0,
+}
+
+# Errors after which the connection is discarded and the send retried on a fresh one
+RECONNECT_ERRORS = (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError, ConnectionError, TimeoutError)
+
+# Per-message rejections; the session itself is still healthy and can be reused
+MESSAGE_ERRORS = (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError)
+
+
+def provider_rate_limit(host: str) -> Optional[float]:
+    """Look up the default send rate for an SMTP host"""
+    for pattern, rate in PROVIDER_RATE_LIMITS.items():
+        if fnmatch.fnmatch(host, pattern):
+            return rate
+    return None
+
+
+class RateLimiter:
+    """Thread-safe token bucket limiting sends to `rate` per second"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        """Block until a send is allowed"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+@dataclass
+class PooledConnection:
+    smtp: smtplib.SMTP
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    messages_sent: int = 0
+
+
+@dataclass
+class PoolStats:
+    connections_opened: int = 0
+    messages_sent: int = 0
+    reconnects: int = 0
+    failures: int = 0
+
+
+class SMTPConnectionPool:
+    """Keeps authenticated SMTP sessions open and shares them between senders.
+
+    Each connection pays for TCP setup, STARTTLS and AUTH once and is then
+    reused for up to `max_messages_per_connection` messages. Connections that
+    sat idle longer than `max_idle_seconds` are checked with NOOP before reuse,
+    and a send that fails because the server dropped the session is retried on
+    a fresh connection.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_starttls: bool = True,
+        max_connections: int = 4,
+        max_messages_per_connection: int = 100,
+        max_idle_seconds: float = 30.0,
+        rate_limit: Optional[float] = None,
+        timeout: float = 30.0,
+        max_retries: int = 2,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_starttls = use_starttls
+        self.max_messages_per_connection = max_messages_per_connection
+        self.max_idle_seconds = max_idle_seconds
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.stats = PoolStats()
+
+        rate = rate_limit if rate_limit is not None else provider_rate_limit(host)
+        self.rate_limiter = RateLimiter(rate, burst=max_connections) if rate else None
+
+        self._idle: "queue.LifoQueue[PooledConnection]" = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._stats_lock = threading.Lock()
+
+    def _open(self) -> PooledConnection:
+        smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            smtp.ehlo()
+            if self.use_starttls:
+                smtp.starttls()
+                smtp.ehlo()
+            if self.username and self.password:
+                smtp.login(self.username, self.password)
+        except Exception:
+            self._close(PooledConnection(smtp))
+            raise
+
+        with self._stats_lock:
+            self.stats.connections_opened += 1
+        logger.debug(f"Opened SMTP connection to {self.host}:{self.port}")
+        return PooledConnection(smtp)
+
+    @staticmethod
+    def _close(connection: PooledConnection) -> None:
+        try:
+            connection.smtp.quit()
+        except Exception:
+            try:
+                connection.smtp.close()
+            except Exception:
+                pass
+
+    def _is_usable(self, connection: PooledConnection) -> bool:
+        if connection.messages_sent >= self.max_messages_per_connection:
+            return False
+        if time.monotonic() - connection.last_used > self.max_idle_seconds:
+            try:
+                return connection.smtp.noop()[0] == 250
+            except Exception:
+                return False
+        return True
+
+    def _checkout(self) -> PooledConnection:
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                return self._open()
+            if self._is_usable(connection):
+                return connection
+            self._close(connection)
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; it is discarded if the session failed while borrowed"""
+        with self._slots:
+            connection = self._checkout()
+            try:
+                yield connection
+            except MESSAGE_ERRORS:
+                self._release(connection)
+                raise
+            except Exception:
+                self._close(connection)
+                raise
+            self._release(connection)
+
+    def _release(self, connection: PooledConnection) -> None:
+        connection.last_used = time.monotonic()
+        self._idle.put(connection)
+
+    def send(self, from_addr: str, to_addrs: List[str], message: str) -> None:
+        """Send one message, reconnecting and retrying if the session was dropped"""
+        if self.rate_limiter:
+            self.rate_limiter.acquire()
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                with self.connection() as connection:
+                    connection.smtp.sendmail(from_addr, to_addrs, message)
+                    connection.messages_sent += 1
+                with self._stats_lock:
+                    self.stats.messages_sent += 1
+                return
+            except RECONNECT_ERRORS as e:
+                with self._stats_lock:
+                    self.stats.reconnects += 1
+                if attempt == self.max_retries:
+                    with self._stats_lock:
+                        self.stats.failures += 1
+                    raise
+                RETRIES.labels(operation="smtp_reconnect").inc()
+                logger.warning(f"SMTP connection to {self.host} lost ({e}); reconnecting")
+            except Exception:
+                with self._stats_lock:
+                    self.stats.failures += 1
+                raise
+
+    def close(self) -> None:
+        """Close all idle connections"""
+        while True:
+            try:
+                self._close(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+_pools: Dict[Tuple, SMTPConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_smtp_pool(host: str, port: int, username: Optional[str] = None, password: Optional[str] = None, **options):
+    """Return the process-wide pool for a server and account, creating it on first use"""
+    key = (host, port, username, password, options.get("use_starttls", True))
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = SMTPConnectionPool(host, port, username, password, **options)
+        return pool
+
+
+def close_all_pools() -> None:
+    """Close every pooled connection, e.g. at process shutdown"""
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,262 @@
+"""
+Incremental Parquet snapshots for offline analysis
+
+Writes the `jobs`, `agent_matches` and `outreach` tables to a directory of
+Parquet files partitioned by the month the job was posted:
+
+    snapshots/jobs/month=2025-01/part-000003.parquet
+
+Each run only exports rows created or changed since the previous run (tracked
+by a per-table watermark in `_state.json`) and adds one part file per touched
+month, so analytic workloads read files instead of the OLTP database. A row
+changed after it was exported appears again in a later part; `load_snapshot`
+keeps the newest copy, and `compact_snapshot` rewrites a table's partitions
+down to one deduplicated file each.
+
+`updated_at` is stamped when a row is flushed, not when its transaction
+commits, so a long transaction can commit rows older than ones already
+exported. Each run therefore only exports rows written at least
+`SNAPSHOT_LAG_SECONDS` (default 600) ago; a transaction open longer than that
+can still be missed. Deleted rows are not tracked: they stay in the snapshot
+until it is rebuilt by removing the directory and snapshotting again.
+
+    python -m backend.snapshot [--root snapshots] [--compact]
+"""
+
+import argparse
+import json
+import os
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+
+from loguru import logger
+from sqlalchemy import and_, or_, select
+from sqlalchemy.sql import Select
+
+from .export import _arrow_schema, iter_row_batches
+from .models import AgentMatch, Job, Outreach
+
+SNAPSHOT_TABLES = ("jobs", "agent_matches", "outreach")
+STATE_FILE = "_state.json"
+SNAPSHOT_BATCH_SIZE = 10000
+SNAPSHOT_LAG_SECONDS = float(os.getenv("SNAPSHOT_LAG_SECONDS", "600"))
+
+
+def snapshot_root() -> str:
+    return os.getenv("SNAPSHOT_DIR", "./snapshots")
+
+
+# Per table: the model, the column that moves forward when a row is written and
+# the posting date its partition is taken from
+_SOURCES = {
+    "jobs": (Job, Job.updated_at, Job.date_posted),
+    "agent_matches": (AgentMatch, AgentMatch.created_at, Job.date_posted),
+    "outreach": (Outreach, Outreach.updated_at, Job.date_posted),
+}
+
+
+def snapshot_statement(table: str, watermark: Optional[dict] = None, until: Optional[datetime] = None) -> Select:
+    """Rows of `table` written after `watermark` and no later than `until`, oldest first, with their partition date"""
+    model, changed_at, posted_at = _SOURCES[table]
+    statement = select(*model.__table__.columns, posted_at.label("partition_date"))
+    if model is not Job:
+        statement = statement.join(Job, Job.id == model.job_id)
+    if until is not None:
+        statement = statement.where(changed_at <= until)
+    if watermark:
+        # Keyset on (changed_at, id) so rows sharing the watermark timestamp are not lost or repeated
+        since = datetime.fromisoformat(watermark["changed_at"])
+        statement = statement.where(or_(changed_at > since, and_(changed_at == since, model.id > watermark["id"])))
+    return statement.order_by(changed_at, model.id)
+
+
+def read_state(root: str) -> dict:
+    path = os.path.join(root, STATE_FILE)
+    if not os.path.exists(path):
+        return {"snapshot_id": 0, "tables": {}}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _write_state(root: str, state: dict) -> None:
+    path = os.path.join(root, STATE_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(path + ".tmp", path)
+
+
+def _part_name(snapshot_id: int) -> str:
+    return f"part-{snapshot_id:06d}.parquet"
+
+
+def _export_table(
+    root: str, table: str, snapshot_id: int, watermark: Optional[dict], until: datetime, batch_size: int
+) -> Optional[dict]:
+    """Write this run's part files for `table`; returns the new watermark, or None if nothing changed"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    model, changed_at, _ = _SOURCES[table]
+    statement = snapshot_statement(table, watermark, until)
+    columns = [column.key for column in model.__table__.columns]
+    schema = _arrow_schema(select(*model.__table__.columns))
+    writers: Dict[str, pq.ParquetWriter] = {}
+    last_row = None
+    rows = 0
+
+    try:
+        for batch in iter_row_batches(statement, batch_size):
+            by_month: Dict[str, List[dict]] = defaultdict(list)
+            for row in batch:
+                by_month[row["partition_date"].strftime("%Y-%m")].append({key: row[key] for key in columns})
+            for month, month_rows in by_month.items():
+                if month not in writers:
+                    directory = os.path.join(root, table, f"month={month}")
+                    os.makedirs(directory, exist_ok=True)
+                    # Written under a hidden name and renamed once complete, so readers never see partial files
+                    writers[month] = pq.ParquetWriter(os.path.join(directory, "." + _part_name(snapshot_id)), schema)
+                writers[month].write_table(pa.Table.from_pylist(month_rows, schema=schema))
+            last_row = batch[-1]
+            rows += len(batch)
+    finally:
+        for writer in writers.values():
+            writer.close()
+
+    for month in writers:
+        directory = os.path.join(root, table, f"month={month}")
+        os.replace(os.path.join(directory, "." + _part_name(snapshot_id)), os.path.join(directory, _part_name(snapshot_id)))
+
+    if last_row is None:
+        return None
+    logger.info(f"Snapshot {snapshot_id}: wrote {rows} {table} rows across {len(writers)} months")
+    return {"changed_at": last_row[changed_at.key].isoformat(), "id": last_row["id"], "rows": rows}
+
+
+def write_snapshot(
+    root: Optional[str] = None,
+    tables: Iterable[str] = SNAPSHOT_TABLES,
+    batch_size: int = SNAPSHOT_BATCH_SIZE,
+    lag: float = SNAPSHOT_LAG_SECONDS,
+) -> Dict[str, int]:
+    """Export rows written since the last snapshot and at least `lag` seconds ago; returns rows written per table"""
+    root = root or snapshot_root()
+    os.makedirs(root, exist_ok=True)
+    state = read_state(root)
+    snapshot_id = state["snapshot_id"] + 1
+    until = datetime.utcnow() - timedelta(seconds=lag)
+
+    written = {}
+    for table in tables:
+        if table not in _SOURCES:
+            raise ValueError(f"Unknown snapshot table '{table}'; expected one of {', '.join(SNAPSHOT_TABLES)}")
+        watermark = _export_table(root, table, snapshot_id, state["tables"].get(table), until, batch_size)
+        written[table] = watermark.pop("rows") if watermark else 0
+        if watermark:
+            state["tables"][table] = watermark
+
+    state["snapshot_id"] = snapshot_id
+    state["taken_at"] = datetime.utcnow().isoformat()
+    _write_state(root, state)
+    return written
+
+
+def _partitions(root: str, table: str, months: Optional[Iterable[str]] = None) -> List[str]:
+    directory = os.path.join(root, table)
+    if not os.path.isdir(directory):
+        return []
+    wanted = set(months) if months is not None else None
+    return sorted(
+        os.path.join(directory, name)
+        for name in os.listdir(directory)
+        if name.startswith("month=") and (wanted is None or name[len("month=") :] in wanted)
+    )
+
+
+def _part_files(partition: str) -> List[str]:
+    return sorted(os.path.join(partition, name) for name in os.listdir(partition) if name.startswith("part-"))
+
+
+def _latest_rows(tables: list):
+    """Concatenate part tables (oldest first) keeping only the newest copy of each id"""
+    import numpy as np
+    import pyarrow as pa
+
+    table = pa.concat_tables(tables)
+    if len(tables) == 1:
+        return table
+    # Stable sort by id keeps part order within an id, so the last row per id is the newest
+    order = np.argsort(table.column("id").to_numpy(), kind="stable")
+    ids = table.column("id").to_numpy()[order]
+    newest = np.append(ids[1:] != ids[:-1], True)
+    return table.take(order[newest])
+
+
+def load_snapshot(root: Optional[str] = None, table: str = "jobs", months: Optional[Iterable[str]] = None, columns=None):
+    """Read a snapshot table as a pyarrow Table, memory-mapping its part files.
+
+    `months` ("YYYY-MM") limits the read to those partitions and `columns` to
+    a subset of columns; "id" is always included.
+    """
+    import pyarrow.parquet as pq
+
+    root = root or snapshot_root()
+    if columns is not None and "id" not in columns:
+        columns = ["id", *columns]
+    parts = [
+        pq.read_table(path, columns=columns, memory_map=True)
+        for partition in _partitions(root, table, months)
+        for path in _part_files(partition)
+    ]
+    if not parts:
+        model = _SOURCES[table][0]
+        schema = _arrow_schema(select(*model.__table__.columns))
+        return schema.empty_table() if columns is None else schema.empty_table().select(columns)
+    return _latest_rows(parts)
+
+
+def load_snapshot_frame(root: Optional[str] = None, table: str = "jobs", months: Optional[Iterable[str]] = None, columns=None):
+    """`load_snapshot` as a pandas DataFrame"""
+    return load_snapshot(root, table, months, columns).to_pandas()
+
+
+def compact_snapshot(root: Optional[str] = None, table: str = "jobs") -> int:
+    """Rewrite each partition of `table` with more than one part as a single deduplicated file"""
+    import pyarrow.parquet as pq
+
+    root = root or snapshot_root()
+    compacted = 0
+    for partition in _partitions(root, table):
+        paths = _part_files(partition)
+        if len(paths) < 2:
+            continue
+        merged = _latest_rows([pq.read_table(path, memory_map=True) for path in paths])
+        # Keep the newest part's name so later snapshots still sort after it
+        target = paths[-1]
+        pq.write_table(merged, os.path.join(partition, "." + os.path.basename(target)))
+        os.replace(os.path.join(partition, "." + os.path.basename(target)), target)
+        for path in paths[:-1]:
+            os.remove(path)
+        compacted += 1
+    return compacted
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write an incremental Parquet snapshot of jobs, matches and outreach")
+    parser.add_argument("--root", default=snapshot_root(), help="snapshot directory (default: $SNAPSHOT_DIR or ./snapshots)")
+    parser.add_argument("--tables", nargs="+", default=list(SNAPSHOT_TABLES), choices=SNAPSHOT_TABLES)
+    parser.add_argument("--compact", action="store_true", help="merge each partition's parts after the snapshot")
+    parser.add_argument(
+        "--lag", type=float, default=SNAPSHOT_LAG_SECONDS, help="only export rows written at least this many seconds ago"
+    )
+    args = parser.parse_args()
+
+    written = write_snapshot(args.root, args.tables, lag=args.lag)
+    logger.info(f"Snapshot written to {args.root}: {written}")
+    if args.compact:
+        for table in args.tables:
+            logger.info(f"Compacted {compact_snapshot(args.root, table)} {table} partitions")
+
+
+if __name__ == "__main__":
+    main()
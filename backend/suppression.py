@@ -0,0 +1,184 @@
+"""
+Suppression and dedupe checks for outreach
+
+Outreach is blocked for suppressed companies, contact domains and contact
+addresses (unsubscribes, bounces, imported do-not-contact lists), and bulk
+generation skips companies that were contacted within the cooldown window, so
+ten reposts of one role produce one draft. Checks are set and dict lookups
+against an in-memory index, so they cost the same for one draft or fifty
+thousand.
+"""
+
+import csv
+import os
+import sys
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from loguru import logger
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+
+from .metrics import record_cache
+from .models import Job, Outreach, Suppression, TableVersion
+from .normalization import normalize_company
+
+SUPPRESSION_KINDS = ("company", "domain", "email")
+
+# Outreach in these states never reached the firm, so it does not start a cooldown
+NOT_CONTACTED_STATUSES = ("rejected", "suppressed")
+
+
+def normalize_domain(value: Optional[str]) -> str:
+    """Domain of an email address or URL, lowercased and without www."""
+    domain = (value or "").strip().lower().rsplit("@", 1)[-1]
+    domain = domain.split("://", 1)[-1].split("/", 1)[0]
+    return domain.removeprefix("www.")
+
+
+def normalize_value(kind: str, value: str) -> str:
+    if kind == "company":
+        return normalize_company(value)
+    if kind == "domain":
+        return normalize_domain(value)
+    return value.strip().lower()
+
+
+def infer_kind(value: str) -> str:
+    """Guess whether a bare list entry is an email address, a domain or a company name"""
+    value = value.strip()
+    if "@" in value:
+        return "email"
+    if "." in value and " " not in value:
+        return "domain"
+    return "company"
+
+
+class SuppressionIndex:
+    """In-memory suppression sets plus the last contact time per company"""
+
+    def __init__(self, entries: Iterable[Tuple[str, str]] = (), cooldown: Optional[timedelta] = None):
+        self.cooldown = cooldown
+        self.values: Dict[str, Set[str]] = {kind: set() for kind in SUPPRESSION_KINDS}
+        self.last_contacted: Dict[str, datetime] = {}
+        for kind, value in entries:
+            self.values[kind].add(value)
+
+    @classmethod
+    def load(cls, db: Session, cooldown: Optional[timedelta] = None, with_contact_history: bool = True) -> "SuppressionIndex":
+        """Build the index with two queries: the suppression list and the last contact per company"""
+        index = cls(db.query(Suppression.kind, Suppression.value), cooldown)
+        if with_contact_history and cooldown:
+            contacts = (
+                db.query(Job.company, func.max(Outreach.created_at))
+                .join(Outreach, Outreach.job_id == Job.id)
+                .filter(Outreach.status.notin_(NOT_CONTACTED_STATUSES))
+                .group_by(Job.company)
+            )
+            for company, contacted_at in contacts:
+                index.record(company, contacted_at)
+        return index
+
+    def record(self, company: str, when: datetime) -> None:
+        """Note a new contact with `company`, starting its cooldown"""
+        key = normalize_company(company)
+        if key not in self.last_contacted or when > self.last_contacted[key]:
+            self.last_contacted[key] = when
+
+    def check(self, company: Optional[str], contact: Optional[str] = None, now: Optional[datetime] = None) -> Optional[str]:
+        """Return why outreach to this company/contact is blocked, or None if it may proceed"""
+        company_key = normalize_company(company)
+        if company_key and company_key in self.values["company"]:
+            return f"Company {company} is suppressed"
+        if contact:
+            if contact.strip().lower() in self.values["email"]:
+                return f"Contact {contact} is suppressed"
+            if normalize_domain(contact) in self.values["domain"]:
+                return f"Domain {normalize_domain(contact)} is suppressed"
+
+        if self.cooldown and company_key in self.last_contacted:
+            until = self.last_contacted[company_key] + self.cooldown
+            if (now or datetime.utcnow()) < until:
+                return f"Company {company} was contacted recently; cooldown until {until:%Y-%m-%d}"
+        return None
+
+
+_cached_index: Tuple[Optional[int], SuppressionIndex] = (None, SuppressionIndex())
+_cache_lock = threading.Lock()
+
+
+def suppression_index(db: Session) -> SuppressionIndex:
+    """Process-wide index of the suppression list (no cooldowns), reloaded when the table changes"""
+    global _cached_index
+    version = db.query(TableVersion.version).filter(TableVersion.table_name == "suppressions").scalar()
+    with _cache_lock:
+        cached_version, index = _cached_index
+        stale = version is None or version != cached_version
+        if stale:
+            index = SuppressionIndex.load(db, with_contact_history=False)
+            _cached_index = (version, index)
+        record_cache("suppression_index", hits=int(not stale), misses=int(stale))
+        return index
+
+
+def company_cooldown() -> Optional[timedelta]:
+    days = float(os.getenv("OUTREACH_COMPANY_COOLDOWN_DAYS", "30"))
+    return timedelta(days=days) if days > 0 else None
+
+
+def import_suppressions(db: Session, entries: Iterable[Tuple[str, str, Optional[str]]], source: Optional[str] = None) -> int:
+    """Add (kind, value, reason) entries, skipping ones already suppressed; returns the number added"""
+    existing = set(db.query(Suppression.kind, Suppression.value).all())
+    now = datetime.utcnow()
+    rows: List[dict] = []
+    for kind, value, reason in entries:
+        if kind not in SUPPRESSION_KINDS:
+            raise ValueError(f"Unknown suppression kind '{kind}'; expected one of {', '.join(SUPPRESSION_KINDS)}")
+        normalized = normalize_value(kind, value)
+        if not normalized or (kind, normalized) in existing:
+            continue
+        existing.add((kind, normalized))
+        rows.append({"kind": kind, "value": normalized, "reason": reason, "source": source, "created_at": now})
+
+    if rows:
+        db.execute(insert(Suppression), rows)
+    return len(rows)
+
+
+def read_suppression_csv(lines: Iterable[str]) -> List[Tuple[str, str, Optional[str]]]:
+    """Parse `value[,kind[,reason]]` rows; the kind is inferred when omitted"""
+    entries = []
+    for row in csv.reader(lines):
+        if not row or not row[0].strip() or row[0].startswith("#"):
+            continue
+        value = row[0].strip()
+        kind = row[1].strip().lower() if len(row) > 1 and row[1].strip() else infer_kind(value)
+        reason = row[2].strip() if len(row) > 2 and row[2].strip() else None
+        entries.append((kind, value, reason))
+    return entries
+
+
+def main():
+    """Import a suppression list: python -m backend.suppression list.csv [source]"""
+    from .database import SessionLocal
+
+    if len(sys.argv) < 2:
+        print(main.__doc__)
+        sys.exit(1)
+
+    path = sys.argv[1]
+    with open(path, newline="", encoding="utf-8") as f:
+        entries = read_suppression_csv(f)
+
+    db = SessionLocal()
+    try:
+        added = import_suppressions(db, entries, source=sys.argv[2] if len(sys.argv) > 2 else os.path.basename(path))
+        db.commit()
+    finally:
+        db.close()
+    logger.info(f"Imported {added} of {len(entries)} suppression entries from {path}")
+
+
+if __name__ == "__main__":
+    main()
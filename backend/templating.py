@@ -0,0 +1,121 @@
+"""
+Precompiled outreach email templates
+
+Templates live in `backend/templates/outreach/`. Each agent type can override
+the subject or body by adding `<AGENT>/subject.txt` or `<AGENT>/body.txt`;
+anything not overridden falls back to the shared template. Templates are
+compiled once per agent type and reused for every draft.
+"""
+
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+
+from jinja2 import Environment, FileSystemLoader, StrictUndefined, Template
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "templates")
+
+AGENT_DESCRIPTIONS = {
+    "AFC": "Accounting & Financial Compliance agent",
+    "FSP": "Financial Services Professional agent",
+    "other": "specialized AI workforce agent",
+}
+DEFAULT_AGENT_DESCRIPTION = "AI workforce agent"
+
+# Keyword -> task line, in the order tasks are listed in the email
+KEY_TASKS = (
+    ("audit", "Financial auditing and compliance"),
+    ("analysis", "Financial analysis and reporting"),
+    ("accounting", "Accounting operations and bookkeeping"),
+    ("reporting", "Financial reporting and documentation"),
+    ("compliance", "Regulatory compliance monitoring"),
+)
+DEFAULT_KEY_TASKS = "Financial data processing and analysis"
+
+# Tellen's service is priced at this share of the position's salary
+TELLEN_COST_RATIO = 0.2
+
+
+@dataclass
+class RenderedEmail:
+    subject: str
+    body: str
+
+    @property
+    def draft_email(self) -> str:
+        """The combined text stored in `Outreach.draft_email`"""
+        return f"Subject: {self.subject}\n\n{self.body}"
+
+
+def money(value: int) -> str:
+    return f"${value:,}"
+
+
+@lru_cache(maxsize=4096)
+def extract_key_tasks(description: Optional[str]) -> str:
+    """Summarize up to three key tasks mentioned in a job description.
+
+    Reposted jobs usually share a description, so results are cached.
+    """
+    description_lower = (description or "").lower()
+    tasks = [task for keyword, task in KEY_TASKS if keyword in description_lower]
+    return " • ".join(tasks[:3]) if tasks else DEFAULT_KEY_TASKS
+
+
+def salary_terms(salary_min: Optional[int], salary_max: Optional[int]) -> Tuple[Optional[str], Optional[int]]:
+    """Format the advertised salary and estimate Tellen's cost; either may be missing"""
+    known = [salary for salary in (salary_min, salary_max) if salary]
+    if not known:
+        return None, None
+    salary_range = " - ".join(money(salary) for salary in known)
+    return salary_range, int(sum(known) / len(known) * TELLEN_COST_RATIO)
+
+
+class OutreachTemplates:
+    """Renders outreach subjects and bodies from templates compiled once per agent"""
+
+    def __init__(self, template_dir: str = TEMPLATE_DIR):
+        self.environment = Environment(
+            loader=FileSystemLoader(template_dir),
+            undefined=StrictUndefined,
+            trim_blocks=True,
+            lstrip_blocks=True,
+            auto_reload=False,
+            autoescape=False,
+        )
+        self.environment.filters["money"] = money
+        self._compiled: Dict[str, Tuple[Template, Template]] = {}
+
+    def templates_for(self, agent: str) -> Tuple[Template, Template]:
+        """Compiled (subject, body) templates for an agent type"""
+        compiled = self._compiled.get(agent)
+        if compiled is None:
+            compiled = self._compiled[agent] = (
+                self.environment.select_template([f"outreach/{agent}/subject.txt", "outreach/subject.txt"]),
+                self.environment.select_template([f"outreach/{agent}/body.txt", "outreach/body.txt"]),
+            )
+        return compiled
+
+    def render(self, job, agent: str, from_name: str, personalization: Optional[str] = None) -> RenderedEmail:
+        """Render the outreach email for a job and its matched agent type.
+
+        `personalization` is an optional paragraph written for this company,
+        placed after the opening line.
+        """
+        salary_range, tellen_cost = salary_terms(job.salary_min, job.salary_max)
+        context = {
+            "job": job,
+            "agent": agent,
+            "agent_description": AGENT_DESCRIPTIONS.get(agent, DEFAULT_AGENT_DESCRIPTION),
+            "key_tasks": extract_key_tasks(job.description),
+            "salary_range": salary_range,
+            "tellen_cost": tellen_cost,
+            "from_name": from_name,
+            "personalization": personalization,
+        }
+        subject_template, body_template = self.templates_for(agent)
+        return RenderedEmail(subject_template.render(context).strip(), body_template.render(context).strip())
+
+
+outreach_templates = OutreachTemplates()
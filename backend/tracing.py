@@ -0,0 +1,146 @@
+"""
+OpenTelemetry tracing that follows a job from scrape to outreach draft
+
+Each scraped listing starts its own trace. Its W3C `traceparent` is stored on
+`Job.trace_context`, so the stages that pick the job up later, often in
+another process, continue the same trace:
+
+    scrape_job_listing -> save_jobs_to_db -> process_job (llm.* spans) -> generate_outreach
+
+Batch stages (`save_jobs_to_db`) link to the traces of the jobs they handle.
+Set `TRACING_EXPORTER=otlp` to send spans to a collector
+(`OTEL_EXPORTER_OTLP_ENDPOINT`, default http://localhost:4318) or
+`TRACING_EXPORTER=file` to append them as JSON lines to `TRACING_FILE`.
+Until `configure_tracing` installs an exporter every helper here is a no-op
+costing one provider check, and nothing is written to `Job.trace_context`.
+"""
+
+import os
+from contextlib import contextmanager
+from typing import Dict, Iterable, Optional
+
+from loguru import logger
+
+try:
+    from opentelemetry import context as otel_context, trace
+    from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
+
+    _propagator = TraceContextTextMapPropagator()
+except ImportError:  # tracing is optional
+    trace = None
+
+TRACER_NAME = "auditor-job-posting-agent"
+
+
+def tracing_enabled() -> bool:
+    """Whether a tracer provider has been installed"""
+    return trace is not None and not isinstance(
+        trace.get_tracer_provider(), (trace.ProxyTracerProvider, trace.NoOpTracerProvider)
+    )
+
+
+def configure_tracing(service_name: str, exporter: Optional[str] = None, path: Optional[str] = None) -> bool:
+    """Install a tracer provider exporting to `exporter` (default `$TRACING_EXPORTER`).
+
+    Returns whether tracing is enabled. Missing packages or an unknown
+    exporter are logged and leave tracing off.
+    """
+    exporter = (exporter or os.getenv("TRACING_EXPORTER") or "none").lower()
+    if exporter == "none":
+        return False
+    if tracing_enabled():
+        return True
+    try:
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter
+    except ImportError:
+        logger.warning("TRACING_EXPORTER is set but opentelemetry-sdk is not installed; tracing is off")
+        return False
+
+    if exporter == "otlp":
+        try:
+            from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+        except ImportError:
+            logger.warning("TRACING_EXPORTER=otlp needs opentelemetry-exporter-otlp-proto-http; tracing is off")
+            return False
+        span_exporter = OTLPSpanExporter()
+    elif exporter == "file":
+        path = path or os.getenv("TRACING_FILE", "traces.jsonl")
+        span_exporter = ConsoleSpanExporter(
+            out=open(path, "a", encoding="utf-8"), formatter=lambda span: span.to_json(indent=None) + "\n"
+        )
+    else:
+        logger.warning(f"Unknown TRACING_EXPORTER {exporter!r} (expected otlp, file or none); tracing is off")
+        return False
+
+    # The provider flushes its batch processor when the process exits
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    provider.add_span_processor(BatchSpanProcessor(span_exporter))
+    trace.set_tracer_provider(provider)
+    logger.info(f"Tracing {service_name} to {path if exporter == 'file' else exporter}")
+    return True
+
+
+def _current_links():
+    current = trace.get_current_span().get_span_context()
+    return [trace.Link(current)] if current.is_valid else None
+
+
+@contextmanager
+def start_span(name: str, attributes: Optional[Dict] = None, context=None, links=None, root: bool = False):
+    """Run the block in a span, yielding it (or None when tracing is off).
+
+    `context` is the parent (default: the current span); `root` starts a new
+    trace linked to the current span instead.
+    """
+    if not tracing_enabled():
+        yield None
+        return
+    if root:
+        context, links = otel_context.Context(), _current_links()
+    attributes = {key: value for key, value in (attributes or {}).items() if value is not None}
+    with trace.get_tracer(TRACER_NAME).start_as_current_span(
+        name, context=context, links=links, attributes=attributes
+    ) as span:
+        yield span
+
+
+def current_trace_context() -> Optional[str]:
+    """The current span's `traceparent`, to store on a job so later stages continue its trace"""
+    if not tracing_enabled():
+        return None
+    carrier: Dict[str, str] = {}
+    _propagator.inject(carrier)
+    return carrier.get("traceparent")
+
+
+def job_context(trace_context: Optional[str]):
+    """The parent context stored on a job, or None to use the current span"""
+    if not trace_context or not tracing_enabled():
+        return None
+    return _propagator.extract({"traceparent": trace_context})
+
+
+@contextmanager
+def job_span(name: str, job, attributes: Optional[Dict] = None):
+    """Run the block in a span of `job`'s trace, linked to the current span if that is another trace"""
+    if not tracing_enabled():
+        yield None
+        return
+    context = job_context(job.trace_context)
+    links = _current_links() if context is not None else None
+    with start_span(name, {"job.id": job.id, **(attributes or {})}, context=context, links=links) as span:
+        yield span
+
+
+def job_links(trace_contexts: Iterable[Optional[str]]):
+    """Links to the traces of the jobs a batch span handles"""
+    if not tracing_enabled():
+        return None
+    links = []
+    for trace_context in trace_contexts:
+        span_context = trace.get_current_span(job_context(trace_context)).get_span_context() if trace_context else None
+        if span_context is not None and span_context.is_valid:
+            links.append(trace.Link(span_context))
+    return links or None
@@ -0,0 +1,177 @@
+"""
+Analytics benchmark: rollup queries vs scanning the jobs table from Python
+
+Seeds a scratch SQLite database with jobs and agent matches spread over two
+years, builds the rollups with the pandas backfill, then answers two market
+questions both ways: average advertised salary for senior auditors in Texas by
+week, and the share of AFC matches per month.
+
+    python benchmarks/bench_analytics.py --jobs 1000000
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert, select
+
+from backend.analytics import (
+    job_dimensions,
+    job_market_report,
+    match_report,
+    rebuild_rollups,
+    record_jobs,
+    salary_midpoint,
+    week_start,
+)
+from backend.models import AgentMatch, Base, Job
+
+TITLES = [
+    "Senior Auditor",
+    "Sr. Auditor II",
+    "Staff Auditor",
+    "Internal Auditor",
+    "Audit Manager",
+    "Senior Accountant",
+    "Staff Accountant",
+    "Accounting Manager",
+    "Tax Senior",
+    "Tax Manager",
+    "Financial Analyst",
+    "Senior Financial Analyst",
+    "Compliance Analyst",
+    "Controller",
+    "Financial Services Professional",
+]
+LOCATIONS = ["Houston, TX", "Dallas, TX", "Austin, TX", "New York, NY", "Chicago, IL", "Los Angeles, CA", "Remote", None]
+AGENTS = ["AFC", "FSP", "other"]
+
+
+def seed(engine, jobs: int, chunk_size: int = 50_000) -> None:
+    rng = random.Random(42)
+    start = datetime(2023, 1, 1)
+    for first in range(0, jobs, chunk_size):
+        rows, matches = [], []
+        for i in range(first, min(first + chunk_size, jobs)):
+            salary = rng.choice([None, 50000, 65000, 80000, 95000, 110000, 130000])
+            rows.append(
+                {
+                    "title": rng.choice(TITLES),
+                    "company": f"Firm {rng.randrange(2000)}",
+                    "location": rng.choice(LOCATIONS),
+                    "salary_min": salary,
+                    "salary_max": salary and salary + 20000,
+                    "url": f"https://example.com/jobs/{i}",
+                    "source": rng.choice(["indeed", "linkedin"]),
+                    "date_posted": start + timedelta(minutes=rng.randrange(2 * 365 * 24 * 60)),
+                }
+            )
+            matches.append({"job_id": i + 1, "matched_agent": rng.choice(AGENTS), "confidence_score": rng.random()})
+        with engine.begin() as conn:
+            conn.execute(insert(Job), rows)
+            conn.execute(insert(AgentMatch), matches)
+
+
+def scan_salaries_by_week(conn) -> dict:
+    """Senior auditors in Texas: stream every job and classify it in Python"""
+    totals = defaultdict(lambda: [0, 0, 0.0])
+    columns = (Job.title, Job.location, Job.source, Job.salary_min, Job.salary_max, Job.date_posted)
+    for row in conn.execution_options(yield_per=10000).execute(select(*columns)):
+        family, level, state, _ = job_dimensions(row.title, row.location, row.source)
+        if (family, level, state) != ("auditor", "senior", "TX"):
+            continue
+        salary = salary_midpoint(row.salary_min, row.salary_max)
+        total = totals[week_start(row.date_posted)]
+        total[0] += 1
+        total[1] += salary is not None
+        total[2] += salary or 0.0
+    return {week: round(salary_sum / count, 2) if count else None for week, (_, count, salary_sum) in totals.items()}
+
+
+def scan_agent_share_by_month(conn) -> dict:
+    """AFC share of matches per posting month: join and count every match"""
+    totals = defaultdict(lambda: [0, 0])
+    statement = select(AgentMatch.matched_agent, Job.date_posted).join(Job, Job.id == AgentMatch.job_id)
+    for agent, posted in conn.execution_options(yield_per=10000).execute(statement):
+        total = totals[week_start(posted).replace(day=1)]
+        total[0] += 1
+        total[1] += agent == "AFC"
+    return {month: round(afc / count, 4) for month, (count, afc) in totals.items()}
+
+
+def timed(function, repeat: int):
+    """Median seconds over `repeat` runs and the last result"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), result
+
+
+def run(jobs: int = 1_000_000, repeat: int = 5, scan_repeat: int = 1) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        seed(engine, jobs)
+
+        with engine.begin() as conn:
+            start = time.perf_counter()
+            rebuild_rollups(conn)
+            backfill_seconds = time.perf_counter() - start
+
+        with engine.connect() as conn:
+            scan_salary_seconds, scanned_salaries = timed(lambda: scan_salaries_by_week(conn), scan_repeat)
+            rollup_salary_seconds, salaries = timed(
+                lambda: job_market_report(conn, ["period"], title_family="auditor", seniority="senior", state="TX"), repeat
+            )
+            assert {row["period"]: row["avg_salary"] for row in salaries} == scanned_salaries
+
+            scan_share_seconds, scanned_shares = timed(lambda: scan_agent_share_by_month(conn), scan_repeat)
+            rollup_share_seconds, shares = timed(lambda: match_report(conn, ["period", "matched_agent"], "month"), repeat)
+            assert {row["period"]: row["share"] for row in shares if row["matched_agent"] == "AFC"} == scanned_shares
+            rollup_rows = len(job_market_report(conn, ["period", "title_family", "seniority", "state", "source"]))
+
+        # Cost of keeping the rollups current: one scraper-sized batch of new jobs
+        with engine.begin() as conn:
+            last_id = conn.execute(select(Job.id).order_by(Job.id.desc()).limit(1)).scalar()
+            start = time.perf_counter()
+            record_jobs(conn, range(last_id - 999, last_id + 1))
+            record_seconds = time.perf_counter() - start
+            conn.rollback()
+        engine.dispose()
+
+    return {
+        "jobs": jobs,
+        "job_rollup_rows": rollup_rows,
+        "backfill_seconds": round(backfill_seconds, 2),
+        "salary_by_week_scan_ms": round(scan_salary_seconds * 1000, 1),
+        "salary_by_week_rollup_ms": round(rollup_salary_seconds * 1000, 2),
+        "salary_by_week_speedup": round(scan_salary_seconds / rollup_salary_seconds, 1),
+        "agent_share_by_month_scan_ms": round(scan_share_seconds * 1000, 1),
+        "agent_share_by_month_rollup_ms": round(rollup_share_seconds * 1000, 2),
+        "agent_share_by_month_speedup": round(scan_share_seconds / rollup_share_seconds, 1),
+        "record_1000_jobs_ms": round(record_seconds * 1000, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--jobs", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--scan-repeat", type=int, default=1)
+    args = parser.parse_args()
+    print(json.dumps(run(args.jobs, args.repeat, args.scan_repeat), indent=2))
+
+
+if __name__ == "__main__":
+    main()
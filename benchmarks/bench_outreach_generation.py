@@ -0,0 +1,125 @@
+"""
+Outreach generation benchmark: per-job queries and commits vs the batched generator
+
+Seeds a scratch SQLite database with jobs and high-confidence agent matches,
+then times the previous per-match loop on a sample and the set-based
+`generate_outreach_for_all_high_confidence_jobs` on the full set.
+
+    python benchmarks/bench_outreach_generation.py --matches 50000 --legacy-sample 2000
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, delete, insert
+
+from backend.database import SessionLocal, engine as default_engine, create_change_tracking, create_search_index
+from backend.email_service import EmailService, generate_outreach_for_all_high_confidence_jobs
+from backend.models import AgentMatch, Base, Job, Outreach
+
+
+def seed(engine, matches: int) -> None:
+    """One job per match, with confidences spread across 0.8-1.0"""
+    jobs = [
+        {
+            "title": f"Senior Auditor {i}",
+            "company": f"Firm {i % 5000}",
+            "location": "New York, NY",
+            "salary_min": 60000 + (i % 40) * 1000,
+            "salary_max": 90000 + (i % 40) * 1000,
+            "description": "Lead audit engagements, financial analysis and compliance reporting.",
+            "url": f"https://example.com/jobs/{i}",
+            "source": "Benchmark",
+        }
+        for i in range(matches)
+    ]
+    with engine.begin() as conn:
+        conn.execute(insert(Job), jobs)
+        conn.execute(
+            insert(AgentMatch),
+            [
+                {"job_id": i + 1, "matched_agent": "AFC" if i % 2 else "FSP", "confidence_score": 0.8 + (i % 20) / 100}
+                for i in range(matches)
+            ],
+        )
+
+
+def legacy_generate(min_confidence: float = 0.8, limit: int = None) -> int:
+    """The previous implementation: an existence query, two lookups and a commit per match"""
+    db = SessionLocal()
+    email_service = EmailService()
+    generated = 0
+    try:
+        query = db.query(AgentMatch).filter(AgentMatch.confidence_score >= min_confidence)
+        for match in query.limit(limit).all() if limit else query.all():
+            if not db.query(Outreach).filter(Outreach.job_id == match.job_id).first():
+                email_service.save_outreach_draft(
+                    match.job_id,
+                    email_service.generate_outreach_email(
+                        db.query(Job).filter(Job.id == match.job_id).first(),
+                        db.query(AgentMatch)
+                        .filter(AgentMatch.job_id == match.job_id)
+                        .order_by(AgentMatch.confidence_score.desc())
+                        .first(),
+                    ),
+                )
+                generated += 1
+        return generated
+    finally:
+        db.close()
+
+
+def run(matches: int = 50000, legacy_sample: int = 2000, batch_size: int = 1000) -> dict:
+    """Time both generators against a fresh database and return throughput figures"""
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", connect_args={"timeout": 30})
+        Base.metadata.create_all(engine)
+        create_search_index(engine)
+        create_change_tracking(engine)
+        seed(engine, matches)
+        SessionLocal.configure(bind=engine)
+        try:
+            start = time.perf_counter()
+            legacy_count = legacy_generate(limit=legacy_sample)
+            legacy_seconds = time.perf_counter() - start
+            with engine.begin() as conn:
+                conn.execute(delete(Outreach))
+
+            start = time.perf_counter()
+            batched_count = len(generate_outreach_for_all_high_confidence_jobs(batch_size=batch_size))
+            batched_seconds = time.perf_counter() - start
+        finally:
+            SessionLocal.configure(bind=default_engine)
+            engine.dispose()
+
+    legacy_rate = legacy_count / legacy_seconds
+    batched_rate = batched_count / batched_seconds
+    return {
+        "matches": matches,
+        "legacy_sample": legacy_count,
+        "legacy_jobs_per_sec": round(legacy_rate, 1),
+        "legacy_projected_seconds": round(matches / legacy_rate, 1),
+        "batched_generated": batched_count,
+        "batched_seconds": round(batched_seconds, 2),
+        "batched_jobs_per_sec": round(batched_rate, 1),
+        "speedup": round(batched_rate / legacy_rate, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--matches", type=int, default=50000)
+    parser.add_argument("--legacy-sample", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.matches, args.legacy_sample, args.batch_size), indent=2))
+
+
+if __name__ == "__main__":
+    main()
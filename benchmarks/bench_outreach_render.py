@@ -0,0 +1,146 @@
+"""
+Outreach rendering benchmark: the previous per-call f-string vs precompiled templates
+
+Renders drafts for in-memory jobs (no database), so it measures templating
+cost alone. Every tenth job has no posted salary, which the previous renderer
+could not handle; those are skipped in the legacy run.
+
+    python benchmarks/bench_outreach_render.py --drafts 100000
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.models import AgentMatch, Job
+from backend.templating import OutreachTemplates
+
+AGENTS = ["AFC", "FSP", "other"]
+
+
+def make_jobs(count: int) -> list:
+    return [
+        Job(
+            id=i,
+            title=f"Senior Auditor {i}",
+            company=f"Firm {i % 5000}",
+            location="Chicago, IL",
+            salary_min=None if i % 10 == 0 else 60000 + (i % 40) * 1000,
+            salary_max=None if i % 10 == 0 else 90000 + (i % 40) * 1000,
+            description="Lead audit engagements, perform variance analysis and support SOX compliance reporting.",
+        )
+        for i in range(count)
+    ]
+
+
+def legacy_render(job: Job, agent_match: AgentMatch, from_name: str) -> str:
+    """The previous implementation: dict rebuilt and description scanned per call"""
+    tellen_cost = int((job.salary_min + job.salary_max) / 2 * 0.2)
+    agent_descriptions = {
+        "AFC": "Accounting & Financial Compliance agent",
+        "FSP": "Financial Services Professional agent",
+        "other": "specialized AI workforce agent",
+    }
+    agent_desc = agent_descriptions.get(agent_match.matched_agent, "AI workforce agent")
+
+    keywords = []
+    description_lower = job.description.lower()
+    for keyword, task in [
+        ("audit", "Financial auditing and compliance"),
+        ("analysis", "Financial analysis and reporting"),
+        ("accounting", "Accounting operations and bookkeeping"),
+        ("reporting", "Financial reporting and documentation"),
+        ("compliance", "Regulatory compliance monitoring"),
+    ]:
+        if keyword in description_lower:
+            keywords.append(task)
+    tasks = " • ".join(keywords[:3] or ["Financial data processing and analysis"])
+
+    email_template = f"""
+Subject: AI Workforce Solution for {job.title} Position at {job.company}
+
+Dear Hiring Manager,
+
+I hope this email finds you well. I'm reaching out regarding your {job.title} position at {job.company} in {job.location}.
+
+I represent Tellen, a leading provider of AI workforce solutions for accounting and financial services firms. After analyzing your job posting, I believe we have an ideal solution that could significantly reduce your hiring costs while maintaining high-quality work output.
+
+**Our Solution:**
+Our {agent_desc} is specifically designed to handle the core responsibilities outlined in your job posting:
+- {tasks}
+- Automated compliance and reporting
+- 24/7 availability with consistent quality
+
+**Cost Savings:**
+Instead of the ${job.salary_min:,} - ${job.salary_max:,} annual salary for this position, our AI workforce solution costs approximately ${tellen_cost:,} annually - representing a potential savings of 80% while maintaining professional standards.
+
+**Why Choose Tellen:**
+- Proven track record with accounting firms
+- Seamless integration with existing systems
+- Dedicated support and training
+- Scalable solutions that grow with your business
+- No benefits, vacation, or overhead costs
+
+**Next Steps:**
+I'd love to schedule a brief 15-minute call to discuss how our AI workforce can specifically address your needs for the {job.title} role. We can also provide a customized demonstration of our capabilities.
+
+Would you be available for a call this week? I'm flexible with timing and can work around your schedule.
+
+Thank you for your time and consideration. I look forward to hearing from you.
+
+Best regards,
+{from_name}
+Tellen AI Workforce Solutions
+
+P.S. We're currently offering a 30-day free trial for qualified firms. This would allow you to experience the quality and efficiency of our AI workforce with no risk.
+
+---
+This email was generated by our AI system that analyzes job postings to identify automation opportunities. 
+If you'd prefer not to receive these communications, please reply with "UNSUBSCRIBE" and we'll remove you from our outreach list.
+"""
+    return email_template.strip()
+
+
+def run(drafts: int = 100000) -> dict:
+    """Render `drafts` emails with both implementations and return throughput figures"""
+    jobs = make_jobs(drafts)
+    matches = [AgentMatch(matched_agent=AGENTS[i % len(AGENTS)]) for i in range(drafts)]
+
+    start = time.perf_counter()
+    legacy_count = 0
+    for job, match in zip(jobs, matches):
+        if job.salary_min is None:
+            continue
+        legacy_render(job, match, "Tellen")
+        legacy_count += 1
+    legacy_seconds = time.perf_counter() - start
+
+    templates = OutreachTemplates()
+    start = time.perf_counter()
+    for job, match in zip(jobs, matches):
+        templates.render(job, match.matched_agent, "Tellen")
+    template_seconds = time.perf_counter() - start
+
+    return {
+        "drafts": drafts,
+        "legacy_rendered": legacy_count,
+        "legacy_drafts_per_sec": round(legacy_count / legacy_seconds, 1),
+        "template_rendered": drafts,
+        "template_drafts_per_sec": round(drafts / template_seconds, 1),
+        "template_us_per_draft": round(template_seconds / drafts * 1e6, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--drafts", type=int, default=100000)
+    args = parser.parse_args()
+    print(json.dumps(run(args.drafts), indent=2))
+
+
+if __name__ == "__main__":
+    main()
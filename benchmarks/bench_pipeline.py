@@ -0,0 +1,214 @@
+"""
+End-to-end pipeline benchmark on seeded synthetic postings
+
+Generates `--jobs` postings with `scraper.synthetic`, then times each stage of
+the pipeline against a scratch SQLite database:
+
+  ingest    MockIndeedScraper.save_jobs_to_db in scraper-sized batches
+  match     the heuristic agent matcher over every saved job
+  outreach  generate_outreach_for_all_high_confidence_jobs
+  api       median and p95 latency of the main read endpoints
+
+Results are printed (and written to `--output`) as JSON with the parameters,
+git commit and interpreter they were measured with. `--baseline` compares
+against an earlier results file and exits non-zero when any metric is worse
+by more than `--tolerance` (throughputs may not drop, latencies may not rise).
+
+    python benchmarks/bench_pipeline.py --jobs 100000 --output benchmarks/results/latest.json
+    python benchmarks/bench_pipeline.py --jobs 100000 --baseline benchmarks/results/baseline.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from loguru import logger
+from sqlalchemy import create_engine, insert, select
+
+from backend.ai_processor import heuristic_match
+from backend.analytics import record_matches
+from backend.database import SessionLocal, create_change_tracking, create_search_index, engine as default_engine
+from backend.email_service import generate_outreach_for_all_high_confidence_jobs
+from backend.main import app
+from backend.models import AgentMatch, Base, Job
+from scraper.mock_scraper import MockIndeedScraper
+from scraper.synthetic import SyntheticJobGenerator
+
+# (name, path, params) of the endpoints timed by the api stage
+ENDPOINTS = [
+    ("jobs", "/jobs", {"limit": 100}),
+    ("jobs_with_matches", "/jobs", {"limit": 100, "include": "matches"}),
+    ("search", "/jobs/search", {"q": "internal controls", "limit": 20}),
+    ("search_state", "/jobs/search", {"q": "audit", "location": "TX", "limit": 20}),
+    ("ranked", "/jobs/ranked", {"limit": 50}),
+    ("agent_matches", "/agent-matches", {"limit": 100}),
+    ("outreach", "/outreach", {"limit": 100}),
+    ("stats", "/stats", {}),
+    ("analytics_jobs", "/analytics/jobs", {"group_by": "period,title_family"}),
+]
+
+# Metric name suffixes and whether a higher value is better
+HIGHER_IS_BETTER = {"_per_sec": True, "_ms": False, "_seconds": False}
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def ingest(generator: SyntheticJobGenerator, jobs: int, batch_size: int) -> Dict:
+    scraper = MockIndeedScraper()
+    generate_seconds = save_seconds = 0.0
+    saved = 0
+    start = time.perf_counter()
+    for batch in generator.iter_batches(jobs, batch_size):
+        generated = time.perf_counter()
+        generate_seconds += generated - start
+        saved += scraper.save_jobs_to_db(batch)
+        start = time.perf_counter()
+        save_seconds += start - generated
+    assert saved == jobs, f"saved {saved} of {jobs} jobs"
+    return {
+        "generate_jobs_per_sec": round(jobs / generate_seconds, 1),
+        "ingest_seconds": round(save_seconds, 2),
+        "ingest_jobs_per_sec": round(jobs / save_seconds, 1),
+    }
+
+
+def match(engine) -> Dict:
+    """Score every job with the heuristic matcher, then store the matches the way the processor does"""
+    with engine.connect() as conn:
+        rows = conn.execute(select(Job.id, Job.title, Job.description)).all()
+
+    start = time.perf_counter()
+    matches = []
+    for job_id, title, description in rows:
+        agent, confidence, notes = heuristic_match(title, description)
+        matches.append({"job_id": job_id, "matched_agent": agent, "confidence_score": confidence, "notes": notes})
+    match_seconds = time.perf_counter() - start
+
+    with engine.begin() as conn:
+        first_id = (conn.execute(select(AgentMatch.id).order_by(AgentMatch.id.desc()).limit(1)).scalar() or 0) + 1
+        conn.execute(insert(AgentMatch), matches)
+        record_matches(conn, range(first_id, first_id + len(matches)))
+    return {
+        "match_jobs_per_sec": round(len(rows) / match_seconds, 1),
+        "high_confidence_matches": sum(row["confidence_score"] >= 0.8 for row in matches),
+    }
+
+
+def outreach(batch_size: int) -> Dict:
+    start = time.perf_counter()
+    drafts = len(generate_outreach_for_all_high_confidence_jobs(batch_size=batch_size))
+    seconds = time.perf_counter() - start
+    return {
+        "outreach_drafts": drafts,
+        "outreach_seconds": round(seconds, 2),
+        "outreach_drafts_per_sec": round(drafts / seconds, 1),
+    }
+
+
+def api(requests: int) -> Dict:
+    """Median and p95 latency per endpoint; startup events are not run, so the scratch database stays bound"""
+    client = TestClient(app)
+    metrics = {}
+    for name, path, params in ENDPOINTS:
+        client.get(path, params=params).raise_for_status()  # warm-up
+        timings: List[float] = []
+        for _ in range(requests):
+            start = time.perf_counter()
+            client.get(path, params=params).raise_for_status()
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+        metrics[f"api_{name}_median_ms"] = round(statistics.median(timings), 2)
+        metrics[f"api_{name}_p95_ms"] = round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2)
+    return metrics
+
+
+def run(jobs: int = 10000, seed: int = 42, batch_size: int = 1000, requests: int = 20) -> dict:
+    metrics = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", connect_args={"timeout": 30})
+        Base.metadata.create_all(engine)
+        create_search_index(engine)
+        create_change_tracking(engine)
+        SessionLocal.configure(bind=engine)
+        try:
+            metrics.update(ingest(SyntheticJobGenerator(seed=seed, source="Benchmark"), jobs, batch_size))
+            metrics.update(match(engine))
+            metrics.update(outreach(batch_size))
+            metrics.update(api(requests))
+        finally:
+            SessionLocal.configure(bind=default_engine)
+            engine.dispose()
+
+    return {
+        "benchmark": "pipeline",
+        "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "params": {"jobs": jobs, "seed": seed, "batch_size": batch_size, "requests": requests},
+        "metrics": metrics,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float = 0.25) -> List[str]:
+    """Metrics in `results` worse than `baseline` by more than `tolerance` (a fraction)"""
+    regressions = []
+    for name, value in results["metrics"].items():
+        previous = baseline.get("metrics", {}).get(name)
+        higher_is_better = next((higher for suffix, higher in HIGHER_IS_BETTER.items() if name.endswith(suffix)), None)
+        if previous is None or higher_is_better is None or not previous:
+            continue
+        change = (value - previous) / previous
+        if (-change if higher_is_better else change) > tolerance:
+            regressions.append(f"{name}: {previous} -> {value} ({change:+.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--jobs", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=20, help="timed requests per endpoint")
+    parser.add_argument("--output", help="write the results JSON to this file")
+    parser.add_argument("--baseline", help="results JSON to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed fractional regression (default 0.25)")
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    results = run(args.jobs, args.seed, args.batch_size, args.requests)
+    print(json.dumps(results, indent=2))
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Full-text search benchmark on seeded synthetic postings
+
+Inserts `--jobs` postings (default 1,000,000) from `scraper.synthetic` into a
+scratch SQLite database with the FTS5 index and its triggers, then times
+`search_jobs` for typical queries, with and without filters, against the
+50 ms search latency target:
+
+    python benchmarks/bench_search.py --jobs 1000000
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+from typing import List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loguru import logger
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.database import create_search_index
+from backend.models import Base
+from backend.search import search_jobs
+from scraper.synthetic import SyntheticJobGenerator
+
+TARGET_MS = 50.0
+
+# (name, search_jobs keyword arguments)
+QUERIES = [
+    ("single_term", {"query": "audit"}),
+    ("two_terms", {"query": "internal controls"}),
+    ("prefix", {"query": "reconcil*"}),
+    ("rare_term", {"query": "netsuite"}),
+    ("state_filter", {"query": "audit", "location": "TX"}),
+    ("salary_filter", {"query": "compliance", "min_salary": 90000}),
+    ("second_page", {"query": "accounting", "skip": 20}),
+]
+
+
+def seed(engine, jobs: int, batch_size: int) -> float:
+    session = sessionmaker(bind=engine)()
+    start = time.perf_counter()
+    try:
+        SyntheticJobGenerator(seed=42, source="Benchmark").insert_jobs(session, jobs, batch_size, commit=True)
+    finally:
+        session.close()
+    return time.perf_counter() - start
+
+
+def run(jobs: int = 1_000_000, requests: int = 50, batch_size: int = 10000) -> dict:
+    metrics = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        Base.metadata.create_all(engine)
+        create_search_index(engine)
+        seed_seconds = seed(engine, jobs, batch_size)
+
+        session = sessionmaker(bind=engine)()
+        try:
+            for name, params in QUERIES:
+                results = search_jobs(session, limit=20, **params)  # warm-up
+                timings: List[float] = []
+                for _ in range(requests):
+                    start = time.perf_counter()
+                    search_jobs(session, limit=20, **params)
+                    timings.append((time.perf_counter() - start) * 1000)
+                timings.sort()
+                metrics[name] = {
+                    "results": len(results),
+                    "median_ms": round(statistics.median(timings), 2),
+                    "p95_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.95))], 2),
+                }
+        finally:
+            session.close()
+            engine.dispose()
+
+    return {
+        "jobs": jobs,
+        "seed_seconds": round(seed_seconds, 1),
+        "target_ms": TARGET_MS,
+        "within_target": all(query["p95_ms"] <= TARGET_MS for query in metrics.values()),
+        "queries": metrics,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--jobs", type=int, default=1_000_000)
+    parser.add_argument("--requests", type=int, default=50, help="timed searches per query")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    args = parser.parse_args()
+
+    logger.remove()
+    logger.add(sys.stderr, level="WARNING")
+    results = run(args.jobs, args.requests, args.batch_size)
+    print(json.dumps(results, indent=2))
+    sys.exit(0 if results["within_target"] else 1)
+
+
+if __name__ == "__main__":
+    main()
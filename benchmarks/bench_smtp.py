@@ -0,0 +1,101 @@
+"""
+Throughput benchmark: one SMTP connection per message vs the pooled sender
+
+Runs against a local aiosmtpd server, so it measures connection and protocol
+overhead rather than network latency. Against a real provider every avoided
+connection also saves a TLS handshake and an AUTH round trip.
+
+    python benchmarks/bench_smtp.py --messages 1000 --connections 4
+"""
+
+import argparse
+import json
+import os
+import smtplib
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aiosmtpd.controller import Controller
+
+from backend.smtp_pool import SMTPConnectionPool
+
+
+class DiscardHandler:
+    async def handle_DATA(self, server, session, envelope):
+        return "250 OK"
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _message(i: int) -> str:
+    return f"Subject: Benchmark {i}\r\nTo: to{i}@example.com\r\n\r\nOutreach body {i}\r\n"
+
+
+def send_unpooled(host: str, port: int, count: int, workers: int) -> None:
+    """The previous behaviour: connect, send one message and quit"""
+
+    def send(i: int) -> None:
+        server = smtplib.SMTP(host, port)
+        server.ehlo()
+        server.sendmail("from@example.com", [f"to{i}@example.com"], _message(i))
+        server.quit()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(send, range(count)))
+
+
+def send_pooled(host: str, port: int, count: int, workers: int) -> SMTPConnectionPool:
+    pool = SMTPConnectionPool(host, port, use_starttls=False, max_connections=workers)
+
+    def send(i: int) -> None:
+        pool.send("from@example.com", [f"to{i}@example.com"], _message(i))
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(send, range(count)))
+    pool.close()
+    return pool
+
+
+def run(messages: int = 1000, connections: int = 4) -> dict:
+    """Run both senders and return throughput figures"""
+    controller = Controller(DiscardHandler(), hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    try:
+        start = time.perf_counter()
+        send_unpooled(controller.hostname, controller.port, messages, connections)
+        unpooled_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        pool = send_pooled(controller.hostname, controller.port, messages, connections)
+        pooled_seconds = time.perf_counter() - start
+    finally:
+        controller.stop()
+
+    return {
+        "messages": messages,
+        "connections": connections,
+        "unpooled_msgs_per_sec": round(messages / unpooled_seconds, 1),
+        "pooled_msgs_per_sec": round(messages / pooled_seconds, 1),
+        "speedup": round(unpooled_seconds / pooled_seconds, 2),
+        "pooled_connections_opened": pool.stats.connections_opened,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=1000)
+    parser.add_argument("--connections", type=int, default=4)
+    args = parser.parse_args()
+    print(json.dumps(run(args.messages, args.connections), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -14,9 +14,9 @@ export default function JobsPage() {
   const [error, setError] = useState<string | null>(null);
 
   useEffect(() => {
-    const fetchJobs = async () => {
+    const fetchJobs = async (showLoading = true) => {
       try {
-        setLoading(true);
+        if (showLoading) setLoading(true);
         const jobsData = await apiClient.getJobs(0, 50);
         setJobs(jobsData);
 
@@ -39,6 +39,21 @@ export default function JobsPage() {
     };
 
     fetchJobs();
+
+    // Refresh when the API pushes new jobs or matches instead of polling
+    let refreshTimer: ReturnType<typeof setTimeout> | undefined;
+    const scheduleRefresh = () => {
+      clearTimeout(refreshTimer);
+      refreshTimer = setTimeout(() => fetchJobs(false), 500);
+    };
+    const events = new EventSource('http://localhost:8000/events?types=job.created,match.created');
+    events.addEventListener('job.created', scheduleRefresh);
+    events.addEventListener('match.created', scheduleRefresh);
+
+    return () => {
+      clearTimeout(refreshTimer);
+      events.close();
+    };
   }, []);
 
   const getAgentBadgeVariant = (agent: string) => {
@@ -24,9 +24,9 @@ export default function OutreachPage() {
   const [selectedEmail, setSelectedEmail] = useState<Outreach | null>(null);
 
   useEffect(() => {
-    const fetchData = async () => {
+    const fetchData = async (showLoading = true) => {
       try {
-        setLoading(true);
+        if (showLoading) setLoading(true);
         const [outreachData, jobsData] = await Promise.all([
           apiClient.getOutreachEmails(),
           apiClient.getJobs(0, 100)
@@ -48,6 +48,21 @@ export default function OutreachPage() {
     };
 
     fetchData();
+
+    // Refresh when the API pushes new drafts or status changes instead of polling
+    let refreshTimer: ReturnType<typeof setTimeout> | undefined;
+    const scheduleRefresh = () => {
+      clearTimeout(refreshTimer);
+      refreshTimer = setTimeout(() => fetchData(false), 500);
+    };
+    const events = new EventSource('http://localhost:8000/events?types=outreach.created,outreach.status');
+    events.addEventListener('outreach.created', scheduleRefresh);
+    events.addEventListener('outreach.status', scheduleRefresh);
+
+    return () => {
+      clearTimeout(refreshTimer);
+      events.close();
+    };
   }, []);
 
   const getStatusIcon = (status: string) => {
@@ -0,0 +1,51 @@
+"""
+Glassdoor job scraper plugin
+
+Glassdoor's class names are generated and change between deploys, so the
+plugin matches `data-test` attributes and class-name prefixes, and its job
+pages' JSON-LD fills in whatever those miss. Fetching, pacing, caching and
+saving are done by the shared runtime (scraper/runtime.py):
+
+    python -m scraper.runtime --source glassdoor
+"""
+
+from typing import Dict, List
+from urllib.parse import parse_qs, urlencode, urljoin, urlsplit
+
+from scraper.runtime import SourcePlugin, select_text
+
+BASE_URL = "https://www.glassdoor.com"
+
+
+def canonical_job_url(href: str) -> str:
+    """The job page URL reduced to its listing id (`jl`), so each posting has one URL"""
+    url = urljoin(BASE_URL, href)
+    parts = urlsplit(url)
+    listing_id = parse_qs(parts.query).get("jl")
+    if not listing_id:
+        return f"https://{parts.netloc}{parts.path}"
+    return f"https://{parts.netloc}{parts.path}?jl={listing_id[0]}"
+
+
+class GlassdoorSource(SourcePlugin):
+    """Glassdoor job search and job listing pages"""
+
+    name = "glassdoor"
+    headers = {"Referer": f"{BASE_URL}/"}
+
+    def search_url(self, query: str, location: str, page: int) -> str:
+        params = {"sc.keyword": query, "locKeyword": location, "fromAge": 30, "p": page + 1}
+        return f"{BASE_URL}/Job/jobs.htm?{urlencode(params)}"
+
+    def parse_listing(self, soup) -> List[str]:
+        links = soup.select('a[data-test="job-link"][href], a[class*="JobCard_jobTitle"][href]')
+        return [canonical_job_url(link["href"]) for link in links]
+
+    def parse_detail(self, soup, url: str) -> Dict:
+        return {
+            "title": select_text(soup, 'h1[id^="jd-job-title"]', '[data-test="job-title"]', "h1"),
+            "company": select_text(soup, '[data-test="employer-name"]', 'div[class*="EmployerProfile_employerName"]'),
+            "location": select_text(soup, '[data-test="location"]', 'div[class*="JobDetails_location"]'),
+            "description": select_text(soup, 'div[class*="JobDetails_jobDescription"]', "div.jobDescriptionContent"),
+            "salary_text": select_text(soup, '[data-test="detailSalary"]', 'div[class*="SalaryEstimate_averageEstimate"]'),
+        }
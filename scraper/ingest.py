@@ -0,0 +1,76 @@
+"""
+Bulk ingest of scraped postings, shared by every scraper
+
+`save_jobs` saves a batch in one transaction: a single lookup for URLs that
+are already saved (in chunks, to stay under the database's bound-parameter
+limit), one flush for the new rows, then ranking, rollups and one
+`job.created` event per new job.
+"""
+
+from typing import Dict, List, Sequence
+
+from loguru import logger
+
+from backend.analytics import record_jobs
+from backend.database import SessionLocal
+from backend.events import JOB_CREATED, publish_event
+from backend.metrics import FAILURES
+from backend.models import Job
+from backend.ranking import refresh_rank_scores
+from backend.tracing import current_trace_context, job_links, start_span
+
+LOOKUP_CHUNK = 500
+
+
+def saved_urls(db, urls: Sequence[str]) -> set:
+    """The URLs from `urls` that already have a job row"""
+    urls = list(urls)
+    saved = set()
+    for start in range(0, len(urls), LOOKUP_CHUNK):
+        chunk = urls[start : start + LOOKUP_CHUNK]
+        saved.update(url for (url,) in db.query(Job.url).filter(Job.url.in_(chunk)))
+    return saved
+
+
+def save_jobs(jobs: Sequence[Dict]) -> int:
+    """Save the jobs whose URLs are new, as one batch; returns how many were saved"""
+    db = SessionLocal()
+    new_jobs: List[Job] = []
+
+    try:
+        links = job_links(job_data.get("trace_context") for job_data in jobs)
+        with start_span("save_jobs_to_db", {"jobs.count": len(jobs)}, links=links):
+            seen = saved_urls(db, {job_data["url"] for job_data in jobs})
+            for job_data in jobs:
+                if job_data["url"] in seen:
+                    logger.debug(f"Job already exists: {job_data.get('title', 'Unknown')}")
+                    continue
+                seen.add(job_data["url"])
+
+                job = Job(**job_data)
+                if job.trace_context is None:
+                    # Jobs saved without a scrape span join the save span's trace
+                    job.trace_context = current_trace_context()
+                new_jobs.append(job)
+
+            db.add_all(new_jobs)
+            db.flush()
+            job_ids = [job.id for job in new_jobs]
+            refresh_rank_scores(db, job_ids)
+            record_jobs(db, job_ids)
+            created_events = [{"id": job.id, "title": job.title, "company": job.company} for job in new_jobs]
+            db.commit()
+            logger.info(f"Saved {len(new_jobs)} new jobs ({len(jobs) - len(new_jobs)} already saved)")
+
+            for event in created_events:
+                publish_event(JOB_CREATED, event)
+
+    except Exception as e:
+        FAILURES.labels(operation="save_jobs").inc()
+        logger.error(f"Error saving jobs to database: {e}")
+        db.rollback()
+        return 0
+    finally:
+        db.close()
+
+    return len(new_jobs)
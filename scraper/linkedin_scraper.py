@@ -0,0 +1,48 @@
+"""
+LinkedIn job scraper plugin
+
+Reads LinkedIn's public (logged-out) job search and job pages. Search results
+come from the guest endpoint that backs the public search page's infinite
+scroll, 25 postings per page. Fetching, pacing, caching and saving are done
+by the shared runtime (scraper/runtime.py):
+
+    python -m scraper.runtime --source linkedin
+"""
+
+from typing import Dict, List
+from urllib.parse import urlencode, urlsplit, urlunsplit
+
+from scraper.runtime import SourcePlugin, select_text
+
+BASE_URL = "https://www.linkedin.com"
+PAGE_SIZE = 25
+
+
+def canonical_job_url(href: str) -> str:
+    """The job page URL without tracking parameters, so each posting has one URL"""
+    parts = urlsplit(href)
+    return urlunsplit(("https", parts.netloc or "www.linkedin.com", parts.path, "", ""))
+
+
+class LinkedInSource(SourcePlugin):
+    """LinkedIn guest job search and job pages"""
+
+    name = "linkedin"
+
+    def search_url(self, query: str, location: str, page: int) -> str:
+        params = {"keywords": query, "location": location or "United States", "start": page * PAGE_SIZE, "sortBy": "DD"}
+        return f"{BASE_URL}/jobs-guest/jobs/api/seeMoreJobPostings/search?{urlencode(params)}"
+
+    def parse_listing(self, soup) -> List[str]:
+        links = soup.select("a.base-card__full-link[href], a.base-search-card--link[href]")
+        return [canonical_job_url(link["href"]) for link in links if "/jobs/view/" in link["href"]]
+
+    def parse_detail(self, soup, url: str) -> Dict:
+        return {
+            "title": select_text(soup, "h1.top-card-layout__title", "h1.topcard__title", "h1"),
+            "company": select_text(soup, "a.topcard__org-name-link", "span.topcard__flavor"),
+            "location": select_text(soup, "span.topcard__flavor--bullet"),
+            "description": select_text(soup, "div.show-more-less-html__markup", "div.description__text"),
+            "salary_text": select_text(soup, "div.salary.compensation__salary", "div.compensation__salary"),
+            "date_text": select_text(soup, "span.posted-time-ago__text"),
+        }
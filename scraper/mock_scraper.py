@@ -4,21 +4,25 @@ Mock scraper for development and testing when real scraping is blocked
 
 import random
 from datetime import datetime, timedelta
-from typing import List, Dict
+from typing import List, Dict, Optional
 from loguru import logger
 
+import os
 import sys
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from backend.database import SessionLocal
-from backend.models import Job
+from backend.tracing import configure_tracing
+from backend.metrics import export_metrics
+from scraper.ingest import save_jobs
 
 
 class MockIndeedScraper:
     """Mock Indeed scraper for development and testing"""
 
-    def __init__(self):
+    def __init__(self, seed: Optional[int] = None):
+        # Seeded runs repeat the same postings (and URLs); unseeded runs draw fresh ones
+        self.random = random.Random(seed)
         self.companies = [
             "Deloitte",
             "PwC",
@@ -88,24 +92,24 @@ class MockIndeedScraper:
         ]
 
     def generate_mock_jobs(self, count: int = 10) -> List[Dict]:
-        """Generate mock job postings"""
+        """Generate mock job postings; load tests that need thousands or more use `scraper.synthetic`"""
         jobs = []
 
-        for i in range(count):
-            title = random.choice(self.job_titles)
-            company = random.choice(self.companies)
-            location = random.choice(self.locations)
-            salary_min, salary_max = random.choice(self.salary_ranges)
+        for _ in range(count):
+            title = self.random.choice(self.job_titles)
+            company = self.random.choice(self.companies)
+            location = self.random.choice(self.locations)
+            salary_min, salary_max = self.random.choice(self.salary_ranges)
 
             # Add some variation to salaries
-            salary_min += random.randint(-5000, 5000)
-            salary_max += random.randint(-5000, 5000)
+            salary_min += self.random.randint(-5000, 5000)
+            salary_max += self.random.randint(-5000, 5000)
 
             # Generate job description
             description = self.generate_job_description(title, company)
 
             # Generate posting date (within last 30 days)
-            days_ago = random.randint(0, 30)
+            days_ago = self.random.randint(0, 30)
             date_posted = datetime.now() - timedelta(days=days_ago)
 
             job = {
@@ -115,7 +119,7 @@ class MockIndeedScraper:
                 "salary_min": salary_min,
                 "salary_max": salary_max,
                 "description": description,
-                "url": f"https://indeed.com/viewjob?jk=mock{i:06d}",
+                "url": f"https://indeed.com/viewjob?jk=mock{self.random.getrandbits(64):016x}",
                 "source": "indeed",
                 "date_posted": date_posted,
             }
@@ -201,40 +205,12 @@ We provide excellent benefits, professional development opportunities, and a col
 
     def save_jobs_to_db(self, jobs: List[Dict]) -> int:
         """Save mock jobs to database"""
-        # Import here to ensure we're using the right database path
-        from backend.database import SessionLocal
-
-        db = SessionLocal()
-        saved_count = 0
-
-        try:
-            for job_data in jobs:
-                # Check if job already exists
-                existing_job = db.query(Job).filter(Job.url == job_data["url"]).first()
-                if existing_job:
-                    logger.info(f"Job already exists: {job_data.get('title', 'Unknown')}")
-                    continue
-
-                # Create new job
-                job = Job(**job_data)
-                db.add(job)
-                saved_count += 1
-                logger.info(f"Saved job: {job_data.get('title', 'Unknown')}")
-
-            db.commit()
-            logger.info(f"Successfully saved {saved_count} new jobs to database")
-
-        except Exception as e:
-            logger.error(f"Error saving jobs to database: {e}")
-            db.rollback()
-        finally:
-            db.close()
-
-        return saved_count
+        return save_jobs(jobs)
 
 
 def main():
     """Main function to generate and save mock jobs"""
+    configure_tracing("mock_scraper")
     scraper = MockIndeedScraper()
 
     logger.info("Generating mock job postings...")
@@ -245,6 +221,7 @@ def main():
     # Save to database
     saved_count = scraper.save_jobs_to_db(jobs)
     logger.info(f"Mock scraping completed. Saved {saved_count} new jobs.")
+    export_metrics("mock_scraper")
 
 
 if __name__ == "__main__":
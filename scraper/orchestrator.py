@@ -0,0 +1,606 @@
+"""
+Event-driven pipeline orchestrator: scrape -> dedupe -> match -> draft
+
+Replaces the daily scheduler. Scrapes are started by cron-like and interval
+triggers (each with random jitter so instances and job boards don't see a
+fixed beat). Every later stage is driven by new data rather than by the
+clock: `job.created` events from the scrapers feed the dedupe stage, dedupe
+hands unique postings to the match stage, and matched jobs go straight to
+outreach drafting. Each stage collects ids into batches and runs them on its
+own worker tasks, so the match stage can be working through one batch while
+the dedupe and draft stages handle others, and a posting is drafted minutes
+after it is saved instead of waiting for the next manual run.
+
+Events can be dropped (bounded queues) or published by another process while
+the orchestrator is down, so after each scrape, and at startup, the stages
+are also fed from the database: unmatched jobs and matched jobs without a
+draft. A lease in `pipeline_locks` keeps a second orchestrator from running
+at the same time; if another process takes the lease over, scrapes and
+stages pause until it is re-acquired.
+
+    python -m scraper.orchestrator --source indeed --cron "0 9 * * *" --interval 1800 --jitter 120
+    python -m scraper.orchestrator --source all --interval 3600
+    python -m scraper.orchestrator --source mock --once
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from loguru import logger
+from sqlalchemy import and_, exists, func, select
+from sqlalchemy.orm import aliased
+
+from backend.ai_processor import match_jobs_heuristically
+from backend.analytics import record_matches
+from backend.database import SessionLocal, init_database
+from backend.email_service import eligible_outreach_statement, generate_outreach_for_all_high_confidence_jobs
+from backend.events import JOB_CREATED, MATCH_CREATED, configure_event_bus, event_bus, publish_event
+from backend.locks import DatabaseLock
+from backend.metrics import FAILURES, PIPELINE_LATENCY_SECONDS, PIPELINE_STAGE_SECONDS, export_metrics
+from backend.models import AgentMatch, Job, Outreach
+from backend.ranking import refresh_rank_scores
+from backend.tracing import configure_tracing
+
+LOCK_NAME = "pipeline-orchestrator"
+
+# minute, hour, day of month, month, day of week (0 or 7 = Sunday)
+CRON_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+
+def _parse_cron_field(spec: str, low: int, high: int) -> Set[int]:
+    values = set()
+    for part in spec.split(","):
+        part, _, step = part.partition("/")
+        if part == "*":
+            start, end = low, high
+        elif "-" in part:
+            start, end = (int(value) for value in part.split("-", 1))
+        else:
+            start = int(part)
+            end = high if step else start
+        step = int(step) if step else 1
+        if not low <= start <= end <= high or step < 1:
+            raise ValueError(f"Invalid cron field {spec!r}")
+        values.update(range(start, end + 1, step))
+    return values
+
+
+class CronTrigger:
+    """Fires on a five-field cron schedule in local time, plus up to `jitter` seconds"""
+
+    def __init__(self, expression: str, jitter: float = 0.0):
+        fields = expression.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression {expression!r} needs 5 fields")
+        self.expression = expression
+        self.jitter = jitter
+        minutes, hours, days, months, weekdays = (
+            _parse_cron_field(spec, low, high) for spec, (low, high) in zip(fields, CRON_FIELDS)
+        )
+        self.minutes, self.hours = sorted(minutes), sorted(hours)
+        self.days, self.months = days, months
+        self.weekdays = {day % 7 for day in weekdays}
+        # As in cron, when both day fields are restricted a day matching either fires
+        self._days_restricted, self._weekdays_restricted = fields[2] != "*", fields[4] != "*"
+
+    def _day_matches(self, day) -> bool:
+        in_days = day.day in self.days
+        in_weekdays = (day.weekday() + 1) % 7 in self.weekdays
+        if self._days_restricted and self._weekdays_restricted:
+            return in_days or in_weekdays
+        return in_days and in_weekdays
+
+    def next_after(self, after: datetime) -> datetime:
+        """The first scheduled minute after `after`, without jitter"""
+        start = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        day = start.date()
+        for _ in range(366 * 8):  # long enough for a February 29 schedule
+            if day.month in self.months and self._day_matches(day):
+                for hour in self.hours:
+                    for minute in self.minutes:
+                        candidate = datetime(day.year, day.month, day.day, hour, minute)
+                        if candidate >= start:
+                            return candidate
+            day += timedelta(days=1)
+        raise ValueError(f"Cron expression {self.expression!r} never fires")
+
+    def next_fire(self, after: datetime) -> datetime:
+        return self.next_after(after) + timedelta(seconds=random.uniform(0, self.jitter))
+
+    def __repr__(self) -> str:
+        return f"CronTrigger({self.expression!r}, jitter={self.jitter})"
+
+
+class IntervalTrigger:
+    """Fires every `seconds`, plus up to `jitter` seconds"""
+
+    def __init__(self, seconds: float, jitter: float = 0.0):
+        if seconds <= 0:
+            raise ValueError("Interval must be positive")
+        self.seconds = seconds
+        self.jitter = jitter
+
+    def next_fire(self, after: datetime) -> datetime:
+        return after + timedelta(seconds=self.seconds + random.uniform(0, self.jitter))
+
+    def __repr__(self) -> str:
+        return f"IntervalTrigger({self.seconds}, jitter={self.jitter})"
+
+
+class Stage:
+    """A pipeline step that runs its handler on batches of ids from worker tasks.
+
+    Ids already queued or being handled are not queued again. Whatever the
+    handler returns is passed to the `downstream` stage. While the `gate`
+    event is clear the stage takes no new ids and its workers wait.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[List[int]], Optional[Iterable[int]]],
+        workers: int = 1,
+        batch_size: int = 50,
+        max_wait: float = 2.0,
+        downstream: Optional["Stage"] = None,
+    ):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.batch_size = batch_size
+        self.max_wait = max_wait
+        self.downstream = downstream
+        self.gate: Optional[asyncio.Event] = None
+        self.processed = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._pending: Set[int] = set()
+        self._in_flight: Set[int] = set()
+
+    def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    @property
+    def paused(self) -> bool:
+        return self.gate is not None and not self.gate.is_set()
+
+    def put(self, ids: Iterable[int]) -> int:
+        """Queue ids for the stage; must be called on the orchestrator's event loop"""
+        if self.paused:
+            return 0
+        queued = 0
+        for item in ids:
+            if item in self._pending or item in self._in_flight:
+                continue
+            self._pending.add(item)
+            self._queue.put_nowait(item)
+            queued += 1
+        return queued
+
+    def clear(self) -> int:
+        """Drop the ids waiting in the queue; returns how many were dropped"""
+        dropped = 0
+        while not self._queue.empty():
+            self._queue.get_nowait()
+            self._queue.task_done()
+            dropped += 1
+        self._pending.clear()
+        return dropped
+
+    @property
+    def idle(self) -> bool:
+        return not self._pending and not self._in_flight
+
+    async def _next_batch(self) -> List[int]:
+        batch = [await self._queue.get()]
+        deadline = asyncio.get_running_loop().time() + self.max_wait
+        while len(batch) < self.batch_size:
+            timeout = deadline - asyncio.get_running_loop().time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _worker(self) -> None:
+        while True:
+            if self.gate is not None:
+                await self.gate.wait()
+            batch = await self._next_batch()
+            self._pending.difference_update(batch)
+            if self.paused:
+                # The lock was lost while this worker waited for ids
+                for _ in batch:
+                    self._queue.task_done()
+                continue
+            self._in_flight.update(batch)
+            start = time.perf_counter()
+            try:
+                forwarded = await asyncio.to_thread(self.handler, batch)
+                self.processed += len(batch)
+                if self.downstream is not None and forwarded:
+                    self.downstream.put(forwarded)
+            except Exception as e:
+                FAILURES.labels(operation=f"pipeline_{self.name}").inc()
+                logger.error(f"Pipeline stage {self.name} failed on {len(batch)} ids: {e}")
+            finally:
+                PIPELINE_STAGE_SECONDS.labels(stage=self.name).observe(time.perf_counter() - start)
+                self._in_flight.difference_update(batch)
+                for _ in batch:
+                    self._queue.task_done()
+
+
+def _within_days(earlier, later, days: int, dialect: str):
+    """SQL condition that datetime column `earlier` is at most `days` before `later`.
+
+    SQLite stores datetimes as text, where subtracting an interval is string
+    arithmetic, so it compares through datetime() instead.
+    """
+    if dialect == "sqlite":
+        return func.datetime(earlier) >= func.datetime(later, f"-{int(days)} days")
+    return earlier >= later - timedelta(days=days)
+
+
+def dedupe_jobs(job_ids: Sequence[int], window_days: int = 30) -> List[int]:
+    """Copy matches onto reposts and return the jobs that still need matching.
+
+    A repost has the same normalized title, company and location as an earlier
+    job posted within `window_days` that already has a match; it gets that
+    match's agent and confidence instead of another model call.
+    """
+    db = SessionLocal()
+    try:
+        unmatched = [
+            job_id for (job_id,) in db.query(Job.id).filter(Job.id.in_(job_ids), ~exists().where(AgentMatch.job_id == Job.id))
+        ]
+        original = aliased(Job)
+        same_location = and_(
+            func.coalesce(original.state, "") == func.coalesce(Job.state, ""),
+            func.coalesce(original.city, "") == func.coalesce(Job.city, ""),
+            func.coalesce(original.is_remote, False) == func.coalesce(Job.is_remote, False),
+        )
+        rows = db.execute(
+            select(Job.id, func.min(original.id))
+            .join(
+                original,
+                and_(
+                    original.cluster_key == Job.cluster_key,
+                    original.id < Job.id,
+                    _within_days(original.created_at, Job.created_at, window_days, db.bind.dialect.name),
+                    same_location,
+                ),
+            )
+            .where(Job.id.in_(unmatched), exists().where(AgentMatch.job_id == original.id))
+            .group_by(Job.id)
+        ).all()
+        duplicate_of: Dict[int, int] = dict(rows)
+        if not duplicate_of:
+            return unmatched
+
+        best = {}
+        for match in (
+            db.query(AgentMatch)
+            .filter(AgentMatch.job_id.in_(set(duplicate_of.values())))
+            .order_by(AgentMatch.confidence_score.desc(), AgentMatch.id)
+        ):
+            best.setdefault(match.job_id, match)
+        copies = [
+            AgentMatch(
+                job_id=job_id,
+                matched_agent=best[original_id].matched_agent,
+                confidence_score=best[original_id].confidence_score,
+                notes=f"Repost of job {original_id}; match copied.",
+            )
+            for job_id, original_id in duplicate_of.items()
+        ]
+        db.add_all(copies)
+        db.flush()
+        refresh_rank_scores(db, [copy.job_id for copy in copies])
+        record_matches(db, [copy.id for copy in copies])
+        created = [
+            {"id": c.id, "job_id": c.job_id, "matched_agent": c.matched_agent, "confidence_score": c.confidence_score}
+            for c in copies
+        ]
+        db.commit()
+    finally:
+        db.close()
+
+    for event in created:
+        publish_event(MATCH_CREATED, event)
+    logger.info(f"Dedupe: {len(created)} reposts reuse an earlier match, {len(unmatched) - len(created)} to match")
+    return [job_id for job_id in unmatched if job_id not in duplicate_of]
+
+
+def match_jobs(job_ids: Sequence[int]) -> List[int]:
+    """Match jobs with the AI processor when an OpenAI key is configured, else with the heuristic matcher"""
+    if not os.getenv("OPENAI_API_KEY"):
+        return match_jobs_heuristically(job_ids)
+
+    from backend.ai_processor import AIJobProcessor
+
+    processor = AIJobProcessor()
+    return [job_id for job_id in job_ids if processor.process_job(job_id)]
+
+
+def draft_outreach(job_ids: Sequence[int], min_confidence: float = 0.8) -> List[int]:
+    """Generate drafts for the jobs whose matches clear `min_confidence` and record posting-to-draft latency"""
+    outreach_ids = generate_outreach_for_all_high_confidence_jobs(min_confidence, job_ids=list(job_ids))
+    if outreach_ids:
+        db = SessionLocal()
+        try:
+            rows = db.query(Outreach.created_at, Job.created_at).join(Job).filter(Outreach.id.in_(outreach_ids))
+            for drafted_at, saved_at in rows:
+                PIPELINE_LATENCY_SECONDS.observe(max((drafted_at - saved_at).total_seconds(), 0.0))
+        finally:
+            db.close()
+    return outreach_ids
+
+
+def scrape_indeed() -> None:
+    from scraper.indeed_scraper import main as scrape
+
+    scrape([])
+
+
+def scrape_sources(names: Optional[Sequence[str]] = None) -> None:
+    """Crawl job boards concurrently (all registered ones by default) on the shared scraper runtime"""
+    from scraper.runtime import crawl_sources
+
+    crawl_sources(names)
+
+
+def scrape_mock(count: int = 15) -> None:
+    from scraper.mock_scraper import MockIndeedScraper
+
+    scraper = MockIndeedScraper()
+    scraper.save_jobs_to_db(scraper.generate_mock_jobs(count=count))
+
+
+SOURCES = {
+    "indeed": scrape_indeed,
+    "linkedin": partial(scrape_sources, ["linkedin"]),
+    "glassdoor": partial(scrape_sources, ["glassdoor"]),
+    "all": scrape_sources,
+    "mock": scrape_mock,
+}
+
+
+class PipelineOrchestrator:
+    """Runs scrapes on triggers and moves new postings through dedupe, matching and drafting"""
+
+    def __init__(
+        self,
+        scrape: Callable[[], None],
+        triggers: Sequence = (),
+        match_workers: int = 2,
+        batch_size: int = 50,
+        max_wait: float = 2.0,
+        min_confidence: float = 0.8,
+        lock_ttl: float = 300.0,
+        reconcile: bool = True,
+    ):
+        self.scrape = scrape
+        self.triggers = list(triggers)
+        self.min_confidence = min_confidence
+        self.reconcile_backlog = reconcile
+        self.lock = DatabaseLock(LOCK_NAME, ttl=lock_ttl)
+        self.draft = Stage("draft", lambda ids: draft_outreach(ids, min_confidence), 1, batch_size, max_wait)
+        self.match = Stage("match", match_jobs, match_workers, batch_size, max_wait, downstream=self.draft)
+        self.dedupe = Stage("dedupe", dedupe_jobs, 1, batch_size, max_wait, downstream=self.match)
+        self.stages = [self.dedupe, self.match, self.draft]
+        self._subscription = None
+        self._tasks: List[asyncio.Task] = []
+        self._scrapes: Set[asyncio.Task] = set()
+        self._scraping = False
+        self._lock_held: Optional[asyncio.Event] = None
+
+    @property
+    def lock_held(self) -> bool:
+        return self._lock_held is not None and self._lock_held.is_set()
+
+    async def start(self) -> bool:
+        """Take the orchestrator lock and start the stages; False if another orchestrator holds it"""
+        if not self.lock.acquire():
+            logger.warning(f"Another orchestrator holds the pipeline lock ({self.lock.holder()}); not starting")
+            return False
+        self._lock_held = asyncio.Event()
+        self._lock_held.set()
+        configure_event_bus(listen=True)
+        self._subscription = event_bus.subscribe({JOB_CREATED, MATCH_CREATED}, max_queue_size=10000)
+        for stage in self.stages:
+            stage.gate = self._lock_held
+            stage.start()
+        self._tasks = [asyncio.create_task(self._route_events()), asyncio.create_task(self._renew_lock())]
+        await self.reconcile()
+        return True
+
+    async def stop(self) -> None:
+        tasks = self._tasks + list(self._scrapes)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for stage in self.stages:
+            await stage.stop()
+        if self._subscription is not None:
+            event_bus.unsubscribe(self._subscription)
+        self.lock.release()
+
+    async def _route_events(self) -> None:
+        while True:
+            event = await self._subscription.get()
+            if event.type == JOB_CREATED:
+                self.dedupe.put([event.data["id"]])
+            elif event.data.get("confidence_score", 0) >= self.min_confidence:
+                self.draft.put([event.data["job_id"]])
+
+    async def _lock_call(self, method) -> bool:
+        """Run a lock method off the event loop; a database error counts as not holding the lease"""
+        try:
+            return await asyncio.to_thread(method)
+        except Exception as e:
+            FAILURES.labels(operation="pipeline_lock").inc()
+            logger.error(f"Pipeline lock {method.__name__} failed: {e}")
+            return False
+
+    async def _renew_lock(self) -> None:
+        """Keep the lease; if it is taken or cannot be renewed, pause scrapes and stages until it is ours again"""
+        while True:
+            await asyncio.sleep(self.lock.ttl / 3)
+            if await self._lock_call(self.lock.renew):
+                continue
+            self._lock_held.clear()
+            dropped = sum(stage.clear() for stage in self.stages)
+            logger.error(f"Pipeline lock lost; pausing scrapes and stages ({dropped} queued ids dropped)")
+            while not await self._lock_call(self.lock.acquire):
+                await asyncio.sleep(self.lock.ttl / 3)
+            self._lock_held.set()
+            logger.info("Pipeline lock re-acquired; resuming")
+            try:
+                await self.reconcile()
+            except Exception as e:
+                logger.error(f"Reconcile after re-acquiring the pipeline lock failed: {e}")
+
+    def _backlog(self):
+        db = SessionLocal()
+        try:
+            unmatched = [
+                job_id for (job_id,) in db.query(Job.id).filter(~exists().where(AgentMatch.job_id == Job.id)).order_by(Job.id)
+            ]
+            undrafted = [job.id for job, _ in db.execute(eligible_outreach_statement(self.min_confidence))]
+            return unmatched, undrafted
+        finally:
+            db.close()
+
+    async def reconcile(self) -> None:
+        """Queue work the events missed: unmatched jobs and high-confidence matches without a draft"""
+        if not self.reconcile_backlog:
+            return
+        unmatched, undrafted = await asyncio.to_thread(self._backlog)
+        queued = self.dedupe.put(unmatched) + self.draft.put(undrafted)
+        if queued:
+            logger.info(f"Reconciled {queued} jobs from the database into the pipeline")
+
+    async def run_scrape(self) -> bool:
+        """Run one scrape unless one is already running; new jobs flow on through their events"""
+        if not self.lock_held:
+            logger.warning("Pipeline lock is held elsewhere; skipping this trigger")
+            return False
+        if self._scraping:
+            logger.warning("Previous scrape still running; skipping this trigger")
+            return False
+        self._scraping = True
+        start = time.perf_counter()
+        try:
+            await asyncio.to_thread(self.scrape)
+        except Exception as e:
+            FAILURES.labels(operation="pipeline_scrape").inc()
+            logger.error(f"Scrape failed: {e}")
+        finally:
+            self._scraping = False
+            PIPELINE_STAGE_SECONDS.labels(stage="scrape").observe(time.perf_counter() - start)
+        await self.reconcile()
+        return True
+
+    async def drain(self, settle: float = 0.2) -> None:
+        """Wait until every stage is idle and no events are waiting to be routed"""
+        quiet = 0
+        while quiet < 2:
+            await asyncio.sleep(settle)
+            busy = any(not stage.idle for stage in self.stages) or not self._subscription.queue.empty()
+            quiet = 0 if busy else quiet + 1
+
+    def next_fire(self, now: datetime) -> Optional[datetime]:
+        return min((trigger.next_fire(now) for trigger in self.triggers), default=None)
+
+    async def run_forever(self) -> None:
+        if not await self.start():
+            return
+        try:
+            while True:
+                await self._lock_held.wait()
+                fire_at = self.next_fire(datetime.now())
+                if fire_at is None:
+                    await asyncio.Event().wait()  # event-driven stages only
+                logger.info(f"Next scrape at {fire_at:%Y-%m-%d %H:%M:%S}")
+                await asyncio.sleep(max((fire_at - datetime.now()).total_seconds(), 0))
+                # The loop only keeps weak references to tasks, so hold the scrape until it finishes
+                scrape = asyncio.create_task(self.run_scrape())
+                self._scrapes.add(scrape)
+                scrape.add_done_callback(self._scrapes.discard)
+        finally:
+            await self.stop()
+
+    async def run_once(self) -> bool:
+        """Scrape once and wait for every new posting to be matched and drafted"""
+        if not await self.start():
+            return False
+        try:
+            await self.run_scrape()
+            await self.drain()
+        finally:
+            await self.stop()
+        logger.info(", ".join(f"{stage.name}: {stage.processed}" for stage in self.stages))
+        return True
+
+
+def build_triggers(cron: Sequence[str], interval: Optional[float], jitter: float) -> List:
+    triggers = [CronTrigger(expression, jitter) for expression in cron]
+    if interval:
+        triggers.append(IntervalTrigger(interval, jitter))
+    return triggers
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the scrape -> dedupe -> match -> draft pipeline")
+    parser.add_argument("--source", choices=sorted(SOURCES), default=os.getenv("ORCHESTRATOR_SOURCE", "indeed"))
+    parser.add_argument(
+        "--cron",
+        action="append",
+        default=[expression for expression in os.getenv("ORCHESTRATOR_CRON", "").split(";") if expression.strip()],
+        help='five-field cron schedule for scrapes, e.g. "0 9 * * *" (repeatable)',
+    )
+    parser.add_argument("--interval", type=float, default=float(os.getenv("ORCHESTRATOR_INTERVAL", "1800")) or None)
+    parser.add_argument("--jitter", type=float, default=float(os.getenv("ORCHESTRATOR_JITTER", "120")))
+    parser.add_argument("--match-workers", type=int, default=int(os.getenv("ORCHESTRATOR_MATCH_WORKERS", "2")))
+    parser.add_argument("--batch-size", type=int, default=50)
+    parser.add_argument("--once", action="store_true", help="scrape once, drain the pipeline and exit")
+    args = parser.parse_args(argv)
+
+    init_database()
+    configure_tracing("orchestrator")
+    orchestrator = PipelineOrchestrator(
+        SOURCES[args.source],
+        build_triggers(args.cron, args.interval, args.jitter),
+        match_workers=args.match_workers,
+        batch_size=args.batch_size,
+    )
+    try:
+        if args.once:
+            asyncio.run(orchestrator.run_once())
+        else:
+            logger.info(f"Starting pipeline orchestrator with {orchestrator.triggers}")
+            asyncio.run(orchestrator.run_forever())
+    finally:
+        export_metrics("orchestrator")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Adaptive request pacing and per-host circuit breakers for the scrapers
+
+Each host gets an AIMD rate: every successful response adds
+`SCRAPE_RATE_INCREASE` requests per second (up to `SCRAPE_RATE_MAX`), and
+every throttling response (429, 403 or 503) multiplies the rate by
+`SCRAPE_RATE_DECREASE` (down to `SCRAPE_RATE_MIN`). A `Retry-After` header
+holds back the next request to that host until it has passed.
+
+After `SCRAPE_BREAKER_THRESHOLD` throttling responses in a row, or a
+Retry-After longer than `SCRAPE_BREAKER_MAX_WAIT`, the host's circuit opens
+and requests fail fast with `CircuitOpenError` for `SCRAPE_BREAKER_COOLDOWN`
+seconds (or the Retry-After, if longer). Then one probe request is let
+through: success closes the circuit, another block reopens it for twice as
+long, up to an hour.
+
+    controller = RateController.from_env()
+    response = controller.get(session, url, timeout=30)
+
+The current rate and breaker state per host are exported as the
+`auditor_scrape_rate` and `auditor_scrape_circuit_state` gauges.
+"""
+
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+from loguru import logger
+
+from backend.metrics import SCRAPE_CIRCUIT_STATE, SCRAPE_RATE, SCRAPE_THROTTLED
+
+THROTTLE_STATUSES = (403, 429, 503)
+CLOSED, HALF_OPEN, OPEN = "closed", "half_open", "open"
+CIRCUIT_STATES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+MAX_COOLDOWN = 3600.0
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request to a host whose circuit is open"""
+
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"Circuit open for {host}; retry in {retry_in:.0f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """Seconds to wait from a Retry-After header given as seconds or an HTTP date"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        retry_at = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(retry_at - (now if now is not None else time.time()), 0.0)
+
+
+class HostState:
+    """Rate and breaker state for one host; guarded by the controller's lock"""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.next_request_at = 0.0
+        self.state = CLOSED
+        self.consecutive_blocks = 0
+        self.open_until = 0.0
+        self.cooldown = 0.0
+        self.probing = False
+
+
+class RateController:
+    """AIMD request rates and circuit breakers, one of each per host"""
+
+    def __init__(
+        self,
+        initial_rate: float = 0.3,
+        min_rate: float = 0.05,
+        max_rate: float = 2.0,
+        increase: float = 0.05,
+        decrease: float = 0.5,
+        breaker_threshold: int = 3,
+        breaker_cooldown: float = 300.0,
+        breaker_max_wait: float = 60.0,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        self.initial_rate = initial_rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.breaker_threshold = breaker_threshold
+        self.breaker_cooldown = breaker_cooldown
+        self.breaker_max_wait = breaker_max_wait
+        self.clock = clock
+        self.sleep = sleep
+        self._hosts: Dict[str, HostState] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "RateController":
+        return cls(
+            initial_rate=float(os.getenv("SCRAPE_RATE_INITIAL", "0.3")),
+            min_rate=float(os.getenv("SCRAPE_RATE_MIN", "0.05")),
+            max_rate=float(os.getenv("SCRAPE_RATE_MAX", "2")),
+            increase=float(os.getenv("SCRAPE_RATE_INCREASE", "0.05")),
+            decrease=float(os.getenv("SCRAPE_RATE_DECREASE", "0.5")),
+            breaker_threshold=int(os.getenv("SCRAPE_BREAKER_THRESHOLD", "3")),
+            breaker_cooldown=float(os.getenv("SCRAPE_BREAKER_COOLDOWN", "300")),
+            breaker_max_wait=float(os.getenv("SCRAPE_BREAKER_MAX_WAIT", "60")),
+        )
+
+    def _host(self, host: str) -> HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = HostState(self.initial_rate)
+            self._export(host, state)
+        return state
+
+    def _export(self, host: str, state: HostState) -> None:
+        SCRAPE_RATE.labels(host=host).set(state.rate)
+        SCRAPE_CIRCUIT_STATE.labels(host=host).set(CIRCUIT_STATES[state.state])
+
+    def rate(self, host: str) -> float:
+        with self._lock:
+            return self._host(host).rate
+
+    def circuit_state(self, host: str) -> str:
+        with self._lock:
+            return self._host(host).state
+
+    def acquire(self, host: str) -> None:
+        """Wait for the host's next request slot; raises CircuitOpenError instead of waiting out an open circuit"""
+        with self._lock:
+            state = self._host(host)
+            now = self.clock()
+            if state.state == OPEN:
+                if now < state.open_until:
+                    raise CircuitOpenError(host, state.open_until - now)
+                state.state = HALF_OPEN
+                self._export(host, state)
+                logger.info(f"Circuit for {host} half-open; sending a probe request")
+            if state.state == HALF_OPEN:
+                if state.probing:
+                    raise CircuitOpenError(host, state.cooldown)
+                state.probing = True
+            start = max(now, state.next_request_at)
+            state.next_request_at = start + 1.0 / state.rate
+        if start > now:
+            self.sleep(start - now)
+
+    def record(self, host: str, status: Optional[int], retry_after: Optional[float] = None) -> None:
+        """Adjust the host's rate and breaker for a response (`status` None for a connection error)"""
+        with self._lock:
+            state = self._host(host)
+            state.probing = False
+            if status in THROTTLE_STATUSES:
+                SCRAPE_THROTTLED.labels(host=host, status=str(status)).inc()
+                self._on_block(host, state, retry_after)
+            elif status is not None and status < 500:
+                self._on_success(host, state)
+            elif state.state == HALF_OPEN:
+                # A failed probe says nothing good about the host; wait again
+                self._open(host, state, None)
+            self._export(host, state)
+
+    def _on_success(self, host: str, state: HostState) -> None:
+        state.consecutive_blocks = 0
+        if state.state != CLOSED:
+            logger.info(f"Circuit for {host} closed")
+            state.state, state.cooldown = CLOSED, 0.0
+        state.rate = min(self.max_rate, state.rate + self.increase)
+
+    def _on_block(self, host: str, state: HostState, retry_after: Optional[float]) -> None:
+        state.consecutive_blocks += 1
+        state.rate = max(self.min_rate, state.rate * self.decrease)
+        now = self.clock()
+        state.next_request_at = max(state.next_request_at, now + 1.0 / state.rate)
+        if retry_after:
+            state.next_request_at = max(state.next_request_at, now + retry_after)
+        if (
+            state.state == HALF_OPEN
+            or state.consecutive_blocks >= self.breaker_threshold
+            or (retry_after or 0) > self.breaker_max_wait
+        ):
+            self._open(host, state, retry_after)
+        else:
+            logger.warning(f"Throttled by {host}; slowing to {state.rate:.2f} requests/s")
+
+    def _open(self, host: str, state: HostState, retry_after: Optional[float]) -> None:
+        state.cooldown = min(MAX_COOLDOWN, state.cooldown * 2 if state.cooldown else self.breaker_cooldown)
+        wait = max(state.cooldown, retry_after or 0)
+        state.state, state.open_until = OPEN, self.clock() + wait
+        logger.warning(f"Circuit for {host} opened for {wait:.0f}s after {state.consecutive_blocks} blocked requests")
+
+    def get(self, session, url: str, **kwargs):
+        """`session.get(url)` paced and guarded for the URL's host; the response's status adjusts the rate"""
+        host = urlparse(url).netloc
+        self.acquire(host)
+        try:
+            response = session.get(url, **kwargs)
+        except Exception:
+            self.record(host, None)
+            raise
+        self.record(host, response.status_code, parse_retry_after(response.headers.get("Retry-After")))
+        return response
@@ -0,0 +1,305 @@
+"""
+Checkpointed, resumable scrape runs
+
+A run ledger records every (term, location, page) search unit of a crawl and
+every job detail URL it finds as pending, done or failed. Listings are saved
+page by page and a URL only counts as done once its job is in the database,
+so when a run dies (blocked, OOM, deploy) the next one picks up the same run
+and skips the pages it already finished:
+
+    ledger = RunLedger.start("indeed")
+    ledger.plan_pages([(term, "", page) for term in terms for page in range(2)])
+    saved = resumable_crawl(scraper, ledger)
+    ledger.finish()
+
+URLs that are already saved are never fetched again, including ones found by
+another search term. URLs whose listing could not be scraped are retried by
+later runs with exponential backoff (SCRAPE_RETRY_BASE_MINUTES, doubling up to
+a day) until SCRAPE_MAX_URL_ATTEMPTS. An unfinished run older than
+SCRAPE_RESUME_HOURS is abandoned rather than resumed, as its search results
+are stale by then.
+"""
+
+import os
+from contextlib import nullcontext
+from datetime import datetime, timedelta
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+from backend.database import SessionLocal
+from backend.metrics import FAILURES
+from backend.models import Job, ScrapePage, ScrapeRun, ScrapeUrl
+from scraper.rate_control import CircuitOpenError
+
+MAX_BACKOFF = timedelta(hours=24)
+
+
+def retry_delay(attempts: int, base_minutes: Optional[float] = None) -> timedelta:
+    """Wait before the next try of a URL that has failed `attempts` times"""
+    if base_minutes is None:
+        base_minutes = float(os.getenv("SCRAPE_RETRY_BASE_MINUTES", "30"))
+    return min(timedelta(minutes=base_minutes * 2 ** max(attempts - 1, 0)), MAX_BACKOFF)
+
+
+class RunLedger:
+    """The pages and URLs of one scrape run of a source"""
+
+    def __init__(self, run_id: int, source: str, resumed: bool = False, max_url_attempts: Optional[int] = None):
+        self.run_id = run_id
+        self.source = source
+        self.resumed = resumed
+        self.saved_count = 0
+        self.interrupted = False  # stopped early by an open circuit; leave the run to be resumed
+        self.max_url_attempts = max_url_attempts or int(os.getenv("SCRAPE_MAX_URL_ATTEMPTS", "5"))
+
+    @classmethod
+    def start(cls, source: str, resume_hours: Optional[float] = None) -> "RunLedger":
+        """Resume the source's unfinished run, or start a new one"""
+        if resume_hours is None:
+            resume_hours = float(os.getenv("SCRAPE_RESUME_HOURS", "24"))
+        now = datetime.utcnow()
+        db = SessionLocal()
+        try:
+            runs = db.query(ScrapeRun).filter(ScrapeRun.source == source, ScrapeRun.status == "running")
+            resumable = None
+            for run in runs.order_by(ScrapeRun.id.desc()):
+                if resumable is None and run.started_at >= now - timedelta(hours=resume_hours):
+                    resumable = run
+                else:
+                    run.status, run.finished_at = "abandoned", now
+            if resumable is None:
+                resumable = ScrapeRun(source=source, status="running", started_at=now)
+                db.add(resumable)
+                resumed = False
+            else:
+                resumed = True
+            db.commit()
+            ledger = cls(resumable.id, source, resumed)
+        finally:
+            db.close()
+        if resumed:
+            logger.info(f"Resuming {source} scrape run {ledger.run_id}")
+        return ledger
+
+    def plan_pages(self, units: Iterable[Tuple[str, str, int]]) -> None:
+        """Record the run's search units; units already in the ledger keep their status"""
+        db = SessionLocal()
+        try:
+            known = {
+                (term, location, page)
+                for term, location, page in db.query(ScrapePage.term, ScrapePage.location, ScrapePage.page).filter(
+                    ScrapePage.run_id == self.run_id
+                )
+            }
+            for term, location, page in units:
+                if (term, location, page) not in known:
+                    known.add((term, location, page))
+                    db.add(ScrapePage(run_id=self.run_id, term=term, location=location, page=page))
+            db.commit()
+        finally:
+            db.close()
+
+    def pending_pages(self) -> List[Tuple[str, str, int]]:
+        """Search units not yet done, in the order they were planned"""
+        db = SessionLocal()
+        try:
+            rows = (
+                db.query(ScrapePage.term, ScrapePage.location, ScrapePage.page)
+                .filter(ScrapePage.run_id == self.run_id, ScrapePage.status != "done")
+                .order_by(ScrapePage.id)
+            )
+            return [tuple(row) for row in rows]
+        finally:
+            db.close()
+
+    def _set_page(self, unit: Tuple[str, str, int], **values) -> None:
+        term, location, page = unit
+        db = SessionLocal()
+        try:
+            db.query(ScrapePage).filter(
+                ScrapePage.run_id == self.run_id,
+                ScrapePage.term == term,
+                ScrapePage.location == location,
+                ScrapePage.page == page,
+            ).update({**values, "updated_at": datetime.utcnow()}, synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+    def page_done(self, unit: Tuple[str, str, int], url_count: int) -> None:
+        self._set_page(unit, status="done", url_count=url_count, last_error=None)
+
+    def page_failed(self, unit: Tuple[str, str, int], error: str) -> None:
+        self._set_page(unit, status="failed", last_error=error)
+
+    def claim_urls(self, urls: Sequence[str], now: Optional[datetime] = None) -> List[str]:
+        """The URLs from `urls` worth fetching now, recorded as pending for this run.
+
+        Skips URLs that are done or already saved as jobs, failed URLs whose
+        backoff has not elapsed or that are out of attempts, and duplicates.
+        """
+        now = now or datetime.utcnow()
+        urls = list(dict.fromkeys(urls))
+        if not urls:
+            return []
+        db = SessionLocal()
+        try:
+            saved = {url for (url,) in db.query(Job.url).filter(Job.url.in_(urls))}
+            entries = {
+                entry.url: entry
+                for entry in db.query(ScrapeUrl).filter(ScrapeUrl.source == self.source, ScrapeUrl.url.in_(urls))
+            }
+            claimed = []
+            for url in urls:
+                entry = entries.get(url)
+                if entry is None:
+                    entry = ScrapeUrl(source=self.source, url=url, attempts=0)
+                    db.add(entry)
+                if url in saved:
+                    entry.status = "done"
+                elif entry.status == "done" or (
+                    entry.status == "failed"
+                    and (entry.attempts >= self.max_url_attempts or (entry.next_attempt_at and entry.next_attempt_at > now))
+                ):
+                    continue
+                else:
+                    entry.status = "pending"
+                    claimed.append(url)
+                entry.run_id = self.run_id
+                entry.updated_at = now
+            db.commit()
+            return claimed
+        finally:
+            db.close()
+
+    def due_retries(self, limit: int = 100, now: Optional[datetime] = None) -> List[str]:
+        """Failed URLs from earlier attempts whose backoff has elapsed, oldest due first"""
+        now = now or datetime.utcnow()
+        db = SessionLocal()
+        try:
+            rows = (
+                db.query(ScrapeUrl.url)
+                .filter(
+                    ScrapeUrl.source == self.source,
+                    ScrapeUrl.status == "failed",
+                    ScrapeUrl.attempts < self.max_url_attempts,
+                    ScrapeUrl.next_attempt_at <= now,
+                )
+                .order_by(ScrapeUrl.next_attempt_at)
+                .limit(limit)
+            )
+            return [url for (url,) in rows]
+        finally:
+            db.close()
+
+    def settle_urls(self, urls: Sequence[str], errors: Optional[dict] = None, now: Optional[datetime] = None) -> int:
+        """Mark URLs done if their job is saved and failed otherwise; returns how many are done
+
+        Checking the jobs table rather than trusting the caller means a save
+        that was rolled back leaves its URLs to be retried.
+        """
+        now = now or datetime.utcnow()
+        errors = errors or {}
+        if not urls:
+            return 0
+        db = SessionLocal()
+        try:
+            saved = {url for (url,) in db.query(Job.url).filter(Job.url.in_(urls))}
+            for entry in db.query(ScrapeUrl).filter(ScrapeUrl.source == self.source, ScrapeUrl.url.in_(urls)):
+                entry.run_id = self.run_id
+                entry.updated_at = now
+                if entry.url in saved:
+                    entry.status, entry.last_error, entry.next_attempt_at = "done", None, None
+                    continue
+                entry.status = "failed"
+                entry.attempts += 1
+                entry.last_error = errors.get(entry.url, "listing was not saved")
+                entry.next_attempt_at = now + retry_delay(entry.attempts)
+                if entry.attempts >= self.max_url_attempts:
+                    logger.warning(f"Giving up on {entry.url} after {entry.attempts} attempts")
+            db.commit()
+            return len(saved)
+        finally:
+            db.close()
+
+    def finish(self, status: str = "completed") -> None:
+        db = SessionLocal()
+        try:
+            db.query(ScrapeRun).filter(ScrapeRun.id == self.run_id).update(
+                {"status": status, "finished_at": datetime.utcnow()}, synchronize_session=False
+            )
+            db.commit()
+        finally:
+            db.close()
+
+
+def scrape_listings(scraper, urls: Sequence[str]) -> Iterator[Tuple[str, Optional[dict]]]:
+    """(url, job data or None) for each listing, concurrently if the scraper has `scrape_job_listings`"""
+    if hasattr(scraper, "scrape_job_listings"):
+        yield from scraper.scrape_job_listings(urls)
+        return
+    for url in urls:
+        yield url, scraper.scrape_job_listing(url)
+        scraper.delay()
+
+
+def scrape_and_save(scraper, ledger: RunLedger, urls: Sequence[str]) -> int:
+    """Scrape the listings the ledger lets through, save them and settle their URLs; returns jobs saved"""
+    claimed = ledger.claim_urls(urls)
+    jobs, errors, attempted = [], {}, []
+    saved_count = 0
+    try:
+        for url, job_data in scrape_listings(scraper, claimed):
+            attempted.append(url)
+            if job_data:
+                jobs.append(job_data)
+            else:
+                errors[url] = "listing could not be scraped"
+    finally:
+        # On an open circuit, keep what was scraped; untried URLs stay pending
+        saved_count = scraper.save_jobs_to_db(jobs) if jobs else 0
+        ledger.saved_count += saved_count
+        ledger.settle_urls(attempted, errors)
+    return saved_count
+
+
+def resumable_crawl(scraper, ledger: RunLedger, stage: Optional[Callable[[str], object]] = None) -> int:
+    """Crawl the ledger's pending pages, then the failed URLs due a retry; returns jobs saved
+
+    `scraper` provides `search_page(term, location, page)` returning detail
+    URLs, `scrape_job_listing(url)`, `save_jobs_to_db(jobs)` and `delay()`,
+    and optionally `scrape_job_listings(urls)` to fetch a page's listings
+    concurrently (see scraper/runtime.py).
+    `stage(name)`, e.g. a profiler's, wraps each page in a context manager.
+    When a host's circuit opens the crawl stops and `ledger.interrupted` is
+    set, so the caller leaves the run unfinished for the next run to resume.
+    """
+    stage = stage or (lambda name: nullcontext())
+    saved_before = ledger.saved_count
+    try:
+        for unit in ledger.pending_pages():
+            term, location, page = unit
+            with stage(f"search: {term}"):
+                try:
+                    urls = scraper.search_page(term, location, page)
+                except CircuitOpenError:
+                    raise
+                except Exception as e:
+                    FAILURES.labels(operation="search").inc()
+                    logger.error(f"Error searching {term!r} page {page + 1}: {e}")
+                    ledger.page_failed(unit, str(e))
+                    scraper.delay()
+                    continue
+                scrape_and_save(scraper, ledger, urls)
+                ledger.page_done(unit, len(urls))
+
+        retries = ledger.due_retries()
+        if retries:
+            logger.info(f"Retrying {len(retries)} listings that failed in earlier runs")
+            with stage("retry"):
+                scrape_and_save(scraper, ledger, retries)
+    except CircuitOpenError as e:
+        ledger.interrupted = True
+        logger.warning(f"Stopping the crawl: {e}. The next run resumes from here.")
+    return ledger.saved_count - saved_before
@@ -0,0 +1,554 @@
+"""
+Shared fetch/parse runtime for job board scrapers
+
+A job board is a `SourcePlugin`: it builds search URLs, pulls the job detail
+URLs out of a results page and reads the fields of a detail page. Everything
+else is shared, so a new board gets it without writing any of it:
+
+- fetching on a pooled session through the per-host adaptive `RateController`
+  (scraper/rate_control.py), with responses cached for SCRAPE_CACHE_SECONDS
+  up to SCRAPE_CACHE_MAX_BYTES of page bodies
+- the listings found on a search page fetched on SCRAPE_FETCH_WORKERS threads
+- salary, relative-date and schema.org JobPosting (JSON-LD) parsing, so a
+  plugin only has to find what the page's structured data leaves out
+- bulk ingest (scraper/ingest.py) and checkpointed, resumable crawls
+  (scraper/run_ledger.py), with `Job.source` set to the plugin's name
+
+`crawl_sources` crawls several boards at once, one thread per source:
+
+    python -m scraper.runtime --source indeed --source linkedin
+    saved = crawl_sources(["indeed", "glassdoor"])
+
+A new board is a plugin class plus an entry in `SOURCE_PLUGINS`.
+"""
+
+import argparse
+import importlib
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import requests
+from bs4 import BeautifulSoup
+from fake_useragent import UserAgent
+from loguru import logger
+from requests.adapters import HTTPAdapter
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.metrics import FAILURES, HTTP_FETCH_SECONDS, PARSE_SECONDS, RETRIES, export_metrics, observe, record_cache
+from backend.profiling import RunProfiler, add_profile_arguments
+from backend.tracing import configure_tracing, current_trace_context, start_span
+from scraper.ingest import save_jobs
+from scraper.rate_control import THROTTLE_STATUSES, CircuitOpenError, RateController
+from scraper.run_ledger import RunLedger, resumable_crawl
+
+# module:class of each source's plugin, imported when the source is first used
+SOURCE_PLUGINS = {
+    "indeed": "scraper.indeed_scraper:IndeedSource",
+    "linkedin": "scraper.linkedin_scraper:LinkedInSource",
+    "glassdoor": "scraper.glassdoor_scraper:GlassdoorSource",
+}
+
+# Search terms for accounting/auditing jobs
+SEARCH_TERMS = [
+    "auditor",
+    "accounting",
+    "financial analyst",
+    "bookkeeper",
+    "tax preparer",
+    "financial services",
+    "compliance",
+    "internal audit",
+]
+
+SALARY_PATTERNS = [
+    r"\$(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s*-\s*\$(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)",  # $50,000 - $70,000
+    r"\$(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s*to\s*\$(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)",  # $50,000 to $70,000
+    r"(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s*-\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)",  # 50,000 - 70,000
+    r"(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)\s*to\s*(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)",  # 50,000 to 70,000
+]
+SINGLE_SALARY_PATTERN = r"\$?(\d{1,3}(?:,\d{3})*(?:\.\d{2})?)"
+AGE_UNITS = {
+    "minute": timedelta(minutes=1),
+    "hour": timedelta(hours=1),
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1),
+    "month": timedelta(days=30),
+}
+
+
+def extract_salary(text: str) -> Tuple[Optional[float], Optional[float]]:
+    """Extract salary range from text"""
+    if not text:
+        return None, None
+
+    # "$65K" as "$65,000", and drop "/yr" between the ends of a range
+    text = re.sub(r"(\d+(?:\.\d+)?)\s*[kK]\b", lambda m: f"{float(m.group(1)) * 1000:,.0f}", text)
+    text = re.sub(r"\s*(?:/|per\s+)(?:yr|year|annum)\b", "", text, flags=re.IGNORECASE)
+
+    for pattern in SALARY_PATTERNS:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            try:
+                min_sal = float(match.group(1).replace(",", ""))
+                max_sal = float(match.group(2).replace(",", ""))
+                return min_sal, max_sal
+            except ValueError:
+                continue
+
+    # Single salary
+    match = re.search(SINGLE_SALARY_PATTERN, text)
+    if match:
+        try:
+            salary = float(match.group(1).replace(",", ""))
+            return salary, salary
+        except ValueError:
+            pass
+
+    return None, None
+
+
+def parse_posted_date(text: Optional[str], now: Optional[datetime] = None) -> datetime:
+    """Posting date from an ISO date or an age like "3 days ago", "30+ days ago" or "Just posted"; now if unknown"""
+    now = now or datetime.now()
+    if not text:
+        return now
+    text = text.strip()
+    try:
+        return datetime.fromisoformat(text.replace("Z", "+00:00")).replace(tzinfo=None)
+    except ValueError:
+        pass
+    match = re.search(r"(\d+)\+?\s*(minute|hour|day|week|month)", text, re.IGNORECASE)
+    if match:
+        unit = match.group(2).lower()
+        posted = now - int(match.group(1)) * AGE_UNITS[unit]
+        return posted if unit in ("minute", "hour") else posted.replace(hour=0, minute=0, second=0, microsecond=0)
+    return now
+
+
+def select_text(soup, *selectors: str) -> Optional[str]:
+    """Stripped text of the first element matching any of the CSS selectors, in order"""
+    for selector in selectors:
+        element = soup.select_one(selector)
+        if element is not None:
+            text = element.get_text(" ", strip=True)
+            if text:
+                return text
+    return None
+
+
+def _job_posting_node(data) -> Optional[dict]:
+    if isinstance(data, list):
+        return next(filter(None, (_job_posting_node(item) for item in data)), None)
+    if not isinstance(data, dict):
+        return None
+    kind = data.get("@type")
+    if kind == "JobPosting" or (isinstance(kind, list) and "JobPosting" in kind):
+        return data
+    return _job_posting_node(data.get("@graph", []))
+
+
+def parse_job_posting_ld(soup) -> Dict:
+    """Job fields from the page's schema.org JobPosting JSON-LD, if it has one"""
+    posting = None
+    for script in soup.find_all("script", type="application/ld+json"):
+        try:
+            posting = _job_posting_node(json.loads(script.string or ""))
+        except ValueError:
+            continue
+        if posting:
+            break
+    if not posting:
+        return {}
+
+    fields = {"title": posting.get("title")}
+    organization = posting.get("hiringOrganization")
+    if isinstance(organization, dict):
+        fields["company"] = organization.get("name")
+    places = posting.get("jobLocation")
+    place = places[0] if isinstance(places, list) and places else places
+    address = place.get("address") if isinstance(place, dict) else None
+    if isinstance(address, dict):
+        parts = [address.get("addressLocality"), address.get("addressRegion")]
+        fields["location"] = ", ".join(part for part in parts if part) or None
+    if posting.get("jobLocationType") == "TELECOMMUTE" and not fields.get("location"):
+        fields["location"] = "Remote"
+    if posting.get("description"):
+        fields["description"] = BeautifulSoup(posting["description"], "html.parser").get_text(" ", strip=True)
+    fields["date_text"] = posting.get("datePosted")
+
+    salary = posting.get("baseSalary")
+    value = salary.get("value") if isinstance(salary, dict) else None
+    if isinstance(value, dict) and value.get("unitText", "YEAR") == "YEAR":
+        low = value.get("minValue", value.get("value"))
+        high = value.get("maxValue", low)
+        try:
+            fields["salary_min"], fields["salary_max"] = float(low), float(high)
+        except (TypeError, ValueError):
+            pass
+    return {key: value for key, value in fields.items() if value}
+
+
+class SourcePlugin:
+    """One job board: where its searches are and how to read its pages.
+
+    Subclasses set `name` (stored as `Job.source` and used for the run
+    ledger and metrics) and implement the three methods below. Pages are
+    handed over already parsed by BeautifulSoup.
+    """
+
+    name = ""
+    # Extra request headers for the board, on top of the runtime's defaults
+    headers: Dict[str, str] = {}
+
+    def search_url(self, query: str, location: str, page: int) -> str:
+        """URL of results page `page` (from 0) for the query"""
+        raise NotImplementedError
+
+    def parse_listing(self, soup) -> List[str]:
+        """Absolute job detail URLs on a results page"""
+        raise NotImplementedError
+
+    def parse_detail(self, soup, url: str) -> Dict:
+        """Job fields found on a detail page.
+
+        Return any of title, company, location, description, salary_min and
+        salary_max, plus `salary_text` and `date_text` for the runtime to
+        parse. Fields left out are taken from the page's JSON-LD when present.
+        """
+        raise NotImplementedError
+
+
+def load_source(name: str) -> SourcePlugin:
+    """An instance of the plugin registered for `name`"""
+    try:
+        module_name, class_name = SOURCE_PLUGINS[name].split(":")
+    except KeyError:
+        raise ValueError(f"Unknown source {name!r}; known sources: {', '.join(sorted(SOURCE_PLUGINS))}") from None
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+class ResponseCache:
+    """Page bodies by URL for `ttl` seconds, least recently used dropped past
+    `max_entries` pages or `max_bytes` of bodies, whichever comes first.
+
+    Shared by the scrapers of one process, so a listing found by several
+    search terms, or retried after a failed save, is fetched once. A body
+    larger than `max_bytes` on its own is not cached.
+    """
+
+    def __init__(self, ttl: float = 900.0, max_entries: int = 2000, max_bytes: int = 32 * 1024 * 1024, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.clock = clock
+        self.size = 0
+        self._entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        return cls(
+            ttl=float(os.getenv("SCRAPE_CACHE_SECONDS", "900")),
+            max_entries=int(os.getenv("SCRAPE_CACHE_SIZE", "2000")),
+            max_bytes=int(os.getenv("SCRAPE_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+        )
+
+    def _drop(self, url: str) -> None:
+        _, body = self._entries.pop(url)
+        self.size -= len(body)
+
+    def get(self, url: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None and entry[0] < self.clock():
+                self._drop(url)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(url)
+        record_cache("scrape_pages", hits=int(entry is not None), misses=int(entry is None))
+        return entry[1] if entry is not None else None
+
+    def put(self, url: str, body: bytes) -> None:
+        if self.ttl <= 0 or self.max_entries <= 0 or len(body) > self.max_bytes:
+            return
+        with self._lock:
+            if url in self._entries:
+                self._drop(url)
+            self._entries[url] = (self.clock() + self.ttl, body)
+            self.size += len(body)
+            while len(self._entries) > self.max_entries or self.size > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+
+class SourceScraper:
+    """Scrapes one source's plugin on the shared runtime.
+
+    Provides what `resumable_crawl` drives: `search_page`,
+    `scrape_job_listing(s)`, `save_jobs_to_db` and `delay`.
+    """
+
+    def __init__(
+        self,
+        plugin: SourcePlugin,
+        rate_controller: Optional[RateController] = None,
+        cache: Optional[ResponseCache] = None,
+        workers: Optional[int] = None,
+        delay_range=(0, 0.5),
+        max_retries: int = 3,
+    ):
+        self.plugin = plugin
+        self.name = plugin.name
+        self.rate_controller = rate_controller or RateController.from_env()
+        self.cache = cache or ResponseCache.from_env()
+        self.workers = workers or int(os.getenv("SCRAPE_FETCH_WORKERS", "4"))
+        self.delay_range = delay_range  # random jitter on top of the controller's pacing
+        self.max_retries = max_retries
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.workers, pool_maxsize=self.workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.ua = UserAgent()
+        self.setup_session()
+
+    def setup_session(self):
+        """Setup requests session with headers"""
+        self.session.headers.update(
+            {
+                "User-Agent": self.ua.random,
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+                "Accept-Language": "en-US,en;q=0.5",
+                "Accept-Encoding": "gzip, deflate",
+                "Connection": "keep-alive",
+                "Upgrade-Insecure-Requests": "1",
+                **self.plugin.headers,
+            }
+        )
+
+    def delay(self):
+        """Random delay between requests"""
+        delay = random.uniform(*self.delay_range)
+        logger.debug(f"Waiting {delay:.2f} seconds...")
+        time.sleep(delay)
+
+    def fetch(self, url: str, kind: str) -> bytes:
+        """The page body, from the cache or fetched through the rate controller"""
+        body = self.cache.get(url)
+        if body is not None:
+            return body
+        with observe(HTTP_FETCH_SECONDS, source=self.name, kind=kind):
+            response = self.rate_controller.get(self.session, url, timeout=30)
+        response.raise_for_status()
+        self.cache.put(url, response.content)
+        return response.content
+
+    def search_page(self, query: str, location: str = "", page: int = 0) -> List[str]:
+        """Fetch one page of search results and return its job detail URLs"""
+        logger.info(f"Searching {self.name} page {page + 1} for: {query}")
+        body = self.fetch(self.plugin.search_url(query, location, page), "search")
+
+        with observe(PARSE_SECONDS, source=self.name, kind="search"):
+            job_links = list(dict.fromkeys(self.plugin.parse_listing(BeautifulSoup(body, "html.parser"))))
+
+        logger.info(f"Found {len(job_links)} job links on page {page + 1}")
+        return job_links
+
+    def parse_job(self, body: bytes, job_url: str) -> Optional[Dict]:
+        """Job dict from a detail page, or None if it lacks a title or company"""
+        soup = BeautifulSoup(body, "html.parser")
+        fields = parse_job_posting_ld(soup)
+        fields.update({key: value for key, value in self.plugin.parse_detail(soup, job_url).items() if value})
+
+        salary_text = fields.pop("salary_text", None)
+        date_text = fields.pop("date_text", None)
+        job_data = {**fields, "url": job_url, "source": self.name}
+        if job_data.get("salary_min") is None:
+            if not salary_text and job_data.get("description"):
+                # Look for salary in job description
+                salary_match = re.search(r"salary[:\s]*([^.]*)", job_data["description"], re.IGNORECASE)
+                if salary_match:
+                    salary_text = salary_match.group(1)
+            if salary_text:
+                job_data["salary_min"], job_data["salary_max"] = extract_salary(salary_text)
+        job_data["date_posted"] = parse_posted_date(date_text)
+
+        if not job_data.get("title") or not job_data.get("company"):
+            logger.warning(f"No title or company found on {job_url}; page layout may have changed")
+            return None
+        return job_data
+
+    def scrape_job_listing(self, job_url: str) -> Optional[Dict]:
+        """Scrape individual job listing, starting the trace that follows the job through the pipeline"""
+        with start_span("scrape_job_listing", {"job.url": job_url, "job.source": self.name}, root=True):
+            job_data = self._scrape_job_listing(job_url)
+            if job_data:
+                job_data["trace_context"] = current_trace_context()
+            return job_data
+
+    def _scrape_job_listing(self, job_url: str) -> Optional[Dict]:
+        for attempt in range(self.max_retries):
+            try:
+                logger.info(f"Scraping job: {job_url} (attempt {attempt + 1})")
+                body = self.fetch(job_url, "listing")
+
+                with observe(PARSE_SECONDS, source=self.name, kind="listing"):
+                    job_data = self.parse_job(body, job_url)
+                if job_data:
+                    logger.info(f"Successfully scraped job: {job_data['title']}")
+                return job_data
+
+            except CircuitOpenError:
+                FAILURES.labels(operation="fetch").inc()
+                raise
+            except Exception as e:
+                logger.error(f"Error scraping job {job_url} (attempt {attempt + 1}): {e}")
+                status = getattr(getattr(e, "response", None), "status_code", None)
+                if status in (404, 410):
+                    return None
+                if attempt < self.max_retries - 1:
+                    RETRIES.labels(operation="fetch").inc()
+                    if status not in THROTTLE_STATUSES:
+                        # Throttled retries are already held back by the rate controller
+                        self.delay()
+                else:
+                    FAILURES.labels(operation="fetch").inc()
+                    logger.error(f"Failed to scrape job after {self.max_retries} attempts: {job_url}")
+                    return None
+
+    def _scrape_after_jitter(self, job_url: str) -> Optional[Dict]:
+        self.delay()
+        return self.scrape_job_listing(job_url)
+
+    def scrape_job_listings(self, urls: Sequence[str]) -> Iterator[Tuple[str, Optional[Dict]]]:
+        """Scrape listings on the worker threads, yielding (url, job data or None) as each finishes.
+
+        When the host's circuit opens, listings already scraped are still
+        yielded, listings not yet started are dropped, and then
+        CircuitOpenError is raised.
+        """
+        if not urls:
+            return
+        circuit_open = None
+        workers = min(self.workers, len(urls))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"{self.name}-fetch") as pool:
+            futures = {pool.submit(self._scrape_after_jitter, url): url for url in urls}
+            for future in as_completed(futures):
+                if future.cancelled():
+                    continue
+                try:
+                    job_data = future.result()
+                except CircuitOpenError as e:
+                    circuit_open = circuit_open or e
+                    for pending in futures:
+                        pending.cancel()
+                    continue
+                yield futures[future], job_data
+        if circuit_open is not None:
+            raise circuit_open
+
+    def search_jobs(self, query: str, location: str = "", max_pages: int = 3) -> List[Dict]:
+        """Search for jobs without the run ledger"""
+        all_jobs = []
+
+        for page in range(max_pages):
+            try:
+                job_links = self.search_page(query, location, page)
+                all_jobs.extend(job_data for _, job_data in self.scrape_job_listings(job_links) if job_data)
+            except Exception as e:
+                FAILURES.labels(operation="search").inc()
+                logger.error(f"Error searching page {page + 1}: {e}")
+                continue
+
+        logger.info(f"Total jobs scraped: {len(all_jobs)}")
+        return all_jobs
+
+    def save_jobs_to_db(self, jobs: List[Dict]) -> int:
+        """Save scraped jobs to database"""
+        return save_jobs(jobs)
+
+
+def crawl_source(
+    scraper: SourceScraper,
+    terms: Sequence[str] = SEARCH_TERMS,
+    pages: int = 2,
+    fresh: bool = False,
+    stage: Optional[Callable[[str], object]] = None,
+) -> int:
+    """Run (or resume) the source's checkpointed crawl of `pages` result pages per term; returns jobs saved"""
+    ledger = RunLedger.start(scraper.name, resume_hours=0 if fresh else None)
+    ledger.plan_pages([(term, "", page) for term in terms for page in range(pages)])
+    saved_count = resumable_crawl(scraper, ledger, stage=stage)
+    if not ledger.interrupted:
+        ledger.finish()
+    logger.info(f"{scraper.name} crawl saved {saved_count} new jobs")
+    return saved_count
+
+
+def crawl_sources(
+    names: Optional[Sequence[str]] = None,
+    terms: Sequence[str] = SEARCH_TERMS,
+    pages: int = 2,
+    fresh: bool = False,
+    stage: Optional[Callable[[str], object]] = None,
+) -> Dict[str, int]:
+    """Crawl the sources (all registered ones by default) concurrently; returns jobs saved per source.
+
+    The sources share one rate controller, which paces each host separately,
+    and one response cache. A source that fails is logged and counts 0.
+    """
+    scrapers = []
+    rate_controller, cache = RateController.from_env(), ResponseCache.from_env()
+    for name in dict.fromkeys(names or SOURCE_PLUGINS):
+        scrapers.append(SourceScraper(load_source(name), rate_controller, cache))
+
+    def crawl(scraper: SourceScraper) -> int:
+        source_stage = (lambda name: stage(f"{scraper.name} {name}")) if stage else None
+        return crawl_source(scraper, terms, pages, fresh, source_stage)
+
+    saved: Dict[str, int] = {}
+    with ThreadPoolExecutor(max_workers=len(scrapers), thread_name_prefix="crawl") as pool:
+        futures = {pool.submit(crawl, scraper): scraper.name for scraper in scrapers}
+        for future in as_completed(futures):
+            name = futures[future]
+            try:
+                saved[name] = future.result()
+            except Exception as e:
+                FAILURES.labels(operation="crawl").inc()
+                logger.error(f"{name} crawl failed: {e}")
+                saved[name] = 0
+    return saved
+
+
+def main(argv=None):
+    """Crawl the chosen job boards concurrently, checkpointing each in the run ledger"""
+    parser = argparse.ArgumentParser(description="Scrape accounting and audit postings from several job boards")
+    parser.add_argument(
+        "--source",
+        action="append",
+        choices=sorted(SOURCE_PLUGINS),
+        help="job board to crawl (repeatable; default: all)",
+    )
+    parser.add_argument("--pages", type=int, default=2, help="result pages per search term")
+    parser.add_argument("--fresh", action="store_true", help="abandon unfinished runs instead of resuming them")
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
+
+    configure_tracing("scraper")
+    with RunProfiler("scraper", args.profile, top=args.profile_top) as profiler:
+        saved = crawl_sources(args.source, pages=args.pages, fresh=args.fresh, stage=profiler.stage)
+    summary = ", ".join(f"{name}: {count}" for name, count in sorted(saved.items()))
+    logger.info(f"Scraping completed. New jobs saved per source: {summary}")
+    export_metrics("scraper")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,22 @@
 """
 Scheduler for running the job scraper at regular intervals
+
+Kept for existing deployments: scrapes now run through the pipeline
+orchestrator, which also matches and drafts outreach for new postings as
+they arrive. The default schedule is the old daily 09:00 scrape.
 """
 
-import schedule
-import time
-from loguru import logger
-from indeed_scraper import main as scrape_jobs
+import os
+import sys
 
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-def run_scraper():
-    """Run the job scraper"""
-    try:
-        logger.info("Starting scheduled job scraping...")
-        scrape_jobs()
-        logger.info("Scheduled job scraping completed successfully")
-    except Exception as e:
-        logger.error(f"Error in scheduled scraping: {e}")
+from scraper.orchestrator import main as run_orchestrator
 
 
 def main():
     """Main scheduler function"""
-    logger.info("Starting job scraper scheduler...")
-
-    # Schedule scraping to run daily at 9 AM
-    schedule.every().day.at("09:00").do(run_scraper)
-
-    # Also run once immediately for testing
-    logger.info("Running initial scrape...")
-    run_scraper()
-
-    # Keep the scheduler running
-    while True:
-        schedule.run_pending()
-        time.sleep(60)  # Check every minute
+    run_orchestrator(["--cron", os.getenv("SCRAPER_SCHEDULE", "0 9 * * *"), "--interval", "0"])
 
 
 if __name__ == "__main__":
@@ -0,0 +1,697 @@
+"""
+Seeded synthetic job postings for load tests and benchmarks
+
+Builds postings from libraries of title, company, location and description
+fragments so large runs (10k-1M+ jobs) cover the spread of titles, seniority
+levels, location spellings, salary bands and description lengths the scrapers
+see, rather than repeating a handful of fixed records. Posting number N of a
+seed is always the same posting, however the run is chunked, and each
+posting's URL is unique within a seed, so generated sets can be saved side by
+side without colliding.
+
+Every field is drawn for a block of postings at once with NumPy: titles, companies
+and locations are indexes into pre-rendered tables, salaries and posting dates
+are array arithmetic, and descriptions are concatenated from pre-rendered
+blocks, so a million postings take seconds rather than minutes. Chunks come
+out as lists of dicts (`iter_batches`), Arrow record batches
+(`iter_record_batches`), a Parquet file (`write_parquet`) or bulk inserts into
+the jobs table (`insert_jobs`).
+
+    python scraper/synthetic.py --jobs 1000000 --parquet jobs.parquet
+    python scraper/synthetic.py --jobs 100000          # into the configured database
+"""
+
+import argparse
+import os
+import sys
+from datetime import datetime
+from functools import lru_cache
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+from loguru import logger
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import insert, select
+
+from backend.analytics import record_jobs
+from backend.export import _arrow_schema
+from backend.models import Job
+from backend.ranking import refresh_rank_scores
+
+# Per title family: the titles seen for it, its manager title, salary base and duties
+TITLE_FAMILIES = {
+    "auditor": {
+        "titles": ["Auditor", "Internal Auditor", "IT Auditor", "External Auditor", "Audit Associate", "Audit Analyst"],
+        "manager": "Audit Manager",
+        "salary": 72000,
+        "duties": [
+            "Plan and execute financial and operational audits",
+            "Evaluate the design and operating effectiveness of internal controls",
+            "Test SOX key controls and document walkthroughs",
+            "Prepare audit workpapers, findings and recommendations",
+            "Assess risk across business processes and IT general controls",
+            "Follow up on remediation of audit findings with process owners",
+            "Coordinate with external auditors on year-end procedures",
+            "Verify the audit trail for journal entries and reconciliations",
+            "Perform data analytics to select audit samples",
+            "Present audit results to management and the audit committee",
+            "Review compliance with company policies and regulatory requirements",
+        ],
+    },
+    "accountant": {
+        "titles": [
+            "Accountant",
+            "Staff Accountant",
+            "General Ledger Accountant",
+            "Cost Accountant",
+            "Revenue Accountant",
+            "Fixed Asset Accountant",
+            "Accounting Specialist",
+        ],
+        "manager": "Accounting Manager",
+        "salary": 66000,
+        "duties": [
+            "Own the month-end close and account reconciliations",
+            "Prepare journal entries, accruals and prepaid schedules",
+            "Prepare and review financial statements under GAAP",
+            "Maintain the general ledger and chart of accounts",
+            "Support the annual audit with schedules and documentation",
+            "Oversee accounts payable and receivable processes",
+            "Track fixed assets and depreciation",
+            "Analyze variances between actuals and budget",
+            "Account for leases under ASC 842",
+            "Recognize revenue under ASC 606 and review contracts",
+            "Reconcile intercompany balances and eliminations",
+        ],
+    },
+    "tax": {
+        "titles": ["Tax Accountant", "Tax Associate", "Tax Analyst", "Tax Preparer", "Tax Specialist"],
+        "manager": "Tax Manager",
+        "salary": 70000,
+        "duties": [
+            "Prepare federal and state income tax returns",
+            "Calculate quarterly estimated payments and provisions",
+            "Research tax issues and document positions",
+            "Manage sales and use tax compliance filings",
+            "Respond to notices from taxing authorities",
+            "Support the ASC 740 income tax provision",
+            "Review partnership and S corporation returns",
+            "Advise clients on tax planning opportunities",
+        ],
+    },
+    "compliance": {
+        "titles": ["Compliance Analyst", "Compliance Officer", "Regulatory Compliance Specialist", "AML Compliance Analyst"],
+        "manager": "Compliance Manager",
+        "salary": 74000,
+        "duties": [
+            "Monitor regulatory compliance across business units",
+            "Maintain compliance policies, procedures and training",
+            "Perform transaction monitoring and KYC reviews",
+            "Prepare compliance reporting for regulators and the board",
+            "Investigate alerts and document escalations",
+            "Track regulatory change and assess its impact",
+            "Test controls against regulatory requirements",
+            "Support regulatory examinations and internal audits",
+        ],
+    },
+    "risk": {
+        "titles": ["Risk Analyst", "Credit Risk Analyst", "Operational Risk Specialist", "Enterprise Risk Analyst"],
+        "manager": "Risk Manager",
+        "salary": 80000,
+        "duties": [
+            "Run risk assessments and maintain the risk register",
+            "Model credit exposure and loss forecasts",
+            "Test key risk indicators and control self-assessments",
+            "Report risk metrics to senior management",
+            "Review vendor and third-party risk",
+            "Perform stress testing and scenario analysis",
+            "Document risk appetite and escalation thresholds",
+        ],
+    },
+    "controller": {
+        "titles": ["Controller", "Assistant Controller", "Plant Controller", "Division Controller"],
+        "manager": "Corporate Controller",
+        "salary": 105000,
+        "duties": [
+            "Lead the close, consolidation and external reporting",
+            "Own the internal control environment",
+            "Manage the accounting team and review its work",
+            "Partner with FP&A on budgets and forecasts",
+            "Coordinate the external audit and tax filings",
+            "Implement accounting policies and system improvements",
+            "Report results to the CFO and board",
+        ],
+    },
+    "bookkeeper": {
+        "titles": ["Bookkeeper", "Full Charge Bookkeeper", "Accounting Clerk", "Accounts Payable Clerk"],
+        "manager": "Office Manager",
+        "salary": 45000,
+        "duties": [
+            "Record daily transactions in QuickBooks",
+            "Process payroll, invoices and vendor payments",
+            "Reconcile bank and credit card statements",
+            "Maintain organized financial records",
+            "Prepare deposits and manage petty cash",
+            "Assist with month-end reporting",
+        ],
+    },
+    "financial analyst": {
+        "titles": ["Financial Analyst", "FP&A Analyst", "Budget Analyst", "Revenue Analyst", "Investment Analyst"],
+        "manager": "FP&A Manager",
+        "salary": 76000,
+        "duties": [
+            "Perform financial analysis and modeling",
+            "Build forecasts, budgets and long-range plans",
+            "Prepare monthly and quarterly financial reports and dashboards",
+            "Conduct market research and competitive analysis",
+            "Support investment and portfolio reviews",
+            "Run data analysis on pricing and profitability",
+            "Build financial modeling for new business cases",
+            "Present variance commentary to business leaders",
+        ],
+    },
+    "financial services": {
+        "titles": ["Financial Services Professional", "Financial Services Associate", "Financial Services Representative"],
+        "manager": "Financial Services Manager",
+        "salary": 62000,
+        "duties": [
+            "Advise clients on financial planning and investment options",
+            "Conduct client financial assessments",
+            "Support portfolio management and rebalancing",
+            "Prepare client reporting and market research summaries",
+            "Open and service client accounts",
+            "Build relationships with prospective clients",
+        ],
+    },
+    "other": {
+        "titles": ["Operations Coordinator", "Business Analyst", "Office Administrator", "Project Coordinator"],
+        "manager": "Operations Manager",
+        "salary": 55000,
+        "duties": [
+            "Coordinate cross-functional projects and timelines",
+            "Manage client relationships and vendor contracts",
+            "Improve processes and document procedures",
+            "Support leadership with reporting and scheduling",
+            "Onboard new team members and maintain records",
+        ],
+    },
+}
+
+# Relative weight of each family, roughly as the auditor searches return them
+FAMILY_WEIGHTS = {
+    "auditor": 24,
+    "accountant": 22,
+    "tax": 10,
+    "compliance": 9,
+    "risk": 6,
+    "controller": 5,
+    "bookkeeper": 5,
+    "financial analyst": 11,
+    "financial services": 4,
+    "other": 4,
+}
+
+# (title template, salary multiplier); {title} is a family title, {manager} its manager title
+SENIORITY_TEMPLATES = [
+    ("{title}", 1.0),
+    ("{title}", 1.0),
+    ("Junior {title}", 0.8),
+    ("Staff {title}", 0.9),
+    ("{title} I", 0.85),
+    ("Senior {title}", 1.25),
+    ("Sr. {title}", 1.25),
+    ("Sr {title}", 1.25),
+    ("{title} II", 1.1),
+    ("{title} III", 1.3),
+    ("Lead {title}", 1.35),
+    ("Principal {title}", 1.5),
+    ("{manager}", 1.55),
+    ("Senior {manager}", 1.8),
+    ("Director, {manager}", 2.1),
+]
+
+ESTABLISHED_FIRMS = [
+    "Deloitte",
+    "PwC",
+    "EY",
+    "KPMG",
+    "Grant Thornton",
+    "RSM US LLP",
+    "BDO USA",
+    "Crowe",
+    "Baker Tilly",
+    "Moss Adams",
+    "CliftonLarsonAllen",
+    "CBIZ",
+    "Marcum LLP",
+    "Weaver",
+    "Plante Moran",
+    "Eide Bailly",
+    "JPMorgan Chase",
+    "Bank of America",
+    "Wells Fargo",
+    "Goldman Sachs",
+    "Fidelity Investments",
+    "Charles Schwab",
+    "Humana",
+    "Lockheed Martin",
+]
+SURNAMES = [
+    "Anderson", "Baker", "Bennett", "Brooks", "Campbell", "Carter", "Coleman", "Collins", "Cooper", "Davis",
+    "Edwards", "Ellis", "Fisher", "Foster", "Gray", "Griffin", "Hayes", "Howard", "Hughes", "Jenkins",
+    "Kelly", "Kim", "Lawson", "Long", "Marshall", "Mason", "Meyer", "Mitchell", "Morgan", "Murphy",
+    "Nguyen", "Owens", "Parker", "Patel", "Perry", "Porter", "Price", "Reed", "Reyes", "Rivera",
+    "Russell", "Sanders", "Shah", "Stewart", "Sullivan", "Thompson", "Turner", "Walsh", "Ward", "Watson",
+]  # fmt: skip
+FIRM_SUFFIXES = ["LLP", "CPAs", "& Associates", "& Co.", "Group", "Advisors", "PLLC", "Partners", "LLC", "Inc."]
+INDUSTRY_WORDS = ["Capital", "Health", "Energy", "Logistics", "Manufacturing", "Bancorp", "Insurance", "Technologies"]
+# Share of postings from established firms, "Surname Surname Suffix" firms and "Surname Industry Suffix" companies
+COMPANY_KIND_WEIGHTS = (0.2, 0.55, 0.25)
+
+# (city, state code, state name, salary multiplier)
+CITIES = [
+    ("New York", "NY", "New York", 1.3),
+    ("Los Angeles", "CA", "California", 1.2),
+    ("San Francisco", "CA", "California", 1.35),
+    ("San Diego", "CA", "California", 1.15),
+    ("Chicago", "IL", "Illinois", 1.1),
+    ("Houston", "TX", "Texas", 1.0),
+    ("Dallas", "TX", "Texas", 1.02),
+    ("Austin", "TX", "Texas", 1.05),
+    ("San Antonio", "TX", "Texas", 0.95),
+    ("Phoenix", "AZ", "Arizona", 0.97),
+    ("Philadelphia", "PA", "Pennsylvania", 1.05),
+    ("Pittsburgh", "PA", "Pennsylvania", 0.95),
+    ("Boston", "MA", "Massachusetts", 1.25),
+    ("Seattle", "WA", "Washington", 1.2),
+    ("Denver", "CO", "Colorado", 1.05),
+    ("Atlanta", "GA", "Georgia", 1.0),
+    ("Miami", "FL", "Florida", 1.0),
+    ("Tampa", "FL", "Florida", 0.95),
+    ("Charlotte", "NC", "North Carolina", 1.0),
+    ("Raleigh", "NC", "North Carolina", 0.98),
+    ("Washington", "DC", "District of Columbia", 1.2),
+    ("Minneapolis", "MN", "Minnesota", 1.02),
+    ("Detroit", "MI", "Michigan", 0.95),
+    ("Columbus", "OH", "Ohio", 0.93),
+    ("Nashville", "TN", "Tennessee", 0.95),
+    ("Baton Rouge", "LA", "Louisiana", 0.88),
+    ("Salt Lake City", "UT", "Utah", 0.95),
+    ("Kansas City", "MO", "Missouri", 0.92),
+]
+# Location spellings; {city}, {state} and {state_name} come from CITIES. A
+# trailing {zip} is filled with a random ZIP code per posting
+LOCATION_FORMATS = [
+    "{city}, {state}",
+    "{city}, {state}",
+    "{city}, {state}",
+    "{city}, {state_name}",
+    "{city}, {state} {zip}",
+    "Hybrid - {city}, {state}",
+    "Hybrid remote in {city}, {state}",
+    "{city} Metro Area",
+]
+REMOTE_LOCATIONS = ["Remote", "Remote - US", "Remote, United States", "United States (Remote)"]
+REMOTE_SHARE = 0.12
+
+# Opening sentences; {company} always comes before {title}
+INTRODUCTIONS = [
+    "{company} is seeking a {title} to join our growing team.",
+    "{company} has an exciting opportunity for a {title}.",
+    "Join {company} as a {title} supporting our finance organization.",
+    "{company} is looking for a {title} to help scale our reporting and controls.",
+    "Our client, {company}, is hiring a {title} for a key role on its finance team.",
+    "At {company}, the {title} is a trusted partner to the business.",
+    "{company} is adding a {title} to a team that is expanding with the business.",
+    "Do you want to grow your career? {company} needs a {title} who enjoys solving problems.",
+    "{company} is recruiting a {title} for an immediate opening.",
+    "{company} seeks an experienced {title} to strengthen its finance function.",
+]
+ABOUT_COMPANY = [
+    "We serve clients across healthcare, manufacturing and financial services.",
+    "We are a top-100 firm with offices across the country.",
+    "Our team has doubled in the last three years.",
+    "We were recognized as a best place to work for five years running.",
+    "We are a publicly traded company with operations in 20 countries.",
+    "We are a privately held, family-owned business founded over 50 years ago.",
+    "Our finance team supports more than $2B in annual revenue.",
+    "We recently completed a major ERP implementation.",
+]
+ABOUT_SHARE = 0.6
+REQUIREMENTS = [
+    "Bachelor's degree in Accounting, Finance, or related field",
+    "CPA certification preferred",
+    "CPA, CIA or CISA certification a plus",
+    "{years} years of relevant experience",
+    "Strong analytical and communication skills",
+    "Advanced Excel skills; experience with NetSuite, SAP or Oracle",
+    "Knowledge of GAAP and financial reporting standards",
+    "Experience with data analysis tools such as SQL or Power BI",
+    "Ability to manage multiple deadlines during busy season",
+    "Public accounting experience preferred",
+    "Excellent attention to detail and organizational skills",
+    "Experience in a SOX-compliant environment",
+    "Ability to travel up to 25%",
+    "Working knowledge of COSO and risk frameworks",
+    "Strong written communication and report-writing skills",
+    "Comfortable working with ambiguity in a fast-paced environment",
+]
+PREFERRED = [
+    "Big 4 experience",
+    "Experience with Workiva or AuditBoard",
+    "Master's degree in Accounting or MBA",
+    "Industry experience in financial services",
+    "Experience with Alteryx, Python or other automation tools",
+    "Bilingual in English and Spanish",
+    "Prior experience leading a small team",
+    "CFA or CMA designation",
+]
+PREFERRED_SHARE = 0.4
+CLOSINGS = [
+    "We offer competitive salary, comprehensive benefits, and opportunities for professional growth.",
+    "This role offers a hybrid schedule, 401(k) matching and paid CPA exam support.",
+    "Benefits include medical, dental and vision coverage, generous PTO and tuition reimbursement.",
+    "We are an equal opportunity employer and value diversity at our company.",
+    "Relocation assistance is available for the right candidate.",
+    "Enjoy flexible hours, summer Fridays and a culture that values work-life balance.",
+    "Apply today to join a collaborative team that invests in your development.",
+    "",
+]
+NO_SALARY_SHARE = 0.25
+
+# Pre-rendered responsibility and requirement lists per library; more blocks means more distinct descriptions
+DUTY_BLOCKS_PER_FAMILY = 48
+REQUIREMENT_BLOCKS = 192
+PREFERRED_BLOCKS = 32
+
+# Postings drawn per seeded block; chunk sizes that are multiples of it waste no draws
+BLOCK_SIZE = 10000
+
+FIELDS = ("title", "company", "location", "salary_min", "salary_max", "description", "url", "source", "date_posted")
+
+
+def _object_array(values) -> np.ndarray:
+    array = np.empty(len(values), dtype=object)
+    array[:] = values
+    return array
+
+
+def _bullet_blocks(rng: np.random.Generator, fragments: List[str], count: int, low: int, high: int) -> List[str]:
+    """`count` bulleted lists of `low`-`high` fragments in random order"""
+    blocks = []
+    for _ in range(count):
+        picked = rng.choice(len(fragments), size=rng.integers(low, high + 1), replace=False)
+        blocks.append("\n".join(f"• {fragments[i]}" for i in picked))
+    return blocks
+
+
+@lru_cache(maxsize=None)
+def _library() -> dict:
+    """Lookup tables the generator indexes into, rendered once from the fragment lists"""
+    rng = np.random.default_rng(0)
+    families = list(FAMILY_WEIGHTS)
+    weights = np.array(list(FAMILY_WEIGHTS.values()), dtype=float)
+
+    titles, title_multipliers, title_starts, title_counts = [], [], [], []
+    duty_blocks = []
+    for name in families:
+        family = TITLE_FAMILIES[name]
+        title_starts.append(len(titles))
+        for template, multiplier in SENIORITY_TEMPLATES:
+            for base in family["titles"]:
+                titles.append(template.format(title=base, manager=family["manager"]))
+                title_multipliers.append(multiplier)
+        title_counts.append(len(titles) - title_starts[-1])
+        duties = family["duties"]
+        duty_blocks.append(
+            [
+                "\n\nResponsibilities:\n" + block
+                for block in _bullet_blocks(rng, duties, DUTY_BLOCKS_PER_FAMILY, 3, len(duties))
+            ]
+        )
+
+    pairs = [f"{a} {b} {suffix}" for a in SURNAMES for b in SURNAMES for suffix in FIRM_SUFFIXES]
+    industry = [f"{a} {word} {suffix}" for a in SURNAMES for word in INDUSTRY_WORDS for suffix in FIRM_SUFFIXES]
+    companies = ESTABLISHED_FIRMS + pairs + industry
+    company_counts = np.array([len(ESTABLISHED_FIRMS), len(pairs), len(industry)])
+
+    locations = [
+        [form.replace(" {zip}", " ").format(city=city, state=state, state_name=state_name) for form in LOCATION_FORMATS]
+        for city, state, state_name, _ in CITIES
+    ]
+
+    requirements = []
+    for block in _bullet_blocks(rng, REQUIREMENTS, REQUIREMENT_BLOCKS, 3, 7):
+        low = rng.integers(1, 5)
+        requirements.append("\n\nRequirements:\n" + block.replace("{years}", f"{low}-{low + rng.integers(2, 5)}"))
+    preferred = ["\n\nPreferred:\n" + block for block in _bullet_blocks(rng, PREFERRED, PREFERRED_BLOCKS, 1, 3)]
+
+    # Introductions split around their placeholders: before {company}, between, after {title}
+    introductions = [
+        (template.partition("{company}")[0], *template.partition("{company}")[2].partition("{title}")[::2])
+        for template in INTRODUCTIONS
+    ]
+
+    return {
+        "families": families,
+        "family_p": weights / weights.sum(),
+        "family_salary": np.array([TITLE_FAMILIES[name]["salary"] for name in families], dtype=float),
+        "titles": _object_array(titles),
+        "title_multipliers": np.array(title_multipliers),
+        "title_starts": np.array(title_starts),
+        "title_counts": np.array(title_counts),
+        "duty_blocks": np.array(duty_blocks, dtype=object),
+        "companies": _object_array(companies),
+        "company_starts": np.concatenate([[0], np.cumsum(company_counts)[:-1]]),
+        "company_counts": company_counts,
+        "locations": np.array(locations, dtype=object),
+        "zip_format": LOCATION_FORMATS.index("{city}, {state} {zip}"),
+        "location_multipliers": np.array([city[3] for city in CITIES]),
+        "remote_locations": _object_array(REMOTE_LOCATIONS),
+        "introductions": [_object_array(parts) for parts in zip(*introductions)],
+        "about": _object_array([" " + sentence for sentence in ABOUT_COMPANY]),
+        "requirements": _object_array(requirements),
+        "preferred": _object_array(preferred),
+        "closings": _object_array(["\n\n" + closing if closing else "" for closing in CLOSINGS]),
+    }
+
+
+def _optional(rng: np.random.Generator, blocks: np.ndarray, share: float, size: int) -> np.ndarray:
+    """A random block per row for a `share` of rows, "" for the rest"""
+    picked = blocks[rng.integers(len(blocks), size=size)]
+    picked[rng.random(size) >= share] = ""
+    return picked
+
+
+class SyntheticJobGenerator:
+    """Seeded generator of realistic, varied job postings"""
+
+    def __init__(
+        self,
+        seed: int = 0,
+        start_date: datetime = datetime(2024, 1, 1),
+        days: int = 365,
+        source: str = "synthetic",
+        url_prefix: Optional[str] = None,
+    ):
+        self.seed = seed
+        self.start_date = np.datetime64(start_date, "m")
+        self.minutes = days * 24 * 60
+        self.source = source
+        self.url_prefix = url_prefix or f"https://jobs.example.com/{source}/{seed}"
+
+    def columns(self, count: int, offset: int = 0) -> Dict[str, np.ndarray]:
+        """`count` postings from posting number `offset` as one array per field.
+
+        Text fields are object arrays, missing salaries are NaN and
+        `date_posted` is datetime64[us]. Posting numbers are drawn in fixed
+        blocks seeded by (seed, block), so a posting is the same however the
+        run is chunked.
+        """
+        first = offset // BLOCK_SIZE
+        last = max(first, (offset + count - 1) // BLOCK_SIZE)
+        blocks = [self._block(block) for block in range(first, last + 1)]
+        start = offset - first * BLOCK_SIZE
+        return {name: np.concatenate([block[name] for block in blocks])[start : start + count] for name in FIELDS}
+
+    def _block(self, block: int) -> Dict[str, np.ndarray]:
+        library = _library()
+        rng = np.random.default_rng([self.seed, block])
+        count, offset = BLOCK_SIZE, block * BLOCK_SIZE
+
+        family = rng.choice(len(library["families"]), size=count, p=library["family_p"])
+        title_index = library["title_starts"][family] + (rng.random(count) * library["title_counts"][family]).astype(int)
+        titles = library["titles"][title_index]
+
+        kind = rng.choice(3, size=count, p=COMPANY_KIND_WEIGHTS)
+        company_index = library["company_starts"][kind] + (rng.random(count) * library["company_counts"][kind]).astype(int)
+        companies = library["companies"][company_index]
+
+        city = rng.integers(len(CITIES), size=count)
+        form = rng.integers(len(LOCATION_FORMATS), size=count)
+        locations = library["locations"][city, form]
+        has_zip = form == library["zip_format"]
+        locations[has_zip] += rng.integers(10000, 100000, size=int(has_zip.sum())).astype(str).astype(object)
+        remote = rng.random(count) < REMOTE_SHARE
+        locations[remote] = library["remote_locations"][rng.integers(len(REMOTE_LOCATIONS), size=int(remote.sum()))]
+        location_multiplier = np.where(remote, 1.0, library["location_multipliers"][city])
+
+        midpoint = (
+            library["family_salary"][family]
+            * library["title_multipliers"][title_index]
+            * location_multiplier
+            * rng.uniform(0.9, 1.1, count)
+        )
+        spread = rng.uniform(0.1, 0.3, count)
+        salary_min = np.round(midpoint * (1 - spread / 2), -3)
+        salary_max = np.round(midpoint * (1 + spread / 2), -3)
+        no_salary = rng.random(count) < NO_SALARY_SHARE
+        salary_min[no_salary] = salary_max[no_salary] = np.nan
+
+        introduction = rng.integers(len(INTRODUCTIONS), size=count)
+        before_company, before_title, after_title = (part[introduction] for part in library["introductions"])
+        parts = (
+            before_company,
+            companies,
+            before_title,
+            titles,
+            after_title,
+            _optional(rng, library["about"], ABOUT_SHARE, count),
+            library["duty_blocks"][family, rng.integers(DUTY_BLOCKS_PER_FAMILY, size=count)],
+            library["requirements"][rng.integers(REQUIREMENT_BLOCKS, size=count)],
+            _optional(rng, library["preferred"], PREFERRED_SHARE, count),
+            library["closings"][rng.integers(len(CLOSINGS), size=count)],
+        )
+        # One join per row; chained array additions would copy each growing description once per part
+        descriptions = _object_array(list(map("".join, zip(*(part.tolist() for part in parts)))))
+
+        numbers = np.arange(offset, offset + count)
+        return {
+            "title": titles,
+            "company": companies,
+            "location": locations,
+            "salary_min": salary_min,
+            "salary_max": salary_max,
+            "description": descriptions,
+            "url": (self.url_prefix + "/") + numbers.astype(str).astype(object),
+            "source": np.full(count, self.source, dtype=object),
+            "date_posted": (self.start_date + rng.integers(self.minutes, size=count).astype("timedelta64[m]")).astype(
+                "datetime64[us]"
+            ),
+        }
+
+    def generate(self, count: int, offset: int = 0) -> List[Dict]:
+        """`count` postings from posting number `offset` as job dicts, the shape the scrapers save"""
+        columns = self.columns(count, offset)
+        values = [columns[name].tolist() for name in ("title", "company", "location", "description", "url", "source")]
+        salaries = [
+            np.where(np.isnan(columns[name]), None, columns[name].astype(object)).tolist()
+            for name in ("salary_min", "salary_max")
+        ]
+        dates = columns["date_posted"].tolist()
+        return [
+            {
+                "title": title,
+                "company": company,
+                "location": location,
+                "salary_min": salary_min,
+                "salary_max": salary_max,
+                "description": description,
+                "url": url,
+                "source": source,
+                "date_posted": date_posted,
+            }
+            for (title, company, location, description, url, source), salary_min, salary_max, date_posted in zip(
+                zip(*values), *salaries, dates
+            )
+        ]
+
+    def _chunks(self, count: int, batch_size: int, offset: int) -> Iterator[tuple]:
+        for first in range(offset, offset + count, batch_size):
+            yield min(batch_size, offset + count - first), first
+
+    def iter_batches(self, count: int, batch_size: int = 10000, offset: int = 0) -> Iterator[List[Dict]]:
+        """`count` postings in lists of at most `batch_size`, without holding them all in memory"""
+        for size, first in self._chunks(count, batch_size, offset):
+            yield self.generate(size, first)
+
+    def iter_record_batches(self, count: int, batch_size: int = 100000, offset: int = 0):
+        """`count` postings as pyarrow RecordBatches with the jobs table's column types"""
+        import pyarrow as pa
+
+        schema = job_arrow_schema()
+        for size, first in self._chunks(count, batch_size, offset):
+            columns = self.columns(size, first)
+            # Object arrays convert several times faster from lists; NaN salaries become nulls
+            arrays = [
+                pa.array(values.tolist() if values.dtype == object else values, type=field.type, from_pandas=True)
+                for field, values in ((field, columns[field.name]) for field in schema)
+            ]
+            yield pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+    def write_parquet(self, path: str, count: int, batch_size: int = 100000, offset: int = 0) -> int:
+        """Write `count` postings to a Parquet file, one row group per batch; returns the rows written"""
+        import pyarrow.parquet as pq
+
+        written = 0
+        with pq.ParquetWriter(path, job_arrow_schema()) as writer:
+            for batch in self.iter_record_batches(count, batch_size, offset):
+                writer.write_batch(batch)
+                written += batch.num_rows
+        return written
+
+    def insert_jobs(self, db, count: int, batch_size: int = 10000, offset: int = 0, commit: bool = False) -> int:
+        """Bulk insert `count` postings into the jobs table with one executemany per batch.
+
+        `db` is a Session or Connection. Rank scores and rollups are brought
+        up to date per batch, as the scrapers do; with `commit` each batch is
+        committed as it lands. Returns the number of jobs inserted.
+        """
+        inserted = 0
+        for batch in self.iter_batches(count, batch_size, offset):
+            # A Core insert on the table; the ORM bulk path re-sorts RETURNING rows at quadratic cost
+            job_ids = db.execute(insert(Job.__table__).returning(Job.__table__.c.id), batch).scalars().all()
+            refresh_rank_scores(db, job_ids)
+            record_jobs(db, job_ids)
+            if commit:
+                db.commit()
+            inserted += len(job_ids)
+        return inserted
+
+
+@lru_cache(maxsize=None)
+def job_arrow_schema():
+    """Arrow schema of the generated fields, typed like the jobs table export"""
+    return _arrow_schema(select(*(Job.__table__.c[name] for name in FIELDS)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate seeded synthetic job postings")
+    parser.add_argument("--jobs", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--offset", type=int, default=0, help="first posting number, to extend an earlier run")
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--source", default="synthetic")
+    parser.add_argument("--parquet", help="write to this Parquet file instead of the database")
+    args = parser.parse_args()
+
+    generator = SyntheticJobGenerator(seed=args.seed, source=args.source)
+    if args.parquet:
+        written = generator.write_parquet(args.parquet, args.jobs, args.batch_size, args.offset)
+        logger.info(f"Wrote {written} synthetic jobs to {args.parquet}")
+        return
+
+    from backend.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        inserted = generator.insert_jobs(db, args.jobs, args.batch_size, args.offset, commit=True)
+        logger.info(f"Inserted {inserted} synthetic jobs")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,30 +2,39 @@
 Test run with 10 job postings
 """
 
+import argparse
 import sys
 import os
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from mock_scraper import MockIndeedScraper
+from backend.profiling import RunProfiler, add_profile_arguments
 from loguru import logger
 
 
-def main():
+def main(argv=None):
     """Generate exactly 10 test jobs"""
-    scraper = MockIndeedScraper()
+    parser = argparse.ArgumentParser(description="Generate and save 10 mock job postings")
+    add_profile_arguments(parser)
+    args = parser.parse_args(argv)
 
-    logger.info("Generating 10 test job postings...")
-    jobs = scraper.generate_mock_jobs(count=10)
+    with RunProfiler("test_run", args.profile, top=args.profile_top) as profiler:
+        scraper = MockIndeedScraper()
 
-    logger.info(f"Generated {len(jobs)} test jobs")
+        logger.info("Generating 10 test job postings...")
+        with profiler.stage("generate"):
+            jobs = scraper.generate_mock_jobs(count=10)
 
-    # Show the jobs
-    for i, job in enumerate(jobs, 1):
-        logger.info(f"{i}. {job['title']} at {job['company']} - ${job['salary_min']:,.0f}-${job['salary_max']:,.0f}")
+        logger.info(f"Generated {len(jobs)} test jobs")
 
-    # Save to database
-    saved_count = scraper.save_jobs_to_db(jobs)
+        # Show the jobs
+        for i, job in enumerate(jobs, 1):
+            logger.info(f"{i}. {job['title']} at {job['company']} - ${job['salary_min']:,.0f}-${job['salary_max']:,.0f}")
+
+        # Save to database
+        with profiler.stage("save"):
+            saved_count = scraper.save_jobs_to_db(jobs)
     logger.info(f"Test run completed. Saved {saved_count} new jobs to database.")
 
     return saved_count
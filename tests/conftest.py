@@ -0,0 +1,72 @@
+"""
+Shared test fixtures
+
+The suite runs against a throwaway SQLite database: DATABASE_URL is pointed
+at a temporary directory before any backend module is imported, so tests
+never read or write backend/auditor_jobs.db.
+"""
+
+import pytest
+import sys
+import os
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DATABASE_DIR = tempfile.TemporaryDirectory(prefix="auditor-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(DATABASE_DIR.name, 'auditor_jobs.db')}"
+
+from backend.analytics import rebuild_rollups
+from backend.database import init_database, SessionLocal
+from backend.models import AgentMatch, Job, Outreach, ScrapePage, ScrapeRun, ScrapeUrl
+
+init_database()
+
+
+def pytest_unconfigure(config):
+    DATABASE_DIR.cleanup()
+
+
+@pytest.fixture
+def sources():
+    """The Job.source tags a module's rows are written with; override it in the module"""
+    return []
+
+
+@pytest.fixture
+def db(sources):
+    """A session; afterwards every job, match, outreach and scrape run tagged with `sources` is deleted"""
+    session = SessionLocal()
+    yield session
+    session.rollback()
+    if sources:
+        job_ids = [job_id for (job_id,) in session.query(Job.id).filter(Job.source.in_(sources))]
+        run_ids = [run_id for (run_id,) in session.query(ScrapeRun.id).filter(ScrapeRun.source.in_(sources))]
+        session.query(ScrapeUrl).filter(ScrapeUrl.source.in_(sources)).delete(synchronize_session=False)
+        session.query(ScrapePage).filter(ScrapePage.run_id.in_(run_ids)).delete(synchronize_session=False)
+        session.query(ScrapeRun).filter(ScrapeRun.id.in_(run_ids)).delete(synchronize_session=False)
+        session.query(Outreach).filter(Outreach.job_id.in_(job_ids)).delete(synchronize_session=False)
+        session.query(AgentMatch).filter(AgentMatch.job_id.in_(job_ids)).delete(synchronize_session=False)
+        session.query(Job).filter(Job.id.in_(job_ids)).delete(synchronize_session=False)
+        rebuild_rollups(session)
+        session.commit()
+    session.close()
+
+
+@pytest.fixture
+def job_data(sources):
+    """Builds scraped-job dicts tagged with the module's first source, unique per `n`"""
+
+    def make(n: int, **fields) -> dict:
+        source = fields.get("source", sources[0])
+        return {
+            "title": "Senior Internal Auditor",
+            "company": f"{source} Co {n}",
+            "location": "Austin, TX",
+            "description": "Internal audit, compliance testing, internal control reviews, risk and regulatory reporting",
+            "url": f"https://test.com/{source.lower()}-{n}",
+            "source": source,
+            **fields,
+        }
+
+    return make
@@ -0,0 +1,104 @@
+"""
+Market analytics rollup tests
+"""
+
+import pytest
+import sys
+import os
+from datetime import date, datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.database import init_database
+from backend.models import Job, AgentMatch
+from backend.analytics import job_market_report, match_report, rebuild_rollups, record_jobs, record_matches
+from backend.normalization import location_state, seniority, title_family
+
+init_database()
+client = TestClient(app)
+
+SOURCE = "AnalyticsTest"
+
+
+@pytest.fixture
+def sources():
+    return [SOURCE]
+
+
+def add_postings(db):
+    """Three postings over two weeks of January 2020, recorded the way the scrapers and processor do"""
+    postings = [
+        ("Senior Auditor", "Houston, TX", 90000, 110000, datetime(2020, 1, 7), "AFC", 0.9),
+        ("Sr. Auditor II", "Dallas, TX", None, None, datetime(2020, 1, 9), "AFC", 0.85),
+        ("Tax Manager", "Remote", 120000, 140000, datetime(2020, 1, 14), "other", 0.3),
+    ]
+    jobs, matches = [], []
+    for i, (title, location, salary_min, salary_max, posted, agent, confidence) in enumerate(postings):
+        job = Job(title=title, company="Analytics Firm", location=location, salary_min=salary_min, salary_max=salary_max,
+                  url=f"https://test.com/analytics-{i}", source=SOURCE, date_posted=posted)
+        db.add(job)
+        db.flush()
+        match = AgentMatch(job_id=job.id, matched_agent=agent, confidence_score=confidence)
+        db.add(match)
+        db.flush()
+        jobs.append(job.id)
+        matches.append(match.id)
+    record_jobs(db, jobs)
+    record_matches(db, matches)
+    db.commit()
+
+
+def test_dimensions():
+    """Test titles and locations map to rollup dimensions"""
+    assert (title_family("Sr. Internal Auditor"), seniority("Sr. Internal Auditor")) == ("auditor", "senior")
+    assert (title_family("Senior Tax Manager"), seniority("Senior Tax Manager")) == ("tax", "manager")
+    assert title_family("Revenue Analyst") == "financial analyst"
+    assert location_state("Houston, TX") == "TX"
+    assert location_state("Remote - US") == "remote"
+    assert location_state(None) == "unknown"
+
+
+def test_incremental_rollups_match_rebuild(db):
+    """Test rollups maintained on insert agree with a full rebuild"""
+    add_postings(db)
+
+    def reports():
+        return (
+            job_market_report(db, ["period"], source=SOURCE, title_family="auditor", seniority="senior", state="tx"),
+            match_report(db, ["period", "matched_agent"], "month", source=SOURCE),
+        )
+
+    incremental = reports()
+    senior_auditors, matches = incremental
+    assert senior_auditors == [{"period": date(2020, 1, 6), "job_count": 2, "salary_count": 1, "avg_salary": 100000.0}]
+    assert [(row["matched_agent"], row["match_count"], row["share"]) for row in matches] == [("AFC", 2, 0.6667), ("other", 1, 0.3333)]
+    assert matches[0]["period"] == date(2020, 1, 1)
+    assert matches[0]["high_confidence_count"] == 2
+
+    rebuild_rollups(db)
+    db.commit()
+    assert reports() == incremental
+
+
+def test_analytics_endpoints(db):
+    """Test the API answers grouped questions and rejects unknown dimensions"""
+    add_postings(db)
+
+    response = client.get("/analytics/jobs", params={"group_by": "period,state", "source": SOURCE})
+    assert response.status_code == 200
+    assert [(row["period"], row["state"], row["job_count"]) for row in response.json()["rows"]] == [
+        ("2020-01-06", "TX", 2),
+        ("2020-01-13", "remote", 1),
+    ]
+
+    response = client.get("/analytics/matches", params={"group_by": "matched_agent", "source": SOURCE, "since": "2020-01-13"})
+    assert [(row["matched_agent"], row["share"]) for row in response.json()["rows"]] == [("other", 1.0)]
+
+    companies = client.get("/analytics/companies", params={"until": "2020-01-31", "limit": 500}).json()
+    assert {"company": "Analytics Firm", "company_key": "analytics firm", "job_count": 3, "salary_count": 2,
+            "avg_salary": 115000.0} in companies
+
+    assert client.get("/analytics/jobs", params={"group_by": "company"}).status_code == 400
+    assert client.get("/analytics/jobs", params={"interval": "year"}).status_code == 400
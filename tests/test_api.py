@@ -7,8 +7,13 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from fastapi.testclient import TestClient
+from loguru import logger
 from backend.main import app
+from backend.database import init_database, SessionLocal
+from backend.models import Job
+from backend.query_stats import set_slow_query_threshold, track_queries
 
+init_database()
 client = TestClient(app)
 
 def test_root_endpoint():
@@ -40,3 +45,100 @@ def test_get_stats():
     assert "jobs" in data
     assert "agent_matches" in data
     assert "outreach" in data
+
+def test_get_outreach_filtered_by_status():
+    """Test the outreach status filter"""
+    response = client.get("/outreach", params={"status": "no-such-status"})
+    assert response.status_code == 200
+    assert response.json() == []
+    assert all(email["status"] == "draft" for email in client.get("/outreach", params={"status": "draft"}).json())
+
+def test_get_job_without_include_skips_relationships():
+    """Test that job detail leaves out relationships that were not requested"""
+    job_id = client.get("/jobs").json()[0]["id"]
+    response = client.get(f"/jobs/{job_id}")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["id"] == job_id
+    assert "title" in data and "rank_score" in data
+    assert "agent_matches" not in data
+    assert "outreach_emails" not in data
+
+def test_get_job_with_includes():
+    """Test job detail with matches and outreach eager-loaded"""
+    job_id = client.get("/jobs").json()[0]["id"]
+    response = client.get(f"/jobs/{job_id}", params={"include": "matches,outreach"})
+    assert response.status_code == 200
+    data = response.json()
+    expected_matches = client.get(f"/jobs/{job_id}/matches").json()
+    assert [m["id"] for m in data["agent_matches"]] == [m["id"] for m in expected_matches]
+    assert all(o["job_id"] == job_id for o in data["outreach_emails"])
+
+def test_get_jobs_list_with_matches():
+    """Test list variant of the include parameter"""
+    response = client.get("/jobs", params={"include": "matches"})
+    assert response.status_code == 200
+    jobs = response.json()
+    assert any(job["agent_matches"] for job in jobs)
+    assert all("outreach_emails" not in job for job in jobs)
+
+def test_get_job_unknown_include():
+    """Test that unknown include values are rejected"""
+    response = client.get("/jobs", params={"include": "matches,bogus"})
+    assert response.status_code == 400
+
+
+@pytest.fixture
+def debug_headers(monkeypatch):
+    monkeypatch.setenv("DEBUG", "true")
+
+
+def assert_max_queries(path, max_queries, **params):
+    """GET `path` and assert it ran at most `max_queries` statements (needs the debug_headers fixture)"""
+    response = client.get(path, params=params)
+    assert response.status_code == 200
+    count = int(response.headers["X-DB-Query-Count"])
+    assert count <= max_queries, f"GET {path} {params} ran {count} queries, budget {max_queries}"
+    return response
+
+
+def test_query_budgets(debug_headers):
+    """Test list endpoints run a fixed number of queries however many rows they return"""
+    job_id = client.get("/jobs").json()[0]["id"]
+    assert_max_queries("/jobs", 2)
+    assert_max_queries("/jobs", 3, include="matches", limit=500)
+    assert_max_queries("/jobs", 4, include="matches,outreach", limit=500)
+    assert_max_queries(f"/jobs/{job_id}", 3, include="matches,outreach")
+    assert_max_queries("/jobs/search", 1, q="audit")
+    assert_max_queries("/jobs/ranked", 2)
+    assert_max_queries("/agent-matches", 1)
+    assert_max_queries("/outreach", 2)
+    assert_max_queries("/stats", 4)
+    assert_max_queries("/analytics/jobs", 2)
+    response = assert_max_queries("/analytics/matches", 2)
+    assert response.headers["X-DB-Query-Time"].endswith("ms")
+
+
+def test_query_headers_only_in_debug(monkeypatch):
+    """Test query counts are not sent as headers outside debug mode"""
+    monkeypatch.setenv("DEBUG", "false")
+    assert "X-DB-Query-Count" not in client.get("/jobs").headers
+
+
+def test_slow_query_logged_with_plan():
+    """Test statements over the threshold are counted and logged with their EXPLAIN plan"""
+    messages = []
+    sink = logger.add(messages.append, level="WARNING", format="{message}")
+    previous = set_slow_query_threshold(0)
+    db = SessionLocal()
+    try:
+        with track_queries() as stats:
+            db.query(Job).filter(Job.state == "TX").all()
+    finally:
+        db.close()
+        set_slow_query_threshold(previous)
+        logger.remove(sink)
+    assert (stats.count, stats.slow) == (1, 1)
+    slow = [message for message in messages if message.startswith("Slow query")]
+    assert len(slow) == 1
+    assert "SEARCH jobs USING INDEX ix_jobs_state" in slow[0]
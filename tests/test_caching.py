@@ -0,0 +1,96 @@
+"""
+HTTP caching and compression tests
+"""
+import pytest
+import sys
+import os
+from datetime import timedelta, timezone
+from email.utils import format_datetime
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from backend import caching
+from backend.main import app
+from backend.database import init_database, SessionLocal
+from backend.models import Outreach, Job
+
+init_database()
+client = TestClient(app)
+
+@pytest.fixture
+def settled_clock(monkeypatch):
+    """Runs the caching clock a minute ahead, so the last write is never in the current second"""
+    now = caching._utcnow() + timedelta(minutes=1)
+    monkeypatch.setattr(caching, "_utcnow", lambda: now)
+
+def test_etag_returns_not_modified(settled_clock):
+    """Test that a repeated request with the ETag gets a 304"""
+    first = client.get("/stats")
+    etag = first.headers["etag"]
+    assert first.headers["last-modified"]
+
+    second = client.get("/stats", headers={"If-None-Match": etag})
+    assert second.status_code == 304
+    assert second.headers["etag"] == etag
+    assert second.content == b""
+
+def test_etag_changes_after_write():
+    """Test that writing to a table invalidates the ETag of endpoints reading it"""
+    etag = client.get("/outreach").headers["etag"]
+    jobs_etag = client.get("/jobs").headers["etag"]
+
+    db = SessionLocal()
+    job_id = db.query(Job.id).first()[0]
+    outreach = Outreach(job_id=job_id, draft_email="Subject: Test\n\nBody", status="draft")
+    db.add(outreach)
+    db.commit()
+    try:
+        assert client.get("/outreach", headers={"If-None-Match": etag}).status_code == 200
+        assert client.get("/jobs", headers={"If-None-Match": jobs_etag}).status_code == 304
+    finally:
+        db.delete(outreach)
+        db.commit()
+        db.close()
+
+def test_etag_depends_on_query_parameters():
+    """Test that different pages of the same list have different ETags"""
+    assert client.get("/jobs?limit=1").headers["etag"] != client.get("/jobs?limit=2").headers["etag"]
+
+def test_if_modified_since(settled_clock):
+    """Test Last-Modified based revalidation"""
+    last_modified = client.get("/stats").headers["last-modified"]
+    response = client.get("/stats", headers={"If-Modified-Since": last_modified})
+    assert response.status_code == 304
+
+def test_if_modified_since_ignored_within_the_changed_second(monkeypatch):
+    """Test that a change less than a second old is never answered from Last-Modified"""
+    db = SessionLocal()
+    try:
+        changed_at = caching.get_table_versions(db, ["outreach"])["outreach"][1].replace(tzinfo=timezone.utc)
+    finally:
+        db.close()
+    since = format_datetime(changed_at.replace(microsecond=0), usegmt=True)
+
+    # Another write in the same second would not move Last-Modified
+    monkeypatch.setattr(caching, "_utcnow", lambda: changed_at.replace(microsecond=500000))
+    response = client.get("/outreach", headers={"If-Modified-Since": since})
+    assert response.status_code == 200
+    assert "last-modified" not in response.headers
+    assert response.headers["etag"]
+
+    monkeypatch.setattr(caching, "_utcnow", lambda: changed_at.replace(microsecond=0) + timedelta(seconds=1))
+    response = client.get("/outreach", headers={"If-Modified-Since": since})
+    assert response.status_code == 304
+    assert response.headers["last-modified"] == since
+
+def test_large_responses_are_compressed():
+    """Test that large list responses are compressed"""
+    response = client.get("/jobs", headers={"Accept-Encoding": "gzip"})
+    assert response.status_code == 200
+    assert len(response.content) >= 1000
+    assert response.headers["content-encoding"] == "gzip"
+
+def test_small_responses_are_not_compressed():
+    """Test that tiny responses skip compression"""
+    response = client.get("/health", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
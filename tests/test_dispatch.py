@@ -0,0 +1,129 @@
+"""
+Outreach dispatch tests
+"""
+import smtplib
+import time
+from datetime import datetime, timedelta
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.database import init_database, SessionLocal
+from backend.dispatch import dispatcher, INTERRUPTED_SEND_ERROR
+from backend.email_service import EmailService
+from backend.models import Job, Outreach
+
+init_database()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    """Test client with the app lifespan (and so the dispatcher) running"""
+    monkeypatch.setattr(EmailService, "credentials_configured", lambda self: True)
+    with TestClient(app) as test_client:
+        yield test_client
+
+@pytest.fixture
+def approved_outreach():
+    """Create approved outreach emails and remove them afterwards"""
+    db = SessionLocal()
+    job_id = db.query(Job.id).first()[0]
+    rows = [
+        Outreach(job_id=job_id, draft_email=f"Subject: Test {i}\n\nBody {i}", status="approved", firm_contact=f"c{i}@example.com")
+        for i in range(3)
+    ]
+    db.add_all(rows)
+    db.commit()
+    ids = [row.id for row in rows]
+    try:
+        yield ids
+    finally:
+        db.query(Outreach).filter(Outreach.id.in_(ids)).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+
+def outreach_rows(ids):
+    db = SessionLocal()
+    try:
+        return {row.id: row for row in db.query(Outreach).filter(Outreach.id.in_(ids))}
+    finally:
+        db.close()
+
+def wait_for(predicate, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.05)
+    return False
+
+def test_send_approved_sends_each_message_once(client, approved_outreach, monkeypatch):
+    """Test bulk sending delivers every approved message exactly once"""
+    delivered = []
+    monkeypatch.setattr(dispatcher.email_service, "deliver", lambda to, subject, body, message_id=None: delivered.append(message_id))
+
+    response = client.post("/outreach/send-approved")
+    assert response.status_code == 200
+    assert set(approved_outreach) <= set(response.json()["outreach_ids"])
+    client.portal.call(dispatcher.join)
+
+    rows = outreach_rows(approved_outreach)
+    assert all(row.status == "sent" and row.sent_at and row.send_attempts == 1 for row in rows.values())
+    assert {f"<outreach-{i}@localhost>" for i in approved_outreach} <= set(delivered)
+    assert len(delivered) == len(set(delivered))
+
+    # Nothing is approved any more, so a second bulk send queues nothing
+    assert not set(approved_outreach) & set(client.post("/outreach/send-approved").json()["outreach_ids"])
+
+def test_transient_failures_retry_then_fail(client, approved_outreach, monkeypatch):
+    """Test transient SMTP errors are retried up to the attempt limit"""
+    def disconnected(*args, **kwargs):
+        raise smtplib.SMTPServerDisconnected("connection lost")
+
+    monkeypatch.setattr(dispatcher.email_service, "deliver", disconnected)
+    monkeypatch.setattr(dispatcher, "retry_delay", 0.0)
+    monkeypatch.setattr(dispatcher, "max_attempts", 2)
+
+    client.post("/outreach/send-approved")
+    assert wait_for(lambda: all(row.status == "failed" for row in outreach_rows(approved_outreach).values()))
+    rows = outreach_rows(approved_outreach)
+    assert all(row.send_attempts == 2 for row in rows.values())
+    assert all("connection lost" in row.last_error for row in rows.values())
+
+def test_claim_prevents_double_send(approved_outreach, monkeypatch):
+    """Test a message can only be claimed for sending once"""
+    service = EmailService()
+    monkeypatch.setattr(service, "deliver", lambda *args, **kwargs: None)
+    assert service.send_outreach(approved_outreach[0]).status == "sent"
+    assert service.send_outreach(approved_outreach[0]).status == "skipped"
+
+def test_interrupted_sends_are_not_retried(approved_outreach):
+    """Test messages abandoned mid-send by a crash are failed, not resent, and live claims are left alone"""
+    now = datetime.utcnow()
+    db = SessionLocal()
+    db.query(Outreach).filter(Outreach.id == approved_outreach[0]).update(
+        {Outreach.status: "sending", Outreach.claimed_by: "crashed-worker", Outreach.claimed_at: now - timedelta(hours=1)}
+    )
+    db.query(Outreach).filter(Outreach.id == approved_outreach[1]).update(
+        {Outreach.status: "sending", Outreach.claimed_by: "other-worker", Outreach.claimed_at: now}
+    )
+    db.commit()
+    db.close()
+
+    assert dispatcher.recover_interrupted() >= 1
+    rows = outreach_rows(approved_outreach)
+    assert rows[approved_outreach[0]].status == "failed"
+    assert rows[approved_outreach[0]].last_error == INTERRUPTED_SEND_ERROR
+    # Another API worker's send in progress is not failed under it
+    assert rows[approved_outreach[1]].status == "sending"
+
+def test_claims_record_the_dispatcher(client, approved_outreach, monkeypatch):
+    """Test the dispatcher's claims name it as the sender"""
+    monkeypatch.setattr(dispatcher.email_service, "deliver", lambda *args, **kwargs: None)
+    client.post("/outreach/send-approved")
+    client.portal.call(dispatcher.join)
+    rows = outreach_rows(approved_outreach).values()
+    assert all(row.status == "sent" and row.claimed_by == dispatcher.owner and row.claimed_at for row in rows)
@@ -8,6 +8,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from unittest.mock import Mock, patch
 from backend.email_service import EmailService
+from backend.smtp_pool import close_all_pools
 from backend.models import Job, AgentMatch
 
 @pytest.fixture
@@ -77,7 +78,7 @@ def test_save_outreach_draft(email_service, sample_job):
         # The method should have been called
         assert outreach_id == 1
 
-@patch('backend.email_service.smtplib.SMTP')
+@patch('backend.smtp_pool.smtplib.SMTP')
 def test_send_email_success(mock_smtp, email_service):
     """Test successful email sending"""
     # Create a new email service instance with mocked credentials
@@ -91,12 +92,104 @@ def test_send_email_success(mock_smtp, email_service):
     
     result = email_service.send_email("to@example.com", "Test Subject", "Test Body")
     
-    assert result is True
-    mock_server.starttls.assert_called_once()
-    mock_server.login.assert_called_once()
-    mock_server.sendmail.assert_called_once()
+    try:
+        assert result is True
+        mock_server.starttls.assert_called_once()
+        mock_server.login.assert_called_once()
+        mock_server.sendmail.assert_called_once()
+
+        # A second message reuses the pooled, already authenticated session
+        assert email_service.send_email("other@example.com", "Test Subject", "Test Body") is True
+        mock_smtp.assert_called_once()
+        mock_server.login.assert_called_once()
+        assert mock_server.sendmail.call_count == 2
+    finally:
+        close_all_pools()
 
 def test_send_email_no_credentials(email_service):
     """Test email sending without credentials"""
     result = email_service.send_email("to@example.com", "Test Subject", "Test Body")
     assert result is False
+
+def test_generate_outreach_for_all_high_confidence_jobs():
+    """Test batched outreach generation picks each eligible job's best match once"""
+    from backend.database import init_database, SessionLocal
+    from backend.email_service import generate_outreach_for_all_high_confidence_jobs
+    from backend.models import Outreach
+
+    init_database()
+    db = SessionLocal()
+    jobs = [
+        Job(title=f"Batch Auditor {i}", company=f"Batch Co {i}", location="Test City", salary_min=50000,
+            salary_max=70000, description="Audit work", url=f"https://test.com/batch-outreach-{i}", source="Test")
+        for i in range(4)
+    ]
+    db.add_all(jobs)
+    db.flush()
+    db.add_all([
+        # Best match wins even when a weaker high-confidence match also exists
+        AgentMatch(job_id=jobs[0].id, matched_agent="AFC", confidence_score=0.82),
+        AgentMatch(job_id=jobs[0].id, matched_agent="FSP", confidence_score=0.95),
+        AgentMatch(job_id=jobs[1].id, matched_agent="AFC", confidence_score=0.9),
+        # Below the threshold
+        AgentMatch(job_id=jobs[2].id, matched_agent="AFC", confidence_score=0.5),
+        # Already has outreach
+        AgentMatch(job_id=jobs[3].id, matched_agent="AFC", confidence_score=0.9),
+        Outreach(job_id=jobs[3].id, draft_email="Subject: Existing\n\nBody", status="draft"),
+    ])
+    db.commit()
+    job_ids = [job.id for job in jobs]
+
+    outreach_ids = generate_outreach_for_all_high_confidence_jobs(0.8, batch_size=1)
+    try:
+        created = db.query(Outreach).filter(Outreach.id.in_(outreach_ids), Outreach.job_id.in_(job_ids)).all()
+        by_job = {outreach.job_id: outreach for outreach in created}
+        assert set(by_job) == {job_ids[0], job_ids[1]}
+        assert "Financial Services Professional agent" in by_job[job_ids[0]].draft_email
+        assert all(outreach.status == "draft" for outreach in created)
+
+        # Running again finds nothing left to generate for these jobs
+        assert not set(generate_outreach_for_all_high_confidence_jobs(0.8)) & {o.id for o in created}
+        assert db.query(Outreach).filter(Outreach.job_id.in_(job_ids)).count() == 3
+    finally:
+        db.query(Outreach).filter(Outreach.id.in_(outreach_ids)).delete(synchronize_session=False)
+        db.query(Outreach).filter(Outreach.job_id.in_(job_ids)).delete(synchronize_session=False)
+        db.query(AgentMatch).filter(AgentMatch.job_id.in_(job_ids)).delete(synchronize_session=False)
+        db.query(Job).filter(Job.id.in_(job_ids)).delete(synchronize_session=False)
+        db.commit()
+        db.close()
+
+def test_generate_outreach_email_without_salary(email_service, sample_job, sample_agent_match):
+    """Test jobs without a posted salary still get a draft"""
+    sample_job.salary_min = None
+    sample_job.salary_max = None
+    email_content = email_service.generate_outreach_email(sample_job, sample_agent_match)
+
+    assert "Senior Auditor" in email_content
+    assert "about 20% of the annual salary" in email_content
+    assert "None" not in email_content
+
+def test_render_outreach_email_fields(email_service, sample_job, sample_agent_match):
+    """Test subject and body are rendered separately"""
+    email = email_service.render_outreach_email(sample_job, sample_agent_match)
+
+    assert email.subject == "AI Workforce Solution for Senior Auditor Position at Test Company"
+    assert email.body.startswith("Dear Hiring Manager,")
+    assert email.draft_email == f"Subject: {email.subject}\n\n{email.body}"
+    assert EmailService.split_draft(email.draft_email) == (email.subject, email.body)
+
+def test_agent_template_override(tmp_path, sample_job, sample_agent_match):
+    """Test an agent-specific template replaces the shared one for that agent only"""
+    from backend.templating import OutreachTemplates
+
+    (tmp_path / "outreach" / "AFC").mkdir(parents=True)
+    (tmp_path / "outreach" / "subject.txt").write_text("Shared subject for {{ job.company }}")
+    (tmp_path / "outreach" / "body.txt").write_text("Shared body")
+    (tmp_path / "outreach" / "AFC" / "body.txt").write_text("AFC body for {{ job.title }}: {{ tellen_cost | money }}")
+    templates = OutreachTemplates(str(tmp_path))
+
+    afc = templates.render(sample_job, "AFC", "Test Name")
+    assert afc.subject == "Shared subject for Test Company"
+    assert afc.body == "AFC body for Senior Auditor: $20,000"
+    assert templates.render(sample_job, "FSP", "Test Name").body == "Shared body"
+    assert templates.templates_for("AFC") is templates.templates_for("AFC")
@@ -0,0 +1,86 @@
+"""
+Event bus and event stream tests
+"""
+import asyncio
+import threading
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.database import init_database
+from backend.events import EventBus, Event, event_bus, OUTREACH_STATUS, JOB_CREATED
+
+init_database()
+client = TestClient(app)
+
+def test_event_sse_format():
+    """Test server-sent events wire format"""
+    event = Event(id=7, type="job.created", data={"id": 1})
+    assert event.to_sse() == 'id: 7\nevent: job.created\ndata: {"id": 1}\n\n'
+
+def test_publish_from_other_thread():
+    """Test that events published from worker threads reach async subscribers"""
+    bus = EventBus()
+
+    async def scenario():
+        subscription = bus.subscribe({JOB_CREATED})
+        threading.Thread(target=bus.publish, args=("match.created", {"id": 1})).start()
+        threading.Thread(target=bus.publish, args=(JOB_CREATED, {"id": 2})).start()
+        event = await asyncio.wait_for(subscription.get(), timeout=2)
+        bus.unsubscribe(subscription)
+        return event
+
+    event = asyncio.run(scenario())
+    assert event.type == JOB_CREATED
+    assert event.data == {"id": 2}
+    assert bus.subscriber_count == 0
+
+def test_slow_subscriber_drops_oldest():
+    """Test bounded subscriber queues keep the newest events"""
+    bus = EventBus(max_queue_size=2)
+
+    async def scenario():
+        subscription = bus.subscribe()
+        for i in range(5):
+            bus.publish(JOB_CREATED, {"id": i})
+        await asyncio.sleep(0)
+        return [(await subscription.get()).data["id"] for _ in range(2)], subscription.dropped
+
+    ids, dropped = asyncio.run(scenario())
+    assert ids == [3, 4]
+    assert dropped == 3
+
+def test_replay_after_last_event_id():
+    """Test reconnecting subscribers receive events they missed"""
+    bus = EventBus()
+    first = bus.dispatch(JOB_CREATED, {"id": 1})
+    bus.dispatch(JOB_CREATED, {"id": 2})
+
+    async def scenario():
+        subscription = bus.subscribe(last_event_id=first.id)
+        return (await subscription.get()).data
+
+    assert asyncio.run(scenario()) == {"id": 2}
+
+def test_approve_publishes_status_event():
+    """Test that approving outreach publishes a status change"""
+    outreach_id = client.get("/outreach").json()[0]["id"]
+
+    async def scenario():
+        subscription = event_bus.subscribe({OUTREACH_STATUS})
+        try:
+            await asyncio.to_thread(client.put, f"/outreach/{outreach_id}/approve")
+            return await asyncio.wait_for(subscription.get(), timeout=2)
+        finally:
+            event_bus.unsubscribe(subscription)
+
+    event = asyncio.run(scenario())
+    assert event.data["id"] == outreach_id
+    assert event.data["status"] == "approved"
+
+def test_events_rejects_unknown_types():
+    """Test the event stream validates requested event types"""
+    response = client.get("/events", params={"types": "job.created,bogus"})
+    assert response.status_code == 400
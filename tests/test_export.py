@@ -0,0 +1,56 @@
+"""
+Data export tests
+"""
+import csv
+import io
+import json
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.database import init_database
+from backend.export import jobs_export_statement, stream_export
+
+init_database()
+client = TestClient(app)
+
+def test_export_jobs_ndjson():
+    """Test NDJSON export returns one JSON object per job"""
+    response = client.get("/export/jobs")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert len(rows) == client.get("/stats").json()["jobs"]["total"]
+    assert {"id", "title", "company", "date_posted"} <= rows[0].keys()
+
+def test_export_jobs_csv_with_agent_filter():
+    """Test CSV export filtered by matched agent"""
+    response = client.get("/export/jobs", params={"format": "csv", "agent": "AFC"})
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    afc_job_ids = {m["job_id"] for m in client.get("/agent-matches", params={"agent": "AFC"}).json()}
+    assert {int(row["id"]) for row in rows} == afc_job_ids
+
+def test_export_agent_matches_ndjson():
+    """Test agent match export includes the job source"""
+    response = client.get("/export/agent-matches", params={"source": "indeed"})
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert rows
+    assert all(row["job_source"] == "indeed" for row in rows)
+
+def test_export_parquet_round_trip():
+    """Test Parquet export produces a readable file"""
+    pq = pytest.importorskip("pyarrow.parquet")
+    payload = b"".join(stream_export(jobs_export_statement(), "parquet", batch_size=1))
+    table = pq.read_table(io.BytesIO(payload))
+    assert table.num_rows == client.get("/stats").json()["jobs"]["total"]
+    assert "salary_min" in table.column_names
+
+def test_export_unknown_format():
+    """Test unsupported formats are rejected"""
+    response = client.get("/export/jobs", params={"format": "xml"})
+    assert response.status_code == 400
@@ -0,0 +1,84 @@
+"""
+Prometheus metrics tests
+"""
+
+import pytest
+import sys
+import os
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from backend.main import app
+from backend.database import init_database, SessionLocal
+from backend.metrics import export_metrics, llm_call
+from backend.models import Job
+
+init_database()
+client = TestClient(app)
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_metrics_endpoint_exposes_collectors():
+    """Test /metrics serves the exposition format with request latencies labelled by route template"""
+    client.get("/jobs/999999999")
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    for name in ["auditor_api_request_seconds", "auditor_db_query_seconds", "auditor_llm_request_seconds", "auditor_retries"]:
+        assert name in response.text
+    assert 'route="/jobs/{job_id}"' in response.text
+    assert "/jobs/999999999" not in response.text
+
+
+def test_not_modified_counts_as_cache_hit():
+    """Test conditional GETs record hits and misses on the http cache"""
+    etag = client.get("/stats").headers["etag"]
+    hits = sample("auditor_cache_hits_total", cache="http")
+    misses = sample("auditor_cache_misses_total", cache="http")
+
+    assert client.get("/stats", headers={"If-None-Match": etag}).status_code == 304
+    assert sample("auditor_cache_hits_total", cache="http") == hits + 1
+    assert client.get("/stats").status_code == 200
+    assert sample("auditor_cache_misses_total", cache="http") == misses + 1
+
+
+def test_database_queries_are_timed():
+    """Test statements run through the engine land in the query histogram by verb"""
+    before = sample("auditor_db_query_seconds_count", statement="SELECT")
+    db = SessionLocal()
+    try:
+        db.query(Job.id).limit(1).all()
+        db.query(Job.id).limit(1).all()
+    finally:
+        db.close()
+    assert sample("auditor_db_query_seconds_count", statement="SELECT") >= before + 2
+
+
+def test_llm_call_records_latency_tokens_and_failures():
+    """Test token usage is read from the completion and a raised error counts as a failure"""
+    count = sample("auditor_llm_request_seconds_count", operation="test")
+    tokens = sample("auditor_llm_tokens_sum", operation="test", kind="prompt")
+    with llm_call("test") as call:
+        call.response = SimpleNamespace(usage=SimpleNamespace(prompt_tokens=120, completion_tokens=30))
+    assert sample("auditor_llm_request_seconds_count", operation="test") == count + 1
+    assert sample("auditor_llm_tokens_sum", operation="test", kind="prompt") == tokens + 120
+
+    failures = sample("auditor_failures_total", operation="llm_test")
+    with pytest.raises(TimeoutError):
+        with llm_call("test"):
+            raise TimeoutError("slow")
+    assert sample("auditor_failures_total", operation="llm_test") == failures + 1
+    assert sample("auditor_llm_request_seconds_count", operation="test") == count + 2
+
+
+def test_export_metrics_writes_textfile(tmp_path):
+    """Test CLI runs can hand their metrics to node_exporter's textfile collector"""
+    export_metrics("test_job", textfile_dir=str(tmp_path / "textfile"))
+    content = (tmp_path / "textfile" / "test_job.prom").read_text()
+    assert "auditor_db_query_seconds_bucket" in content
@@ -0,0 +1,93 @@
+"""
+Title and location normalization tests
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.database import init_database
+from backend.ai_processor import heuristic_match
+from backend.models import Job
+from backend.normalization import (
+    SENIORITY_LEVELS,
+    TITLE_FAMILIES,
+    Location,
+    backfill_job_keys,
+    canonical_title,
+    parse_location,
+)
+
+init_database()
+client = TestClient(app)
+
+
+@pytest.fixture
+def sources():
+    return ["NormalizationTest"]
+
+
+def test_title_variants_share_a_key():
+    """Test spelling variants of a title map to the same family and seniority codes"""
+    senior_auditor = (TITLE_FAMILIES.index("auditor"), SENIORITY_LEVELS.index("senior"))
+    for title in ["Senior Auditor", "Sr. Auditor", "Senior Auditor II", "SR AUDITOR", "Auditor III", "Lead Internal Auditor"]:
+        assert canonical_title(title) == senior_auditor, title
+    assert canonical_title("Senior Tax Accountant").family == TITLE_FAMILIES.index("tax")
+    assert canonical_title("Sr. Audit Mgr").seniority == SENIORITY_LEVELS.index("manager")
+    assert canonical_title("Office Coordinator") == (0, 0)
+
+
+def test_location_variants():
+    """Test free-text locations parse to city, state and remote flag"""
+    assert parse_location("NYC") == parse_location("New York, NY") == Location("New York", "NY", False)
+    assert parse_location("austin, texas 78701") == Location("Austin", "TX", False)
+    assert parse_location("Hybrid - Dallas, TX") == Location("Dallas", "TX", False)
+    assert parse_location("Remote - US") == Location(None, None, True)
+    assert parse_location("Baton Rouge, LA") == Location("Baton Rouge", "LA", False)
+    assert parse_location("Washington, DC") == Location("Washington", "DC", False)
+    assert parse_location(None) == Location(None, None, False)
+
+
+def test_keys_set_on_insert_and_backfilled(db):
+    """Test new jobs get their key columns on insert and older rows are backfilled"""
+    job = Job(title="Sr. Staff Accountant", company="Norm Co", location="Houston, TX 77002",
+              url="https://test.com/normalization-1", source="NormalizationTest")
+    db.add(job)
+    db.commit()
+    assert (job.title_family, job.seniority) == tuple(canonical_title("Senior Accountant"))
+    assert (job.city, job.state, job.is_remote) == ("Houston", "TX", False)
+
+    job.title_family = job.seniority = job.state = None
+    db.commit()
+    assert backfill_job_keys(db) >= 1
+    db.commit()
+    db.refresh(job)
+    assert job.state == "TX"
+    assert job.title_family == TITLE_FAMILIES.index("accountant")
+
+
+def test_search_location_filter_uses_state(db):
+    """Test searching by a bare state matches postings whatever their location spelling"""
+    for i, location in enumerate(["Austin, Texas", "Dallas, TX", "Chicago, IL"]):
+        db.add(Job(title="Reconciliation Specialist", company="Norm Co", location=location,
+                   description="Normkeyword reconciliations", url=f"https://test.com/normalization-s{i}",
+                   source="NormalizationTest"))
+    db.commit()
+
+    for location in ["TX", "Texas"]:
+        response = client.get("/jobs/search", params={"q": "normkeyword", "location": location})
+        assert sorted(job["city"] for job in response.json()) == ["Austin", "Dallas"]
+
+
+def test_heuristic_match_counts_title_keywords():
+    """Test every keyword in the title counts toward the fallback confidence, as before titles were normalized"""
+    assert heuristic_match("Regulatory Compliance Auditor", None)[:2] == ("AFC", pytest.approx(0.8))
+    assert heuristic_match("Compliance Risk Auditor", "")[:2] == ("AFC", pytest.approx(0.8))
+    assert heuristic_match("Internal Audit Compliance Analyst", None)[:2] == ("AFC", pytest.approx(0.7))
+    assert heuristic_match("Portfolio Analyst", "Investment research")[:2] == ("FSP", pytest.approx(0.7))
+    # A keyword split between the title and the description is not a match
+    assert heuristic_match("Senior Financial", "Statement preparation")[0] == "other"
@@ -0,0 +1,208 @@
+"""
+Pipeline orchestrator tests
+"""
+
+import pytest
+import asyncio
+import sys
+import os
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy.exc import OperationalError
+
+from backend.database import init_database, SessionLocal
+from backend.locks import DatabaseLock
+from backend.models import AgentMatch, Job, Outreach, PipelineLock
+from scraper.mock_scraper import MockIndeedScraper
+from scraper.orchestrator import CronTrigger, IntervalTrigger, PipelineOrchestrator, dedupe_jobs
+
+init_database()
+
+SOURCE = "OrchestratorTest"
+
+
+@pytest.fixture
+def sources():
+    return [SOURCE]
+
+
+@pytest.fixture(autouse=True)
+def no_openai(monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+
+
+def test_cron_trigger_next_times():
+    """Test cron fields, steps, ranges and the either-day rule"""
+    now = datetime(2024, 3, 4, 9, 30)  # a Monday
+    assert CronTrigger("0 9 * * *").next_after(now) == datetime(2024, 3, 5, 9, 0)
+    assert CronTrigger("*/15 * * * *").next_after(now) == datetime(2024, 3, 4, 9, 45)
+    assert CronTrigger("0 8-17/4 * * 1-5").next_after(now) == datetime(2024, 3, 4, 12, 0)
+    assert CronTrigger("0 9 * * 0").next_after(now) == datetime(2024, 3, 10, 9, 0)
+    assert CronTrigger("0 9 * * 7").next_after(now) == datetime(2024, 3, 10, 9, 0)
+    assert CronTrigger("0 0 29 2 *").next_after(now) == datetime(2028, 2, 29, 0, 0)
+    # Day of month 15 or any Friday, whichever comes first
+    assert CronTrigger("0 9 15 * 5").next_after(now) == datetime(2024, 3, 8, 9, 0)
+    for expression in ["0 9 * *", "60 * * * *", "0 9 * * mon"]:
+        with pytest.raises(ValueError):
+            CronTrigger(expression)
+
+
+def test_triggers_add_bounded_jitter():
+    """Test jitter only ever delays a fire, by at most the configured seconds"""
+    now = datetime(2024, 3, 4, 9, 30)
+    interval = IntervalTrigger(600, jitter=60)
+    cron = CronTrigger("0 * * * *", jitter=60)
+    for _ in range(100):
+        assert timedelta(seconds=600) <= interval.next_fire(now) - now <= timedelta(seconds=660)
+        assert timedelta(0) <= cron.next_fire(now) - datetime(2024, 3, 4, 10, 0) <= timedelta(seconds=60)
+
+
+def test_database_lock_is_exclusive_until_released_or_expired():
+    """Test a second owner can't take a held lock, but can take an expired or released one"""
+    first = DatabaseLock("orchestrator-test", ttl=60)
+    second = DatabaseLock("orchestrator-test", ttl=60)
+    try:
+        assert first.acquire()
+        assert not second.acquire()
+        assert second.holder() == first.owner
+        assert first.acquire() and first.renew()
+
+        first.release()
+        assert second.acquire()
+        second.ttl = -1
+        assert second.renew()  # the lease is now in the past
+        assert first.acquire()
+        assert not second.renew()
+    finally:
+        first.release()
+        second.release()
+
+
+def test_pipeline_matches_and_drafts_new_jobs(db, job_data):
+    """Test a run takes new postings through to drafts and copies matches onto reposts"""
+    batches = [
+        [job_data(1, company="Orchestrator Co 1"), job_data(2, company="Orchestrator Co 2")],
+        [{**job_data(3, company="Orchestrator Co 1")}],
+    ]
+
+    def scrape():
+        MockIndeedScraper().save_jobs_to_db(batches.pop(0))
+
+    def run():
+        orchestrator = PipelineOrchestrator(scrape, max_wait=0.05, reconcile=False)
+        assert asyncio.run(orchestrator.run_once())
+        return orchestrator
+
+    orchestrator = run()
+    assert [stage.processed for stage in orchestrator.stages] == [2, 2, 2]
+    jobs = db.query(Job).filter(Job.source == SOURCE).order_by(Job.id).all()
+    assert db.query(AgentMatch).filter(AgentMatch.job_id.in_([job.id for job in jobs])).count() == 2
+    assert db.query(Outreach).filter(Outreach.job_id.in_([job.id for job in jobs])).count() == 2
+
+    # The repost reuses the first job's match and is held back by the company cooldown
+    run()
+    repost = db.query(Job).filter(Job.url == job_data(3)["url"]).one()
+    match = db.query(AgentMatch).filter(AgentMatch.job_id == repost.id).one()
+    assert match.notes == f"Repost of job {jobs[0].id}; match copied."
+    assert db.query(Outreach).filter(Outreach.job_id == repost.id).count() == 0
+
+
+def test_dedupe_only_copies_matches_within_the_window(db, job_data):
+    """Test a repost of a posting older than the window is matched again rather than copied"""
+    assert MockIndeedScraper().save_jobs_to_db([job_data(10, company="Window Co"), job_data(11, company="Window Co")]) == 2
+    original, repost = db.query(Job).filter(Job.company == "Window Co").order_by(Job.id).all()
+    db.add(AgentMatch(job_id=original.id, matched_agent="AFC", confidence_score=0.9))
+    original.created_at = repost.created_at - timedelta(days=31)
+    db.commit()
+    assert dedupe_jobs([repost.id]) == [repost.id]
+    assert db.query(AgentMatch).filter(AgentMatch.job_id == repost.id).count() == 0
+
+    original.created_at = repost.created_at - timedelta(days=29)
+    db.commit()
+    assert dedupe_jobs([repost.id]) == []
+    assert db.query(AgentMatch).filter(AgentMatch.job_id == repost.id).count() == 1
+
+
+def test_lost_lease_pauses_scrapes_and_stages(db):
+    """Test an orchestrator whose lease is taken over stops scraping and taking work until it gets the lock back"""
+    scraped = []
+
+    async def scenario():
+        orchestrator = PipelineOrchestrator(lambda: scraped.append(1), max_wait=0.05, reconcile=False, lock_ttl=0.3)
+        assert await orchestrator.start()
+        other = DatabaseLock("pipeline-orchestrator", ttl=60, owner="other-process")
+        try:
+            # Our lease lapses (a long GC pause, say) and another process takes the lock
+            session = SessionLocal()
+            session.query(PipelineLock).filter(PipelineLock.name == "pipeline-orchestrator").update(
+                {"expires_at": datetime.utcnow() - timedelta(seconds=1)}
+            )
+            session.commit()
+            session.close()
+            assert other.acquire()
+            await asyncio.sleep(0.3)
+
+            assert not orchestrator.lock_held
+            assert not await orchestrator.run_scrape()
+            assert orchestrator.dedupe.put([-1]) == 0
+            assert scraped == []
+
+            other.release()
+            await asyncio.sleep(0.3)
+            assert orchestrator.lock_held
+            assert await orchestrator.run_scrape()
+            assert orchestrator.dedupe.put([-1]) == 1
+            await orchestrator.drain(settle=0.05)
+            assert scraped == [1] and orchestrator.dedupe.processed == 1
+        finally:
+            other.release()
+            await orchestrator.stop()
+
+    asyncio.run(scenario())
+
+
+def test_lock_errors_count_as_a_lost_lease(db, monkeypatch):
+    """Test a renew that raises pauses the orchestrator instead of killing the renewal task"""
+    failing = [True]
+
+    def renew(self):
+        if failing[0]:
+            raise OperationalError("UPDATE pipeline_locks", {}, Exception("database is locked"))
+        return True
+
+    monkeypatch.setattr(DatabaseLock, "renew", renew)
+
+    async def scenario():
+        orchestrator = PipelineOrchestrator(lambda: None, max_wait=0.05, reconcile=False, lock_ttl=0.3)
+        assert await orchestrator.start()
+        try:
+            monkeypatch.setattr(DatabaseLock, "acquire", lambda self: not failing[0])
+            await asyncio.sleep(0.3)
+            assert not orchestrator.lock_held
+            assert not await orchestrator.run_scrape()
+            assert orchestrator.dedupe.put([-1]) == 0
+
+            failing[0] = False
+            await asyncio.sleep(0.3)
+            assert orchestrator.lock_held
+            assert await orchestrator.run_scrape()
+        finally:
+            failing[0] = False
+            await orchestrator.stop()
+
+    asyncio.run(scenario())
+
+
+def test_second_orchestrator_does_not_start(db):
+    """Test the pipeline lock keeps two orchestrators from running at once"""
+    holder = DatabaseLock("pipeline-orchestrator")
+    assert holder.acquire()
+    try:
+        scraped = []
+        orchestrator = PipelineOrchestrator(lambda: scraped.append(1), reconcile=False)
+        assert not asyncio.run(orchestrator.run_once())
+        assert scraped == []
+    finally:
+        holder.release()
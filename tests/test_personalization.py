@@ -0,0 +1,156 @@
+"""
+Outreach personalization tests
+"""
+import asyncio
+import json
+import pytest
+import sys
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.database import init_database
+from backend.models import Job, AgentMatch, PersonalizedParagraph
+from backend.personalization import OutreachPersonalizer, cache_key
+
+init_database()
+
+
+class FakeCompletions:
+    """Stands in for AsyncOpenAI.chat.completions, recording concurrency"""
+
+    def __init__(self, delay=0.01, slow_companies=()):
+        self.delay = delay
+        self.slow_companies = slow_companies
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create(self, model, messages, **kwargs):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            prompt = messages[-1]["content"]
+            company = prompt.split(" is hiring")[0]
+            await asyncio.sleep(10 if company in self.slow_companies else self.delay)
+            content = f"Personalized note for {company}."
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+        finally:
+            self.in_flight -= 1
+
+
+def make_pairs(companies, description="Perform audits and compliance reviews."):
+    return [
+        (Job(id=i, title="Auditor", company=company, description=description), AgentMatch(job_id=i, matched_agent="AFC"))
+        for i, company in enumerate(companies)
+    ]
+
+
+def test_cache_key_normalizes_responsibilities():
+    """Test whitespace, case and punctuation edits share a cache entry"""
+    assert cache_key("Acme LLP", "AFC", "Perform audits,  and\nreviews.") == cache_key("acme llp", "AFC", "perform audits and reviews")
+    assert cache_key("Acme LLP", "AFC", "Perform audits") != cache_key("Acme LLP", "FSP", "Perform audits")
+
+
+def test_personalize_concurrent_and_cached(db):
+    """Test calls are bounded, reposts share one call and cached text is reused"""
+    completions = FakeCompletions()
+    personalizer = OutreachPersonalizer(client=SimpleNamespace(chat=SimpleNamespace(completions=completions)), concurrency=3)
+    companies = [f"Personalize Co {i}" for i in range(10)]
+
+    # Two postings of the same role in one batch share a call
+    paragraphs, report = personalizer.personalize(db, make_pairs(companies + companies[:1]))
+    assert paragraphs[0] == "Personalized note for Personalize Co 0."
+    assert paragraphs[-1] == paragraphs[0]
+    assert completions.calls == 10
+    assert completions.max_in_flight == 3
+    assert report.cache_hits == 0 and report.fallbacks == 0
+
+    # A later batch with reposts is answered from the cache
+    paragraphs, report = personalizer.personalize(db, make_pairs(companies[:4] + ["Personalize Co new"]))
+    assert completions.calls == 11
+    assert report.cache_hits == 4
+    assert report.hit_rate == pytest.approx(0.8)
+    assert db.query(PersonalizedParagraph).filter(PersonalizedParagraph.company == "Personalize Co 0").one().hits == 1
+
+
+def test_personalize_timeout_falls_back(db):
+    """Test a slow model call yields None so the template is used"""
+    completions = FakeCompletions(slow_companies=("Slow Co",))
+    personalizer = OutreachPersonalizer(client=SimpleNamespace(chat=SimpleNamespace(completions=completions)), timeout=0.2)
+
+    paragraphs, report = personalizer.personalize(db, make_pairs(["Slow Co", "Fast Co"]))
+    assert paragraphs == [None, "Personalized note for Fast Co."]
+    assert report.timeouts == 1
+    assert report.fallbacks == 1
+    assert db.query(PersonalizedParagraph).filter(PersonalizedParagraph.company == "Slow Co").count() == 0
+
+
+class ChatCompletionHandler(BaseHTTPRequestHandler):
+    """Answers /chat/completions like the OpenAI API, naming the company from the prompt"""
+
+    # Keep-alive, so the client pools its connection as it would against the real API
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        company = body["messages"][-1]["content"].split(" is hiring")[0]
+        payload = json.dumps(
+            {
+                "id": "chatcmpl-test",
+                "object": "chat.completion",
+                "created": 0,
+                "model": body["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "finish_reason": "stop",
+                        "message": {"role": "assistant", "content": f"Personalized note for {company}."},
+                    }
+                ],
+                "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+            }
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def openai_server(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ChatCompletionHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("OPENAI_API_KEY", "test-key")
+    monkeypatch.setenv("OPENAI_BASE_URL", f"http://127.0.0.1:{server.server_port}/v1")
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_personalize_batches_with_real_client(db, openai_server):
+    """Test consecutive batches, each on its own event loop, all reach the API through a real AsyncOpenAI client"""
+    personalizer = OutreachPersonalizer(model="test-model")
+    for batch in range(2):
+        companies = [f"HTTP Co {batch}-{i}" for i in range(3)]
+        paragraphs, report = personalizer.personalize(db, make_pairs(companies))
+        assert paragraphs == [f"Personalized note for {company}." for company in companies]
+        assert report.failures == 0 and report.fallbacks == 0
+
+
+def test_personalized_paragraph_in_draft():
+    """Test the paragraph follows the opening line of the rendered body"""
+    from backend.email_service import EmailService
+
+    job, match = make_pairs(["Acme LLP"])[0]
+    body = EmailService().render_outreach_email(job, match, "Your audit team could hand off sampling.").body
+    assert "position at Acme LLP.\n\nYour audit team could hand off sampling.\n\nI represent Tellen" in body
+    assert "Your audit" not in EmailService().render_outreach_email(job, match).body
@@ -0,0 +1,107 @@
+"""
+CLI profiling mode tests
+"""
+
+import pytest
+import argparse
+import sys
+import os
+import pstats
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.profiling import PROFILE_MODES, RunProfiler, add_profile_arguments
+
+
+def busy_loop(seconds: float) -> int:
+    end = time.perf_counter() + seconds
+    count = 0
+    while time.perf_counter() < end:
+        count += 1
+    return count
+
+
+def parse(argv, monkeypatch, **env):
+    for name in ["PROFILE", "PROFILE_MODE"]:
+        monkeypatch.delenv(name, raising=False)
+    for name, value in env.items():
+        monkeypatch.setenv(name, value)
+    parser = argparse.ArgumentParser()
+    add_profile_arguments(parser)
+    return parser.parse_args(argv).profile
+
+
+def test_profile_argument(monkeypatch):
+    """Test --profile defaults to cProfile and the environment can pick the mode or turn it on"""
+    assert parse([], monkeypatch) is None
+    assert parse(["--profile"], monkeypatch) == "cprofile"
+    assert parse(["--profile", "sample"], monkeypatch) == "sample"
+    assert parse(["--profile"], monkeypatch, PROFILE_MODE="sample") == "sample"
+    assert parse([], monkeypatch, PROFILE="sample") == "sample"
+    with pytest.raises(SystemExit):
+        parse(["--profile", "perf"], monkeypatch)
+
+
+def test_cprofile_run_writes_stats_and_report(tmp_path):
+    """Test a cProfile run writes loadable stats and a report with the stage table and hot functions"""
+    with RunProfiler("unit", "cprofile", output_dir=str(tmp_path), top=5) as profiler:
+        for _ in range(3):
+            with profiler.stage("busy"):
+                busy_loop(0.01)
+        with profiler.stage("idle"):
+            time.sleep(0.01)
+
+    assert set(profiler.artifacts) == {"prof", "report"}
+    assert pstats.Stats(profiler.artifacts["prof"]).total_calls > 0
+    report = open(profiler.artifacts["report"]).read()
+    assert "busy_loop" in report
+    busy = next(line for line in report.splitlines() if line.startswith("busy "))
+    assert busy.split()[1] == "3"
+    assert "idle" in report and "total" in report
+
+
+def test_sample_run_writes_folded_stacks(tmp_path, monkeypatch):
+    """Test the sampler attributes time to the function that was running"""
+    monkeypatch.setenv("PROFILE_INTERVAL", "0.001")
+    with RunProfiler("unit", "sample", output_dir=str(tmp_path)) as profiler:
+        with profiler.stage("busy"):
+            busy_loop(0.2)
+
+    folded = open(profiler.artifacts["collapsed"]).read().splitlines()
+    assert folded and all(line.rsplit(" ", 1)[1].isdigit() for line in folded)
+    assert any("busy_loop (test_profiling.py" in line for line in folded)
+    assert "busy_loop" in open(profiler.artifacts["report"]).read()
+
+
+def test_both_modes_profile_worker_threads(tmp_path, monkeypatch):
+    """Test functions that only run on threads started during the run are profiled"""
+    monkeypatch.setenv("PROFILE_INTERVAL", "0.001")
+
+    def worker():
+        busy_loop(0.1)
+
+    for mode in PROFILE_MODES:
+        with RunProfiler("unit", mode, output_dir=str(tmp_path)) as profiler:
+            threads = [threading.Thread(target=worker) for _ in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        assert "busy_loop" in open(profiler.artifacts["report"]).read(), mode
+        if mode == "cprofile":
+            stats = pstats.Stats(profiler.artifacts["prof"])
+            assert [key for key in stats.stats if key[2] == "worker"]
+
+
+def test_disabled_profiler_only_times_stages(tmp_path):
+    """Test without a mode nothing is profiled or written"""
+    with RunProfiler("unit", None, output_dir=str(tmp_path / "profiles")) as profiler:
+        with profiler.stage("work"):
+            pass
+    assert profiler.artifacts == {}
+    assert not (tmp_path / "profiles").exists()
+    assert [name for name, _ in profiler.stages] == ["work"]
+    with pytest.raises(ValueError):
+        RunProfiler("unit", "perf")
@@ -0,0 +1,92 @@
+"""
+Job ranking tests
+"""
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+from backend.main import app
+from backend.database import init_database
+from backend.models import Job, AgentMatch
+from backend.ranking import compute_rank_score, refresh_rank_scores
+
+init_database()
+client = TestClient(app)
+
+
+@pytest.fixture
+def sources():
+    return ["RankingTest"]
+
+
+def add_job(db, suffix, title="Audit Senior", company="Ranking Firm LLP", salary=(90000, 110000)):
+    job = Job(title=title, company=company, salary_min=salary[0], salary_max=salary[1], description="Audit work",
+              url=f"https://test.com/ranking-{suffix}", source="RankingTest")
+    db.add(job)
+    db.flush()
+    return job
+
+
+def test_compute_rank_score():
+    """Test each input raises the score and missing inputs score zero"""
+    base = compute_rank_score(80000, 100000, 1, 0.8, "AFC")
+    assert compute_rank_score(None, None, 1, None, None) == 0
+    assert compute_rank_score(120000, 140000, 1, 0.8, "AFC") > base
+    assert compute_rank_score(80000, 100000, 4, 0.8, "AFC") > base
+    assert compute_rank_score(80000, 100000, 1, 0.9, "AFC") > base
+    assert compute_rank_score(80000, 100000, 1, 0.8, "other") < base
+    assert compute_rank_score(500000, 500000, 50, 1.0, "AFC") == 100
+
+
+def test_refresh_updates_whole_cluster(db):
+    """Test a new posting raises the score of its similar postings"""
+    first = add_job(db, "cluster-1")
+    refresh_rank_scores(db, [first.id])
+    db.commit()
+    db.refresh(first)
+    alone = first.rank_score
+    assert first.cluster_key == "audit senior|ranking firm"
+
+    # Same role at the same firm, differently punctuated
+    second = add_job(db, "cluster-2", title="Audit Senior", company="Ranking Firm, L.L.P.")
+    refresh_rank_scores(db, [second.id])
+    db.commit()
+    db.refresh(first)
+    db.refresh(second)
+    assert second.cluster_key == first.cluster_key
+    assert first.rank_score > alone
+    assert first.rank_score == second.rank_score
+
+    db.add(AgentMatch(job_id=second.id, matched_agent="AFC", confidence_score=0.9))
+    db.flush()
+    refresh_rank_scores(db, [second.id])
+    db.commit()
+    db.refresh(second)
+    assert second.rank_score > first.rank_score
+
+
+def test_ranked_endpoint_uses_index(db):
+    """Test /jobs/ranked returns jobs by descending score without sorting the table"""
+    top = add_job(db, "top", title="Audit Director", salary=(400000, 400000))
+    db.add(AgentMatch(job_id=top.id, matched_agent="AFC", confidence_score=1.0))
+    db.flush()
+    refresh_rank_scores(db, [top.id])
+    db.commit()
+
+    response = client.get("/jobs/ranked", params={"limit": 5})
+    assert response.status_code == 200
+    ranked = response.json()
+    assert ranked[0]["id"] == top.id
+    scores = [job["rank_score"] for job in ranked]
+    assert scores == sorted(scores, reverse=True)
+    assert all(job["rank_score"] >= 50 for job in client.get("/jobs/ranked", params={"min_score": 50}).json())
+
+    plan = db.execute(
+        text("EXPLAIN QUERY PLAN SELECT id FROM jobs WHERE rank_score IS NOT NULL ORDER BY rank_score DESC, id DESC LIMIT 5")
+    ).all()
+    details = " ".join(row[-1] for row in plan)
+    assert "ix_jobs_rank_score" in details
+    assert "TEMP B-TREE" not in details
@@ -0,0 +1,139 @@
+"""
+Adaptive rate limiting and circuit breaker tests
+"""
+
+import pytest
+import sys
+import os
+from email.utils import formatdate
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.metrics import SCRAPE_CIRCUIT_STATE, SCRAPE_RATE
+from scraper.rate_control import CircuitOpenError, RateController, parse_retry_after
+
+HOST = "www.indeed.test"
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class FakeResponse:
+    def __init__(self, status_code, retry_after=None):
+        self.status_code = status_code
+        self.headers = {"Retry-After": retry_after} if retry_after else {}
+
+
+class FakeSession:
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def get(self, url, **kwargs):
+        self.calls += 1
+        return self.responses.pop(0)
+
+
+def controller(clock, **kwargs):
+    settings = dict(initial_rate=1.0, min_rate=0.1, max_rate=2.0, increase=0.25, decrease=0.5)
+    settings.update(kwargs)
+    return RateController(clock=clock, sleep=clock.sleep, **settings)
+
+
+def test_parse_retry_after():
+    """Test Retry-After in seconds and as an HTTP date"""
+    assert parse_retry_after("120") == 120
+    assert parse_retry_after(formatdate(1030.0, usegmt=True), now=1000.0) == 30
+    assert parse_retry_after("soon") is None
+    assert parse_retry_after(None) is None
+
+
+def test_rate_increases_additively_and_halves_on_throttling():
+    """Test AIMD: +increase per success up to the max, x decrease per throttle down to the min"""
+    clock = FakeClock()
+    rates = controller(clock)
+    for _ in range(3):
+        rates.record(HOST, 200)
+    assert rates.rate(HOST) == 1.75
+    rates.record(HOST, 200)
+    rates.record(HOST, 200)
+    assert rates.rate(HOST) == 2.0
+    rates.record(HOST, 429)
+    assert rates.rate(HOST) == 1.0
+    for _ in range(5):
+        rates.record(HOST, 503)
+    assert rates.rate(HOST) == 0.1
+    assert SCRAPE_RATE.labels(host=HOST)._value.get() == 0.1
+
+
+def test_requests_are_spaced_by_the_rate_and_retry_after():
+    """Test requests wait for the host's next slot and a Retry-After holds them back"""
+    clock = FakeClock()
+    rates = controller(clock)
+    start = clock.now
+    for _ in range(3):
+        rates.acquire(HOST)
+    assert clock.now - start == 2.0
+
+    session = FakeSession(FakeResponse(429, "20"), FakeResponse(200))
+    rates.get(session, f"https://{HOST}/jobs")
+    before = clock.now
+    rates.get(session, f"https://{HOST}/jobs")
+    assert clock.now - before >= 20
+
+
+def test_breaker_opens_after_consecutive_blocks_and_probes():
+    """Test the circuit opens, fails fast, lets one probe through after the cooldown and closes on success"""
+    clock = FakeClock()
+    rates = controller(clock, breaker_threshold=3, breaker_cooldown=300)
+    for _ in range(2):
+        rates.record(HOST, 403)
+    rates.record(HOST, 200)
+    for _ in range(2):
+        rates.record(HOST, 403)
+    assert rates.circuit_state(HOST) == "closed"
+    rates.record(HOST, 403)
+    assert rates.circuit_state(HOST) == "open"
+    assert SCRAPE_CIRCUIT_STATE.labels(host=HOST)._value.get() == 2
+    with pytest.raises(CircuitOpenError):
+        rates.acquire(HOST)
+
+    # A failed probe reopens the circuit for twice as long
+    clock.now += 300
+    rates.acquire(HOST)
+    assert rates.circuit_state(HOST) == "half_open"
+    with pytest.raises(CircuitOpenError):
+        rates.acquire(HOST)  # only one probe at a time
+    rates.record(HOST, 429)
+    assert rates.circuit_state(HOST) == "open"
+    clock.now += 300
+    with pytest.raises(CircuitOpenError):
+        rates.acquire(HOST)
+
+    clock.now += 300
+    rates.acquire(HOST)
+    rates.record(HOST, 200)
+    assert rates.circuit_state(HOST) == "closed"
+    assert SCRAPE_CIRCUIT_STATE.labels(host=HOST)._value.get() == 0
+    assert rates.circuit_state("other.test") == "closed"
+
+
+def test_long_retry_after_opens_the_breaker():
+    """Test a Retry-After longer than the inline wait limit opens the circuit until it has passed"""
+    clock = FakeClock()
+    rates = controller(clock, breaker_cooldown=60, breaker_max_wait=60)
+    session = FakeSession(FakeResponse(429, "3600"))
+    rates.get(session, f"https://{HOST}/jobs")
+    assert rates.circuit_state(HOST) == "open"
+    clock.now += 1800
+    with pytest.raises(CircuitOpenError) as error:
+        rates.acquire(HOST)
+    assert error.value.retry_in == 1800
@@ -0,0 +1,166 @@
+"""
+Scrape run ledger tests
+"""
+
+import pytest
+import sys
+import os
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.database import init_database
+from backend.models import Job, ScrapePage, ScrapeRun, ScrapeUrl
+from scraper.mock_scraper import MockIndeedScraper
+from scraper.rate_control import CircuitOpenError
+from scraper.run_ledger import RunLedger, resumable_crawl, retry_delay
+
+init_database()
+
+SOURCE = "LedgerTest"
+
+
+class Died(BaseException):
+    """Stands in for the process being killed mid-crawl"""
+
+
+class FakeScraper:
+    """Two listings per search page; listings in `broken` can't be scraped"""
+
+    def __init__(self, die_on=None, broken=()):
+        self.die_on = die_on
+        self.broken = set(broken)
+        self.searched = []
+        self.fetched = []
+
+    def search_page(self, term, location, page):
+        if (term, page) == self.die_on:
+            raise Died()
+        self.searched.append((term, page))
+        # Each page also lists a posting every search term finds
+        return [f"https://test.com/ledger-{term}-{page}", f"https://test.com/ledger-shared-{page}"]
+
+    def scrape_job_listing(self, url):
+        self.fetched.append(url)
+        if url in self.broken:
+            return None
+        return {"title": "Staff Auditor", "company": "Ledger Co", "location": "Austin, TX", "url": url, "source": SOURCE}
+
+    def save_jobs_to_db(self, jobs):
+        return MockIndeedScraper().save_jobs_to_db(jobs)
+
+    def delay(self):
+        pass
+
+
+@pytest.fixture
+def sources():
+    return [SOURCE]
+
+
+def start(**kwargs) -> RunLedger:
+    ledger = RunLedger.start(SOURCE, **kwargs)
+    ledger.plan_pages([(term, "", page) for term in ["a", "b"] for page in range(2)])
+    return ledger
+
+
+def test_retry_delay_doubles_up_to_a_day():
+    """Test the backoff between attempts at a failed listing"""
+    assert retry_delay(1, base_minutes=30) == timedelta(minutes=30)
+    assert retry_delay(3, base_minutes=30) == timedelta(minutes=120)
+    assert retry_delay(20, base_minutes=30) == timedelta(hours=24)
+
+
+def test_crashed_run_resumes_where_it_stopped(db):
+    """Test a restart skips finished pages and already saved listings"""
+    ledger = start()
+    with pytest.raises(Died):
+        resumable_crawl(FakeScraper(die_on=("b", 0)), ledger)
+    assert db.query(Job).filter(Job.source == SOURCE).count() == 4
+
+    resumed = start()
+    assert resumed.resumed and resumed.run_id == ledger.run_id
+    scraper = FakeScraper()
+    assert resumable_crawl(scraper, resumed) == 2
+    resumed.finish()
+    assert scraper.searched == [("b", 0), ("b", 1)]
+    assert scraper.fetched == ["https://test.com/ledger-b-0", "https://test.com/ledger-b-1"]
+
+    statuses = {status for (status,) in db.query(ScrapePage.status).filter(ScrapePage.run_id == ledger.run_id)}
+    assert statuses == {"done"}
+    assert not start().resumed
+
+
+def test_stale_runs_are_abandoned(db):
+    """Test an unfinished run past the resume window is not resumed"""
+    ledger = start()
+    db.query(ScrapeRun).filter(ScrapeRun.id == ledger.run_id).update({"started_at": datetime.utcnow() - timedelta(days=2)})
+    db.commit()
+    fresh = start()
+    assert not fresh.resumed and fresh.run_id != ledger.run_id
+    assert db.query(ScrapeRun.status).filter(ScrapeRun.id == ledger.run_id).scalar() == "abandoned"
+
+
+def test_failed_listings_retry_with_backoff(db, monkeypatch):
+    """Test a failed listing waits out its backoff, is retried by a later run, and is given up on eventually"""
+    broken = "https://test.com/ledger-a-0"
+    ledger = start()
+    resumable_crawl(FakeScraper(broken=[broken]), ledger)
+    ledger.finish()
+    entry = db.query(ScrapeUrl).filter(ScrapeUrl.source == SOURCE, ScrapeUrl.url == broken).one()
+    assert (entry.status, entry.attempts) == ("failed", 1)
+    assert entry.next_attempt_at > datetime.utcnow() + timedelta(minutes=29)
+
+    # Not due yet: the next run leaves it alone even though page a-0 lists it again
+    ledger = start()
+    scraper = FakeScraper()
+    resumable_crawl(scraper, ledger)
+    ledger.finish()
+    assert broken not in scraper.fetched
+    assert ledger.due_retries(now=datetime.utcnow() + timedelta(minutes=31)) == [broken]
+
+    monkeypatch.setenv("SCRAPE_RETRY_BASE_MINUTES", "0")
+    monkeypatch.setenv("SCRAPE_MAX_URL_ATTEMPTS", "3")
+    db.query(ScrapeUrl).filter(ScrapeUrl.url == broken).update({"next_attempt_at": datetime.utcnow()})
+    db.commit()
+    for attempts in [2, 3]:
+        ledger = RunLedger.start(SOURCE)
+        scraper = FakeScraper(broken=[broken])
+        resumable_crawl(scraper, ledger)
+        ledger.finish()
+        assert scraper.fetched == [broken]
+        db.expire_all()
+        assert db.query(ScrapeUrl.attempts).filter(ScrapeUrl.url == broken).scalar() == attempts
+
+    ledger = RunLedger.start(SOURCE)
+    assert ledger.due_retries() == []
+    assert ledger.claim_urls([broken]) == []
+
+    # A listing that recovers is saved and marked done
+    db.query(ScrapeUrl).filter(ScrapeUrl.url == broken).update({"attempts": 1})
+    db.commit()
+    assert resumable_crawl(FakeScraper(), ledger) == 1
+    db.expire_all()
+    assert db.query(ScrapeUrl.status).filter(ScrapeUrl.url == broken).scalar() == "done"
+
+
+def test_open_circuit_interrupts_the_run(db):
+    """Test an open circuit stops the crawl, keeps what was scraped and leaves the rest for the next run"""
+
+    class BlockedScraper(FakeScraper):
+        def scrape_job_listing(self, url):
+            if url == "https://test.com/ledger-a-1":
+                raise CircuitOpenError("test.com", 300)
+            return super().scrape_job_listing(url)
+
+    ledger = start()
+    assert resumable_crawl(BlockedScraper(), ledger) == 2
+    assert ledger.interrupted
+    pending = db.query(ScrapeUrl.status).filter(ScrapeUrl.url == "https://test.com/ledger-a-1").scalar()
+    assert pending == "pending"
+
+    resumed = start()
+    assert resumed.resumed
+    scraper = FakeScraper()
+    assert resumable_crawl(scraper, resumed) == 4
+    assert scraper.searched[0] == ("a", 1)
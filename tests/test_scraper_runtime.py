@@ -0,0 +1,256 @@
+"""
+Multi-source scraper runtime tests
+"""
+
+import pstats
+import pytest
+import requests
+import sys
+import os
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.database import init_database
+from backend.models import Job, ScrapeRun
+from backend.profiling import RunProfiler
+from scraper.indeed_scraper import IndeedSource
+from scraper.ingest import save_jobs
+from scraper.rate_control import CircuitOpenError, RateController
+from scraper.runtime import (
+    ResponseCache,
+    SourcePlugin,
+    SourceScraper,
+    crawl_sources,
+    extract_salary,
+    parse_posted_date,
+)
+import scraper.runtime as runtime
+
+init_database()
+
+SOURCES = ["RuntimeTestA", "RuntimeTestB"]
+
+JSON_LD_PAGE = """
+<html><head><script type="application/ld+json">
+{"@context": "https://schema.org", "@type": "JobPosting", "title": "Staff Auditor",
+ "hiringOrganization": {"@type": "Organization", "name": "Ledger Co"},
+ "jobLocation": [{"address": {"addressLocality": "Austin", "addressRegion": "TX"}}],
+ "description": "<p>Audit <b>fieldwork</b></p>", "datePosted": "2026-10-01",
+ "baseSalary": {"value": {"minValue": 60000, "maxValue": 80000, "unitText": "YEAR"}}}
+</script></head><body><h1 class="title">Senior Staff Auditor</h1></body></html>
+"""
+
+
+class FakeResponse:
+    def __init__(self, url, body):
+        self.url = url
+        self.status_code = 200 if body is not None else 404
+        self.headers = {}
+        self.content = (body or "").encode()
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(f"{self.status_code} for {self.url}", response=self)
+
+
+class FakeSession:
+    """Serves PAGES and counts the requests for each URL"""
+
+    pages = {}
+    calls = []
+
+    def __init__(self):
+        self.headers = {}
+
+    def mount(self, prefix, adapter):
+        pass
+
+    def get(self, url, **kwargs):
+        FakeSession.calls.append(url)
+        return FakeResponse(url, FakeSession.pages.get(url))
+
+
+class FakeSource(SourcePlugin):
+    """Two postings per results page on its own host, read by class name"""
+
+    def __init__(self, name="RuntimeTestA"):
+        self.name = name
+        self.host = f"https://{name.lower()}.test"
+        for page in range(2):
+            links = "".join(f'<a class="job" href="/job/{page}-{n}">x</a>' for n in range(2))
+            FakeSession.pages[self.search_url("auditor", "", page)] = f"<html>{links}</html>"
+            for n in range(2):
+                FakeSession.pages[f"{self.host}/job/{page}-{n}"] = (
+                    f'<h1 class="title">Staff Auditor {page}-{n}</h1><div class="company">{name} Co</div>'
+                    '<div class="salary">$65K - $85K a year</div><span class="age">3 days ago</span>'
+                )
+
+    def search_url(self, query, location, page):
+        return f"{self.host}/search?q={query}&page={page}"
+
+    def parse_listing(self, soup):
+        return [self.host + link["href"] for link in soup.select("a.job")]
+
+    def parse_detail(self, soup, url):
+        return {
+            "title": runtime.select_text(soup, "h1.title"),
+            "company": runtime.select_text(soup, "div.company"),
+            "salary_text": runtime.select_text(soup, "div.salary"),
+            "date_text": runtime.select_text(soup, "span.age"),
+        }
+
+
+@pytest.fixture(autouse=True)
+def fake_http(monkeypatch):
+    FakeSession.pages, FakeSession.calls = {}, []
+    monkeypatch.setattr(requests, "Session", FakeSession)
+    monkeypatch.setattr(SourceScraper, "delay", lambda self: None)
+    monkeypatch.setenv("SCRAPE_RATE_INITIAL", "1000")
+    monkeypatch.setenv("SCRAPE_RATE_MAX", "1000")
+
+
+@pytest.fixture
+def sources():
+    return SOURCES
+
+
+def make_scraper(plugin=None, **kwargs) -> SourceScraper:
+    return SourceScraper(plugin or FakeSource(), RateController(initial_rate=1000, max_rate=1000), **kwargs)
+
+
+def test_extract_salary_and_posted_date():
+    """Test the shared salary and posting-date parsing"""
+    assert extract_salary("$65K - $85K (Employer est.)") == (65000, 85000)
+    assert extract_salary("$70,000.00/yr - $90,000.00/yr") == (70000, 90000)
+    assert extract_salary("$50,000 to $70,000") == (50000, 70000)
+    assert extract_salary("") == (None, None)
+
+    now = datetime(2026, 10, 19, 15, 30)
+    assert parse_posted_date("3 days ago", now) == datetime(2026, 10, 16)
+    assert parse_posted_date("30+ days ago", now) == datetime(2026, 9, 19)
+    assert parse_posted_date("5 hours ago", now) == datetime(2026, 10, 19, 10, 30)
+    assert parse_posted_date("2026-10-01T08:00:00Z", now) == datetime(2026, 10, 1, 8)
+    assert parse_posted_date("Just posted", now) == now
+
+
+def test_plugin_fields_override_json_ld():
+    """Test fields the plugin finds win, and the page's JSON-LD fills in the rest"""
+    job = make_scraper().parse_job(JSON_LD_PAGE.encode(), "https://runtimetesta.test/job/ld")
+    assert job["title"] == "Senior Staff Auditor"
+    assert job["company"] == "Ledger Co"
+    assert job["location"] == "Austin, TX"
+    assert job["description"] == "Audit fieldwork"
+    assert (job["salary_min"], job["salary_max"]) == (60000, 80000)
+    assert job["date_posted"] == datetime(2026, 10, 1)
+    assert job["source"] == "RuntimeTestA"
+
+    assert make_scraper().parse_job(b"<h1 class='title'>No company</h1>", "https://runtimetesta.test/x") is None
+
+
+def test_indeed_plugin_reads_search_and_job_pages():
+    """Test the Indeed plugin's URLs and selectors"""
+    source = IndeedSource()
+    assert source.search_url("internal audit", "", 1) == "https://www.indeed.com/jobs?q=internal+audit&l=&start=10&sort=date"
+
+    search = '<div data-testid="job-title"><a href="/viewjob?jk=abc">Auditor</a></div>'
+    detail = (
+        '<h1 class="jobsearch-JobInfoHeader-title">Internal Auditor</h1>'
+        '<div data-testid="company-name">Crowe</div><div data-testid="job-location">Chicago, IL</div>'
+        '<div id="jobDescriptionText">Salary: $70,000 - $90,000. Audit work.</div>'
+    )
+    FakeSession.pages[source.search_url("auditor", "", 0)] = search
+    FakeSession.pages["https://www.indeed.com/viewjob?jk=abc"] = detail
+
+    scraper = make_scraper(source)
+    assert scraper.search_page("auditor") == ["https://www.indeed.com/viewjob?jk=abc"]
+    job = scraper.scrape_job_listing("https://www.indeed.com/viewjob?jk=abc")
+    assert (job["title"], job["company"], job["location"]) == ("Internal Auditor", "Crowe", "Chicago, IL")
+    assert (job["salary_min"], job["salary_max"], job["source"]) == (70000, 90000, "indeed")
+
+
+def test_responses_are_cached():
+    """Test a page fetched twice within the TTL is requested once, and again once it expires"""
+    now = [0.0]
+    scraper = make_scraper(cache=ResponseCache(ttl=60, clock=lambda: now[0]))
+    url = "https://runtimetesta.test/job/0-0"
+    scraper.scrape_job_listing(url)
+    scraper.scrape_job_listing(url)
+    assert FakeSession.calls.count(url) == 1
+    now[0] = 61
+    scraper.scrape_job_listing(url)
+    assert FakeSession.calls.count(url) == 2
+
+
+def test_cache_is_capped_by_bytes():
+    """Test the least recently used pages are dropped once the bodies pass max_bytes"""
+    cache = ResponseCache(max_bytes=100)
+    cache.put("a", b"x" * 40)
+    cache.put("b", b"x" * 40)
+    cache.get("a")
+    cache.put("c", b"x" * 40)
+    assert (cache.get("a"), cache.get("b")) == (b"x" * 40, None)
+    assert cache.size == 80
+    cache.put("huge", b"x" * 101)
+    assert cache.get("huge") is None and cache.size == 80
+
+
+def test_listings_are_fetched_concurrently_until_the_circuit_opens(monkeypatch):
+    """Test every listing is yielded, and an open circuit drops the rest and is raised"""
+    scraper = make_scraper(workers=3)
+    urls = [f"https://runtimetesta.test/job/{page}-{n}" for page in range(2) for n in range(2)]
+    scraped = dict(scraper.scrape_job_listings(urls))
+    assert set(scraped) == set(urls)
+    assert all(job["source"] == "RuntimeTestA" for job in scraped.values())
+
+    get = RateController.get
+
+    def blocked_after_first(self, session, url, **kwargs):
+        if url != urls[0]:
+            raise CircuitOpenError("runtimetesta.test", 300)
+        return get(self, session, url, **kwargs)
+
+    monkeypatch.setattr(RateController, "get", blocked_after_first)
+    yielded = []
+    with pytest.raises(CircuitOpenError):
+        for url, job in make_scraper(workers=1).scrape_job_listings(urls):
+            yielded.append(url)
+    assert yielded == [urls[0]]
+
+
+def test_save_jobs_skips_saved_and_repeated_urls(db):
+    """Test the bulk ingest saves each new URL once"""
+    job = {"title": "Staff Auditor", "company": "Ledger Co", "url": "https://runtimetesta.test/saved", "source": SOURCES[0]}
+    assert save_jobs([job, dict(job)]) == 1
+    assert save_jobs([job, {**job, "url": "https://runtimetesta.test/new"}]) == 1
+    assert db.query(Job).filter(Job.source == SOURCES[0]).count() == 2
+
+
+def test_sources_crawl_concurrently_into_their_own_runs(db, monkeypatch):
+    """Test each source is crawled in its own ledger run and its jobs are saved with its name"""
+    plugins = {name: FakeSource(name) for name in SOURCES}
+    monkeypatch.setattr(runtime, "load_source", lambda name: plugins[name])
+
+    assert crawl_sources(SOURCES, terms=["auditor"], pages=2) == {name: 4 for name in SOURCES}
+    for name in SOURCES:
+        jobs = db.query(Job).filter(Job.source == name).all()
+        assert len(jobs) == 4
+        assert {(job.salary_min, job.salary_max) for job in jobs} == {(65000, 85000)}
+        assert db.query(ScrapeRun.status).filter(ScrapeRun.source == name).scalar() == "completed"
+
+    # A second crawl finds nothing new and fetches no listing again
+    FakeSession.calls = []
+    assert crawl_sources(SOURCES, terms=["auditor"], pages=2) == {name: 0 for name in SOURCES}
+    assert not [url for url in FakeSession.calls if "/job/" in url]
+
+
+def test_profiled_crawl_covers_the_worker_threads(db, monkeypatch, tmp_path):
+    """Test a profiled crawl records the parsing done on the crawl and fetch pools' threads"""
+    plugins = {name: FakeSource(name) for name in SOURCES}
+    monkeypatch.setattr(runtime, "load_source", lambda name: plugins[name])
+
+    with RunProfiler("scraper", "cprofile", output_dir=str(tmp_path)) as profiler:
+        assert crawl_sources(SOURCES, terms=["auditor"], pages=2, stage=profiler.stage) == {name: 4 for name in SOURCES}
+
+    functions = {name for _, _, name in pstats.Stats(profiler.artifacts["prof"]).stats}
+    assert {"parse_job", "parse_detail", "save_jobs"} <= functions
@@ -0,0 +1,90 @@
+"""
+Full-text search tests
+"""
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.database import init_database, SessionLocal
+from backend.models import Job
+from backend.search import build_fts5_query
+
+init_database()
+client = TestClient(app)
+
+@pytest.fixture
+def netsuite_job():
+    """Insert a job that only the search tests reference"""
+    db = SessionLocal()
+    job = Job(
+        title="NetSuite Accountant",
+        company="Search Test Co",
+        location="Austin, TX",
+        salary_min=60000,
+        salary_max=80000,
+        description="Own month-end close in NetSuite and support SOX testing.",
+        url="https://test.com/search-netsuite",
+        source="indeed",
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    try:
+        yield job
+    finally:
+        db.delete(job)
+        db.commit()
+        db.close()
+
+def test_build_fts5_query_quotes_terms():
+    """Test that user input cannot inject FTS5 syntax"""
+    assert build_fts5_query('SOX "NetSuite" OR-') == '"SOX" "NetSuite" "OR"'
+    assert build_fts5_query("audit*") == '"audit"*'
+
+def test_search_finds_and_highlights(netsuite_job):
+    """Test search ranks the matching job and highlights the term"""
+    response = client.get("/jobs/search", params={"q": "netsuite"})
+    assert response.status_code == 200
+    results = response.json()
+    assert results[0]["id"] == netsuite_job.id
+    assert "<mark>NetSuite</mark>" in results[0]["title_highlight"]
+    assert "<mark>" in results[0]["snippet"]
+
+def test_search_filters(netsuite_job):
+    """Test location and salary filters narrow the search results"""
+    ids = lambda params: {r["id"] for r in client.get("/jobs/search", params=params).json()}
+    assert netsuite_job.id in ids({"q": "SOX", "location": "Austin"})
+    assert netsuite_job.id not in ids({"q": "SOX", "location": "Chicago"})
+    assert netsuite_job.id not in ids({"q": "SOX", "min_salary": 90000})
+    assert netsuite_job.id in ids({"q": "SOX", "max_salary": 70000})
+
+def test_search_index_follows_updates(netsuite_job):
+    """Test triggers keep the index in sync when a job is edited"""
+    db = SessionLocal()
+    job = db.get(Job, netsuite_job.id)
+    job.title = "Sage Intacct Accountant"
+    job.description = "Month-end close in Sage Intacct."
+    db.commit()
+    db.close()
+    assert client.get("/jobs/search", params={"q": "netsuite"}).json() == []
+    assert client.get("/jobs/search", params={"q": "intacct"}).json()[0]["id"] == netsuite_job.id
+
+def test_search_highlights_are_html_escaped():
+    """Test markup in a posting is escaped so only the <mark> tags are HTML"""
+    db = SessionLocal()
+    job = Job(title="<img src=x onerror=alert(1)> Escapetest Auditor", company="Search Test Co",
+              description="<script>steal()</script> escapetest & more", url="https://test.com/search-escape", source="indeed")
+    db.add(job)
+    db.commit()
+    try:
+        result = client.get("/jobs/search", params={"q": "escapetest"}).json()[0]
+        assert result["title_highlight"] == "&lt;img src=x onerror=alert(1)&gt; <mark>Escapetest</mark> Auditor"
+        assert "<script>" not in result["snippet"] and "&lt;script&gt;" in result["snippet"]
+        assert "<mark>escapetest</mark> &amp; more" in result["snippet"]
+    finally:
+        db.delete(job)
+        db.commit()
+        db.close()
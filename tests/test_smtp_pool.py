@@ -0,0 +1,107 @@
+"""
+Pooled SMTP sender tests against a local aiosmtpd server
+"""
+import socket
+import time
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from concurrent.futures import ThreadPoolExecutor
+from backend.smtp_pool import SMTPConnectionPool, RateLimiter, provider_rate_limit
+
+aiosmtpd_controller = pytest.importorskip("aiosmtpd.controller")
+
+
+class CollectingHandler:
+    """aiosmtpd handler that records every delivered message"""
+
+    def __init__(self):
+        self.messages = []
+
+    async def handle_DATA(self, server, session, envelope):
+        self.messages.append(envelope)
+        return "250 OK"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+@pytest.fixture
+def smtp_server():
+    """Run a local SMTP stand-in for the duration of a test"""
+    handler = CollectingHandler()
+    controller = aiosmtpd_controller.Controller(handler, hostname="127.0.0.1", port=free_port())
+    controller.start()
+    try:
+        yield controller, handler
+    finally:
+        controller.stop()
+
+def make_pool(controller, **options):
+    return SMTPConnectionPool(controller.hostname, controller.port, use_starttls=False, **options)
+
+def test_pool_reuses_connection(smtp_server):
+    """Test many messages share one session"""
+    controller, handler = smtp_server
+    pool = make_pool(controller, max_connections=1)
+    for i in range(10):
+        pool.send("from@example.com", [f"to{i}@example.com"], f"Subject: {i}\r\n\r\nBody {i}")
+    pool.close()
+
+    assert len(handler.messages) == 10
+    assert pool.stats.connections_opened == 1
+    assert pool.stats.messages_sent == 10
+
+def test_pool_bounds_concurrent_connections(smtp_server):
+    """Test concurrent senders never open more connections than the pool size"""
+    controller, handler = smtp_server
+    pool = make_pool(controller, max_connections=3)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda i: pool.send("from@example.com", ["to@example.com"], f"Subject: {i}\r\n\r\n"), range(40)))
+    pool.close()
+
+    assert len(handler.messages) == 40
+    assert pool.stats.connections_opened <= 3
+
+def test_pool_reconnects_after_dropped_session(smtp_server):
+    """Test a dropped session is replaced and the message still delivered"""
+    controller, handler = smtp_server
+    pool = make_pool(controller)
+    pool.send("from@example.com", ["to@example.com"], "Subject: first\r\n\r\n")
+
+    # Simulate the server closing the idle connection
+    pool._idle.queue[0].smtp.sock.shutdown(socket.SHUT_RDWR)
+    pool.send("from@example.com", ["to@example.com"], "Subject: second\r\n\r\n")
+    pool.close()
+
+    assert len(handler.messages) == 2
+    assert pool.stats.reconnects == 1
+    assert pool.stats.connections_opened == 2
+
+def test_pool_recycles_connection_after_message_limit(smtp_server):
+    """Test connections are replaced after max_messages_per_connection"""
+    controller, handler = smtp_server
+    pool = make_pool(controller, max_messages_per_connection=2)
+    for i in range(5):
+        pool.send("from@example.com", ["to@example.com"], f"Subject: {i}\r\n\r\n")
+    pool.close()
+
+    assert pool.stats.connections_opened == 3
+
+def test_rate_limiter_spaces_sends():
+    """Test the token bucket enforces the configured rate"""
+    limiter = RateLimiter(rate=50.0, burst=1)
+    start = time.monotonic()
+    for _ in range(6):
+        limiter.acquire()
+    assert time.monotonic() - start >= 0.09
+
+def test_provider_rate_limits():
+    """Test provider defaults match host patterns"""
+    assert provider_rate_limit("smtp.gmail.com") == 1.0
+    assert provider_rate_limit("email-smtp.us-east-1.amazonaws.com") == 14.0
+    assert provider_rate_limit("localhost") is None
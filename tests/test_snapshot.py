@@ -0,0 +1,112 @@
+"""
+Parquet snapshot tests
+"""
+
+import pytest
+import sys
+import os
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+pytest.importorskip("pyarrow")
+
+from backend.database import init_database
+from backend.models import Job, AgentMatch, Outreach
+from backend.ranking import refresh_rank_scores
+from backend.snapshot import compact_snapshot, load_snapshot, load_snapshot_frame, write_snapshot
+
+init_database()
+
+
+@pytest.fixture
+def sources():
+    return ["SnapshotTest"]
+
+
+def test_first_snapshot_exports_every_row(db, tmp_path):
+    """Test the first run exports each table in full and an unchanged database exports nothing"""
+    written = write_snapshot(str(tmp_path), lag=0)
+    assert written == {
+        "jobs": db.query(Job).count(),
+        "agent_matches": db.query(AgentMatch).count(),
+        "outreach": db.query(Outreach).count(),
+    }
+    assert write_snapshot(str(tmp_path), lag=0) == {"jobs": 0, "agent_matches": 0, "outreach": 0}
+
+    jobs = load_snapshot_frame(str(tmp_path), "jobs", columns=["title", "date_posted"])
+    assert sorted(jobs["id"]) == sorted(row[0] for row in db.query(Job.id))
+    assert list(jobs.columns) == ["id", "title", "date_posted"]
+
+
+def test_incremental_snapshot_keeps_newest_rows(db, tmp_path):
+    """Test changed and new rows land in later parts and the loader returns one current copy of each"""
+    write_snapshot(str(tmp_path), lag=0)
+
+    job = db.query(Job).order_by(Job.id).first()
+    original_title = job.title
+    job.title = "Snapshot Renamed Title"
+    db.add(Job(title="Staff Auditor", company="Snapshot Firm", url="https://test.com/snapshot-new", source="SnapshotTest",
+               date_posted=datetime(2021, 3, 15)))
+    db.commit()
+    try:
+        assert write_snapshot(str(tmp_path), tables=["jobs"], lag=0)["jobs"] == 2
+        assert os.path.exists(tmp_path / "jobs" / "month=2021-03" / "part-000002.parquet")
+
+        jobs = load_snapshot(str(tmp_path), "jobs")
+        ids = jobs.column("id").to_pylist()
+        assert len(ids) == len(set(ids)) == db.query(Job).count()
+        titles = dict(zip(ids, jobs.column("title").to_pylist()))
+        assert titles[job.id] == "Snapshot Renamed Title"
+
+        march = load_snapshot(str(tmp_path), "jobs", months=["2021-03"], columns=["company"])
+        assert march.column("company").to_pylist() == ["Snapshot Firm"]
+
+        assert compact_snapshot(str(tmp_path), "jobs") >= 1
+        compacted = load_snapshot(str(tmp_path), "jobs")
+        assert sorted(compacted.column("id").to_pylist()) == sorted(ids)
+        assert dict(zip(compacted.column("id").to_pylist(), compacted.column("title").to_pylist())) == titles
+    finally:
+        job.title = original_title
+        db.commit()
+
+
+def test_rows_committed_late_are_not_skipped(db, tmp_path):
+    """Test a row flushed before an exported row but committed after it is still exported"""
+
+    def snapshot_urls(lag):
+        write_snapshot(str(tmp_path), tables=["jobs"], lag=lag)
+        return set(load_snapshot(str(tmp_path), "jobs", columns=["url"]).column("url").to_pylist())
+
+    snapshot_urls(lag=60)
+    now = datetime.utcnow()
+    db.add(Job(title="Staff Auditor", company="Snapshot Firm", url="https://test.com/snapshot-recent", source="SnapshotTest",
+               updated_at=now - timedelta(seconds=10)))
+    db.commit()
+    # Too recent: a transaction that flushed before it may not have committed yet
+    assert "https://test.com/snapshot-recent" not in snapshot_urls(lag=60)
+
+    db.add(Job(title="Staff Auditor", company="Snapshot Firm", url="https://test.com/snapshot-late", source="SnapshotTest",
+               updated_at=now - timedelta(seconds=30)))
+    db.commit()
+    assert {"https://test.com/snapshot-recent", "https://test.com/snapshot-late"} <= snapshot_urls(lag=0)
+
+
+def test_rescored_jobs_appear_in_the_next_snapshot(db, tmp_path):
+    """Test a job whose rank moves because it was matched is exported again"""
+    job = Job(title="Staff Auditor", company="Snapshot Rank Firm", url="https://test.com/snapshot-new", source="SnapshotTest")
+    db.add(job)
+    db.flush()
+    refresh_rank_scores(db, [job.id])
+    db.commit()
+    write_snapshot(str(tmp_path), tables=["jobs"], lag=0)
+
+    db.add(AgentMatch(job_id=job.id, matched_agent="AFC", confidence_score=0.9))
+    db.flush()
+    refresh_rank_scores(db, [job.id])
+    db.commit()
+    db.refresh(job)
+    assert write_snapshot(str(tmp_path), tables=["jobs"], lag=0)["jobs"] == 1
+    jobs = load_snapshot(str(tmp_path), "jobs")
+    scores = dict(zip(jobs.column("id").to_pylist(), jobs.column("rank_score").to_pylist()))
+    assert scores[job.id] == job.rank_score
@@ -0,0 +1,128 @@
+"""
+Outreach suppression and dedupe tests
+"""
+
+import pytest
+import sys
+import os
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.database import init_database, SessionLocal
+from backend.email_service import EmailService, generate_outreach_for_all_high_confidence_jobs
+from backend.models import Job, AgentMatch, Outreach, Suppression
+from backend.suppression import SuppressionIndex, normalize_company, normalize_domain, read_suppression_csv
+
+init_database()
+client = TestClient(app)
+
+
+@pytest.fixture
+def make_job():
+    """Create jobs with a high-confidence match and remove everything created afterwards"""
+    db = SessionLocal()
+    job_ids = []
+
+    def create(company, suffix):
+        job = Job(
+            title="Staff Auditor",
+            company=company,
+            location="Boston, MA",
+            salary_min=60000,
+            salary_max=80000,
+            description="Audit work",
+            url=f"https://test.com/suppression-{suffix}",
+            source="Test",
+        )
+        db.add(job)
+        db.flush()
+        db.add(AgentMatch(job_id=job.id, matched_agent="AFC", confidence_score=0.9))
+        db.commit()
+        job_ids.append(job.id)
+        return job.id
+
+    yield create
+    db.query(Outreach).filter(Outreach.job_id.in_(job_ids)).delete(synchronize_session=False)
+    db.query(AgentMatch).filter(AgentMatch.job_id.in_(job_ids)).delete(synchronize_session=False)
+    db.query(Job).filter(Job.id.in_(job_ids)).delete(synchronize_session=False)
+    db.query(Suppression).filter(Suppression.source.like("test%") | Suppression.source.like("outreach:%")).delete(
+        synchronize_session=False
+    )
+    db.commit()
+    db.close()
+
+
+def test_normalization():
+    """Test company and domain keys ignore punctuation, legal suffixes and www"""
+    assert normalize_company("The Smith & Co., LLP") == "smith"
+    assert normalize_company("SMITH CPAs") == "smith"
+    assert normalize_company("Deloitte & Touche") == "deloitte and touche"
+    assert normalize_domain("Jane.Doe@Example.COM") == "example.com"
+    assert normalize_domain("https://www.example.com/careers") == "example.com"
+    assert read_suppression_csv(["acme.com", "jane@x.com,,bounce", "Acme LLP,company", "# comment"]) == [
+        ("domain", "acme.com", None),
+        ("email", "jane@x.com", "bounce"),
+        ("company", "Acme LLP", None),
+    ]
+
+
+def test_index_checks_and_cooldown():
+    """Test suppression lookups and the per-company cooldown"""
+    index = SuppressionIndex([("company", "acme"), ("domain", "blocked.com"), ("email", "cfo@ok.com")], timedelta(days=30))
+    assert index.check("Acme, Inc.")
+    assert index.check("Other Firm", "someone@blocked.com")
+    assert index.check("Other Firm", "CFO@ok.com")
+    assert index.check("Other Firm", "controller@ok.com") is None
+
+    now = datetime(2025, 1, 1)
+    index.record("Other Firm LLC", now)
+    assert "cooldown" in index.check("Other Firm", now=now + timedelta(days=29))
+    assert index.check("Other Firm", now=now + timedelta(days=31)) is None
+
+
+def test_generation_dedupes_reposts_and_skips_suppressed(make_job):
+    """Test reposts of one firm get one draft and suppressed firms get none"""
+    first = make_job("Repost Partners LLP", "repost-1")
+    second = make_job("Repost Partners", "repost-2")
+    blocked = make_job("Blocked Advisory Group", "blocked")
+    response = client.post("/suppressions/import", json={"entries": [{"value": "Blocked Advisory Group"}], "source": "test"})
+    assert response.json()["added"] == 1
+
+    generate_outreach_for_all_high_confidence_jobs(0.8)
+    db = SessionLocal()
+    try:
+        drafted = {row[0] for row in db.query(Outreach.job_id).filter(Outreach.job_id.in_([first, second, blocked]))}
+    finally:
+        db.close()
+    assert drafted == {first}
+
+    # Importing the same entry again is a no-op
+    response = client.post(
+        "/suppressions/import", json={"entries": [{"value": "blocked advisory group", "kind": "company"}], "source": "test"}
+    )
+    assert response.json() == {"message": "Imported 0 suppressions", "added": 0, "skipped": 1}
+
+
+def test_unsubscribe_blocks_sending(make_job, monkeypatch):
+    """Test an unsubscribed contact is never emailed again"""
+    job_id = make_job("Unsubscribe Test Firm", "unsubscribe")
+    service = EmailService()
+    outreach_id = service.save_outreach_draft(job_id, "Subject: Hi\n\nBody", "partner@unsubscribe-firm.com")
+
+    response = client.post(f"/outreach/{outreach_id}/unsubscribe")
+    assert response.status_code == 200
+    assert response.json()["suppressions_added"] == 2
+    client.put(f"/outreach/{outreach_id}/approve")
+
+    delivered = []
+    monkeypatch.setattr(EmailService, "deliver", lambda self, *args, **kwargs: delivered.append(args))
+    result = service.send_outreach(outreach_id)
+    assert result.status == "suppressed"
+    assert delivered == []
+    assert client.get(f"/outreach/{outreach_id}").json()["status"] == "suppressed"
+
+    with pytest.raises(ValueError):
+        service.generate_outreach_for_job(job_id)
@@ -0,0 +1,79 @@
+"""
+OpenTelemetry tracing tests
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.database import init_database
+from backend.email_service import EmailService
+from backend.models import AgentMatch, Job
+from backend.tracing import current_trace_context, job_span, start_span, tracing_enabled
+from scraper.mock_scraper import MockIndeedScraper
+
+init_database()
+
+
+@pytest.fixture
+def sources():
+    return ["TracingTest"]
+
+
+@pytest.fixture(scope="module")
+def spans():
+    """Install an in-memory exporter; the global provider stays installed for the rest of the session"""
+    pytest.importorskip("opentelemetry.sdk")
+    from opentelemetry import trace
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+    from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+
+    exporter = InMemorySpanExporter()
+    provider = TracerProvider()
+    provider.add_span_processor(SimpleSpanProcessor(exporter))
+    trace.set_tracer_provider(provider)
+    return exporter
+
+
+def test_disabled_tracing_is_a_no_op(db, job_data):
+    """Test that without a provider spans are skipped and no trace context is stored"""
+    if tracing_enabled():
+        pytest.skip("a tracer provider is already installed")
+    with start_span("scrape_job_listing", root=True) as span:
+        assert span is None
+        assert current_trace_context() is None
+    assert MockIndeedScraper().save_jobs_to_db([job_data(0)]) == 1
+    assert db.query(Job.trace_context).filter(Job.url == job_data(0)["url"]).scalar() is None
+
+
+def test_job_trace_follows_scrape_to_outreach(db, job_data, spans):
+    """Test the scrape, processing and outreach spans of a job share one trace and carry its id"""
+    spans.clear()
+    with start_span("scrape_job_listing", {"job.url": job_data(1)["url"]}, root=True):
+        scraped = job_data(1, trace_context=current_trace_context())
+    assert MockIndeedScraper().save_jobs_to_db([scraped, job_data(2)]) == 2
+
+    job = db.query(Job).filter(Job.url == scraped["url"]).one()
+    assert job.trace_context == scraped["trace_context"]
+    with job_span("process_job", job):
+        with start_span("llm.match"):
+            db.add(AgentMatch(job_id=job.id, matched_agent="AFC", confidence_score=0.9))
+            db.commit()
+    EmailService().generate_outreach_for_job(job.id, "partner@tracing.example")
+
+    finished = {span.name: span for span in spans.get_finished_spans()}
+    trace_id = finished["scrape_job_listing"].context.trace_id
+    for name in ["process_job", "llm.match", "generate_outreach"]:
+        assert finished[name].context.trace_id == trace_id, name
+    assert finished["process_job"].attributes["job.id"] == job.id
+    assert finished["generate_outreach"].attributes["job.id"] == job.id
+    assert finished["llm.match"].parent.span_id == finished["process_job"].context.span_id
+
+    # The batch save links to the scraped job's trace; jobs saved without one join the save span's trace
+    save = finished["save_jobs_to_db"]
+    assert [link.context.trace_id for link in save.links] == [trace_id]
+    unscraped = db.query(Job.trace_context).filter(Job.url == job_data(2)["url"]).scalar()
+    assert unscraped.split("-")[1] == format(save.context.trace_id, "032x")